@@ -1,154 +1,862 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response
 import threading
 import time
 import os
+import re
+import json
+import hmac
+import tempfile
+import queue
 import numpy as np
-from collections import deque, Counter # Importa 'deque' e 'Counter'
 
-from train_model import load_trained_model, predict_note, extract_features, SAMPLE_RATE, N_MFCC, MAX_PAD_LEN
-from audio_capture import start_recording, stop_recording, get_audio_segment, list_audio_devices, SAMPLE_RATE as AUDIO_SAMPLE_RATE
+from train_model import load_trained_model, predict_note, model_input_frames, model_window_features, SAMPLE_RATE, N_MFCC, INFERENCE_BACKEND
+from train_model import warm_up_model, load_model_metadata, EPOCHS
+from training_jobs import TrainingJobRunner, validate_training_params
+import model_registry
+from audio_capture import get_audio_segment, create_reader, list_audio_devices, SAMPLE_RATE as AUDIO_SAMPLE_RATE, RECORD_DURATION
+from streaming_features import StreamingMFCC
+from recognition import SessionRegistry, RecognitionSession, PREDICTION_HOP_SECONDS
+from inference_scheduler import InferenceScheduler
+from similarity_gate import SimilarityGate, SIMILARITY_THRESHOLD, MAX_REUSE
+import metrics
+from transcribe import transcribe_file
+from audio_sources import VirtualAudioSource
+from inference_worker import InferenceWorker, load_worker_model
+from shared_state import create_state_store, DEFAULT_STATE_DIR, STATE_POLL_SECONDS, COMMAND_TIMEOUT_SECONDS
+from capture_manager import CaptureManager
 
 app = Flask(__name__)
 
 model_loaded = None
 encoder_loaded = None
 scaler_loaded = None
-prediction_thread = None
-prediction_active = False
-current_note = "Aguardando áudio..."
+SSE_HEARTBEAT_SECONDS = 15
+# Cada /note_stream aberto prende uma thread do worker (gunicorn gthread, threads=8);
+# acima deste limite o stream responde 503 e o cliente volta ao polling do /get_note,
+# deixando threads livres para as outras rotas.
+SSE_MAX_STREAMS = int(os.environ.get('VIOLAO_SSE_MAX_STREAMS', '4'))
+note_stream_slots = threading.BoundedSemaphore(SSE_MAX_STREAMS)
 
-PREDICTION_BUFFER_SIZE = 12   
-STABILITY_THRESHOLD = 9  
-prediction_buffer = deque(maxlen=PREDICTION_BUFFER_SIZE)
-stable_note = "Aguardando áudio..."
+# Calcula MFCC de forma incremental (só os quadros novos a cada iteração)
+USE_STREAMING_FEATURES = True
 
+# O loop de predição é acordado pela captura a cada hop de áudio novo (PREDICTION_HOP_SECONDS,
+# de recognition.py); se a inferência atrasar, os hops acumulados são descartados e só a
+# janela mais recente é predita.
+AUDIO_WAIT_TIMEOUT_SECONDS = 0.25
 
-with app.app_context():
-    print("Tentando carregar modelo de ACORDES na inicialização do Flask...")
+# Janelas quase iguais à última inferida reaproveitam a predição (acorde sustentado);
+# VIOLAO_SIMILARITY_THRESHOLD=0 desliga o reaproveitamento.
+SIMILARITY_THRESHOLD = float(os.environ.get('VIOLAO_SIMILARITY_THRESHOLD', SIMILARITY_THRESHOLD))
+MAX_REUSE = int(os.environ.get('VIOLAO_MAX_REUSE', MAX_REUSE))
+
+# Dispositivo virtual no lugar do microfone (máquinas sem áudio, testes de carga), ex.:
+# VIOLAO_AUDIO_SOURCE="script:C_Major:2,G_Major:2,silence:1" ou "file:gravacao.wav";
+# VIOLAO_AUDIO_SPEED=4 toca 4x mais rápido que o tempo real.
+AUDIO_SOURCE = os.environ.get('VIOLAO_AUDIO_SOURCE')
+AUDIO_SOURCE_SPEED = float(os.environ.get('VIOLAO_AUDIO_SPEED', '1'))
+if AUDIO_SOURCE:
+    import audio_capture as ac
+    ac.set_audio_source(VirtualAudioSource.from_spec(AUDIO_SOURCE, speed=AUDIO_SOURCE_SPEED))
+
+# Cada aba/cliente tem sua própria sessão (session_id); requisições sem session_id
+# usam a sessão padrão.
+DEFAULT_SESSION_ID = 'default'
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+# Estado do reconhecimento entre processos: 'local' (padrão, um worker) ou 'shared' (vários
+# workers do gunicorn). No modo 'shared' um único worker, o dono, roda a captura e as
+# sessões e publica o estado em VIOLAO_STATE_DIR; os outros respondem /get_note,
+# /session_stats e /note_stream a partir dele e encaminham start/stop para o dono.
+STATE_BACKEND = os.environ.get('VIOLAO_STATE_BACKEND', 'local')
+STATE_DIR = os.environ.get('VIOLAO_STATE_DIR', DEFAULT_STATE_DIR)
+# Intervalo em que o dono republica as estatísticas das sessões ativas
+STATE_STATS_SECONDS = 1.0
+state_store = create_state_store(STATE_BACKEND, STATE_DIR)
+state_owner_lock = threading.Lock()
+
+def publish_session_state(session):
+    # Só o dono publica; no modo 'local' o estado fica apenas nas sessões em memória
+    if not state_store.shared or not state_store.is_owner():
+        return
     try:
-        model_loaded, encoder_loaded, scaler_loaded = load_trained_model()
-        if model_loaded is None:
-            print("AVISO: Modelo de acordes não foi carregado. Verifique o dataset e o treinamento.")
-            print("Para treinar o modelo, execute: python model.py")
-        else:
-            print("Modelo de acordes, encoder e scaler carregados com sucesso!")
+        state_store.publish(session.session_id, {
+            'version': session.note_version,
+            'payload': session.payload(),
+            'stats': session.stats(),
+            'owner_pid': os.getpid(),
+        })
+    except OSError as e:
+        print(f"Erro ao publicar o estado da sessão {session.session_id}: {e}")
+
+sessions = SessionRegistry(on_change=publish_session_state)
+# Captura por canal (vários dispositivos / várias entradas): cada sessão com `channel` tem buffer próprio
+capture_manager = CaptureManager()
+
+# As janelas de todas as sessões ativas são agrupadas em um único model.predict
+INFERENCE_MAX_BATCH_SIZE = int(os.environ.get('VIOLAO_MAX_BATCH_SIZE', '64'))
+INFERENCE_LATENCY_BUDGET_SECONDS = float(os.environ.get('VIOLAO_BATCH_LATENCY_MS', '10')) / 1000
+inference_scheduler = None
+inference_scheduler_lock = threading.Lock()
+
+# VIOLAO_INFERENCE_MODE=process roda MFCC e inferência em um processo separado
+# (inference_worker.py), que lê o áudio do buffer de captura em memória compartilhada e
+# devolve uma predição por hop para todas as sessões; 'thread' (padrão) roda tudo no
+# processo web, como nos testes.
+INFERENCE_MODE = os.environ.get('VIOLAO_INFERENCE_MODE', 'thread')
+INFERENCE_WORKER_LOADER = load_worker_model
+inference_worker = None
+inference_worker_lock = threading.Lock()
+
+
+# O modelo não é carregado na importação do módulo: o carregamento é explícito
+# (load_model) ou em segundo plano (start_model_loading), e nunca dispara um treino.
+model_status = 'not_loaded'  # 'loading', 'ready', 'unavailable' ou 'error'
+model_status_message = "Modelo ainda não carregado."
+model_loading_thread = None
+model_loading_lock = threading.Lock()
+
+# Troca do modelo sem reiniciar (hot reload): modelo, encoder, scaler e agendador mudam
+# juntos sob model_swap_lock, e o loop de predição pega os quatro de uma vez a cada hop.
+model_swap_lock = threading.Lock()
+model_version = None
+model_warmup = None
+model_reload_lock = threading.Lock()
+model_reload = {'status': 'idle', 'version': None, 'message': None, 'failed_version': None}
+# Com VIOLAO_MODEL_WATCH_SECONDS > 0, trained_model/CURRENT é verificado nesse intervalo
+# e uma versão nova é carregada automaticamente (0 desliga o monitor).
+MODEL_WATCH_SECONDS = float(os.environ.get('VIOLAO_MODEL_WATCH_SECONDS', '0'))
+# Os endpoints /admin e /train exigem o cabeçalho X-Admin-Token com o valor de VIOLAO_ADMIN_TOKEN;
+# sem o token definido eles ficam desativados (403), já que a API escuta em 0.0.0.0
+ADMIN_TOKEN = os.environ.get('VIOLAO_ADMIN_TOKEN')
+
+
+def load_model():
+    global model_loaded, encoder_loaded, scaler_loaded, model_status, model_status_message
+
+    model_status = 'loading'
+    model_status_message = "Carregando modelo de acordes..."
+    print("Tentando carregar modelo de ACORDES...")
+    version = model_registry.current_version()
+    try:
+        model, encoder, scaler = load_trained_model(backend=INFERENCE_BACKEND, train_if_missing=False,
+                                                    model_dir=model_registry.version_dir(version))
+        warmup = warm_up_model(model, encoder, scaler) if model is not None else None
     except Exception as e:
-        print(f"ERRO CRÍTICO ao carregar o modelo de acordes na inicialização: {e}")
+        print(f"ERRO CRÍTICO ao carregar o modelo de acordes: {e}")
         print("Certifique-se de que o modelo de acordes foi treinado e os arquivos .joblib estão na pasta 'trained_model'.")
-        model_loaded = None 
+        model_status = 'error'
+        model_status_message = f"Erro ao carregar o modelo: {e}"
+        return False
+
+    if model is None:
+        print("AVISO: Modelo de acordes não foi carregado. Verifique o dataset e o treinamento.")
+        print("Para treinar o modelo, execute: python train_model.py")
+        model_status = 'unavailable'
+        model_status_message = "Modelo não encontrado. Treine o modelo primeiro (python train_model.py ou POST /train)."
+        return False
+
+    swap_model(model, encoder, scaler, version, warmup)
+    print("Modelo de acordes, encoder e scaler carregados com sucesso!")
+    print(f"Versão {version} aquecida em {warmup['warmup_seconds']:.2f} s "
+          f"(1ª predição {warmup['first_predict_ms']:.1f} ms, depois {warmup['steady_predict_ms']:.1f} ms)")
+    return True
+
+def swap_model(model, encoder, scaler, version=None, warmup=None):
+    # Troca atômica do modelo em uso; o agendador do modelo anterior termina as janelas
+    # que já recebeu (stop com drain), então nenhum hop em andamento perde a predição.
+    global model_loaded, encoder_loaded, scaler_loaded, model_version, model_warmup, model_status, model_status_message
+
+    with model_swap_lock:
+        model_loaded, encoder_loaded, scaler_loaded = model, encoder, scaler
+        model_version, model_warmup = version, warmup
+        model_status = 'ready'
+        model_status_message = "Modelo carregado."
+        if inference_scheduler is not None:
+            get_inference_scheduler()
+    if INFERENCE_MODE == 'process' and version is not None:
+        update_inference_worker(version)
+
+def current_model():
+    # Modelo, encoder, scaler e agendador de uma mesma versão (nunca misturados durante uma troca)
+    with model_swap_lock:
+        return model_loaded, encoder_loaded, scaler_loaded, get_inference_scheduler()
+
+def reload_model(version=None):
+    """
+    Carrega `version` (ou a versão atual de trained_model/CURRENT) em segundo plano,
+    aquece e troca o modelo em uso. Retorna a thread, ou None se já há uma recarga
+    em andamento.
+    """
+    if not model_reload_lock.acquire(blocking=False):
+        return None
+    model_reload.update(status='loading', version=version, message="Carregando nova versão do modelo...")
+    thread = threading.Thread(target=_reload_model_worker, args=(version,), daemon=True)
+    thread.start()
+    return thread
+
+def _reload_model_worker(version):
+    # Com `version` explícita, CURRENT só passa a apontar para ela depois da troca bem-sucedida
+    activate = version is not None
+    version = version or model_registry.current_version()
+    try:
+        model_dir = model_registry.version_dir(version)
+        metadata = load_model_metadata(model_registry.artifact_paths(model_dir)['metadata'])
+        if metadata.get('sample_rate') != SAMPLE_RATE or metadata.get('n_mfcc') != N_MFCC:
+            raise ValueError(f"versão {version} usa features incompatíveis "
+                             f"(sample_rate={metadata.get('sample_rate')}, n_mfcc={metadata.get('n_mfcc')})")
+        model, encoder, scaler = load_trained_model(backend=INFERENCE_BACKEND, train_if_missing=False, model_dir=model_dir)
+        if model is None:
+            raise ValueError(f"arquivos do modelo não encontrados em {model_dir}")
+        model_reload.update(status='warming_up', version=version, message="Aquecendo nova versão do modelo...")
+        warmup = warm_up_model(model, encoder, scaler)
+        swap_model(model, encoder, scaler, version, warmup)
+        if activate:
+            model_registry.set_current(version)
+        model_reload.update(status='done', version=version, failed_version=None,
+                            message=f"Versão {version} em uso (aquecida em {warmup['warmup_seconds']:.2f} s).")
+        print(f"Modelo trocado para a versão {version} (aquecimento: {warmup['warmup_seconds']:.2f} s)")
+    except Exception as e:
+        print(f"Erro ao recarregar o modelo (versão {version}): {e}")
+        model_reload.update(status='error', version=version, failed_version=version,
+                            message=f"Erro ao recarregar o modelo: {e}")
+    finally:
+        model_reload_lock.release()
+
+def watch_model_version(interval=MODEL_WATCH_SECONDS, stop_event=None):
+    # Recarrega quando CURRENT passa a apontar para outra versão (ex.: depois de um treino)
+    stop_event = stop_event or threading.Event()
+    while not stop_event.wait(interval):
+        version = model_registry.current_version()
+        if model_status == 'ready' and version != model_version and version != model_reload['failed_version']:
+            reload_model()
+
+def start_model_watcher():
+    if MODEL_WATCH_SECONDS <= 0:
+        return None
+    thread = threading.Thread(target=watch_model_version, name='model-watcher', daemon=True)
+    thread.start()
+    return thread
+
+def start_model_loading():
+    # Inicia load_model em segundo plano; não faz nada se já carregou ou está carregando
+    global model_loading_thread, model_status, model_status_message
+
+    with model_loading_lock:
+        if model_loaded is not None or model_status in ('loading', 'ready'):
+            return model_loading_thread
+        model_status = 'loading'
+        model_status_message = "Carregando modelo de acordes..."
+        model_loading_thread = threading.Thread(target=load_model, daemon=True)
+        model_loading_thread.start()
+        return model_loading_thread
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/ready')
+def ready():
+    # Sonda de prontidão: 200 quando o modelo está carregado, 503 enquanto não está.
+    # Os outros workers não carregam o modelo: respondem com o estado do modelo do dono.
+    if model_loaded is None and not is_state_owner():
+        owner = state_store.owner_status() or {'model_status': 'loading', 'message': "Aguardando o processo dono do reconhecimento."}
+        is_ready = owner['model_status'] == 'ready'
+        return jsonify(status=owner['model_status'], ready=is_ready, message=owner['message']), 200 if is_ready else 503
+    if model_loaded is None:
+        start_model_loading()
+    is_ready = model_loaded is not None and encoder_loaded is not None and scaler_loaded is not None
+    status = 'ready' if is_ready else model_status
+    message = "Modelo carregado." if is_ready else model_status_message
+    return jsonify(status=status, ready=is_ready, message=message), 200 if is_ready else 503
+
 @app.route('/list_audio_devices')
 def get_audio_devices():
     devices = list_audio_devices()
     device_list = [{'id': d['index'], 'name': d['name'], 'max_input_channels': d['max_input_channels']} for d in devices]
     return jsonify(device_list)
 
-def audio_prediction_loop():
-    global current_note, prediction_active, prediction_buffer, stable_note
+def get_inference_scheduler():
+    # Um único agendador por processo, recriado se o modelo carregado mudar
+    global inference_scheduler
+
+    with inference_scheduler_lock:
+        if inference_scheduler is None or inference_scheduler.model is not model_loaded:
+            previous = inference_scheduler
+            inference_scheduler = InferenceScheduler(model_loaded, max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+                                                     max_latency=INFERENCE_LATENCY_BUDGET_SECONDS).start()
+            if previous is not None:
+                inference_scheduler.set_expected_clients(previous.expected_clients)
+                previous.stop(drain=True)
+        return inference_scheduler
+
+def update_inference_worker(version):
+    # O worker carrega a mesma versão do modelo em uso no processo web (e a troca no hot reload)
+    global inference_worker
 
+    with inference_worker_lock:
+        if inference_worker is None:
+            import audio_capture as ac
+            inference_worker = InferenceWorker(
+                ac.use_shared_ring(), version, loader=INFERENCE_WORKER_LOADER,
+                hop_samples=max(int(AUDIO_SAMPLE_RATE * PREDICTION_HOP_SECONDS), 1),
+                window_samples=int(AUDIO_SAMPLE_RATE * RECORD_DURATION), sample_rate=AUDIO_SAMPLE_RATE, n_mfcc=N_MFCC,
+                similarity_threshold=SIMILARITY_THRESHOLD, max_reuse=MAX_REUSE, backend=INFERENCE_BACKEND).start()
+        elif inference_worker.version != version:
+            inference_worker.load(version)
+        return inference_worker
+
+def update_expected_clients():
+    # Com todas as sessões ativas já na fila, o lote sai sem esperar o prazo de latência
+    if inference_scheduler is not None:
+        inference_scheduler.set_expected_clients(len(sessions.active_sessions()))
+
+def audio_prediction_loop(session):
     if model_loaded is None or encoder_loaded is None or scaler_loaded is None:
-        current_note = "Modelo não carregado. Treine o modelo primeiro."
-        prediction_active = False
+        session.active = False
+        session.publish_note("Modelo não carregado. Treine o modelo primeiro.")
         return
 
-    print("Iniciando loop de predição de áudio com filtro de estabilidade...")
-    while prediction_active:
+    # O worker de inferência lê só a captura global; sessões de um canal rodam neste processo
+    capture = session.capture
+    if inference_worker is not None and capture is None:
+        return worker_prediction_loop(session, inference_worker)
+
+    print(f"Iniciando loop de predição de áudio com filtro de estabilidade (sessão {session.session_id})...")
+    model, encoder, scaler, scheduler = current_model()
+    update_expected_clients()
+    # Comprimento de entrada salvo no próprio modelo (janela ao vivo ou MAX_PAD_LEN)
+    input_frames = model_input_frames(model)
+    # Modelos com features próprias (cromagrama) só usam o áudio da janela
+    uses_mfcc = model_window_features(model) is None
+    hop_samples = max(int(AUDIO_SAMPLE_RATE * PREDICTION_HOP_SECONDS), 1)
+    read_window = capture.get_audio_segment if capture is not None else get_audio_segment
+    audio_reader = capture.create_reader() if capture is not None else create_reader()
+    gate = SimilarityGate(SIMILARITY_THRESHOLD, MAX_REUSE) if SIMILARITY_THRESHOLD > 0 else None
+    session.prediction_gate = gate
+    streaming_mfcc = None
+    # O StreamingMFCC só é alimentado enquanto o modelo usa MFCC; ao voltar a usar, recomeça da janela atual
+    mfcc_stale = True
+    if USE_STREAMING_FEATURES:
+        streaming_mfcc = StreamingMFCC(int(AUDIO_SAMPLE_RATE * RECORD_DURATION), sample_rate=AUDIO_SAMPLE_RATE, n_mfcc=N_MFCC)
+        if uses_mfcc:
+            # A janela começa com o áudio já gravado até o cursor inicial do leitor
+            streaming_mfcc.push(read_window(end_cursor=audio_reader.cursor))
+            mfcc_stale = False
+
+    last_iteration_at = None
+    while session.active:
         try:
-            audio_segment = get_audio_segment()
+            # Sem um hop de áudio novo não há predição (nunca prediz a mesma janela duas vezes)
+            if not audio_reader.wait(hop_samples, timeout=AUDIO_WAIT_TIMEOUT_SECONDS):
+                continue
+            iteration_start = time.perf_counter()
+            if last_iteration_at is not None:
+                metrics.LOOP_INTERVAL.observe(iteration_start - last_iteration_at)
+            last_iteration_at = iteration_start
+            metrics.STAGE_CAPTURE_BACKLOG.observe(audio_reader.available() / AUDIO_SAMPLE_RATE)
+
+            # Pega o modelo a cada hop: depois de um hot reload o próximo hop já usa a versão nova
+            current = current_model()
+            if current[0] is not model:
+                model, encoder, scaler, scheduler = current
+                input_frames = model_input_frames(model)
+                uses_mfcc = model_window_features(model) is None
+                if gate is not None:
+                    gate.reset()
+            else:
+                scheduler = current[3]
+
+            new_samples, dropped_hops = audio_reader.read_hops(hop_samples)
+            session.hops_processed += 1
+            session.hops_dropped += dropped_hops
+            session.audio_overruns = audio_reader.overruns
+
+            features = None
+            if streaming_mfcc is not None and uses_mfcc:
+                with metrics.STAGE_FEATURES.time():
+                    if mfcc_stale:
+                        streaming_mfcc.reset()
+                        streaming_mfcc.push(read_window(end_cursor=audio_reader.cursor))
+                        mfcc_stale = False
+                    else:
+                        streaming_mfcc.push(new_samples)
+                    audio_segment = streaming_mfcc.window_audio()
+                    features = streaming_mfcc.features(max_pad_len=input_frames)
+            else:
+                # Modelos com features próprias (cromagrama) recebem a janela direto do buffer
+                audio_segment = read_window(end_cursor=audio_reader.cursor)
+                mfcc_stale = True
 
             if audio_segment.size > 0:
+                predicted_chord = predict_note(audio_segment, scheduler, encoder, scaler,
+                                              sample_rate=AUDIO_SAMPLE_RATE, n_mfcc=N_MFCC, max_pad_len=input_frames,
+                                              features=features, gate=gate)
+                with metrics.STAGE_STABILITY.time():
+                    session.stability.update(predicted_chord)
 
-                predicted_chord = predict_note(audio_segment, model_loaded, encoder_loaded, scaler_loaded,
-                                              sample_rate=AUDIO_SAMPLE_RATE, n_mfcc=N_MFCC, max_pad_len=MAX_PAD_LEN)
-                
-                if predicted_chord and "N/A" not in predicted_chord:
-                    prediction_buffer.append(predicted_chord)
-
-                if len(prediction_buffer) >= STABILITY_THRESHOLD:
-                   
-                    counts = Counter(prediction_buffer)
-                    most_common_chord, num_occurrences = counts.most_common(1)[0]
-
-                    if num_occurrences >= STABILITY_THRESHOLD:
-                        if most_common_chord == "Silêncio" and stable_note != "Silêncio...":
-                             if num_occurrences >= PREDICTION_BUFFER_SIZE -1:
-                                stable_note = "Silêncio..."
-                        elif most_common_chord != "Silêncio":
-                             stable_note = most_common_chord
-            
-            current_note = stable_note
+            session.publish_note(session.stability.stable_note)
+            if capture is not None:
+                capture.record_hop(audio_reader.cursor, time.perf_counter())
+            metrics.LOOP_ITERATION.observe(time.perf_counter() - iteration_start)
+            metrics.LOOP_ITERATIONS.inc()
 
         except Exception as e:
-            current_note = f"Erro na predição: {e}"
-            print(f"Erro no loop de predição: {e}")
-            prediction_active = False 
-        
-        time.sleep(0.08) 
+            print(f"Erro no loop de predição (sessão {session.session_id}): {e}")
+            session.active = False 
+            session.publish_note(f"Erro na predição: {e}")
 
-@app.route('/start_recognition', methods=['POST'])
-def start_recognition():
-    
-    global prediction_thread, prediction_active, current_note, prediction_buffer, stable_note
+    update_expected_clients()
+
+def worker_prediction_loop(session, worker):
+    # Modo processo: as predições chegam do worker de inferência (uma por hop, as mesmas
+    # para todas as sessões) e aqui só roda o filtro de estabilidade da sessão
+    print(f"Iniciando loop de predição com o worker de inferência (sessão {session.session_id})...")
+    results = worker.subscribe()
+    try:
+        while session.active:
+            try:
+                result = results.get(timeout=AUDIO_WAIT_TIMEOUT_SECONDS)
+            except queue.Empty:
+                continue
+            session.hops_processed += 1
+            session.hops_dropped += result['dropped_hops']
+            session.audio_overruns += result['overruns']
+            with metrics.STAGE_STABILITY.time():
+                session.stability.update(result['chord'])
+            session.publish_note(session.stability.stable_note)
+            metrics.LOOP_ITERATIONS.inc()
+    finally:
+        worker.unsubscribe(results)
 
+def request_session_id(data=None):
+    session_id = (data or {}).get('session_id') or request.args.get('session_id') or DEFAULT_SESSION_ID
+    session_id = str(session_id)
+    return session_id if SESSION_ID_PATTERN.match(session_id) else None
+
+def invalid_session_response():
+    return jsonify(status='error', message='session_id inválido.'), 400
+
+def start_session(session_id, device_id_str=None, channel=None):
+    # Inicia a sessão neste processo (o dono do estado); retorna o corpo da resposta.
+    # Com `channel`, a sessão ouve só essa entrada do dispositivo (captura do CaptureManager)
     if model_loaded is None or encoder_loaded is None or scaler_loaded is None:
-        return jsonify(status='error', message='Modelo de reconhecimento não carregado. Treine o modelo primeiro.')
+        start_model_loading()
+        if model_status == 'loading':
+            return {'status': 'error', 'message': 'Modelo de reconhecimento ainda está carregando. Tente novamente em instantes.'}
+        return {'status': 'error', 'message': 'Modelo de reconhecimento não carregado. Treine o modelo primeiro.'}
+
+    session = sessions.get(session_id, create=True)
 
-    if prediction_active:
-        return jsonify(status='warning', message='Reconhecimento já está ativo.')
+    if session.active:
+        return {'status': 'warning', 'message': 'Reconhecimento já está ativo.', 'session_id': session_id}
 
-    data = request.get_json()
-    device_id_str = data.get('device_id')
     try:
         device_id = int(device_id_str) 
     except (TypeError, ValueError):
         device_id = None 
 
-    import audio_capture as ac
-    if not ac.start_recording(device_id=device_id):
-        return jsonify(status='error', message='Não foi possível iniciar a gravação. Verifique o dispositivo.')
-
-    # Reseta o estado para um início limpo
-    prediction_buffer.clear()
-    stable_note = "Ouvindo..."
-    current_note = "Ouvindo..."
-    prediction_active = True
-    
-    prediction_thread = threading.Thread(target=audio_prediction_loop)
-    prediction_thread.daemon = True
-    prediction_thread.start()
-    return jsonify(status='success', message='Reconhecimento iniciado.')
+    release_session_capture(session)
+    if channel is not None:
+        try:
+            session.capture = capture_manager.acquire(device_id, channel)
+        except ValueError:
+            return {'status': 'error', 'message': 'Canal inválido.', 'session_id': session_id}
+        except Exception as e:
+            print(f"Erro ao abrir o canal {channel} do dispositivo {device_id}: {e}")
+            return {'status': 'error', 'message': 'Não foi possível abrir o canal. Verifique o dispositivo.'}
+    else:
+        # A captura é compartilhada: a primeira sessão abre o stream, as demais leem do mesmo buffer
+        import audio_capture as ac
+        if not ac.start_recording(device_id=device_id):
+            return {'status': 'error', 'message': 'Não foi possível iniciar a gravação. Verifique o dispositivo.'}
+
+    session.device_id = device_id
+    session.start(audio_prediction_loop)
+    return {'status': 'success', 'message': 'Reconhecimento iniciado.', 'session_id': session_id}
+
+def stop_session(session_id):
+    session = sessions.get(session_id)
+    if session is not None:
+        session.stop()
+        release_session_capture(session)
+
+    # A gravação só é encerrada quando nenhuma outra sessão está ouvindo a captura global
+    if not any(s.capture is None for s in sessions.active_sessions()):
+        import audio_capture as ac
+        ac.stop_recording()
+    update_expected_clients()
+    return {'status': 'success', 'message': 'Reconhecimento parado.', 'session_id': session_id}
+
+def release_session_capture(session):
+    if session.capture is not None:
+        capture_manager.release(session.capture)
+        session.capture = None
+
+def is_state_owner():
+    # Sem dono (ou com o dono morto, o que libera o lock) este processo assume
+    if state_store.is_owner():
+        return True
+    with state_owner_lock:
+        if state_store.is_owner() or not state_store.try_become_owner():
+            return state_store.is_owner()
+    print(f"Processo {os.getpid()} assumiu a captura e o reconhecimento (estado compartilhado em {STATE_DIR}).")
+    # Sessões de um dono anterior que morreu ficam paradas (a captura dele acabou junto)
+    for session_id, state in state_store.sessions().items():
+        if state.get('owner_pid') != os.getpid() and state['payload'].get('status') == 'active':
+            sessions.get(session_id, create=True).stop()
+    # Só o dono carrega o modelo (não faz nada se ele já está carregado ou carregando)
+    start_model_loading()
+    threading.Thread(target=state_command_loop, name='state-commands', daemon=True).start()
+    return True
+
+def state_command_loop():
+    # Dono: executa os comandos encaminhados pelos outros workers (start/stop, /admin e /train)
+    # e republica as estatísticas e o estado do modelo
+    last_stats = 0.0
+    published_model_status = None
+    while True:
+        if (model_status, model_status_message) != published_model_status:
+            published_model_status = (model_status, model_status_message)
+            state_store.publish_owner_status({'model_status': model_status, 'message': model_status_message})
+        for command_id, command in state_store.take_commands():
+            try:
+                if command['action'] == 'start':
+                    result = start_session(command['session_id'], command.get('device_id'), command.get('channel'))
+                elif command['action'] == 'stop':
+                    result = stop_session(command['session_id'])
+                elif command['action'] == 'admin':
+                    body, status = run_admin_command(command['admin_action'], **command['params'])
+                    result = {'body': body, 'http_status': status}
+                else:
+                    result = {'status': 'error', 'message': f"Comando desconhecido: {command['action']}"}
+            except Exception as e:
+                result = {'status': 'error', 'message': f"Erro no processo dono do reconhecimento: {e}"}
+            state_store.put_result(command_id, result)
+        if time.monotonic() - last_stats >= STATE_STATS_SECONDS:
+            last_stats = time.monotonic()
+            for session in sessions.active_sessions():
+                publish_session_state(session)
+            state_store.prune_results()
+        time.sleep(STATE_POLL_SECONDS)
+
+def forward_to_state_owner(action, session_id, **params):
+    command_id = state_store.submit(dict(params, action=action, session_id=session_id))
+    result = state_store.wait_result(command_id, COMMAND_TIMEOUT_SECONDS)
+    if result is None:
+        return {'status': 'error', 'message': 'O processo responsável pelo reconhecimento não respondeu.',
+                'session_id': session_id}
+    return result
+
+def shared_session_state(session_id):
+    # Estado publicado pelo dono, ou o de uma sessão nova se ela não existe
+    state = state_store.read(session_id)
+    if state is None:
+        session = RecognitionSession(session_id)
+        return {'version': None, 'payload': session.payload(), 'stats': session.stats(), 'owner_pid': None}
+    return state
+
+@app.route('/start_recognition', methods=['POST'])
+def start_recognition():
+    data = request.get_json(silent=True) or {}
+    session_id = request_session_id(data)
+    if session_id is None:
+        return invalid_session_response()
+    if not is_state_owner():
+        return jsonify(forward_to_state_owner('start', session_id, device_id=data.get('device_id'),
+                                              channel=data.get('channel')))
+    return jsonify(start_session(session_id, data.get('device_id'), data.get('channel')))
 
 @app.route('/stop_recognition', methods=['POST'])
 def stop_recognition():
-    
-    global prediction_active, current_note, stable_note, prediction_buffer
-
-    prediction_active = False
-    import audio_capture as ac
-    ac.stop_recording()
-    if prediction_thread and prediction_thread.is_alive():
-        prediction_thread.join(timeout=1)
-    
-    prediction_buffer.clear()
-    stable_note = "Reconhecimento parado."
-    current_note = "Reconhecimento parado."
-    
-    return jsonify(status='success', message='Reconhecimento parado.')
+    session_id = request_session_id(request.get_json(silent=True))
+    if session_id is None:
+        return invalid_session_response()
+    if not is_state_owner():
+        return jsonify(forward_to_state_owner('stop', session_id))
+    return jsonify(stop_session(session_id))
 
 @app.route('/get_note')
 def get_note():
-    global current_note
-    
-    if not prediction_active and current_note == "Reconhecimento parado.":
-        return jsonify(status='stopped')
-    return jsonify(note=current_note, status='active' if prediction_active else 'inactive')
+    session_id = request_session_id()
+    if session_id is None:
+        return invalid_session_response()
+    if not is_state_owner():
+        return jsonify(shared_session_state(session_id)['payload'])
+    session = sessions.get(session_id) or RecognitionSession(session_id)
+    return jsonify(session.payload())
+
+# Valores lidos na hora da exportação do /metrics
+metrics.registry.gauge('active_sessions', "Sessões de reconhecimento ativas", lambda: len(sessions.active_sessions()))
+metrics.registry.gauge('inference_mean_batch_size', "Tamanho médio dos micro-lotes de inferência",
+                       lambda: inference_scheduler.stats()['mean_batch_size'] if inference_scheduler is not None else 0.0)
+metrics.registry.gauge('model_ready', "1 quando o modelo está carregado", lambda: int(model_status == 'ready'))
+metrics.registry.gauge('inference_worker_ready', "1 quando o worker de inferência (modo processo) está pronto",
+                       lambda: int(inference_worker is not None and inference_worker.ready))
+metrics.registry.gauge('capture_channels', "Canais de entrada abertos pelo gerenciador de captura",
+                       lambda: len(capture_manager.channels()))
+metrics.registry.gauge('model_warmup_seconds', "Duração do aquecimento da versão do modelo em uso",
+                       lambda: model_warmup['warmup_seconds'] if model_warmup else 0.0)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    # Formato de texto do Prometheus; com VIOLAO_METRICS=0 a instrumentação fica desligada
+    if not metrics.registry.enabled:
+        return Response("Métricas desativadas (VIOLAO_METRICS=0).\n", status=404, mimetype='text/plain')
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+def admin_authorized():
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(request.headers.get('X-Admin-Token', '').encode(), ADMIN_TOKEN.encode())
+
+def admin_forbidden_response():
+    if not ADMIN_TOKEN:
+        return jsonify(status='error', message='Rotas de administração desativadas: defina VIOLAO_ADMIN_TOKEN.'), 403
+    return jsonify(status='error', message='Token de administração inválido.'), 403
+
+def validate_model_version(version):
+    # Retorna (corpo, status) de erro, ou None se a versão pode ser carregada
+    try:
+        model_dir = model_registry.version_dir(version)
+    except ValueError as e:
+        return {'status': 'error', 'message': str(e)}, 400
+    if not model_registry.is_complete(model_dir):
+        return {'status': 'error', 'message': f'Versão {version} não encontrada ou incompleta.'}, 404
+    return None
+
+def start_reload(version):
+    error = validate_model_version(str(version))
+    if error is not None:
+        return error
+    if reload_model(str(version)) is None:
+        return {'status': 'error', 'message': 'Já existe uma recarga do modelo em andamento.'}, 409
+    return {'status': 'accepted', 'message': 'Recarga do modelo iniciada.', 'version': str(version)}, 202
+
+def on_training_success(job):
+    # A API continua com o modelo anterior durante o treino e troca para a versão nova no fim
+    if job.params.get('reload') and reload_model(job.version) is None:
+        print(f"Recarga já em andamento; a versão {job.version} não foi carregada automaticamente.")
+
+# Treino em segundo plano: um job por vez, em um processo separado (ver training_jobs.py)
+training_jobs = TrainingJobRunner(on_success=on_training_success)
+
+def run_admin_command(action, version=None, job_id=None, params=None):
+    # Executa neste processo (o dono do estado) um comando de /admin ou /train; retorna (corpo, status HTTP)
+    if action == 'model':
+        return {'current': model_registry.current_version(), 'loaded': model_version,
+                'versions': model_registry.available_versions(), 'status': model_status,
+                'reload': {key: model_reload[key] for key in ('status', 'version', 'message')},
+                'warmup': model_warmup}, 200
+    if action == 'reload':
+        return start_reload(version or model_registry.current_version())
+    if action == 'rollback':
+        version = version or model_registry.previous_version()
+        if version is None:
+            return {'status': 'error', 'message': 'Não há versão anterior para voltar.'}, 409
+        return start_reload(version)
+    if action == 'train_list':
+        return {'jobs': [job.to_dict() for job in training_jobs.jobs()]}, 200
+    if action == 'train_submit':
+        job = training_jobs.submit(params)
+        return {'status': 'accepted', 'message': 'Treino enfileirado.', 'job': job.to_dict()}, 202
+    job = training_jobs.get(job_id)
+    if job is None:
+        return {'status': 'error', 'message': 'Job de treino não encontrado.'}, 404
+    if action == 'train_get':
+        return job.to_dict(), 200
+    if not training_jobs.cancel(job_id):
+        return {'status': 'error', 'message': 'O job já terminou.', 'job': job.to_dict()}, 409
+    return {'status': 'accepted', 'message': 'Cancelamento solicitado.', 'job': job.to_dict()}, 202
+
+def admin_response(action, **params):
+    # Só o dono do estado carrega o modelo e treina: nos outros workers a requisição é
+    # encaminhada a ele, então os ids dos jobs e o limite de um treino por vez valem para todos
+    if is_state_owner():
+        body, status = run_admin_command(action, **params)
+        return jsonify(body), status
+    result = forward_to_state_owner('admin', None, admin_action=action, params=params)
+    if 'http_status' not in result:
+        return jsonify(status='error', message=result['message']), 503
+    return jsonify(result['body']), result['http_status']
+
+@app.route('/admin/model')
+def admin_model():
+    # Versões disponíveis, versão em uso e o estado da última recarga (com os tempos de aquecimento)
+    if not admin_authorized():
+        return admin_forbidden_response()
+    return admin_response('model')
+
+@app.route('/admin/model/reload', methods=['POST'])
+def admin_model_reload():
+    # Sem 'version', recarrega a versão apontada por trained_model/CURRENT
+    if not admin_authorized():
+        return admin_forbidden_response()
+    return admin_response('reload', version=(request.get_json(silent=True) or {}).get('version'))
+
+@app.route('/admin/model/rollback', methods=['POST'])
+def admin_model_rollback():
+    # Volta para 'version' ou para a versão anterior à atual
+    if not admin_authorized():
+        return admin_forbidden_response()
+    return admin_response('rollback', version=(request.get_json(silent=True) or {}).get('version'))
+
+@app.route('/train', methods=['GET', 'POST'])
+def train():
+    # POST enfileira um treino; GET lista os jobs (na fila, em execução e os últimos terminados)
+    if not admin_authorized():
+        return admin_forbidden_response()
+    if request.method == 'GET':
+        return admin_response('train_list')
+    try:
+        params = validate_training_params(request.get_json(silent=True) or {}, EPOCHS)
+    except ValueError as e:
+        return jsonify(status='error', message=str(e)), 400
+    return admin_response('train_submit', params=params)
+
+@app.route('/train/<job_id>')
+def train_job(job_id):
+    # Progresso: estágio, época, perdas, acurácia de validação e amostras/s da última época
+    if not admin_authorized():
+        return admin_forbidden_response()
+    return admin_response('train_get', job_id=job_id)
+
+@app.route('/train/<job_id>/cancel', methods=['POST'])
+def cancel_train_job(job_id):
+    if not admin_authorized():
+        return admin_forbidden_response()
+    return admin_response('train_cancel', job_id=job_id)
+
+@app.route('/session_stats')
+def session_stats():
+    # Contadores do loop de predição: hops processados, hops descartados por atraso e overruns do buffer
+    session_id = request_session_id()
+    if session_id is None:
+        return invalid_session_response()
+    if not is_state_owner():
+        stats = shared_session_state(session_id)['stats']
+    else:
+        session = sessions.get(session_id) or RecognitionSession(session_id)
+        stats = session.stats()
+    if inference_worker is not None:
+        stats['inference_worker'] = inference_worker.stats()
+    if state_store.shared:
+        stats['state'] = {'owner_pid': state_store.owner_pid(), 'served_by': os.getpid()}
+    return jsonify(stats)
+
+@app.route('/channels')
+def channels():
+    # Canais abertos pelo gerenciador de captura, com as sessões de cada um e a
+    # latência captura -> predição (p50/p95/máx) dos últimos hops
+    if not is_state_owner():
+        by_channel = {}
+        for session_id, state in state_store.sessions().items():
+            capture = state['stats'].get('capture')
+            if capture is not None and state['payload'].get('status') == 'active':
+                entry = by_channel.setdefault((capture['device_id'], capture['channel']), dict(capture, sessions=[]))
+                entry['sessions'].append(session_id)
+        return jsonify(list(by_channel.values()))
+    active = sessions.active_sessions()
+    return jsonify([dict(capture.stats(), sessions=[s.session_id for s in active if s.capture is capture])
+                    for capture in capture_manager.channels()])
+
+@app.route('/note_stream')
+def note_stream():
+    # Server-Sent Events: envia a nota atual ao conectar e depois só quando ela muda,
+    # com um comentário de heartbeat a cada SSE_HEARTBEAT_SECONDS sem mudanças.
+    session_id = request_session_id()
+    if session_id is None:
+        return invalid_session_response()
+    if not note_stream_slots.acquire(blocking=False):
+        return jsonify(status='error', message='Limite de streams atingido; use o /get_note.'), 503
+    if is_state_owner():
+        stream = session_note_stream(session_id)
+    else:
+        stream = shared_note_stream(session_id)
+    response = Response(stream, mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Libera a vaga quando o servidor fecha a resposta (cliente desconectou)
+    response.call_on_close(note_stream_slots.release)
+    return response
+
+def session_note_stream(session_id):
+    # /note_stream no worker dono: acompanha a sessão local sem criá-la. Enquanto ela não
+    # existe (ou depois de expirar) envia o estado ocioso e a procura de novo a cada heartbeat.
+    idle = RecognitionSession(session_id)
+    session = last_version = None
+    while True:
+        current = sessions.get(session_id) or idle
+        if current is not session:
+            session, last_version = current, None
+        version = session.wait_for_change(last_version, SSE_HEARTBEAT_SECONDS)
+        if version == last_version:
+            yield ": heartbeat\n\n"
+            continue
+        last_version = version
+        yield f"id: {version}\nevent: note\ndata: {json.dumps(session.payload())}\n\n"
+
+def shared_note_stream(session_id):
+    # /note_stream em um worker que não é o dono: acompanha o estado publicado pelo dono
+    # (last_version começa diferente de qualquer versão, então o estado atual vai ao conectar)
+    last_version = ()
+    while True:
+        state = state_store.wait_for_change(session_id, last_version, SSE_HEARTBEAT_SECONDS)
+        version = state['version'] if state else None
+        if version == last_version:
+            yield ": heartbeat\n\n"
+            continue
+        last_version = version
+        payload = state['payload'] if state else RecognitionSession(session_id).payload()
+        yield f"id: {version}\nevent: note\ndata: {json.dumps(payload)}\n\n"
+
+@app.route('/transcribe', methods=['POST'])
+def transcribe():
+    # Transcrição offline: recebe um .wav (campo 'file' do formulário ou corpo da requisição)
+    # e devolve a linha do tempo de acordes. Usa o modelo direto, em lotes grandes.
+    if not is_state_owner():
+        # Só o dono carrega o modelo e recebe os recarregamentos; um upload não cabe nos comandos
+        # encaminhados, então os outros workers recusam com o estado do modelo do dono
+        owner = state_store.owner_status() or {'model_status': 'loading', 'message': "Aguardando o processo dono do reconhecimento."}
+        return jsonify(status='error', model_status=owner['model_status'],
+                       message=f"Transcrição disponível só no processo dono do reconhecimento. {owner['message']}"), 503
+    if model_loaded is None or encoder_loaded is None or scaler_loaded is None:
+        start_model_loading()
+        return jsonify(status='error', message='Modelo de reconhecimento não carregado.'), 503
+
+    upload = request.files.get('file')
+    if upload is None and not request.content_length:
+        return jsonify(status='error', message='Envie um arquivo .wav no campo "file".'), 400
+
+    try:
+        hop_seconds = float(request.args.get('hop', PREDICTION_HOP_SECONDS))
+        if not 0 < hop_seconds <= 10:
+            raise ValueError(hop_seconds)
+    except ValueError:
+        return jsonify(status='error', message='Parâmetro hop inválido.'), 400
+
+    with tempfile.NamedTemporaryFile(suffix='.wav') as tmp:
+        if upload is not None:
+            upload.save(tmp)
+        else:
+            # Copia o corpo em blocos para não carregar gravações longas na memória
+            while True:
+                block = request.stream.read(1 << 20)
+                if not block:
+                    break
+                tmp.write(block)
+        tmp.flush()
+        try:
+            result = transcribe_file(tmp.name, model_loaded, encoder_loaded, scaler_loaded, hop_seconds=hop_seconds)
+        except RuntimeError as e:
+            return jsonify(status='error', message=f'Não foi possível ler o áudio: {e}'), 400
+
+    return jsonify(status='success', **result)
 
 if __name__ == '__main__':
     os.makedirs('trained_model', exist_ok=True)
     os.makedirs('dataset', exist_ok=True) 
+
+    # Com debug=True o processo pai do reloader apenas observa arquivos; só o filho carrega o modelo
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_model_loading()
+        start_model_watcher()
     
     app.run(debug=True, threaded=True, host='0.0.0.0')
\ No newline at end of file
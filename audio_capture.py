@@ -1,8 +1,11 @@
-import sounddevice as sd
 import numpy as np
 import threading
 import time
 import queue
+import atexit
+
+from ring_buffer import RingBuffer, SharedRingBuffer
+from metrics import AUDIO_CALLBACK, AUDIO_CALLBACKS, AUDIO_CALLBACK_STATUS, registry as metrics_registry
 
 SAMPLE_RATE = 22050  
 BLOCK_SIZE = 1024    
@@ -11,58 +14,165 @@ DTYPE = 'float32'
 RECORD_DURATION = 0.75 
 
 BUFFER_SIZE_SECONDS = 3 
-audio_buffer = np.zeros(int(SAMPLE_RATE * BUFFER_SIZE_SECONDS), dtype=DTYPE)
-buffer_write_idx = 0
-buffer_lock = threading.Lock() 
+# Buffer circular compartilhado: o callback escreve sem lock, cada consumidor lê pelo seu cursor
+audio_ring = RingBuffer(int(SAMPLE_RATE * BUFFER_SIZE_SECONDS), dtype=DTYPE)
 
 stream = None
 is_recording = False
-
-def callback(indata, frames, time, status):
-    global audio_buffer, buffer_write_idx, buffer_lock
-
-    if status:
-        print(f"Status do stream de áudio: {status}") 
-    
-    with buffer_lock:
-        num_samples = indata.shape[0]
-        if buffer_write_idx + num_samples > audio_buffer.size:
-            samples_to_end = audio_buffer.size - buffer_write_idx
-            audio_buffer[buffer_write_idx:] = indata[:samples_to_end, 0]
-            audio_buffer[:num_samples - samples_to_end] = indata[samples_to_end:, 0]
-            buffer_write_idx = num_samples - samples_to_end
-        else:
-            audio_buffer[buffer_write_idx : buffer_write_idx + num_samples] = indata[:, 0]
-            buffer_write_idx += num_samples
+# Fonte virtual (audio_sources.VirtualAudioSource) no lugar do sounddevice: arquivo ou
+# roteiro de acordes sintéticos, para testes de carga em máquinas sem microfone
+audio_source = None
+
+# Flags de sounddevice.CallbackFlags contadas em /metrics (overflow/underflow = xrun)
+CALLBACK_STATUS_FLAGS = ('input_overflow', 'input_underflow', 'output_overflow', 'output_underflow', 'priming_output')
+# O callback só grava a duração e as flags em slots pré-alocados (sem lock, sem print);
+# uma thread fora do áudio passa os slots para /metrics e loga as flags a cada
+# CALLBACK_DRAIN_SECONDS. 1024 slots são ~47 s de blocos de 1024 amostras a 22050 Hz.
+CALLBACK_SLOTS = 1024
+CALLBACK_DRAIN_SECONDS = 1.0
+
+def status_bits(status):
+    bits = 0
+    for bit, flag in enumerate(CALLBACK_STATUS_FLAGS):
+        if getattr(status, flag, False):
+            bits |= 1 << bit
+    return bits
+
+class CallbackStats:
+    """
+    Registro das chamadas do callback de um stream. O callback (único escritor) grava
+    a duração e as flags de status no próximo slot de arrays pré-alocados e só então
+    avança `written`; drain(), fora da thread de áudio, lê os slots novos.
+    """
+
+    def __init__(self, slots=CALLBACK_SLOTS):
+        self.durations = np.zeros(slots)
+        self.flags = np.zeros(slots, dtype=np.uint8)
+        self.written = 0
+        self._drained = 0
+
+    def record(self, seconds, status):
+        slot = self.written % len(self.durations)
+        self.durations[slot] = seconds
+        self.flags[slot] = status_bits(status) if status else 0
+        self.written += 1
+
+    def drain(self):
+        """Retorna (chamadas, durações, flags) desde o último drain; slots já sobrescritos só entram na contagem."""
+        written = self.written
+        calls = written - self._drained
+        slots = np.arange(max(self._drained, written - len(self.durations)), written) % len(self.durations)
+        self._drained = written
+        return calls, self.durations[slots], self.flags[slots]
+
+# Stats da captura global; os streams do capture_manager registram os seus
+callback_stats = CallbackStats()
+_registered_stats = [callback_stats]
+_drain_lock = threading.Lock()
+_drain_thread = None
+
+def _drain(stats):
+    calls, durations, flags = stats.drain()
+    if calls:
+        AUDIO_CALLBACKS.inc(calls)
+    for seconds in durations:
+        AUDIO_CALLBACK.observe(float(seconds))
+    counts = {}
+    for bit, flag in enumerate(CALLBACK_STATUS_FLAGS):
+        count = int(np.count_nonzero(flags & (1 << bit)))
+        if count:
+            AUDIO_CALLBACK_STATUS.inc(count, label_value=flag)
+            counts[flag] = count
+    return counts
+
+def drain_callback_stats():
+    # Fora da thread de áudio: passa os callbacks registrados para /metrics e loga as flags de status
+    with _drain_lock:
+        counts = {}
+        for stats in _registered_stats:
+            for flag, count in _drain(stats).items():
+                counts[flag] = counts.get(flag, 0) + count
+    if counts:
+        print("Status do stream de áudio: " + ", ".join(f"{flag} x{count}" for flag, count in counts.items()))
+
+def register_callback_stats(stats):
+    with _drain_lock:
+        if stats not in _registered_stats:
+            _registered_stats.append(stats)
+    start_callback_drain()
+
+def unregister_callback_stats(stats):
+    # Drena uma última vez: as chamadas do stream fechado não se perdem
+    with _drain_lock:
+        if stats in _registered_stats:
+            _registered_stats.remove(stats)
+            _drain(stats)
+
+def _drain_loop():
+    while True:
+        time.sleep(CALLBACK_DRAIN_SECONDS)
+        drain_callback_stats()
+
+def start_callback_drain():
+    global _drain_thread
+    with _drain_lock:
+        if _drain_thread is None:
+            _drain_thread = threading.Thread(target=_drain_loop, name='callback-stats', daemon=True)
+            _drain_thread.start()
+
+metrics_registry.collector(drain_callback_stats)
+
+def callback(indata, frames, time_info, status):
+    started = time.perf_counter()
+    audio_ring.write(indata[:, 0])
+    callback_stats.record(time.perf_counter() - started, status)
+
+def _sounddevice():
+    # Importado sob demanda: o PortAudio só é necessário para listar dispositivos ou gravar
+    import sounddevice as sd
+    return sd
+
+def set_audio_source(source):
+    # None volta a usar os dispositivos reais (sounddevice)
+    global audio_source
+    audio_source = source
 
 def list_audio_devices():
+    if audio_source is not None:
+        return [{'index': 'virtual', 'name': audio_source.name, 'max_input_channels': audio_source.channels}]
     try:
-        devices = sd.query_devices()
+        devices = _sounddevice().query_devices()
         return devices
     except Exception as e:
         print(f"Erro ao listar dispositivos de áudio: {e}")
         return []
 
+def open_input_stream(device_id, channels=CHANNELS, callback=callback):
+    # Stream (ainda parado) do dispositivo real ou da fonte virtual, se houver uma
+    if audio_source is not None:
+        return audio_source.open_stream(samplerate=SAMPLE_RATE, blocksize=BLOCK_SIZE, channels=channels, callback=callback)
+    return _sounddevice().InputStream(
+        samplerate=SAMPLE_RATE,
+        blocksize=BLOCK_SIZE,
+        device=device_id,
+        channels=channels,
+        dtype=DTYPE,
+        callback=callback
+    )
+
 def start_recording(device_id=None):
-    global stream, is_recording, audio_buffer, buffer_write_idx
+    global stream, is_recording
 
     if is_recording:
         return True
 
     print(f"Iniciando gravação com dispositivo ID: {device_id if device_id is not None else 'Padrão'}")
     try:
-        audio_buffer = np.zeros(int(SAMPLE_RATE * BUFFER_SIZE_SECONDS), dtype=DTYPE)
-        buffer_write_idx = 0
-
-        stream = sd.InputStream(
-            samplerate=SAMPLE_RATE,
-            blocksize=BLOCK_SIZE,
-            device=device_id,
-            channels=CHANNELS,
-            dtype=DTYPE,
-            callback=callback
-        )
+        audio_ring.reset()
+
+        stream = open_input_stream(device_id)
         stream.start()
+        start_callback_drain()
         is_recording = True
         print("Gravação iniciada.")
         return True
@@ -73,30 +183,43 @@ def start_recording(device_id=None):
 
 def stop_recording():
     global stream, is_recording
-    if stream is not None and stream.active:
-        stream.stop()
+    # Um stream virtual sem repetição termina sozinho no fim do sinal (inativo, mas ainda aberto)
+    if stream is not None:
+        if stream.active:
+            stream.stop()
         stream.close()
+        stream = None
         is_recording = False
         print("Gravação parada.")
 
-def get_audio_segment():
-    global audio_buffer, buffer_write_idx, buffer_lock
-
+def use_shared_ring():
+    """
+    Passa o buffer de captura para memória compartilhada (SharedRingBuffer), para o
+    worker de inferência ler o áudio em outro processo. Só com a gravação parada.
+    """
+    global audio_ring
+    if not isinstance(audio_ring, SharedRingBuffer):
+        if is_recording:
+            raise RuntimeError("Não é possível trocar o buffer de captura durante a gravação.")
+        audio_ring = SharedRingBuffer(audio_ring.capacity, dtype=DTYPE)
+        atexit.register(_release_shared_ring, audio_ring)
+    return audio_ring
+
+def _release_shared_ring(ring):
+    stop_recording()
+    ring.unlink()
+
+def get_audio_segment(end_cursor=None):
+    # Últimos RECORD_DURATION segundos (ou os que terminam em end_cursor); view do buffer
+    # quando a região não dá a volta
     num_samples_needed = int(SAMPLE_RATE * RECORD_DURATION)
+    if end_cursor is None:
+        return audio_ring.latest(num_samples_needed)
+    return audio_ring.window(end_cursor, num_samples_needed)
 
-    with buffer_lock:
-        if audio_buffer.size < num_samples_needed:
-            return np.array([])
-
-        if buffer_write_idx >= num_samples_needed:
-            segment = audio_buffer[buffer_write_idx - num_samples_needed : buffer_write_idx].copy()
-        else:
-            part1_len = num_samples_needed - buffer_write_idx
-            part1 = audio_buffer[audio_buffer.size - part1_len:].copy()
-            part2 = audio_buffer[0:buffer_write_idx].copy()
-            segment = np.concatenate((part1, part2))
-    
-    return segment
+def create_reader(backlog_seconds=0):
+    """Leitor com cursor próprio; a primeira leitura inclui os últimos `backlog_seconds` já gravados."""
+    return audio_ring.reader(backlog=int(SAMPLE_RATE * backlog_seconds))
 
 if __name__ == '__main__':
     print("Executando audio_capture.py diretamente. Isso geralmente lista os dispositivos de áudio.")
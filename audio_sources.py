@@ -0,0 +1,221 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+SAMPLE_RATE = 22050
+# Rótulo dos trechos sem acorde num roteiro (a mesma palavra que predict_note retorna)
+SILENCE = 'Silêncio'
+
+# Frequências (Hz) das notas de cada acorde na região grave/média do violão
+CHORD_FREQUENCIES = {
+    'C_Major': [130.81, 164.81, 196.00, 261.63, 329.63],
+    'D_Major': [146.83, 220.00, 293.66, 369.99],
+    'E_Major': [82.41, 123.47, 164.81, 207.65, 246.94, 329.63],
+    'F_Major': [87.31, 130.81, 174.61, 220.00, 261.63, 349.23],
+    'G_Major': [98.00, 123.47, 146.83, 196.00, 246.94, 392.00],
+    'A_Major': [110.00, 164.81, 220.00, 277.18, 329.63],
+    'A_Minor': [110.00, 164.81, 220.00, 261.63, 329.63],
+    'E_Minor': [82.41, 123.47, 164.81, 196.00, 246.94, 329.63],
+}
+
+
+def synth_chord(chord, duration=2.0, sample_rate=SAMPLE_RATE, seed=0, strum_ms=15.0, amplitude=0.3):
+    """
+    Gera um sinal sintético parecido com um acorde de violão dedilhado: cada corda
+    tem harmônicos com decaimento exponencial e um pequeno atraso de ataque.
+    """
+    rng = np.random.default_rng(seed)
+    n_samples = int(duration * sample_rate)
+    t = np.arange(n_samples) / sample_rate
+    signal = np.zeros(n_samples, dtype=np.float64)
+    for string_idx, freq in enumerate(CHORD_FREQUENCIES[chord]):
+        onset = int(string_idx * strum_ms / 1000 * sample_rate)
+        detune = 1 + rng.normal(0, 0.002)
+        decay = rng.uniform(1.5, 3.0)
+        tone = np.zeros(n_samples)
+        for harmonic in range(1, 7):
+            tone += np.sin(2 * np.pi * freq * detune * harmonic * t + rng.uniform(0, 2 * np.pi)) / harmonic ** 1.5
+        envelope = np.exp(-decay * t)
+        signal[onset:] += (tone * envelope)[:n_samples - onset]
+    signal += rng.normal(0, 0.002, n_samples)
+    signal *= amplitude / (np.max(np.abs(signal)) + 1e-9)
+    return signal.astype(np.float32)
+
+
+def parse_chord_script(text):
+    """'C_Major:2,G_Major:1.5,silence:1' -> [('C_Major', 2.0), ('G_Major', 1.5), ('Silêncio', 1.0)]"""
+    steps = []
+    for item in text.split(','):
+        name, _, seconds = item.strip().partition(':')
+        label = SILENCE if name.lower() in ('silence', 'silencio', SILENCE.lower()) else name
+        if label != SILENCE and label not in CHORD_FREQUENCIES:
+            raise ValueError(f"Acorde desconhecido no roteiro: {name} (opções: {', '.join(CHORD_FREQUENCIES)}, silence)")
+        steps.append((label, float(seconds or 2.0)))
+    return steps
+
+
+class ChordScript:
+    """
+    Sequência roteirizada de acordes (e silêncios) sintéticos, com os instantes
+    exatos das mudanças: `changes` é a lista [(amostra, rótulo)] do início de cada
+    trecho. Trechos seguidos com o mesmo rótulo são unidos (não há mudança entre eles).
+    """
+
+    def __init__(self, steps, sample_rate=SAMPLE_RATE, seed=0):
+        if isinstance(steps, str):
+            steps = parse_chord_script(steps)
+        self.sample_rate = sample_rate
+        self.steps = list(steps)
+        parts = []
+        self.changes = []
+        position = 0
+        for i, (label, seconds) in enumerate(self.steps):
+            n_samples = int(seconds * sample_rate)
+            if label == SILENCE:
+                part = np.random.default_rng(seed + i).normal(0, 0.0005, n_samples).astype(np.float32)
+            else:
+                part = synth_chord(label, seconds, sample_rate, seed=seed + i)[:n_samples]
+            if not self.changes or self.changes[-1][1] != label:
+                self.changes.append((position, label))
+            parts.append(part)
+            position += n_samples
+        self.signal = np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+    @property
+    def duration(self):
+        return len(self.signal) / self.sample_rate
+
+    def label_at(self, position):
+        label = None
+        for start, step_label in self.changes:
+            if start > position:
+                break
+            label = step_label
+        return label
+
+
+def load_audio_file(path, sample_rate=SAMPLE_RATE):
+    import librosa
+
+    signal, _ = librosa.load(path, sr=sample_rate, mono=True)
+    return signal.astype(np.float32)
+
+
+class VirtualInputStream:
+    """
+    Substituto do `sounddevice.InputStream` (start/stop/close/active): uma thread
+    entrega o sinal em blocos de `blocksize` amostras ao mesmo `callback(indata,
+    frames, time, status)` da captura real, no ritmo do tempo real vezes `speed`.
+    Se a thread atrasar, os blocos atrasados são entregues em seguida (nada é perdido).
+    Um sinal mono vai igual para todos os canais; um sinal (amostras, canais) entrega
+    uma coluna por canal.
+    """
+
+    def __init__(self, signal, samplerate, blocksize, channels, callback, speed=1.0, loop=False):
+        self.signal = np.asarray(signal, dtype=np.float32)
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.channels = channels
+        self.callback = callback
+        self.speed = float(speed)
+        self.loop = loop
+        self.samples_delivered = 0
+        self.late_blocks = 0
+        self.started_at = None
+        self.finished = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def active(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._stop.clear()
+        self.finished.clear()
+        self._thread = threading.Thread(target=self._run, name='virtual-audio', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+
+    def close(self):
+        self.stop()
+
+    def _next_block(self, position):
+        if self.loop and len(self.signal):
+            indices = np.arange(position, position + self.blocksize) % len(self.signal)
+            return self.signal[indices]
+        return self.signal[position:position + self.blocksize]
+
+    def _run(self):
+        period = self.blocksize / self.samplerate / self.speed
+        self.started_at = time.perf_counter()
+        block_index = 0
+        while not self._stop.is_set():
+            block = self._next_block(self.samples_delivered)
+            if len(block) == 0:
+                break
+            due = self.started_at + (block_index + 1) * period
+            delay = due - time.perf_counter()
+            if delay > 0:
+                if self._stop.wait(delay):
+                    break
+            elif -delay > period:
+                self.late_blocks += 1
+            if block.ndim == 1:
+                indata = np.repeat(block[:, np.newaxis], self.channels, axis=1)
+            else:
+                indata = block[:, np.arange(self.channels) % block.shape[1]]
+            stream_time = self.samples_delivered / self.samplerate
+            time_info = SimpleNamespace(inputBufferAdcTime=stream_time, currentTime=stream_time + len(block) / self.samplerate)
+            self.callback(indata, len(block), time_info, None)
+            self.samples_delivered += len(block)
+            block_index += 1
+        self.finished.set()
+
+
+class VirtualAudioSource:
+    """
+    Dispositivo de áudio virtual para máquinas sem microfone (CI, testes de carga):
+    toca um arquivo ou um roteiro de acordes sintéticos pelo caminho de captura
+    normal (audio_capture.callback), em tempo real ou `speed` vezes mais rápido.
+    O sinal só é gerado/lido na primeira abertura do stream; um sinal com várias
+    colunas simula uma interface com várias entradas.
+    """
+
+    def __init__(self, signal=None, name='virtual', speed=1.0, loop=True, load=None):
+        self.name = name
+        self.channels = signal.shape[1] if signal is not None and np.ndim(signal) == 2 else 1
+        self.speed = speed
+        self.loop = loop
+        self._signal = signal
+        self._load = load
+        self.stream = None
+
+    @classmethod
+    def from_spec(cls, spec, speed=1.0, loop=True, sample_rate=SAMPLE_RATE):
+        """'file:gravacao.wav' ou 'script:C_Major:2,G_Major:2,silence:1'."""
+        kind, _, value = spec.partition(':')
+        if kind == 'file' and value:
+            return cls(name=f"Virtual: {value}", speed=speed, loop=loop, load=lambda: load_audio_file(value, sample_rate))
+        if kind == 'script' and value:
+            steps = parse_chord_script(value)
+            return cls(name=f"Virtual: {value}", speed=speed, loop=loop,
+                       load=lambda: ChordScript(steps, sample_rate).signal)
+        raise ValueError(f"Fonte de áudio inválida: {spec!r} (use 'file:<caminho>' ou 'script:<acorde>:<s>,...')")
+
+    @property
+    def signal(self):
+        if self._signal is None:
+            self._signal = self._load()
+        return self._signal
+
+    def open_stream(self, samplerate, blocksize, channels, callback):
+        self.stream = VirtualInputStream(self.signal, samplerate, blocksize, channels, callback,
+                                         speed=self.speed, loop=self.loop)
+        return self.stream
@@ -0,0 +1,193 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+import audio_capture
+from ring_buffer import RingBuffer
+
+# Latências guardadas por canal para os percentis do /channels
+LATENCY_WINDOW = 1000
+# Horários de chegada dos últimos blocos de cada canal (para medir a latência de um hop)
+ARRIVAL_SLOTS = 64
+
+
+class LatencyStats:
+    """Percentis das últimas LATENCY_WINDOW latências (captura -> predição) de um canal."""
+
+    def __init__(self, maxlen=LATENCY_WINDOW):
+        self._values = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds):
+        with self._lock:
+            self._values.append(seconds)
+            self.count += 1
+
+    def summary(self):
+        with self._lock:
+            values = np.array(self._values)
+        if values.size == 0:
+            return {'latency_p50_ms': None, 'latency_p95_ms': None, 'latency_max_ms': None}
+        p50, p95 = np.percentile(values, (50, 95)) * 1000
+        return {'latency_p50_ms': float(p50), 'latency_p95_ms': float(p95), 'latency_max_ms': float(values.max() * 1000)}
+
+
+class CaptureChannel:
+    """
+    Um canal de entrada de um dispositivo, com buffer circular próprio. Tem a mesma
+    interface de leitura do audio_capture (`create_reader`, `get_audio_segment`),
+    então o loop de predição funciona igual com a captura global ou com um canal.
+    """
+
+    def __init__(self, device_id, channel, sample_rate=audio_capture.SAMPLE_RATE,
+                 buffer_seconds=audio_capture.BUFFER_SIZE_SECONDS, window_seconds=audio_capture.RECORD_DURATION):
+        self.device_id = device_id
+        self.channel = channel
+        self.sample_rate = sample_rate
+        self.window_samples = int(sample_rate * window_seconds)
+        self.ring = RingBuffer(int(sample_rate * buffer_seconds), dtype=audio_capture.DTYPE)
+        self.latency = LatencyStats()
+        self.users = 0
+        # Cursor de escrita depois de cada bloco e o horário em que o bloco chegou
+        self._arrival_cursor = np.full(ARRIVAL_SLOTS, -1, dtype=np.int64)
+        self._arrival_time = np.zeros(ARRIVAL_SLOTS)
+        self._blocks = 0
+
+    def write(self, samples, arrived_at):
+        self.ring.write(samples)
+        slot = self._blocks % ARRIVAL_SLOTS
+        self._arrival_time[slot] = arrived_at
+        self._arrival_cursor[slot] = self.ring.written
+        self._blocks += 1
+
+    def arrival_time(self, cursor):
+        """Quando chegou o bloco que contém a amostra anterior ao cursor `cursor` (None se já saiu do histórico)."""
+        candidates = self._arrival_cursor >= cursor
+        if not candidates.any():
+            return None
+        cursors = np.where(candidates, self._arrival_cursor, np.iinfo(np.int64).max)
+        return float(self._arrival_time[int(np.argmin(cursors))])
+
+    def record_hop(self, cursor, done_at):
+        arrived_at = self.arrival_time(cursor)
+        if arrived_at is not None:
+            self.latency.record(max(done_at - arrived_at, 0.0))
+
+    def create_reader(self, backlog_seconds=0):
+        return self.ring.reader(backlog=int(self.sample_rate * backlog_seconds))
+
+    def get_audio_segment(self, end_cursor=None):
+        if end_cursor is None:
+            return self.ring.latest(self.window_samples)
+        return self.ring.window(end_cursor, self.window_samples)
+
+    def stats(self):
+        stats = {'device_id': self.device_id, 'channel': self.channel, 'samples_captured': self.ring.written}
+        stats.update(self.latency.summary())
+        return stats
+
+
+class DeviceCapture:
+    # Um stream aberto por dispositivo; o callback distribui cada coluna para o canal dela
+    def __init__(self, device_id):
+        self.device_id = device_id
+        self.channels = {}
+        self.stream = None
+        self.stream_channels = 0
+        self.callback_stats = audio_capture.CallbackStats()
+
+    def callback(self, indata, frames, time_info, status):
+        # Sem lock nem print na thread de áudio (ver audio_capture.CallbackStats)
+        arrived_at = time.perf_counter()
+        for channel, capture in list(self.channels.items()):
+            capture.write(indata[:, channel], arrived_at)
+        self.callback_stats.record(time.perf_counter() - arrived_at, status)
+
+    def close_stream(self):
+        if self.stream is not None:
+            if self.stream.active:
+                self.stream.stop()
+            self.stream.close()
+            self.stream = None
+            self.stream_channels = 0
+            audio_capture.unregister_callback_stats(self.callback_stats)
+
+
+class CaptureManager:
+    """
+    Captura simultânea de vários dispositivos e vários canais por dispositivo (ex.:
+    uma interface com várias entradas, um violão em cada). Cada canal tem seu
+    próprio buffer circular e alimenta sua própria sessão de reconhecimento; o
+    stream de um dispositivo é aberto com canais suficientes para o maior canal
+    pedido e fechado quando nenhum canal dele está em uso.
+    """
+
+    def __init__(self, open_stream=None):
+        # open_stream(device_id, channels, callback) -> stream parado; padrão: audio_capture
+        self._open_stream = open_stream or audio_capture.open_input_stream
+        self._devices = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, device_id, channel):
+        """Abre (ou reaproveita) o canal `channel` do dispositivo e retorna o CaptureChannel."""
+        channel = int(channel)
+        if channel < 0:
+            raise ValueError("O canal deve ser >= 0.")
+        with self._lock:
+            device = self._devices.setdefault(device_id, DeviceCapture(device_id))
+            capture = device.channels.get(channel)
+            if capture is None:
+                capture = CaptureChannel(device_id, channel)
+            if device.stream is None or channel >= device.stream_channels:
+                # Reabre com mais canais: os buffers dos canais já abertos continuam os mesmos
+                self._reopen(device, max([channel, *device.channels]) + 1)
+            device.channels[channel] = capture
+            capture.users += 1
+            return capture
+
+    def _open(self, device, channels):
+        stream = self._open_stream(device.device_id, channels=channels, callback=device.callback)
+        stream.start()
+        device.stream, device.stream_channels = stream, channels
+        audio_capture.register_callback_stats(device.callback_stats)
+
+    def _reopen(self, device, channels):
+        previous_channels = device.stream_channels
+        device.close_stream()
+        try:
+            self._open(device, channels)
+        except Exception:
+            # Os canais que já estavam abertos continuam gravando com o stream anterior
+            if device.channels:
+                self._open(device, previous_channels)
+            else:
+                del self._devices[device.device_id]
+            raise
+        print(f"Captura do dispositivo {device.device_id if device.device_id is not None else 'padrão'} "
+              f"aberta com {channels} canal(is).")
+
+    def release(self, capture):
+        """Solta um uso do canal; o stream do dispositivo é fechado quando nenhum canal dele é usado."""
+        with self._lock:
+            device = self._devices.get(capture.device_id)
+            if device is None or device.channels.get(capture.channel) is not capture:
+                return
+            capture.users -= 1
+            if capture.users <= 0:
+                del device.channels[capture.channel]
+            if not device.channels:
+                device.close_stream()
+                del self._devices[capture.device_id]
+
+    def channels(self):
+        with self._lock:
+            return [capture for device in self._devices.values() for capture in device.channels.values()]
+
+    def close(self):
+        with self._lock:
+            for device in self._devices.values():
+                device.close_stream()
+            self._devices.clear()
@@ -0,0 +1,307 @@
+import os
+import re
+import json
+import time
+import argparse
+
+import numpy as np
+
+from model_registry import artifact_paths, current_model_dir
+
+SAMPLE_RATE = 22050
+# STFT do cromagrama: 4096 pontos (~5,4 Hz por bin, resolve os semitons das cordas graves)
+CHROMA_N_FFT = 4096
+CHROMA_HOP_LENGTH = 2048
+# Faixa de frequências somada no cromagrama (da corda Mi grave até os harmônicos úteis)
+CHROMA_FMIN = 65.0
+CHROMA_FMAX = 2100.0
+# Harmônicos de cada nota nos moldes teóricos, com peso HARMONIC_DECAY^(k-1)
+TEMPLATE_HARMONICS = 4
+HARMONIC_DECAY = 0.6
+# Escala da similaridade de cosseno antes do softmax (só muda a "confiança" das probabilidades)
+SCORE_TEMPERATURE = 20.0
+
+PITCH_CLASSES = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+ACCIDENTALS = {'': 0, '#': 1, 'sharp': 1, 'b': -1, 'flat': -1}
+# Intervalos (semitons a partir da fundamental) de cada qualidade de acorde
+CHORD_QUALITIES = {
+    'major': (0, 4, 7),
+    'minor': (0, 3, 7),
+    '7': (0, 4, 7, 10),
+    'maj7': (0, 4, 7, 11),
+    'm7': (0, 3, 7, 10),
+    'dim': (0, 3, 6),
+    'aug': (0, 4, 8),
+    'sus2': (0, 2, 7),
+    'sus4': (0, 5, 7),
+    '5': (0, 7),
+}
+QUALITY_ALIASES = {
+    '': 'major', 'maj': 'major', 'M': 'major', 'major': 'major', 'maior': 'major',
+    'm': 'minor', 'min': 'minor', 'minor': 'minor', 'menor': 'minor',
+    'dom7': '7', 'min7': 'm7', 'minor7': 'm7', 'major7': 'maj7', 'M7': 'maj7',
+}
+LABEL_PATTERN = re.compile(r'^([A-G])[_\s-]?(#|b|sharp|flat)?[_\s-]?(.*)$', re.IGNORECASE)
+
+
+def parse_chord_label(label):
+    """Fundamental (classe de altura 0-11) e intervalos de um rótulo como 'C_Major', 'Am', 'F#m7' ou 'G7'."""
+    match = LABEL_PATTERN.match(str(label).strip())
+    if match is None:
+        raise ValueError(f"Rótulo sem molde de acorde: {label!r}")
+    note, accidental, quality = match.groups()
+    quality = quality.strip('_ -')
+    # 'M' e 'M7' são maiores; o resto da qualidade não diferencia maiúsculas
+    quality = QUALITY_ALIASES.get(quality, QUALITY_ALIASES.get(quality.lower(), quality.lower()))
+    if quality not in CHORD_QUALITIES:
+        raise ValueError(f"Rótulo sem molde de acorde: {label!r} (qualidade {quality!r} desconhecida)")
+    root = (PITCH_CLASSES[note.upper()] + ACCIDENTALS[(accidental or '').lower()]) % 12
+    return root, CHORD_QUALITIES[quality]
+
+
+def chord_template(label, harmonics=TEMPLATE_HARMONICS, decay=HARMONIC_DECAY):
+    """Molde de 12 classes de altura (norma 1) com as notas do acorde e os primeiros harmônicos delas."""
+    root, intervals = parse_chord_label(label)
+    template = np.zeros(12, dtype=np.float32)
+    for interval in intervals:
+        for k in range(1, harmonics + 1):
+            template[(root + interval + int(round(12 * np.log2(k)))) % 12] += decay ** (k - 1)
+    return template / np.linalg.norm(template)
+
+
+def chroma_filterbank(sample_rate=SAMPLE_RATE, n_fft=CHROMA_N_FFT, fmin=CHROMA_FMIN, fmax=CHROMA_FMAX):
+    """
+    Matriz (12, bins) que soma a magnitude de cada bin da FFT na classe de altura
+    mais próxima, com peso triangular: bins entre dois semitons contam menos.
+    """
+    freqs = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    bins = np.flatnonzero((freqs >= fmin) & (freqs <= fmax))
+    midi = 12 * np.log2(freqs[bins] / 440.0) + 69
+    nearest = np.round(midi)
+    filterbank = np.zeros((12, len(freqs)), dtype=np.float32)
+    filterbank[nearest.astype(int) % 12, bins] = np.clip(1 - 2 * np.abs(midi - nearest), 0, 1)
+    return filterbank
+
+
+def chromagram(audio, filterbank, n_fft=CHROMA_N_FFT, hop_length=CHROMA_HOP_LENGTH):
+    """Cromagrama (12, quadros) de um sinal mono, cada quadro normalizado pelo seu máximo."""
+    audio = np.asarray(audio, dtype=np.float32)
+    if len(audio) < n_fft:
+        audio = np.pad(audio, (0, n_fft - len(audio)))
+    frames = np.lib.stride_tricks.sliding_window_view(audio, n_fft)[::hop_length]
+    magnitude = np.abs(np.fft.rfft(frames * np.hanning(n_fft).astype(np.float32), axis=-1))
+    chroma = filterbank @ magnitude.T
+    return chroma / np.maximum(chroma.max(axis=0, keepdims=True), 1e-10)
+
+
+class IdentityScaler:
+    """O cromagrama já sai normalizado: o scaler do pipeline não muda nada."""
+
+    def transform(self, X):
+        return X
+
+
+class ChromaChordModel:
+    """
+    Reconhecedor sem TensorFlow: compara o cromagrama médio da janela com um molde
+    de 12 classes de altura por acorde (similaridade de cosseno). Expõe `predict` e
+    `input_shape` como o modelo Keras e `window_features`, que o `predict_note` usa
+    no lugar do MFCC; `predict` recebe (lote, quadros, 12), então o agendador de
+    inferência agrupa as janelas das sessões em uma única multiplicação de matrizes.
+    """
+
+    def __init__(self, labels, templates=None, sample_rate=SAMPLE_RATE):
+        self.labels = list(labels)
+        if templates is None:
+            templates = np.stack([chord_template(label) for label in self.labels])
+        templates = np.asarray(templates, dtype=np.float32)
+        self.templates = templates / np.maximum(np.linalg.norm(templates, axis=1, keepdims=True), 1e-10)
+        self.input_shape = (None, None, 12)
+        self._filterbanks = {sample_rate: chroma_filterbank(sample_rate)}
+
+    def window_features(self, audio_segment, sample_rate=SAMPLE_RATE):
+        filterbank = self._filterbanks.get(sample_rate)
+        if filterbank is None:
+            filterbank = self._filterbanks[sample_rate] = chroma_filterbank(sample_rate)
+        return chromagram(audio_segment, filterbank)
+
+    def predict(self, x, verbose=0, batch_size=None):
+        profile = np.asarray(x, dtype=np.float32).mean(axis=1)
+        profile /= np.maximum(np.linalg.norm(profile, axis=1, keepdims=True), 1e-10)
+        scores = SCORE_TEMPERATURE * (profile @ self.templates.T)
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        return scores / scores.sum(axis=1, keepdims=True)
+
+
+def load_chroma_model(model_dir=None):
+    """
+    Carrega o reconhecedor por cromagrama para os rótulos do encoder da versão
+    (label_encoder_chords.joblib). Usa os moldes aprendidos do dataset
+    (chroma_templates.npz, gerados com --fit) quando existem; senão, os teóricos.
+    Retorna (modelo, encoder, scaler) como o load_trained_model.
+    """
+    import joblib
+
+    paths = artifact_paths(model_dir or current_model_dir())
+    if not os.path.exists(paths['encoder']):
+        print(f"Encoder de acordes não encontrado em '{paths['encoder']}'. Para treinar: python train_model.py")
+        return None, None, None
+    encoder = joblib.load(paths['encoder'])
+    labels = [str(label) for label in encoder.classes_]
+    templates = None
+    if os.path.exists(paths['chroma_templates']):
+        with np.load(paths['chroma_templates']) as data:
+            if list(data['labels']) == labels:
+                templates = data['templates']
+            else:
+                print("Moldes de cromagrama de outro conjunto de rótulos; usando os moldes teóricos.")
+    try:
+        model = ChromaChordModel(labels, templates)
+    except ValueError as e:
+        print(f"{e}. Gere os moldes a partir do dataset: python chroma_recognizer.py --fit")
+        return None, None, None
+    print(f"Reconhecedor por cromagrama carregado ({len(labels)} acordes, moldes "
+          f"{'do dataset' if templates is not None else 'teóricos'}).")
+    return model, encoder, IdentityScaler()
+
+
+def _load_file_audio(file_path, sample_rate=SAMPLE_RATE):
+    import librosa
+
+    audio, _ = librosa.load(file_path, sr=sample_rate, mono=True)
+    return audio
+
+
+def fit_templates(dataset_path, labels, sample_rate=SAMPLE_RATE):
+    """Moldes aprendidos: o cromagrama médio (norma 1) dos arquivos de cada rótulo do dataset."""
+    from train_model import _list_dataset_files
+
+    filterbank = chroma_filterbank(sample_rate)
+    sums = {label: np.zeros(12, dtype=np.float64) for label in labels}
+    for label, file_path in _list_dataset_files(dataset_path)[1]:
+        if label in sums:
+            profile = chromagram(_load_file_audio(file_path, sample_rate), filterbank).mean(axis=1)
+            sums[label] += profile / max(np.linalg.norm(profile), 1e-10)
+    templates = np.stack([sums[label] for label in labels]).astype(np.float32)
+    return templates / np.maximum(np.linalg.norm(templates, axis=1, keepdims=True), 1e-10)
+
+
+def dataset_test_files(dataset_path):
+    """Arquivos de teste do dataset: a mesma divisão 80/20 estratificada (random_state=42) do treino."""
+    from sklearn.model_selection import train_test_split
+    from train_model import _list_dataset_files
+
+    _, items = _list_dataset_files(dataset_path)
+    labels = [label for label, _ in items]
+    _, test_items = train_test_split(items, test_size=0.2, random_state=42, stratify=labels)
+    return test_items
+
+
+def _rss_mb():
+    # Memória residente atual do processo (Linux); None em outros sistemas
+    try:
+        with open('/proc/self/status', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def _evaluate_backend(backend, model_dir, test_items, results):
+    # Roda em um processo novo (spawn): a memória medida é só a deste reconhecedor
+    from train_model import load_trained_model, predict_note
+
+    rss_start = _rss_mb()
+    start = time.perf_counter()
+    model, encoder, scaler = load_trained_model(backend=backend, train_if_missing=False, model_dir=model_dir)
+    load_seconds = time.perf_counter() - start
+    if model is None:
+        results.put({'backend': backend, 'error': 'modelo não carregado'})
+        return
+    rss_loaded = _rss_mb()
+    correct = 0
+    latencies = []
+    for label, file_path in test_items:
+        audio = _load_file_audio(file_path)
+        start = time.perf_counter()
+        predicted = predict_note(audio, model, encoder, scaler)
+        latencies.append(time.perf_counter() - start)
+        correct += predicted == label
+    latencies = np.asarray(latencies[1:] or latencies) * 1000
+    results.put({
+        'backend': backend,
+        'accuracy': correct / len(test_items),
+        'latency_p50_ms': float(np.percentile(latencies, 50)),
+        'latency_p95_ms': float(np.percentile(latencies, 95)),
+        'load_seconds': load_seconds,
+        'rss_model_mb': rss_loaded - rss_start if rss_start is not None else None,
+        'rss_total_mb': _rss_mb(),
+    })
+
+
+def compare_backends(backends, dataset_path, model_dir=None, out_path=None):
+    """
+    Compara reconhecedores no conjunto de teste do dataset: acurácia por arquivo,
+    latência do predict_note (features + modelo, mediana e p95), tempo de carga e
+    memória (RSS). Cada backend roda em um processo próprio para a memória de um
+    (ex.: TensorFlow) não contaminar a medida do outro.
+    """
+    import multiprocessing
+
+    model_dir = model_dir or current_model_dir()
+    test_items = dataset_test_files(dataset_path)
+    context = multiprocessing.get_context('spawn')
+    rows = []
+    for backend in backends:
+        results = context.Queue()
+        process = context.Process(target=_evaluate_backend, args=(backend, model_dir, test_items, results))
+        process.start()
+        rows.append(results.get())
+        process.join()
+
+    print(f"\n{len(test_items)} arquivos de teste")
+    print(f"{'backend':<8} {'acurácia':>9} {'latência p50':>13} {'p95':>9} {'carga':>8} {'RSS modelo':>11} {'RSS total':>10}")
+    for row in rows:
+        if 'error' in row:
+            print(f"{row['backend']:<8} {row['error']}")
+            continue
+        print(f"{row['backend']:<8} {row['accuracy']:9.4f} {row['latency_p50_ms']:10.2f} ms {row['latency_p95_ms']:6.2f} ms "
+              f"{row['load_seconds']:6.2f} s {row['rss_model_mb'] or 0:8.0f} MB {row['rss_total_mb'] or 0:7.0f} MB")
+    out_path = out_path or artifact_paths(model_dir)['chroma_report']
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump({'test_files': len(test_items), 'backends': rows}, f, indent=2)
+    print(f"Relatório salvo em: {out_path}")
+    return rows
+
+
+def main():
+    from train_model import DATASET_PATH
+
+    parser = argparse.ArgumentParser(description="Reconhecedor de acordes por cromagrama (sem TensorFlow).")
+    parser.add_argument('--fit', action='store_true', help="aprende os moldes dos acordes a partir do dataset")
+    parser.add_argument('--compare', nargs='*', metavar='BACKEND',
+                        help="compara com outros backends no conjunto de teste (padrão: chroma keras)")
+    parser.add_argument('--dataset', default=DATASET_PATH)
+    parser.add_argument('--model-dir', default=None, help="versão do modelo (padrão: a atual)")
+    args = parser.parse_args()
+
+    model_dir = args.model_dir or current_model_dir()
+    if args.fit:
+        import joblib
+
+        labels = [str(label) for label in joblib.load(artifact_paths(model_dir)['encoder']).classes_]
+        templates = fit_templates(args.dataset, labels)
+        path = artifact_paths(model_dir)['chroma_templates']
+        np.savez(path, labels=np.array(labels), templates=templates)
+        print(f"Moldes de {len(labels)} acordes salvos em: {path}")
+    if args.compare is not None:
+        compare_backends(args.compare or ['chroma', 'keras'], args.dataset, model_dir)
+    if not args.fit and args.compare is None:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+
+FEATURE_CACHE_DIR = 'feature_cache'
+PARAMS_FILENAME = 'params.json'
+SOURCE_FILENAME = 'source.txt'
+# Conjuntos de parâmetros mantidos lado a lado (ex.: treino padrão e com --live-window);
+# acima disso, o usado há mais tempo é removido
+MAX_PARAMS_DIRS = int(os.environ.get('VIOLAO_FEATURE_CACHE_MAX_PARAMS', '4'))
+
+
+class FeatureCache:
+    """
+    Cache em disco das features (MFCC) extraídas de cada arquivo .wav.
+
+    Cada entrada é endereçada pelo caminho absoluto, tamanho e mtime do arquivo,
+    dentro de um subdiretório que identifica os parâmetros de extração e, nele, de
+    um subdiretório por pasta de origem dos arquivos. Cada conjunto de parâmetros
+    fica no seu subdiretório; só os `max_params_dirs` usados mais recentemente são mantidos.
+    """
+
+    def __init__(self, params, cache_dir=FEATURE_CACHE_DIR, max_params_dirs=MAX_PARAMS_DIRS):
+        self.params = dict(params)
+        self.cache_dir = cache_dir
+        params_json = json.dumps(self.params, sort_keys=True)
+        self.params_key = hashlib.sha1(params_json.encode('utf-8')).hexdigest()[:16]
+        self.root = os.path.join(cache_dir, self.params_key)
+        self.max_params_dirs = max(int(max_params_dirs), 1)
+        self.hits = 0
+        self.misses = 0
+        self._touched = set()
+        self._source_dirs = {}
+
+        os.makedirs(self.root, exist_ok=True)
+        # Reescrever params.json também marca este conjunto como o usado mais recentemente
+        with open(os.path.join(self.root, PARAMS_FILENAME), 'w', encoding='utf-8') as f:
+            f.write(params_json)
+        self._evict_old_params()
+
+    def _evict_old_params(self):
+        used = []
+        for entry in os.listdir(self.cache_dir):
+            params_path = os.path.join(self.cache_dir, entry, PARAMS_FILENAME)
+            if entry != self.params_key and os.path.isfile(params_path):
+                used.append((os.path.getmtime(params_path), entry))
+        for _, entry in sorted(used, reverse=True)[self.max_params_dirs - 1:]:
+            entry_path = os.path.join(self.cache_dir, entry)
+            print(f"Cache de features removido (parâmetros usados há mais tempo): {entry_path}")
+            shutil.rmtree(entry_path, ignore_errors=True)
+
+    def _source_dir(self, file_path):
+        # Entradas agrupadas pela pasta do arquivo, para que prune() só mexa nas pastas do dataset lido
+        directory = os.path.dirname(os.path.abspath(file_path))
+        source_dir = self._source_dirs.get(directory)
+        if source_dir is None:
+            digest = hashlib.sha1(directory.encode('utf-8')).hexdigest()[:16]
+            source_dir = self._source_dirs[directory] = os.path.join(self.root, digest)
+        return source_dir
+
+    def _entry_path(self, file_path):
+        stat = os.stat(file_path)
+        raw_key = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        digest = hashlib.sha1(raw_key.encode('utf-8')).hexdigest()
+        return os.path.join(self._source_dir(file_path), digest[:2], digest + '.npy')
+
+    def get(self, file_path):
+        """
+        Retorna (encontrado, features). Features vazias no cache representam
+        arquivos que não geraram features (por exemplo, áudio curto demais).
+        """
+        entry_path = self._entry_path(file_path)
+        self._touched.add(entry_path)
+        if not os.path.exists(entry_path):
+            self.misses += 1
+            return False, None
+        try:
+            features = np.load(entry_path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, (features if features.size > 0 else None)
+
+    def put(self, file_path, features):
+        entry_path = self._entry_path(file_path)
+        self._touched.add(entry_path)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        source_path = os.path.join(self._source_dir(file_path), SOURCE_FILENAME)
+        if not os.path.exists(source_path):
+            with open(source_path, 'w', encoding='utf-8') as f:
+                f.write(os.path.dirname(os.path.abspath(file_path)))
+        data = features if features is not None else np.empty((0,), dtype=np.float32)
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, data)
+        os.replace(tmp_path, entry_path)
+
+    def prune(self, dataset_path):
+        """
+        Remove as entradas não utilizadas nesta sessão (arquivos apagados ou
+        modificados), só das pastas dentro de `dataset_path`: as de outros datasets ficam.
+        """
+        dataset_root = os.path.abspath(dataset_path)
+        removed = 0
+        for entry in os.listdir(self.root):
+            source_dir = os.path.join(self.root, entry)
+            try:
+                with open(os.path.join(source_dir, SOURCE_FILENAME), encoding='utf-8') as f:
+                    directory = f.read()
+            except OSError:
+                continue
+            if os.path.commonpath([directory, dataset_root]) != dataset_root:
+                continue
+            kept = 0
+            for dirpath, _, filenames in os.walk(source_dir):
+                for filename in filenames:
+                    if not filename.endswith('.npy'):
+                        continue
+                    entry_path = os.path.join(dirpath, filename)
+                    if entry_path in self._touched:
+                        kept += 1
+                    else:
+                        os.remove(entry_path)
+                        removed += 1
+            if kept == 0:
+                # Pasta do dataset removida (ou sem nenhum arquivo atual)
+                shutil.rmtree(source_dir, ignore_errors=True)
+        return removed
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,154 @@
+import functools
+
+import numpy as np
+import scipy.fft
+import librosa
+
+SAMPLE_RATE = 22050
+N_MFCC = 40
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MELS = 128
+TOP_DB = 80.0
+AMIN = 1e-10
+# Quadros STFT por passada vetorizada: limita os intermediários dos lotes grandes (~80 MB com n_fft=2048)
+MAX_BATCH_FRAMES = 4096
+# Entra nos parâmetros do cache de features: mudar o cálculo invalida as features salvas
+FEATURE_EXTRACTOR_VERSION = 1
+
+
+class FeatureExtractor:
+    """
+    MFCC equivalente a `librosa.feature.mfcc` (STFT centrada com zeros, janela
+    Hann, banco mel, dB com top_db por clipe e DCT ortonormal), com a janela, o
+    banco mel e a base da DCT calculados uma única vez.
+
+    `mfcc_batch` processa um lote (clipes, amostras) de uma vez; por padrão tudo
+    é feito em float32 (como o librosa faz com áudio float32).
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, n_mfcc=N_MFCC, n_fft=N_FFT, hop_length=HOP_LENGTH,
+                 n_mels=N_MELS, top_db=TOP_DB, dtype=np.float32):
+        self.sample_rate = sample_rate
+        self.n_mfcc = n_mfcc
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_mels = n_mels
+        self.top_db = top_db
+        self.dtype = np.dtype(dtype)
+
+        self.fft_window = librosa.filters.get_window('hann', n_fft, fftbins=True).astype(self.dtype)
+        self.mel_basis_t = np.ascontiguousarray(librosa.filters.mel(sr=sample_rate, n_fft=n_fft, n_mels=n_mels).T,
+                                                dtype=self.dtype)
+        self.dct_basis_t = np.ascontiguousarray(scipy.fft.dct(np.eye(n_mels), type=2, norm='ortho', axis=0)[:n_mfcc].T,
+                                                dtype=self.dtype)
+
+    def n_frames(self, n_samples):
+        return 1 + n_samples // self.hop_length
+
+    def mel_db(self, frames):
+        """Espectro mel em dB (..., n_mels) de quadros (..., n_fft) já recortados."""
+        spectrum = scipy.fft.rfft(frames * self.fft_window, axis=-1)
+        power = np.square(spectrum.real) + np.square(spectrum.imag)
+        mel = power @ self.mel_basis_t
+        return 10.0 * np.log10(np.maximum(mel, self.dtype.type(AMIN)))
+
+    def dct(self, mel_db):
+        """Coeficientes MFCC (..., n_mfcc) a partir do espectro mel em dB (..., n_mels)."""
+        return mel_db @ self.dct_basis_t
+
+    def mfcc_batch(self, audio, max_pad_len=None):
+        """
+        MFCC de um lote (clipes, amostras) de mesmo tamanho, retornado como
+        (clipes, n_mfcc, quadros). Com max_pad_len, os quadros são cortados ou
+        completados com zeros até esse tamanho (como em extract_features).
+        """
+        audio = np.asarray(audio, dtype=self.dtype)
+        n_clips, n_samples = audio.shape
+        n_frames = self.n_frames(n_samples)
+        out_frames = n_frames if max_pad_len is None else max_pad_len
+        mfccs = np.zeros((n_clips, self.n_mfcc, out_frames), dtype=self.dtype)
+        kept = min(n_frames, out_frames)
+
+        pad = self.n_fft // 2
+        chunk = max(1, MAX_BATCH_FRAMES // n_frames)
+        for start in range(0, n_clips, chunk):
+            padded = np.pad(audio[start:start + chunk], ((0, 0), (pad, pad)))
+            frames = np.lib.stride_tricks.sliding_window_view(padded, self.n_fft, axis=1)[:, ::self.hop_length]
+            mel_db = self.mel_db(frames)
+            if self.top_db is not None:
+                # top_db relativo ao máximo de cada clipe (inclusive quadros que serão cortados)
+                mel_db = np.maximum(mel_db, mel_db.max(axis=(1, 2), keepdims=True) - self.dtype.type(self.top_db))
+            mfccs[start:start + chunk, :, :kept] = np.swapaxes(self.dct(mel_db[:, :kept]), 1, 2)
+        return mfccs
+
+    def mfcc_windows(self, audio, starts, window_samples, max_pad_len=None):
+        """
+        MFCC (janelas, n_mfcc, quadros) das janelas audio[start:start + window_samples]
+        de um áudio longo, igual a mfcc_batch das janelas recortadas, mas sem
+        recortá-las: os quadros internos são calculados uma única vez para o áudio e
+        fatiados por janela; só os quadros das bordas (que dependem do preenchimento
+        com zeros) são calculados por janela. Os `starts` precisam estar na mesma
+        grade de hop_length.
+        """
+        audio = np.asarray(audio, dtype=self.dtype)
+        starts = np.asarray(starts, dtype=np.int64)
+        hop, pad = self.hop_length, self.n_fft // 2
+        n_frames = self.n_frames(window_samples)
+        # Quadros t da janela com suporte [t * hop - pad, t * hop + pad) inteiro dentro dela
+        head = -(-pad // hop)
+        tail = (window_samples - pad) // hop + 1
+        tail_start = tail * hop - pad
+        if len(starts) == 0 or head >= tail or tail_start < 0:
+            windows = np.lib.stride_tricks.sliding_window_view(audio, window_samples)[starts]
+            return self.mfcc_batch(windows, max_pad_len=max_pad_len)
+
+        origin = int(starts.min())
+        if np.any((starts - origin) % hop):
+            raise ValueError("As janelas precisam começar na mesma grade de hop_length.")
+        first = (starts - origin) // hop
+
+        # Quadro global g centrado na amostra origin + g * hop (só os que são internos a alguma janela)
+        n_global = int(first.max()) + tail
+        interior = np.empty((n_global, self.n_mels), dtype=self.dtype)
+        for block_start in range(head, n_global, MAX_BATCH_FRAMES):
+            block_end = min(block_start + MAX_BATCH_FRAMES, n_global)
+            segment = audio[origin + block_start * hop - pad:origin + (block_end - 1) * hop + pad]
+            interior[block_start:block_end] = self.mel_db(
+                np.lib.stride_tricks.sliding_window_view(segment, self.n_fft)[::hop])
+
+        out_frames = n_frames if max_pad_len is None else max_pad_len
+        mfccs = np.zeros((len(starts), self.n_mfcc, out_frames), dtype=self.dtype)
+        kept = min(n_frames, out_frames)
+        head_len = (head - 1) * hop + self.n_fft
+        head_samples = min(head_len - pad, window_samples)
+        tail_len = (n_frames - 1 - tail) * hop + self.n_fft
+        tail_samples = window_samples - tail_start
+        group = max(1, MAX_BATCH_FRAMES // n_frames)
+        for start in range(0, len(starts), group):
+            window_starts = starts[start:start + group, np.newaxis]
+            mel_db = np.empty((len(window_starts), n_frames, self.n_mels), dtype=self.dtype)
+            mel_db[:, head:tail] = interior[first[start:start + group, np.newaxis] + np.arange(head, tail)]
+
+            edge = np.zeros((len(window_starts), head_len), dtype=self.dtype)
+            edge[:, pad:pad + head_samples] = audio[window_starts + np.arange(head_samples)]
+            mel_db[:, :head] = self.mel_db(np.lib.stride_tricks.sliding_window_view(edge, self.n_fft, axis=1)[:, ::hop])
+            if n_frames > tail:
+                edge = np.zeros((len(window_starts), tail_len), dtype=self.dtype)
+                edge[:, :tail_samples] = audio[window_starts + tail_start + np.arange(tail_samples)]
+                mel_db[:, tail:] = self.mel_db(np.lib.stride_tricks.sliding_window_view(edge, self.n_fft, axis=1)[:, ::hop])
+
+            if self.top_db is not None:
+                mel_db = np.maximum(mel_db, mel_db.max(axis=(1, 2), keepdims=True) - self.dtype.type(self.top_db))
+            mfccs[start:start + group, :, :kept] = np.swapaxes(self.dct(mel_db[:, :kept]), 1, 2)
+        return mfccs
+
+    def mfcc(self, audio, max_pad_len=None):
+        """MFCC (n_mfcc, quadros) de um único clipe."""
+        return self.mfcc_batch(np.asarray(audio)[np.newaxis], max_pad_len)[0]
+
+
+@functools.lru_cache(maxsize=None)
+def get_feature_extractor(sample_rate=SAMPLE_RATE, n_mfcc=N_MFCC):
+    """Extrator compartilhado (imutável, seguro entre threads) para os parâmetros dados."""
+    return FeatureExtractor(sample_rate=sample_rate, n_mfcc=n_mfcc)
@@ -0,0 +1,191 @@
+import os
+import json
+import numpy as np
+
+FEATURE_STORE_DIR = 'feature_store'
+MANIFEST_FILENAME = 'manifest.json'
+# Tamanho máximo de cada shard: também é o máximo de features na memória durante o build
+SHARD_BYTES = 64 * 1024 * 1024
+
+
+class FeatureStore:
+    """
+    Features (MFCC) do dataset inteiro em shards .npy contíguos, mais um manifest
+    JSON com o rótulo, o shard e a posição das amostras de cada arquivo.
+
+    Os shards são abertos com np.load(mmap_mode='r') (np.memmap): ler as amostras
+    de um arquivo é só fatiar o shard, sem cópia. Gravações novas vão para shards
+    novos (os existentes nunca são reescritos); arquivos apagados ou modificados
+    ficam inativos no manifest e o shard é removido quando não tem mais nada ativo.
+    """
+
+    def __init__(self, root=FEATURE_STORE_DIR, params=None):
+        self.root = root
+        self.params = json.loads(json.dumps(params)) if params is not None else None
+        self.shards = []
+        self.files = []
+        self._memmaps = {}
+
+        manifest = self._read_manifest()
+        if manifest is not None:
+            if self.params is not None and manifest['params'] != self.params:
+                print(f"Feature store invalidado (parâmetros alterados): {root}")
+                self._remove_shards(shard['file'] for shard in manifest['shards'])
+            else:
+                self.params = manifest['params']
+                self.shards = manifest['shards']
+                self.files = manifest['files']
+        self._build_index()
+
+    def _manifest_path(self):
+        return os.path.join(self.root, MANIFEST_FILENAME)
+
+    def _read_manifest(self):
+        try:
+            with open(self._manifest_path(), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self):
+        tmp_path = f"{self._manifest_path()}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'params': self.params, 'shards': self.shards, 'files': self.files}, f)
+        os.replace(tmp_path, self._manifest_path())
+
+    def _remove_shards(self, filenames):
+        for filename in filenames:
+            self._memmaps.pop(filename, None)
+            try:
+                os.remove(os.path.join(self.root, filename))
+            except OSError:
+                pass
+
+    def _build_index(self):
+        # Índices por amostra (só arquivos ativos): rótulo e arquivo de origem
+        active = [i for i, entry in enumerate(self.files) if entry['active'] and entry['samples'] > 0]
+        self.file_ids = np.array(active, dtype=np.int64)
+        counts = [self.files[i]['samples'] for i in active]
+        self.groups = np.repeat(self.file_ids, counts)
+        self.labels = np.array([self.files[i]['label'] for i in self.groups])
+
+    def __len__(self):
+        return len(self.groups)
+
+    def entries(self):
+        """(rótulo, id do arquivo, amostras) de cada arquivo ativo com features."""
+        return [(self.files[i]['label'], int(i), self.files[i]['samples']) for i in self.file_ids]
+
+    def _shard(self, filename):
+        if filename not in self._memmaps:
+            self._memmaps[filename] = np.load(os.path.join(self.root, filename), mmap_mode='r')
+        return self._memmaps[filename]
+
+    def file_samples(self, file_id):
+        """Amostras (n, n_mfcc, quadros) de um arquivo: uma view do memmap, sem cópia."""
+        entry = self.files[file_id]
+        shard = self._shard(self.shards[entry['shard']]['file'])
+        return shard[entry['offset']:entry['offset'] + entry['samples']]
+
+    def take(self, file_ids):
+        """Todas as amostras dos arquivos dados, concatenadas num array (cópia)."""
+        return np.concatenate([self.file_samples(i) for i in file_ids])
+
+    def update(self, items, featurize):
+        """
+        Sincroniza o store com a lista [(rótulo, caminho)]: arquivos novos ou
+        modificados são processados por `featurize(caminhos)` (gerador de
+        (posição, features)) e gravados em shards novos. Retorna (adicionados, removidos).
+        """
+        os.makedirs(self.root, exist_ok=True)
+        current = {}
+        for label, file_path in items:
+            stat = os.stat(file_path)
+            current[os.path.abspath(file_path)] = (label, stat.st_size, stat.st_mtime_ns)
+
+        known = set()
+        removed = 0
+        for entry in self.files:
+            if not entry['active']:
+                continue
+            if current.get(entry['path']) == (entry['label'], entry['size'], entry['mtime_ns']):
+                known.add(entry['path'])
+            else:
+                entry['active'] = False
+                removed += 1
+        pending = [path for path in current if path not in known]
+
+        buffer = []
+        buffered_bytes = 0
+        for position, features in featurize(pending):
+            path = pending[position]
+            label, size, mtime_ns = current[path]
+            samples = 0 if features is None else len(features)
+            if samples and buffered_bytes + features.nbytes > SHARD_BYTES and buffer:
+                self._flush_shard(buffer)
+                buffer, buffered_bytes = [], 0
+            entry = {'path': path, 'label': label, 'size': size, 'mtime_ns': mtime_ns,
+                     'shard': None, 'offset': 0, 'samples': samples, 'active': True}
+            self.files.append(entry)
+            if samples:
+                buffer.append((entry, features))
+                buffered_bytes += features.nbytes
+        if buffer:
+            self._flush_shard(buffer)
+
+        self._drop_empty_shards()
+        self._write_manifest()
+        self._build_index()
+        return len(pending), removed
+
+    def _flush_shard(self, buffer):
+        filename = f"shard_{len(self.shards):05d}.npy"
+        while any(shard['file'] == filename for shard in self.shards):
+            filename = f"shard_{int(filename[6:11]) + 1:05d}.npy"
+        data = np.concatenate([features for _, features in buffer]).astype(np.float32, copy=False)
+        offset = 0
+        for entry, features in buffer:
+            entry['shard'] = len(self.shards)
+            entry['offset'] = offset
+            offset += len(features)
+        tmp_path = os.path.join(self.root, f"{filename}.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.save(f, data)
+        os.replace(tmp_path, os.path.join(self.root, filename))
+        self.shards.append({'file': filename, 'samples': len(data)})
+
+    def _drop_empty_shards(self):
+        # Shards sem nenhum arquivo ativo são apagados e os índices renumerados
+        in_use = {entry['shard'] for entry in self.files if entry['active'] and entry['shard'] is not None}
+        keep = [i for i in range(len(self.shards)) if i in in_use]
+        if len(keep) == len(self.shards):
+            return
+        self._remove_shards(self.shards[i]['file'] for i in range(len(self.shards)) if i not in in_use)
+        renumber = {old: new for new, old in enumerate(keep)}
+        self.shards = [self.shards[i] for i in keep]
+        self.files = [entry for entry in self.files if entry['active']]
+        for entry in self.files:
+            if entry['shard'] is not None:
+                entry['shard'] = renumber[entry['shard']]
+
+    def stats(self):
+        return {
+            'shards': len(self.shards),
+            'files': len(self.file_ids),
+            'samples': len(self),
+            'inactive_samples': sum(entry['samples'] for entry in self.files if not entry['active']),
+        }
+
+
+if __name__ == '__main__':
+    import argparse
+    from train_model import build_feature_store, LIVE_WINDOW_SECONDS
+
+    parser = argparse.ArgumentParser(description="Cria ou atualiza o feature store (shards .npy) a partir do dataset.")
+    parser.add_argument('--live-window', action='store_true', help="Features com o tamanho da janela ao vivo.")
+    parser.add_argument('--workers', type=int, default=None, help="Processos para extração de features (padrão: número de CPUs).")
+    parser.add_argument('--store-dir', default=FEATURE_STORE_DIR)
+    args = parser.parse_args()
+    store = build_feature_store(store_dir=args.store_dir, workers=args.workers,
+                                window_seconds=LIVE_WINDOW_SECONDS if args.live_window else None)
+    print(store.stats())
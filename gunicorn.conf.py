@@ -0,0 +1,25 @@
+# Uso: gunicorn -c gunicorn.conf.py app:app
+import os
+
+bind = '0.0.0.0:5000'
+# Com mais de um worker o estado do reconhecimento fica compartilhado entre eles
+# (VIOLAO_STATE_BACKEND=shared): um worker roda a captura e a inferência e todos
+# respondem /get_note, /note_stream, /start_recognition e /stop_recognition;
+# /admin e /train são encaminhados ao dono.
+workers = int(os.environ.get('VIOLAO_WORKERS', '1'))
+threads = 8
+# Cada /note_stream prende uma dessas threads: acima de metade delas o stream
+# responde 503 e o navegador volta ao polling do /get_note.
+os.environ.setdefault('VIOLAO_SSE_MAX_STREAMS', str(threads // 2))
+if workers > 1:
+    os.environ.setdefault('VIOLAO_STATE_BACKEND', 'shared')
+
+
+def post_worker_init(worker):
+    # O worker sobe sem esperar o TensorFlow; o modelo carrega em segundo plano
+    # e /ready responde 503 até terminar.
+    import app
+    # O primeiro worker a subir fica com a captura, o modelo e o treino (os outros
+    # assumem se ele morrer); os demais não importam o TensorFlow
+    if app.is_state_owner():
+        app.start_model_loading()
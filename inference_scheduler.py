@@ -0,0 +1,143 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+MAX_BATCH_SIZE = 64
+MAX_LATENCY_SECONDS = 0.010
+
+
+class InferenceScheduler:
+    """
+    Agrupa as janelas de features enviadas por várias sessões de reconhecimento em
+    um único `model.predict`. Um lote é executado quando atinge `max_batch_size`,
+    quando todas as sessões ativas já enviaram sua janela (`expected_clients`) ou
+    quando a primeira janela pendente espera mais que `max_latency` segundos.
+
+    Expõe `predict`, `input_shape` e `window_features` como o modelo, então pode
+    ser passado no lugar dele para `predict_note`.
+    """
+
+    def __init__(self, model, max_batch_size=MAX_BATCH_SIZE, max_latency=MAX_LATENCY_SECONDS):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.expected_clients = 1
+        self.batches = 0
+        self.requests = 0
+        self._pending = []
+        self._condition = threading.Condition()
+        self._running = False
+        self._retired = False
+        self._thread = None
+
+    @property
+    def input_shape(self):
+        return getattr(self.model, 'input_shape', None)
+
+    @property
+    def window_features(self):
+        return self.model.window_features if hasattr(type(self.model), 'window_features') else None
+
+    def start(self):
+        with self._condition:
+            if self._running:
+                return self
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name='inference-scheduler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, drain=False):
+        """
+        Para a thread do agendador. Com drain=True (troca de modelo) as janelas já
+        na fila ainda são preditas, e as enviadas depois do stop são preditas
+        direto no modelo, sem lote: quem pegou este agendador antes da troca não
+        perde a predição.
+        """
+        with self._condition:
+            self._running = False
+            self._retired = drain
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def set_expected_clients(self, count):
+        with self._condition:
+            self.expected_clients = max(1, int(count))
+            self._condition.notify_all()
+
+    def submit(self, features_batch):
+        """Enfileira um lote (normalmente de 1 janela) e retorna um Future com as probabilidades."""
+        future = Future()
+        with self._condition:
+            if self._running:
+                self._pending.append((np.asarray(features_batch), future, time.perf_counter()))
+                self._condition.notify_all()
+                return future
+            if not self._retired:
+                raise RuntimeError("InferenceScheduler não está em execução")
+        future.set_result(self.model.predict(np.asarray(features_batch), verbose=0))
+        return future
+
+    def predict(self, x, verbose=0, timeout=None):
+        return self.submit(x).result(timeout=timeout)
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'mean_batch_size': self.requests / self.batches if self.batches else 0.0,
+        }
+
+    def _collect_batch(self):
+        with self._condition:
+            while self._running and not self._pending:
+                self._condition.wait()
+            if not self._running and not (self._retired and self._pending):
+                return []
+            deadline = self._pending[0][2] + self.max_latency
+            while self._running:
+                pending_rows = sum(len(item[0]) for item in self._pending)
+                if pending_rows >= self.max_batch_size or len(self._pending) >= self.expected_clients:
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._condition.wait(timeout=remaining)
+
+            batch = []
+            rows = 0
+            while self._pending and (not batch or rows + len(self._pending[0][0]) <= self.max_batch_size):
+                item = self._pending.pop(0)
+                rows += len(item[0])
+                batch.append(item)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            if not batch:
+                # Só acontece depois de stop(): falha as janelas que ainda estavam na fila
+                with self._condition:
+                    for _, future, _ in self._pending:
+                        future.set_exception(RuntimeError("InferenceScheduler parado"))
+                    self._pending.clear()
+                return
+
+            inputs = [item[0] for item in batch]
+            try:
+                outputs = self.model.predict(np.concatenate(inputs), verbose=0)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.requests += len(batch)
+            offset = 0
+            for features, future, _ in batch:
+                future.set_result(outputs[offset:offset + len(features)])
+                offset += len(features)
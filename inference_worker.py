@@ -0,0 +1,352 @@
+import multiprocessing
+import queue
+import threading
+import time
+
+import metrics
+from audio_capture import SAMPLE_RATE, RECORD_DURATION
+from feature_extractor import N_MFCC
+from recognition import PREDICTION_HOP_SECONDS
+from ring_buffer import SharedRingBuffer
+from similarity_gate import SimilarityGate
+from streaming_features import StreamingMFCC
+from train_model import predict_note, model_input_frames, model_window_features
+
+# Sem nenhuma predição por este tempo enquanto há áudio novo no buffer, o worker é
+# considerado travado: o processo é encerrado e reiniciado
+HANG_TIMEOUT_SECONDS = 10.0
+# Espera antes de reiniciar um worker que caiu; dobra a cada queda seguida até o máximo
+RESTART_BACKOFF_SECONDS = 0.5
+RESTART_BACKOFF_MAX_SECONDS = 30.0
+# Um worker que ficou de pé por este tempo zera a contagem de quedas seguidas
+STABLE_RUN_SECONDS = 30.0
+MONITOR_POLL_SECONDS = 0.1
+AUDIO_WAIT_TIMEOUT_SECONDS = 0.25
+# Resultados pendentes por sessão; um consumidor atrasado perde os mais antigos
+SUBSCRIBER_QUEUE_SIZE = 64
+
+WORKER_PREDICTION = metrics.registry.histogram(
+    'worker_prediction_seconds', "MFCC + predição de um hop no worker de inferência (medido no worker)")
+WORKER_RESTARTS = metrics.registry.counter('inference_worker_restarts_total', "Reinícios do worker de inferência")
+
+
+def load_worker_model(version, backend):
+    """Carregador padrão do worker: a versão `version` do registro de modelos, já aquecida."""
+    import model_registry
+    from train_model import load_trained_model, warm_up_model
+
+    model, encoder, scaler = load_trained_model(backend=backend, train_if_missing=False,
+                                                model_dir=model_registry.version_dir(version))
+    if model is None:
+        raise RuntimeError(f"Modelo da versão {version} não encontrado.")
+    warm_up_model(model, encoder, scaler)
+    return model, encoder, scaler
+
+
+def _prediction_loop(ring, config, state, send, stop_event, streaming_mfcc):
+    # Mesmo caminho do loop em processo (MFCC incremental, SimilarityGate, predict_note),
+    # mas uma única predição por hop, compartilhada por todas as sessões
+    hop_samples = config['hop_samples']
+    gate = SimilarityGate(config['similarity_threshold'], config['max_reuse']) if config['similarity_threshold'] > 0 else None
+    model = reader = None
+    resets = None
+    overruns = 0
+    # O StreamingMFCC só é alimentado enquanto o modelo usa MFCC; ao voltar a usar, recomeça da janela atual
+    mfcc_stale = False
+    while not stop_event.is_set():
+        if ring.resets != resets:
+            # Nova gravação: recomeça do cursor atual com o histórico de features zerado
+            resets = ring.resets
+            reader = ring.reader()
+            overruns = 0
+            streaming_mfcc.reset()
+            mfcc_stale = False
+            if gate is not None:
+                gate.reset()
+        if not reader.wait(hop_samples, timeout=AUDIO_WAIT_TIMEOUT_SECONDS):
+            continue
+        current = state['model']
+        if current[0] is not model:
+            model, encoder, scaler = current
+            input_frames = model_input_frames(model)
+            # Modelos com features próprias (cromagrama) só usam o áudio da janela
+            uses_mfcc = model_window_features(model) is None
+            if gate is not None:
+                gate.reset()
+
+        start = time.perf_counter()
+        samples, dropped_hops = reader.read_hops(hop_samples)
+        if uses_mfcc:
+            if mfcc_stale:
+                streaming_mfcc.reset()
+                streaming_mfcc.push(ring.window(reader.cursor, config['window_samples']))
+                mfcc_stale = False
+            else:
+                streaming_mfcc.push(samples)
+            window = streaming_mfcc.window_audio()
+            features = streaming_mfcc.features(max_pad_len=input_frames)
+        else:
+            window = ring.window(reader.cursor, config['window_samples'])
+            features = None
+            mfcc_stale = True
+        chord = predict_note(window, model, encoder, scaler, sample_rate=config['sample_rate'],
+                             n_mfcc=config['n_mfcc'], max_pad_len=input_frames, features=features, gate=gate)
+        send(('result', {
+            'cursor': reader.cursor,
+            'chord': chord,
+            'dropped_hops': dropped_hops,
+            'overruns': reader.overruns - overruns,
+            'seconds': time.perf_counter() - start,
+        }))
+        overruns = reader.overruns
+
+
+def worker_main(ring_name, capacity, dtype, config, loader, version, results, control):
+    """
+    Processo do worker: abre o buffer de captura compartilhado, carrega o modelo com
+    `loader(version, backend)` e envia uma predição por hop pela conexão `results`.
+    Comandos chegam por `control`: ('load', versão) troca o modelo sem parar o loop;
+    ('stop',) ou o fechamento da conexão encerram o worker.
+    """
+    ring = SharedRingBuffer.attach(ring_name, capacity, dtype)
+    send_lock = threading.Lock()
+    stop_event = threading.Event()
+    state = {}
+
+    def send(message):
+        with send_lock:
+            results.send(message)
+
+    def load(new_version):
+        start = time.perf_counter()
+        state['model'] = loader(new_version, config['backend'])
+        send(('ready', new_version, time.perf_counter() - start))
+
+    def listen():
+        while True:
+            try:
+                command = control.recv()
+            except (EOFError, OSError):
+                break
+            if command[0] == 'stop':
+                break
+            if command[0] == 'load':
+                try:
+                    load(command[1])
+                except Exception as e:
+                    # O modelo anterior continua em uso
+                    send(('error', f"Erro ao carregar a versão {command[1]} no worker: {e}"))
+        stop_event.set()
+
+    # Os filtros do MFCC levam ~1 s para montar: ficam prontos antes do 'ready', senão o
+    # primeiro hop pareceria um travamento
+    streaming_mfcc = StreamingMFCC(config['window_samples'], sample_rate=config['sample_rate'], n_mfcc=config['n_mfcc'])
+    try:
+        load(version)
+    except Exception as e:
+        send(('error', f"Erro ao carregar o modelo no worker: {e}"))
+        raise SystemExit(1)
+    threading.Thread(target=listen, name='inference-worker-control', daemon=True).start()
+    try:
+        _prediction_loop(ring, config, state, send, stop_event, streaming_mfcc)
+    finally:
+        ring.close()
+
+
+class InferenceWorker:
+    """
+    Supervisor (no processo web) do worker de inferência: um processo separado
+    (spawn) que calcula o MFCC e roda o modelo a cada hop de áudio, lendo o buffer
+    de captura direto da memória compartilhada (`SharedRingBuffer`). Assim a
+    extração de features e o TensorFlow não disputam o GIL com o callback do
+    PortAudio e as requisições do Flask.
+
+    As predições voltam por um Pipe e são distribuídas às sessões inscritas
+    (`subscribe`). Se o processo morre (ou para de responder com áudio chegando)
+    ele é reiniciado com espera crescente entre quedas seguidas.
+    """
+
+    def __init__(self, ring, version=None, loader=load_worker_model, hop_samples=int(SAMPLE_RATE * PREDICTION_HOP_SECONDS),
+                 window_samples=int(SAMPLE_RATE * RECORD_DURATION), sample_rate=SAMPLE_RATE, n_mfcc=N_MFCC,
+                 similarity_threshold=0.0, max_reuse=0, backend='keras',
+                 hang_timeout=HANG_TIMEOUT_SECONDS, restart_backoff=RESTART_BACKOFF_SECONDS):
+        self.ring = ring
+        self.version = version
+        self.loader = loader
+        self.config = {
+            'hop_samples': int(hop_samples),
+            'window_samples': int(window_samples),
+            'sample_rate': sample_rate,
+            'n_mfcc': n_mfcc,
+            'similarity_threshold': similarity_threshold,
+            'max_reuse': max_reuse,
+            'backend': backend,
+        }
+        self.hang_timeout = hang_timeout
+        self.restart_backoff = restart_backoff
+        self.ready = False
+        self.loaded_version = None
+        self.results = 0
+        self.restarts = 0
+        self.last_error = None
+        self._context = multiprocessing.get_context('spawn')
+        self._process = None
+        self._results = None
+        self._control = None
+        self._control_lock = threading.Lock()
+        self._subscribers = []
+        self._subscribers_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._monitor = None
+        self._consecutive_crashes = 0
+        self._started_at = None
+        self._last_result_at = None
+        self._last_cursor = 0
+
+    @property
+    def pid(self):
+        return self._process.pid if self._process is not None else None
+
+    def start(self):
+        if self._monitor is None:
+            self._spawn()
+            self._monitor = threading.Thread(target=self._run, name='inference-worker-monitor', daemon=True)
+            self._monitor.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        self._send_control(('stop',))
+        if self._monitor is not None and self._monitor is not threading.current_thread():
+            self._monitor.join(timeout=timeout)
+        self._shutdown_process(timeout)
+
+    def load(self, version):
+        """Troca a versão do modelo no worker; as predições continuam com a anterior até a nova carregar."""
+        self.version = version
+        self._send_control(('load', version))
+
+    def subscribe(self):
+        results = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._subscribers_lock:
+            self._subscribers.append(results)
+        return results
+
+    def unsubscribe(self, results):
+        with self._subscribers_lock:
+            if results in self._subscribers:
+                self._subscribers.remove(results)
+
+    def stats(self):
+        return {
+            'pid': self.pid,
+            'ready': self.ready,
+            'version': self.loaded_version,
+            'results': self.results,
+            'restarts': self.restarts,
+            'last_error': self.last_error,
+        }
+
+    def _send_control(self, command):
+        with self._control_lock:
+            if self._control is None:
+                return
+            try:
+                self._control.send(command)
+            except (OSError, ValueError):
+                # Processo já morreu: o monitor reinicia e o novo worker carrega self.version
+                pass
+
+    def _spawn(self):
+        results_recv, results_send = self._context.Pipe(duplex=False)
+        control_recv, control_send = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=worker_main, name='inference-worker', daemon=True,
+            args=(self.ring.name, self.ring.capacity, self.ring.dtype.str, self.config, self.loader, self.version,
+                  results_send, control_recv))
+        process.start()
+        # Sem as pontas do filho abertas aqui, a morte do worker aparece como EOF no recv
+        results_send.close()
+        control_recv.close()
+        with self._control_lock:
+            self._process, self._results, self._control = process, results_recv, control_send
+        self.ready = False
+        self._started_at = self._last_result_at = time.monotonic()
+        self._last_cursor = self.ring.written
+
+    def _shutdown_process(self, timeout):
+        process = self._process
+        if process is not None:
+            process.join(timeout=timeout)
+            if process.is_alive():
+                process.kill()
+                process.join(timeout=1)
+        with self._control_lock:
+            for connection in (self._results, self._control):
+                if connection is not None:
+                    connection.close()
+            self._results = self._control = None
+
+    def _hung(self):
+        # Só conta como travado se havia áudio para processar e nenhuma predição chegou
+        return (self.ready and self.ring.written > self._last_cursor + self.config['hop_samples']
+                and time.monotonic() - self._last_result_at > self.hang_timeout)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                if self._results.poll(MONITOR_POLL_SECONDS):
+                    self._handle(self._results.recv())
+                    continue
+            except (EOFError, OSError):
+                if not self._stop_event.is_set():
+                    self._restart(f"worker de inferência terminou (código {self._process.exitcode})")
+                continue
+            if not self._process.is_alive():
+                self._restart(f"worker de inferência terminou (código {self._process.exitcode})")
+            elif self._hung():
+                self._process.kill()
+                self._restart(f"worker de inferência sem resposta há mais de {self.hang_timeout:.0f} s")
+
+    def _handle(self, message):
+        kind = message[0]
+        if kind == 'result':
+            result = message[1]
+            self.results += 1
+            self._last_result_at = time.monotonic()
+            self._last_cursor = result['cursor']
+            WORKER_PREDICTION.observe(result['seconds'])
+            with self._subscribers_lock:
+                subscribers = list(self._subscribers)
+            for results in subscribers:
+                try:
+                    results.put_nowait(result)
+                except queue.Full:
+                    try:
+                        results.get_nowait()
+                    except queue.Empty:
+                        pass
+                    results.put_nowait(result)
+        elif kind == 'ready':
+            self.ready = True
+            self.loaded_version = message[1]
+            self._last_result_at = time.monotonic()
+            print(f"Worker de inferência (pid {self.pid}) pronto com a versão {message[1]} ({message[2]:.2f} s)")
+        elif kind == 'error':
+            self.last_error = message[1]
+            print(message[1])
+
+    def _restart(self, reason):
+        print(f"{reason}; reiniciando...")
+        self.last_error = reason
+        self.ready = False
+        self._shutdown_process(timeout=1)
+        if time.monotonic() - self._started_at > STABLE_RUN_SECONDS:
+            self._consecutive_crashes = 0
+        delay = min(self.restart_backoff * 2 ** self._consecutive_crashes, RESTART_BACKOFF_MAX_SECONDS)
+        self._consecutive_crashes += 1
+        if self._stop_event.wait(delay):
+            return
+        self._spawn()
+        self.restarts += 1
+        WORKER_RESTARTS.inc()
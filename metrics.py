@@ -0,0 +1,227 @@
+import bisect
+import math
+import os
+import threading
+import time
+
+# VIOLAO_METRICS=0 desliga a instrumentação: os objetos de métricas viram no-ops
+# e os timers não chamam nem o relógio.
+METRICS_ENABLED = os.environ.get('VIOLAO_METRICS', '1') != '0'
+METRICS_PREFIX = 'violao_'
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Limites dos buckets (segundos): progressão geométrica de 10 µs a ~20 s, erro relativo
+# máximo de ~12% nos percentis.
+DEFAULT_BUCKETS = tuple(1e-5 * 1.25 ** i for i in range(66))
+
+
+class Histogram:
+    """
+    Histograma com buckets fixos: observe() é uma busca binária e um incremento,
+    sem guardar as amostras. Os percentis são estimados pelos buckets.
+    """
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[idx] += 1
+            self.count += 1
+            self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+    def quantile(self, q):
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+        if total == 0:
+            return math.nan
+        rank = q * total
+        cumulative = 0
+        for idx, bucket_count in enumerate(counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                lower = self.buckets[idx - 1] if idx > 0 else 0.0
+                upper = self.buckets[idx] if idx < len(self.buckets) else self.buckets[-1]
+                # Interpolação linear dentro do bucket
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def render(self):
+        name = METRICS_PREFIX + self.name
+        lines = [f"# HELP {name} {self.help_text}", f"# TYPE {name} summary"]
+        for q in QUANTILES:
+            lines.append(f'{name}{{quantile="{q}"}} {_format(self.quantile(q))}')
+        lines.append(f"{name}_sum {_format(self.sum)}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Counter:
+    """Contador monotônico, opcionalmente com um rótulo (ex.: tipo de status do callback)."""
+
+    def __init__(self, name, help_text, label=None):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, label_value=None):
+        with self._lock:
+            self.values[label_value] = self.values.get(label_value, 0) + amount
+
+    def value(self, label_value=None):
+        return self.values.get(label_value, 0)
+
+    def render(self):
+        name = METRICS_PREFIX + self.name
+        lines = [f"# HELP {name} {self.help_text}", f"# TYPE {name} counter"]
+        values = dict(self.values) or {None: 0}
+        for label_value, value in sorted(values.items(), key=lambda item: str(item[0])):
+            labels = f'{{{self.label}="{label_value}"}}' if self.label and label_value is not None else ''
+            lines.append(f"{name}{labels} {_format(value)}")
+        return lines
+
+
+class Gauge:
+    """Valor instantâneo lido na hora da exportação (função sem argumentos)."""
+
+    def __init__(self, name, help_text, read):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+
+    def render(self):
+        name = METRICS_PREFIX + self.name
+        return [f"# HELP {name} {self.help_text}", f"# TYPE {name} gauge", f"{name} {_format(self.read())}"]
+
+
+class _NullMetric:
+    """Substitui qualquer métrica quando a instrumentação está desligada."""
+
+    count = 0
+    sum = 0.0
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1, label_value=None):
+        pass
+
+    def time(self):
+        return _NULL_TIMER
+
+    def quantile(self, q):
+        return math.nan
+
+    def value(self, label_value=None):
+        return 0
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+NULL_METRIC = _NullMetric()
+
+
+class MetricsRegistry:
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, name, factory):
+        if not self.enabled:
+            return NULL_METRIC
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = factory()
+            return self._metrics[name]
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(name, lambda: Histogram(name, help_text, buckets))
+
+    def counter(self, name, help_text, label=None):
+        return self._get_or_create(name, lambda: Counter(name, help_text, label))
+
+    def gauge(self, name, help_text, read):
+        return self._get_or_create(name, lambda: Gauge(name, help_text, read))
+
+    def collector(self, collect):
+        """Registra uma função chamada antes de cada exportação (ex.: para atualizar métricas acumuladas fora delas)."""
+        with self._lock:
+            self._collectors.append(collect)
+
+    def render(self):
+        """Todas as métricas no formato de texto do Prometheus."""
+        with self._lock:
+            collectors = list(self._collectors)
+        for collect in collectors:
+            collect()
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _format(value):
+    if isinstance(value, float) and math.isnan(value):
+        return 'NaN'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = MetricsRegistry()
+
+# Estágios do caminho quente, do áudio à nota exibida
+STAGE_CAPTURE_BACKLOG = registry.histogram(
+    'capture_backlog_seconds', "Áudio pendente no buffer quando o loop de predição acorda")
+STAGE_FEATURES = registry.histogram('features_seconds', "Extração de features (MFCC) por janela")
+STAGE_SCALER = registry.histogram('scaler_transform_seconds', "scaler.transform por janela")
+STAGE_MODEL = registry.histogram('model_predict_seconds', "model.predict por janela (inclui espera do micro-lote)")
+STAGE_STABILITY = registry.histogram('stability_filter_seconds', "Filtro de estabilidade por predição")
+LOOP_ITERATION = registry.histogram('loop_iteration_seconds', "Duração de uma iteração do loop de predição")
+LOOP_INTERVAL = registry.histogram('loop_interval_seconds', "Intervalo entre iterações do loop de predição (1/taxa)")
+LOOP_ITERATIONS = registry.counter('loop_iterations_total', "Iterações do loop de predição")
+AUDIO_CALLBACK = registry.histogram('audio_callback_seconds', "Duração do callback de captura do PortAudio")
+AUDIO_CALLBACKS = registry.counter('audio_callbacks_total', "Chamadas do callback de captura")
+AUDIO_CALLBACK_STATUS = registry.counter(
+    'audio_callback_status_total', "Flags de status do callback (overflow/underflow = xrun)", label='flag')
+GATE_CHECKS = registry.counter('prediction_gate_checks_total', "Janelas verificadas pelo SimilarityGate")
+GATE_REUSED = registry.counter('prediction_gate_reused_total', "Janelas que reaproveitaram a predição anterior")
@@ -0,0 +1,169 @@
+import os
+import shutil
+import time
+
+MODEL_DIR = 'trained_model'
+VERSIONS_DIRNAME = 'versions'
+CURRENT_FILENAME = 'CURRENT'
+
+# Arquivos de uma versão (os mesmos nomes do layout antigo, direto em trained_model/)
+ARTIFACT_FILENAMES = {
+    'model': 'chord_recognizer_cnn_model.h5',
+    'encoder': 'label_encoder_chords.joblib',
+    'scaler': 'scaler_chords.joblib',
+    'metadata': 'model_metadata.json',
+    'numpy': 'chord_recognizer_cnn_weights.npz',
+    'int8': 'chord_recognizer_cnn_int8.tflite',
+    'float16': 'chord_recognizer_cnn_float16.tflite',
+    'quantization_report': 'quantization_report.json',
+    'chroma_templates': 'chroma_templates.npz',
+    'chroma_report': 'chroma_report.json',
+}
+REQUIRED_ARTIFACTS = ('model', 'encoder', 'scaler')
+LEGACY_VERSION = 'legacy'
+
+
+def artifact_paths(model_dir):
+    return {key: os.path.join(model_dir, filename) for key, filename in ARTIFACT_FILENAMES.items()}
+
+
+def versions_root(root=MODEL_DIR):
+    return os.path.join(root, VERSIONS_DIRNAME)
+
+
+def version_dir(version, root=MODEL_DIR):
+    if version == LEGACY_VERSION:
+        return root
+    if not version or os.path.basename(version) != version or version.startswith('.'):
+        raise ValueError(f"Nome de versão inválido: {version!r}")
+    return os.path.join(versions_root(root), version)
+
+
+def is_complete(model_dir):
+    paths = artifact_paths(model_dir)
+    return all(os.path.exists(paths[key]) for key in REQUIRED_ARTIFACTS)
+
+
+def list_versions(root=MODEL_DIR):
+    """Versões completas (model + encoder + scaler), da mais antiga para a mais nova."""
+    base = versions_root(root)
+    if not os.path.isdir(base):
+        return []
+    return sorted(name for name in os.listdir(base)
+                  if not name.startswith('.') and is_complete(os.path.join(base, name)))
+
+
+def available_versions(root=MODEL_DIR):
+    """Versões que podem ser ativadas, incluindo 'legacy' quando há um modelo no layout antigo."""
+    versions = list_versions(root)
+    return [LEGACY_VERSION] + versions if is_complete(root) else versions
+
+
+def current_version(root=MODEL_DIR):
+    """Versão apontada por CURRENT; sem o ponteiro, os arquivos direto em trained_model/ ('legacy')."""
+    try:
+        with open(os.path.join(root, CURRENT_FILENAME), encoding='utf-8') as f:
+            version = f.read().strip()
+    except OSError:
+        return LEGACY_VERSION
+    return version or LEGACY_VERSION
+
+
+def current_model_dir(root=MODEL_DIR):
+    return version_dir(current_version(root), root)
+
+
+def create_version(root=MODEL_DIR):
+    """Cria o diretório de uma nova versão (nome com data/hora, ordenável). Não a ativa."""
+    base = versions_root(root)
+    os.makedirs(base, exist_ok=True)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    name, suffix = stamp, 1
+    while True:
+        try:
+            os.makedirs(os.path.join(base, name))
+            return name
+        except FileExistsError:
+            suffix += 1
+            name = f"{stamp}-{suffix}"
+
+
+def activate(version, root=MODEL_DIR):
+    """Aponta CURRENT para a versão (troca atômica do arquivo)."""
+    model_dir = version_dir(version, root)
+    if not is_complete(model_dir):
+        raise ValueError(f"Versão incompleta ou inexistente: {version}")
+    tmp_path = os.path.join(root, f"{CURRENT_FILENAME}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(version + '\n')
+    os.replace(tmp_path, os.path.join(root, CURRENT_FILENAME))
+    return version
+
+
+def set_current(version, root=MODEL_DIR):
+    """Ativa `version`; 'legacy' remove o ponteiro CURRENT (volta para os arquivos direto em trained_model/)."""
+    if version != LEGACY_VERSION:
+        return activate(version, root)
+    if not is_complete(root):
+        raise ValueError("Não há modelo no layout antigo em trained_model/.")
+    try:
+        os.remove(os.path.join(root, CURRENT_FILENAME))
+    except FileNotFoundError:
+        pass
+    return version
+
+
+def previous_version(root=MODEL_DIR):
+    """
+    Versão imediatamente anterior à atual (None se a atual é a mais antiga). O
+    layout antigo ('legacy') é anterior a todas as versões, então com CURRENT
+    em 'legacy' o resultado é sempre None.
+    """
+    current = current_version(root)
+    if current == LEGACY_VERSION:
+        return None
+    versions = list_versions(root)
+    older = versions[:versions.index(current)] if current in versions else versions
+    if older:
+        return older[-1]
+    if is_complete(root):
+        return LEGACY_VERSION
+    return None
+
+
+def rollback(to=None, root=MODEL_DIR):
+    """Volta CURRENT para `to` ou para a versão anterior à atual."""
+    target = to or previous_version(root)
+    if target is None:
+        raise ValueError("Não há versão anterior para voltar.")
+    return set_current(target, root)
+
+
+def remove_version(version, root=MODEL_DIR):
+    if version == current_version(root):
+        raise ValueError("Não é possível remover a versão atual.")
+    shutil.rmtree(version_dir(version, root))
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Gerencia as versões do modelo em trained_model/versions.")
+    parser.add_argument('--root', default=MODEL_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="Lista as versões (* = atual).")
+    activate_parser = commands.add_parser('activate', help="Ativa uma versão.")
+    activate_parser.add_argument('version')
+    rollback_parser = commands.add_parser('rollback', help="Volta para a versão anterior (ou para --to).")
+    rollback_parser.add_argument('--to', default=None)
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        current = current_version(args.root)
+        for name in available_versions(args.root):
+            print(f"{'*' if name == current else ' '} {name}")
+    elif args.command == 'activate':
+        print(f"Versão atual: {set_current(args.version, args.root)}")
+    else:
+        print(f"Versão atual: {rollback(args.to, args.root)}")
+    print("A API carrega a nova versão pelo POST /admin/model/reload (ou pelo monitor de VIOLAO_MODEL_WATCH_SECONDS).")
@@ -0,0 +1,173 @@
+import os
+import json
+import numpy as np
+
+import model_registry
+
+SUPPORTED_LAYERS = ('Conv1D', 'MaxPooling1D', 'Flatten', 'Dense', 'Dropout', 'InputLayer')
+
+
+def _relu(x):
+    return np.maximum(x, 0, out=x)
+
+
+def _softmax(x):
+    x = x - x.max(axis=-1, keepdims=True)
+    np.exp(x, out=x)
+    return x / x.sum(axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {'relu': _relu, 'softmax': _softmax, 'linear': lambda x: x}
+
+
+class NumpyScaler:
+    """Equivalente a StandardScaler.transform, sem depender do scikit-learn."""
+
+    def __init__(self, mean, scale):
+        self.mean_ = np.asarray(mean, dtype=np.float32)
+        self.scale_ = np.asarray(scale, dtype=np.float32)
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float32) - self.mean_) / self.scale_
+
+
+class NumpyChordModel:
+    """
+    Forward pass em NumPy da pilha de camadas criada por `train_model.build_model`
+    (Conv1D, MaxPooling1D, Flatten, Dense; Dropout é identidade na inferência).
+    Expõe `predict` e `input_shape` como o modelo Keras, então pode ser passado
+    diretamente para `predict_note`.
+    """
+
+    def __init__(self, layers, input_shape):
+        self.layers = layers
+        self.input_shape = tuple(input_shape)
+
+    def count_params(self):
+        return int(sum(layer['kernel'].size + layer['bias'].size for layer in self.layers if 'kernel' in layer))
+
+    def _conv1d(self, x, layer):
+        kernel = layer['kernel']
+        windows = np.lib.stride_tricks.sliding_window_view(x, kernel.shape[0], axis=1)
+        # windows: (lote, quadros, canais, kernel) x kernel: (kernel, canais, filtros)
+        out = np.tensordot(windows, kernel, axes=([2, 3], [1, 0]))
+        out += layer['bias']
+        return ACTIVATIONS[layer['activation']](out)
+
+    def _max_pool1d(self, x, layer):
+        pool, stride = layer['pool_size'], layer['strides']
+        n_out = (x.shape[1] - pool) // stride + 1
+        if pool == stride:
+            return x[:, :n_out * pool].reshape(x.shape[0], n_out, pool, x.shape[2]).max(axis=2)
+        windows = np.lib.stride_tricks.sliding_window_view(x, pool, axis=1)[:, ::stride]
+        return windows.max(axis=-1)
+
+    def _dense(self, x, layer):
+        out = x @ layer['kernel']
+        out += layer['bias']
+        return ACTIVATIONS[layer['activation']](out)
+
+    def predict(self, x, verbose=0, batch_size=None):
+        x = np.asarray(x, dtype=np.float32)
+        for layer in self.layers:
+            kind = layer['type']
+            if kind == 'Conv1D':
+                x = self._conv1d(x, layer)
+            elif kind == 'MaxPooling1D':
+                x = self._max_pool1d(x, layer)
+            elif kind == 'Flatten':
+                x = x.reshape(x.shape[0], -1)
+            elif kind == 'Dense':
+                x = self._dense(x, layer)
+        return x
+
+    __call__ = predict
+
+
+def _layer_spec(layer):
+    kind = type(layer).__name__
+    if kind not in SUPPORTED_LAYERS:
+        raise ValueError(f"Camada não suportada pelo motor NumPy: {kind}")
+    config = layer.get_config()
+    spec = {'type': kind}
+    if kind == 'Conv1D':
+        if config.get('padding', 'valid') != 'valid' or tuple(config.get('strides', (1,))) != (1,) \
+                or tuple(config.get('dilation_rate', (1,))) != (1,):
+            raise ValueError("O motor NumPy suporta apenas Conv1D com padding='valid', strides=1 e dilation_rate=1")
+        spec['activation'] = config['activation']
+    elif kind == 'MaxPooling1D':
+        if config.get('padding', 'valid') != 'valid':
+            raise ValueError("O motor NumPy suporta apenas MaxPooling1D com padding='valid'")
+        pool_size = config['pool_size']
+        strides = config.get('strides') or pool_size
+        spec['pool_size'] = int(pool_size[0] if isinstance(pool_size, (list, tuple)) else pool_size)
+        spec['strides'] = int(strides[0] if isinstance(strides, (list, tuple)) else strides)
+    elif kind == 'Dense':
+        spec['activation'] = config['activation']
+    return spec
+
+
+def _current_paths():
+    # Caminhos padrão: os arquivos da versão ativa do modelo (CURRENT em trained_model/)
+    return model_registry.artifact_paths(model_registry.current_model_dir())
+
+
+def export_numpy_model(model, scaler, out_path=None):
+    """
+    Converte o modelo Keras treinado e o StandardScaler em um arquivo .npz compacto
+    com os pesos (float32) e a descrição das camadas (por padrão na versão ativa).
+    """
+    out_path = out_path or _current_paths()['numpy']
+    arrays = {'scaler_mean': scaler.mean_.astype(np.float32), 'scaler_scale': scaler.scale_.astype(np.float32)}
+    specs = []
+    for idx, layer in enumerate(model.layers):
+        spec = _layer_spec(layer)
+        if spec['type'] in ('Dropout', 'InputLayer'):
+            continue
+        if spec['type'] in ('Conv1D', 'Dense'):
+            kernel, bias = layer.get_weights()
+            arrays[f'layer{idx}_kernel'] = kernel.astype(np.float32)
+            arrays[f'layer{idx}_bias'] = bias.astype(np.float32)
+            spec['weights'] = f'layer{idx}'
+        specs.append(spec)
+
+    metadata = {'layers': specs, 'input_shape': [None] + [int(d) for d in model.input_shape[1:]]}
+    arrays['metadata'] = np.frombuffer(json.dumps(metadata).encode('utf-8'), dtype=np.uint8)
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+    np.savez(out_path, **arrays)
+    print(f"Modelo exportado para o motor NumPy em: {out_path}")
+    return out_path
+
+
+def export_from_files(model_path=None, scaler_path=None, out_path=None):
+    import joblib
+    import tensorflow as tf
+
+    paths = _current_paths()
+    model_path = model_path or paths['model']
+    scaler_path = scaler_path or paths['scaler']
+    out_path = out_path or paths['numpy']
+
+    model = tf.keras.models.load_model(model_path)
+    scaler = joblib.load(scaler_path)
+    return export_numpy_model(model, scaler, out_path)
+
+
+def load_numpy_model(path=None):
+    """Carrega (NumpyChordModel, NumpyScaler) de um arquivo gerado por export_numpy_model."""
+    with np.load(path or _current_paths()['numpy']) as data:
+        metadata = json.loads(data['metadata'].tobytes().decode('utf-8'))
+        layers = []
+        for spec in metadata['layers']:
+            layer = dict(spec)
+            weights = layer.pop('weights', None)
+            if weights is not None:
+                layer['kernel'] = np.ascontiguousarray(data[f'{weights}_kernel'])
+                layer['bias'] = np.ascontiguousarray(data[f'{weights}_bias'])
+            layers.append(layer)
+        scaler = NumpyScaler(data['scaler_mean'], data['scaler_scale'])
+    return NumpyChordModel(layers, metadata['input_shape']), scaler
+
+
+if __name__ == '__main__':
+    export_from_files()
@@ -0,0 +1,175 @@
+import os
+import json
+import time
+import threading
+import warnings
+import numpy as np
+
+import model_registry
+
+QUANTIZATION_MODES = ('int8', 'float16')
+# Amostras de treino usadas para calibrar as faixas das ativações do modelo int8
+CALIBRATION_SAMPLES = 200
+REPORT_LATENCY_REPEATS = 200
+
+
+def _current_path(key):
+    # Caminhos padrão: os arquivos da versão ativa do modelo (CURRENT em trained_model/)
+    return model_registry.artifact_paths(model_registry.current_model_dir())[key]
+
+
+def _interpreter_class():
+    # Nas máquinas de reconhecimento basta o LiteRT (ou o tflite-runtime), sem o TensorFlow completo
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+
+def export_quantized_model(model, calibration_features, mode='int8', out_path=None):
+    """
+    Converte o modelo Keras em um modelo TFLite quantizado pós-treino. 'int8'
+    quantiza pesos e ativações, com as faixas das ativações calibradas em
+    `calibration_features` (amostras já normalizadas, no formato de entrada do
+    modelo); 'float16' guarda os pesos em meia precisão.
+    """
+    import tensorflow as tf
+
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Quantização desconhecida: {mode} (opções: {', '.join(QUANTIZATION_MODES)})")
+    out_path = out_path or _current_path(mode)
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if mode == 'int8':
+        samples = np.asarray(calibration_features, dtype=np.float32)
+
+        def representative_dataset():
+            for sample in samples:
+                yield [sample[np.newaxis]]
+        converter.representative_dataset = representative_dataset
+    else:
+        converter.target_spec.supported_types = [tf.float16]
+    content = converter.convert()
+
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, out_path)
+    print(f"Modelo quantizado ({mode}) exportado em: {out_path} ({len(content) / 1024:.0f} KB)")
+    return out_path
+
+
+class TFLiteChordModel:
+    """
+    Modelo TFLite (quantizado) com a interface usada por `predict_note`
+    (`predict` e `input_shape`); entrada e saída continuam em float32. O
+    interpretador não é thread-safe, então as chamadas são serializadas.
+    """
+
+    def __init__(self, path):
+        interpreter_class = _interpreter_class()
+        with warnings.catch_warnings():
+            # tf.lite.Interpreter avisa que foi substituído pelo LiteRT
+            warnings.simplefilter('ignore')
+            self._interpreter = interpreter_class(model_path=path)
+        self.path = path
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self.input_shape = (None,) + tuple(int(d) for d in self._input['shape'][1:])
+        self._batch_size = None
+        self._lock = threading.Lock()
+
+    def _resize(self, batch_size):
+        if batch_size != self._batch_size:
+            self._interpreter.resize_tensor_input(self._input['index'], [batch_size, *self.input_shape[1:]])
+            self._interpreter.allocate_tensors()
+            self._batch_size = batch_size
+
+    def predict(self, x, verbose=0, batch_size=None):
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        with self._lock:
+            self._resize(len(x))
+            self._interpreter.set_tensor(self._input['index'], x)
+            self._interpreter.invoke()
+            return self._interpreter.get_tensor(self._output['index']).copy()
+
+    __call__ = predict
+
+
+def load_quantized_model(mode, path=None):
+    return TFLiteChordModel(path or _current_path(mode))
+
+
+def _latency_ms(model, sample, repeats):
+    model.predict(sample, verbose=0)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(sample, verbose=0)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times) * 1000)
+
+
+def quantization_report(candidates, X_test, y_test, repeats=REPORT_LATENCY_REPEATS, out_path=None):
+    """
+    Compara os modelos de `candidates` ({nome: (modelo, caminho do arquivo)}):
+    tamanho em disco, latência por predição (lote 1, mediana) e acurácia no
+    conjunto de teste. A concordância é medida contra o primeiro modelo (float32).
+    O relatório é salvo em `out_path` (por padrão na versão ativa; '' não salva).
+    """
+    if out_path is None:
+        out_path = _current_path('quantization_report')
+    y_true = np.argmax(y_test, axis=1) if np.ndim(y_test) == 2 else np.asarray(y_test)
+    X_test = np.asarray(X_test, dtype=np.float32)
+    rows = []
+    reference = None
+    for name, (model, path) in candidates.items():
+        predicted = np.argmax(model.predict(X_test, verbose=0), axis=1)
+        if reference is None:
+            reference = predicted
+        rows.append({
+            'model': name,
+            'path': path,
+            'size_bytes': os.path.getsize(path),
+            'latency_ms': _latency_ms(model, X_test[:1], repeats),
+            'accuracy': float(np.mean(predicted == y_true)),
+            'agreement': float(np.mean(predicted == reference)),
+        })
+
+    print(f"\n{'modelo':<16} {'tamanho':>10} {'latência':>11} {'acurácia':>9} {'concordância':>13}")
+    for row in rows:
+        print(f"{row['model']:<16} {row['size_bytes'] / 1024:7.0f} KB {row['latency_ms']:8.3f} ms "
+              f"{row['accuracy']:9.4f} {row['agreement']:13.4f}")
+    if out_path:
+        os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+        with open(out_path, 'w', encoding='utf-8') as f:
+            json.dump({'test_samples': len(X_test), 'models': rows}, f, indent=2)
+        print(f"Relatório de quantização salvo em: {out_path}")
+    return rows
+
+
+def calibration_sample(X, n_samples=CALIBRATION_SAMPLES, seed=42):
+    """Amostra aleatória (sem reposição) das features de treino para calibrar o int8."""
+    idx = np.random.default_rng(seed).choice(len(X), size=min(n_samples, len(X)), replace=False)
+    return X[np.sort(idx)]
+
+
+if __name__ == '__main__':
+    import argparse
+    from train_model import quantize_trained_model
+
+    parser = argparse.ArgumentParser(description="Gera os modelos quantizados a partir do modelo treinado e compara com o float32.")
+    parser.add_argument('--modes', nargs='+', choices=QUANTIZATION_MODES, default=list(QUANTIZATION_MODES))
+    parser.add_argument('--workers', type=int, default=None, help="Processos para extração de features (padrão: número de CPUs).")
+    args = parser.parse_args()
+    quantize_trained_model(args.modes, workers=args.workers)
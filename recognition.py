@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+from collections import deque, Counter
+
+PREDICTION_BUFFER_SIZE = 12
+STABILITY_THRESHOLD = 9
+# Intervalo entre predições: o loop é acordado a cada hop de áudio novo. Usado pelo
+# app, pelo worker de inferência e pela transcrição (VIOLAO_PREDICTION_HOP_MS, padrão 80 ms)
+PREDICTION_HOP_SECONDS = float(os.environ.get('VIOLAO_PREDICTION_HOP_MS', '80')) / 1000
+# Sessões paradas (ou criadas e nunca iniciadas) há mais tempo que isso são descartadas do registro
+SESSION_TTL_SECONDS = 600
+
+
+class StabilityFilter:
+    """
+    Filtro de estabilidade do loop de predição: uma nota só é exibida depois de
+    aparecer STABILITY_THRESHOLD vezes nas últimas PREDICTION_BUFFER_SIZE predições.
+    """
+
+    def __init__(self, buffer_size=PREDICTION_BUFFER_SIZE, threshold=STABILITY_THRESHOLD, initial_note="Ouvindo..."):
+        self.buffer_size = buffer_size
+        self.threshold = threshold
+        self.prediction_buffer = deque(maxlen=buffer_size)
+        self.stable_note = initial_note
+
+    def reset(self, note="Ouvindo..."):
+        self.prediction_buffer.clear()
+        self.stable_note = note
+
+    def update(self, predicted_chord):
+        if predicted_chord and "N/A" not in predicted_chord:
+            self.prediction_buffer.append(predicted_chord)
+
+        if len(self.prediction_buffer) >= self.threshold:
+            counts = Counter(self.prediction_buffer)
+            most_common_chord, num_occurrences = counts.most_common(1)[0]
+
+            if num_occurrences >= self.threshold:
+                if most_common_chord == "Silêncio" and self.stable_note != "Silêncio...":
+                    if num_occurrences >= self.buffer_size - 1:
+                        self.stable_note = "Silêncio..."
+                elif most_common_chord != "Silêncio":
+                    self.stable_note = most_common_chord
+        return self.stable_note
+
+
+class RecognitionSession:
+    """
+    Estado de uma sessão de reconhecimento (uma aba do navegador): nota atual,
+    filtro de estabilidade, thread do loop de predição e a versão do estado
+    publicado, usada pelo /note_stream para enviar apenas mudanças.
+    """
+
+    def __init__(self, session_id, on_change=None):
+        self.session_id = session_id
+        # Chamado (fora do lock) a cada mudança do estado publicado, ex.: para compartilhar com outros processos
+        self.on_change = on_change
+        self.active = False
+        self.current_note = "Aguardando áudio..."
+        self.stability = StabilityFilter()
+        self.thread = None
+        self.device_id = None
+        self.created_at = time.monotonic()
+        self.stopped_at = None
+        self.note_version = 0
+        self.note_changed = threading.Condition()
+        self._last_payload = None
+        self.hops_processed = 0
+        self.hops_dropped = 0
+        self.audio_overruns = 0
+        self.prediction_gate = None
+        # capture_manager.CaptureChannel quando a sessão ouve um canal próprio (None: captura global)
+        self.capture = None
+
+    def payload(self):
+        if not self.active and self.current_note == "Reconhecimento parado.":
+            return {'status': 'stopped'}
+        return {'note': self.current_note, 'status': 'active' if self.active else 'inactive'}
+
+    def publish_note(self, note):
+        # Atualiza a nota e acorda os clientes do /note_stream apenas se o estado mudou
+        with self.note_changed:
+            self.current_note = note
+            payload = self.payload()
+            changed = payload != self._last_payload
+            if changed:
+                self._last_payload = payload
+                self.note_version += 1
+                self.note_changed.notify_all()
+        if changed and self.on_change is not None:
+            self.on_change(self)
+
+    def stats(self):
+        stats = {
+            'session_id': self.session_id,
+            'active': self.active,
+            'hops_processed': self.hops_processed,
+            'hops_dropped': self.hops_dropped,
+            'audio_overruns': self.audio_overruns,
+        }
+        if self.prediction_gate is not None:
+            stats.update(self.prediction_gate.stats())
+        if self.capture is not None:
+            stats['capture'] = self.capture.stats()
+        return stats
+
+    def wait_for_change(self, last_version, timeout):
+        with self.note_changed:
+            if self.note_version == last_version:
+                self.note_changed.wait(timeout=timeout)
+            return self.note_version
+
+    def start(self, target):
+        self.stability.reset("Ouvindo...")
+        self.hops_processed = self.hops_dropped = self.audio_overruns = 0
+        self.active = True
+        self.stopped_at = None
+        self.publish_note("Ouvindo...")
+        self.thread = threading.Thread(target=target, args=(self,), daemon=True)
+        self.thread.start()
+
+    def stop(self, note="Reconhecimento parado."):
+        self.active = False
+        if self.thread and self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1)
+        self.stability.reset(note)
+        self.stopped_at = time.monotonic()
+        self.publish_note(note)
+
+
+class SessionRegistry:
+    """Registro thread-safe das sessões de reconhecimento do processo."""
+
+    def __init__(self, ttl_seconds=SESSION_TTL_SECONDS, on_change=None):
+        self.ttl_seconds = ttl_seconds
+        self.on_change = on_change
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id, create=False):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None and create:
+                self._prune()
+                session = self._sessions[session_id] = RecognitionSession(session_id, self.on_change)
+            return session
+
+    def active_sessions(self):
+        with self._lock:
+            return [s for s in self._sessions.values() if s.active]
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+    def _prune(self):
+        now = time.monotonic()
+        expired = [sid for sid, s in self._sessions.items()
+                   if not s.active and now - (s.created_at if s.stopped_at is None else s.stopped_at) > self.ttl_seconds]
+        for sid in expired:
+            del self._sessions[sid]
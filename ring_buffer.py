@@ -0,0 +1,250 @@
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Leitores em outro processo não recebem o notify do escritor: consultam o cursor neste intervalo
+SHARED_WAIT_POLL_SECONDS = 0.002
+
+
+class RingBuffer:
+    """
+    Buffer circular de amostras com um cursor monotônico (`written`, total de
+    amostras já escritas) para um único escritor e vários leitores.
+
+    O escritor (callback do PortAudio) não usa lock: copia as amostras e só
+    depois publica o novo cursor. Os leitores leem pelo cursor absoluto e recebem
+    uma view do buffer quando a região é contígua; só a leitura que atravessa o
+    fim do buffer faz cópia. Uma view continua válida enquanto o escritor não
+    der a volta sobre ela (veja `is_valid`).
+
+    Leitores podem esperar por novas amostras com `wait_for`; o escritor só toca
+    na Condition quando há alguém esperando.
+    """
+
+    def __init__(self, capacity, dtype='float32'):
+        self.capacity = int(capacity)
+        self.dtype = np.dtype(dtype)
+        self._data = np.zeros(self.capacity, dtype=self.dtype)
+        self.written = 0
+        self.resets = 0
+        self._data_ready = threading.Condition()
+        self._waiting = 0
+
+    def reset(self):
+        self._data[:] = 0
+        self.written = 0
+        self.resets += 1
+        self._notify()
+
+    def _notify(self):
+        if self._waiting:
+            with self._data_ready:
+                self._data_ready.notify_all()
+
+    def wait_for(self, cursor, timeout=None):
+        """Bloqueia até o cursor de escrita chegar a `cursor` (ou o buffer ser reiniciado)."""
+        resets = self.resets
+        with self._data_ready:
+            self._waiting += 1
+            try:
+                return self._data_ready.wait_for(lambda: self.written >= cursor or self.resets != resets, timeout)
+            finally:
+                self._waiting -= 1
+
+    def write(self, samples):
+        count = len(samples)
+        written = self.written
+        if count > self.capacity:
+            # Mais amostras que a capacidade: só as últimas cabem no buffer
+            written += count - self.capacity
+            samples = samples[count - self.capacity:]
+        idx = written % self.capacity
+        end = idx + len(samples)
+        if end <= self.capacity:
+            self._data[idx:end] = samples
+        else:
+            first = self.capacity - idx
+            self._data[idx:] = samples[:first]
+            self._data[:end - self.capacity] = samples[first:]
+        # Publica o cursor só depois dos dados estarem no buffer
+        self.written += count
+        self._notify()
+
+    def is_valid(self, start):
+        """Se as amostras a partir do cursor `start` ainda não foram sobrescritas."""
+        return self.written - start <= self.capacity
+
+    def _region(self, start, stop, copy):
+        idx = start % self.capacity
+        end = idx + (stop - start)
+        if end <= self.capacity:
+            region = self._data[idx:end]
+            return region.copy() if copy else region
+        return np.concatenate((self._data[idx:], self._data[:end - self.capacity]))
+
+    def read(self, start, count=None, copy=False):
+        """
+        Lê a partir do cursor absoluto `start` (até `count` amostras ou até o fim
+        do que já foi escrito). Retorna (amostras, cursor_inicial_efetivo): se
+        `start` já foi sobrescrito, a leitura começa na amostra mais antiga ainda
+        disponível.
+        """
+        written = self.written
+        start = min(max(start, written - self.capacity), written)
+        stop = written if count is None else min(start + count, written)
+        samples = self._region(start, stop, copy)
+        # O escritor pode ter dado a volta durante a cópia: descarta o início sobrescrito
+        valid_from = self.written - self.capacity
+        if valid_from > start:
+            samples = samples[min(valid_from - start, len(samples)):]
+            start = min(valid_from, stop)
+        return samples, start
+
+    def window(self, end, count, copy=False):
+        """As `count` amostras que terminam no cursor `end` (com zeros antes do início da gravação)."""
+        count = min(int(count), self.capacity)
+        return self._region(end - count, end, copy)
+
+    def latest(self, count, copy=False):
+        """As últimas `count` amostras (com zeros antes do início da gravação)."""
+        return self.window(self.written, count, copy)
+
+    def reader(self, backlog=0):
+        """Novo leitor posicionado `backlog` amostras antes do cursor de escrita."""
+        return RingReader(self, max(self.written - min(backlog, self.capacity), 0))
+
+
+class RingReader:
+    """
+    Cursor de um consumidor do RingBuffer. `read_new` retorna só as amostras que
+    chegaram desde a última leitura; se o leitor ficou mais de `capacity` amostras
+    atrasado, as perdidas são contadas em `overruns`/`dropped_samples`.
+    """
+
+    def __init__(self, ring, cursor=0):
+        self.ring = ring
+        self.cursor = cursor
+        self.resets = ring.resets
+        self.overruns = 0
+        self.dropped_samples = 0
+
+    def available(self):
+        self._check_reset()
+        return self.ring.written - self.cursor
+
+    def _check_reset(self):
+        # Compara o contador de reinícios: depois de um reset o cursor de escrita
+        # pode já ter passado do cursor antigo do leitor
+        resets = self.ring.resets
+        if resets != self.resets:
+            # O buffer foi reiniciado (nova gravação): recomeça do cursor atual
+            self.resets = resets
+            self.cursor = self.ring.written
+
+    def wait(self, min_samples, timeout=None):
+        """Espera até haver pelo menos `min_samples` amostras novas; retorna se há."""
+        self._check_reset()
+        self.ring.wait_for(self.cursor + min_samples, timeout)
+        return self.available() >= min_samples
+
+    def read_hops(self, hop_samples, copy=False):
+        """
+        Lê um número inteiro de hops, mantendo a grade de hops do leitor. Se mais de
+        um hop chegou desde a última leitura (inferência mais lenta que o tempo real),
+        todos são lidos de uma vez e retorna (amostras, hops_descartados) para que só
+        a janela mais recente seja processada.
+        """
+        available = self.available()
+        hops = available // hop_samples
+        if hops == 0:
+            return self.ring._data[:0], 0
+        # Hops já sobrescritos são pulados inteiros, para não sair da grade
+        lost_hops = -(-max(available - self.ring.capacity, 0) // hop_samples)
+        if lost_hops:
+            self.overruns += 1
+            self.dropped_samples += lost_hops * hop_samples
+            self.cursor += lost_hops * hop_samples
+        samples = self.read_new((hops - lost_hops) * hop_samples, copy=copy)
+        return samples, hops - 1
+
+    def read_new(self, max_samples=None, copy=False):
+        self._check_reset()
+        samples, start = self.ring.read(self.cursor, max_samples, copy=copy)
+        if start > self.cursor:
+            self.overruns += 1
+            self.dropped_samples += start - self.cursor
+        self.cursor = start + len(samples)
+        return samples
+
+
+class SharedRingBuffer(RingBuffer):
+    """
+    RingBuffer cujas amostras e cursores (`written`, `resets`) ficam em um bloco
+    `multiprocessing.shared_memory`: o callback de captura escreve no processo web
+    e o worker de inferência lê o mesmo buffer em outro processo, sem copiar nem
+    serializar o áudio. Continua com um único escritor; o cursor de 64 bits é
+    publicado depois das amostras, como no RingBuffer.
+
+    Quem cria o bloco (`create=True`) deve chamar `unlink` no fim; os outros
+    processos abrem com `SharedRingBuffer.attach(name, capacity, dtype)`.
+    """
+
+    _HEADER_BYTES = 16
+
+    def __init__(self, capacity, dtype='float32', name=None, create=True):
+        self.capacity = int(capacity)
+        self.dtype = np.dtype(dtype)
+        size = self._HEADER_BYTES + self.capacity * self.dtype.itemsize
+        self._shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self.name = self._shm.name
+        self._owner = create
+        self._header = np.ndarray((2,), dtype=np.int64, buffer=self._shm.buf)
+        self._data = np.ndarray((self.capacity,), dtype=self.dtype, buffer=self._shm.buf, offset=self._HEADER_BYTES)
+        if create:
+            self._header[:] = 0
+            self._data[:] = 0
+        self._data_ready = threading.Condition()
+        self._waiting = 0
+
+    @classmethod
+    def attach(cls, name, capacity, dtype='float32'):
+        return cls(capacity, dtype=dtype, name=name, create=False)
+
+    @property
+    def written(self):
+        return int(self._header[0])
+
+    @written.setter
+    def written(self, value):
+        self._header[0] = value
+
+    @property
+    def resets(self):
+        return int(self._header[1])
+
+    @resets.setter
+    def resets(self, value):
+        self._header[1] = value
+
+    def wait_for(self, cursor, timeout=None):
+        """Como RingBuffer.wait_for, mas consultando o cursor compartilhado (o escritor pode estar em outro processo)."""
+        resets = self.resets
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.written < cursor and self.resets == resets:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            time.sleep(SHARED_WAIT_POLL_SECONDS if remaining is None else min(SHARED_WAIT_POLL_SECONDS, remaining))
+        return True
+
+    def close(self):
+        # As views numpy precisam ser soltas antes de fechar o mapeamento
+        self._header = self._data = None
+        self._shm.close()
+
+    def unlink(self):
+        self.close()
+        if self._owner:
+            self._shm.unlink()
@@ -0,0 +1,220 @@
+import fcntl
+import itertools
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+
+# Diretório do estado compartilhado: em memória (/dev/shm) quando existe, um por usuário
+DEFAULT_STATE_DIR = os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(),
+                                 f'violao-state-{os.getuid()}')
+# Só o usuário do serviço lê e escreve o estado: os comandos (inclusive os de /admin)
+# chegam por arquivos, então ninguém mais pode criá-los
+STATE_DIR_MODE = 0o700
+STATE_POLL_SECONDS = 0.05
+# Tempo máximo que um worker espera o dono responder a um start/stop encaminhado;
+# comandos mais velhos que isso são descartados pelo dono (ex.: sobras de outra execução)
+COMMAND_TIMEOUT_SECONDS = 5.0
+RESULT_TTL_SECONDS = 60.0
+STATE_BACKENDS = ('local', 'shared')
+
+
+def check_private_dir(path):
+    """
+    Recusa um diretório de estado que não é um diretório de verdade (ex.: link
+    simbólico), que pertence a outro usuário ou que outros podem escrever, como
+    um criado antes por outra pessoa no /dev/shm.
+    """
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        raise PermissionError(f"O estado compartilhado precisa ser um diretório (não um link): {path}")
+    if st.st_uid != os.getuid():
+        raise PermissionError(f"O diretório do estado compartilhado pertence a outro usuário: {path}")
+    if st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"O diretório do estado compartilhado pode ser escrito por outros usuários: {path}")
+
+
+class LocalStateStore:
+    """
+    Estado de reconhecimento só no próprio processo (um único worker): este
+    processo é sempre o dono, e as sessões em memória são a única fonte do estado.
+    """
+
+    shared = False
+
+    def is_owner(self):
+        return True
+
+    def try_become_owner(self):
+        return True
+
+    def owner_pid(self):
+        return os.getpid()
+
+
+class SharedStateStore:
+    """
+    Estado de reconhecimento compartilhado entre os workers do gunicorn, em
+    arquivos JSON num diretório (em memória, /dev/shm).
+
+    Um único processo, o dono (quem segura o flock de owner.lock), roda a captura
+    e o loop de predição. Ele publica o estado de cada sessão (nota, versão,
+    estatísticas) em sessions/<id>.json com escrita atômica (os.replace); os outros
+    workers leem esse estado e encaminham start/stop, /admin e /train como comandos (commands/),
+    respondidos pelo dono em results/. Se o dono morre, o sistema libera o lock e o
+    próximo worker que tentar assume.
+    """
+
+    shared = True
+
+    def __init__(self, directory=DEFAULT_STATE_DIR):
+        self.directory = directory
+        self._lock_fd = None
+        self._ids = itertools.count()
+        self._dirs_ready = False
+
+    def _path(self, *parts):
+        return os.path.join(self.directory, *parts)
+
+    def _ensure_dirs(self):
+        if not self._dirs_ready:
+            for path in (self.directory, self._path('sessions'), self._path('commands'), self._path('results')):
+                os.makedirs(path, mode=STATE_DIR_MODE, exist_ok=True)
+                check_private_dir(path)
+            self._dirs_ready = True
+
+    def _write_json(self, path, data):
+        self._ensure_dirs()
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _read_json(path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def is_owner(self):
+        return self._lock_fd is not None
+
+    def try_become_owner(self):
+        """Tenta pegar o lock do dono sem bloquear; retorna se este processo é o dono."""
+        if self._lock_fd is not None:
+            return True
+        self._ensure_dirs()
+        fd = os.open(self._path('owner.lock'), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        self._write_json(self._path('owner.json'), {'pid': os.getpid(), 'since': time.time()})
+        return True
+
+    def release_owner(self):
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def owner_pid(self):
+        owner = self._read_json(self._path('owner.json'))
+        return owner['pid'] if owner else None
+
+    def publish_owner_status(self, status):
+        # (Dono) Estado do próprio processo para os outros workers, ex.: o do modelo
+        self._write_json(self._path('owner_status.json'), dict(status, pid=os.getpid()))
+
+    def owner_status(self):
+        # Ignora o estado deixado por um dono anterior que morreu
+        status = self._read_json(self._path('owner_status.json'))
+        return status if status is not None and status['pid'] == self.owner_pid() else None
+
+    def publish(self, session_id, state):
+        self._write_json(self._path('sessions', f'{session_id}.json'), state)
+
+    def read(self, session_id):
+        return self._read_json(self._path('sessions', f'{session_id}.json'))
+
+    def sessions(self):
+        self._ensure_dirs()
+        states = {}
+        for name in os.listdir(self._path('sessions')):
+            if name.endswith('.json'):
+                state = self.read(name[:-len('.json')])
+                if state is not None:
+                    states[name[:-len('.json')]] = state
+        return states
+
+    def wait_for_change(self, session_id, last_version, timeout):
+        """Espera o estado publicado da sessão mudar de versão; retorna o estado (ou None)."""
+        deadline = time.monotonic() + timeout
+        while True:
+            state = self.read(session_id)
+            version = state['version'] if state else None
+            if version != last_version or time.monotonic() >= deadline:
+                return state
+            time.sleep(STATE_POLL_SECONDS)
+
+    def submit(self, command):
+        """Enfileira um comando para o dono; retorna o id usado para esperar a resposta."""
+        command_id = f"{time.time_ns():020d}-{os.getpid()}-{next(self._ids)}"
+        self._write_json(self._path('commands', f'{command_id}.json'), dict(command, submitted_at=time.time()))
+        return command_id
+
+    def take_commands(self, max_age=COMMAND_TIMEOUT_SECONDS):
+        """(Dono) Retira os comandos pendentes em ordem de chegada, descartando os vencidos."""
+        self._ensure_dirs()
+        commands = []
+        for name in sorted(os.listdir(self._path('commands'))):
+            if not name.endswith('.json'):
+                continue
+            path = self._path('commands', name)
+            command = self._read_json(path)
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                continue
+            if command is not None and time.time() - command['submitted_at'] <= max_age:
+                commands.append((name[:-len('.json')], command))
+        return commands
+
+    def put_result(self, command_id, result):
+        self._write_json(self._path('results', f'{command_id}.json'), result)
+
+    def wait_result(self, command_id, timeout=COMMAND_TIMEOUT_SECONDS):
+        path = self._path('results', f'{command_id}.json')
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            result = self._read_json(path)
+            if result is not None:
+                os.unlink(path)
+                return result
+            time.sleep(STATE_POLL_SECONDS / 5)
+        return None
+
+    def prune_results(self, max_age=RESULT_TTL_SECONDS):
+        # Respostas que ninguém buscou (o worker desistiu de esperar)
+        self._ensure_dirs()
+        now = time.time()
+        for name in os.listdir(self._path('results')):
+            path = self._path('results', name)
+            try:
+                if now - os.path.getmtime(path) > max_age:
+                    os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+def create_state_store(backend, directory=DEFAULT_STATE_DIR):
+    if backend == 'local':
+        return LocalStateStore()
+    if backend == 'shared':
+        return SharedStateStore(directory)
+    raise ValueError(f"Backend de estado desconhecido: {backend} (opções: {', '.join(STATE_BACKENDS)})")
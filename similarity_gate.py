@@ -0,0 +1,77 @@
+import numpy as np
+
+from metrics import GATE_CHECKS, GATE_REUSED
+
+# Distância de cosseno máxima entre impressões para reaproveitar a última predição.
+# Em acordes sintéticos sustentados a distância entre hops fica abaixo de ~0,005;
+# na troca de acorde passa de 0,013 já no primeiro hop. Ver
+# tests/benchmarks/bench_similarity_gate.py para calibrar contra a acurácia.
+SIMILARITY_THRESHOLD = 0.003
+# Máximo de reaproveitamentos seguidos (~0,5 s com hops de 80 ms) antes de rodar o modelo de novo
+MAX_REUSE = 6
+
+
+def spectral_fingerprint(features, skip_energy=True):
+    """
+    Impressão compacta de uma janela: média no tempo das linhas das features,
+    normalizada. Com MFCC (`skip_energy`), o coeficiente 0 (energia) fica de fora
+    para que o decaimento de um acorde sustentado não conte como mudança; outras
+    features (ex.: cromagrama, em que a linha 0 é a classe de altura Dó) entram inteiras.
+    """
+    fingerprint = np.asarray(features, dtype=np.float32)[1 if skip_energy else 0:].mean(axis=1)
+    norm = np.linalg.norm(fingerprint)
+    return fingerprint / norm if norm > 0 else fingerprint
+
+
+class SimilarityGate:
+    """
+    Reaproveita a predição anterior quando a janela atual é quase igual à última
+    janela que passou pelo modelo (distância de cosseno das impressões abaixo de
+    `threshold`). A comparação é sempre com a última janela inferida, então uma
+    mudança lenta acumula distância até forçar uma nova inferência; `max_reuse`
+    limita quantas vezes seguidas a mesma predição pode ser reaproveitada.
+    """
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD, max_reuse=MAX_REUSE):
+        self.threshold = threshold
+        self.max_reuse = max_reuse
+        self.checks = 0
+        self.reused = 0
+        self._reference = None
+        self._prediction = None
+        self._reuse_count = 0
+        self._candidate = None
+
+    def reset(self):
+        self._reference = None
+        self._prediction = None
+        self._reuse_count = 0
+
+    def lookup(self, features, skip_energy=True):
+        """
+        Retorna a predição reaproveitada, ou None se a janela precisa passar pelo
+        modelo. `skip_energy=False` para features que não são MFCC (ver spectral_fingerprint).
+        """
+        self.checks += 1
+        GATE_CHECKS.inc()
+        self._candidate = spectral_fingerprint(features, skip_energy)
+        if (self._reference is not None and self._reuse_count < self.max_reuse
+                and 1.0 - float(self._candidate @ self._reference) <= self.threshold):
+            self._reuse_count += 1
+            self.reused += 1
+            GATE_REUSED.inc()
+            return self._prediction
+        return None
+
+    def store(self, prediction):
+        """Registra a predição do modelo para a janela passada no último lookup."""
+        self._reference = self._candidate
+        self._prediction = prediction
+        self._reuse_count = 0
+
+    def stats(self):
+        return {
+            'gate_checks': self.checks,
+            'gate_reused': self.reused,
+            'gate_reuse_rate': self.reused / self.checks if self.checks else 0.0,
+        }
@@ -6,6 +6,9 @@ document.addEventListener('DOMContentLoaded', async () => {
     const resultContainer = document.querySelector('.result'); 
 
     let pollingIntervalId = null;
+    let noteSource = null;
+    // Cada aba tem sua própria sessão de reconhecimento no servidor
+    const sessionId = 'aba-' + Date.now().toString(36) + '-' + Math.random().toString(36).slice(2, 10);
 
     async function listAudioDevices() {
         try {
@@ -56,13 +59,13 @@ document.addEventListener('DOMContentLoaded', async () => {
             const response = await fetch('/start_recognition', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ device_id: selectedDeviceId })
+                body: JSON.stringify({ device_id: selectedDeviceId, session_id: sessionId })
             });
             const data = await response.json();
             if (data.status === 'success' || data.status === 'warning') {
                 detectedNoteDisplay.textContent = 'Ouvindo...';
                 resultContainer.classList.add('is-listening'); 
-                startPollingForNotes();
+                startListeningForNotes();
             } else {
                 detectedNoteDisplay.textContent = 'Erro!';
                 stopRecognitionCleanup();
@@ -75,39 +78,80 @@ document.addEventListener('DOMContentLoaded', async () => {
     });
 
     stopBtn.addEventListener('click', async () => {
-        stopPollingForNotes();
+        stopListeningForNotes();
         stopRecognitionCleanup();
         detectedNoteDisplay.textContent = 'Parado';
 
         try {
-            await fetch('/stop_recognition', { method: 'POST' });
+            await fetch('/stop_recognition', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ session_id: sessionId })
+            });
         } catch (error) {
             console.error('Erro ao parar:', error);
             detectedNoteDisplay.textContent = 'Erro!';
         }
     });
 
+    function handleNoteUpdate(data) {
+        if (data.status === 'stopped') {
+            stopListeningForNotes();
+            stopRecognitionCleanup();
+            detectedNoteDisplay.textContent = 'Parado';
+        } else if (data.note) {
+            resultContainer.classList.remove('is-listening'); 
+            detectedNoteDisplay.textContent = data.note.replace(/_/g, ' ');
+        } else {
+            if (!resultContainer.classList.contains('is-listening')) {
+                resultContainer.classList.add('is-listening');
+                detectedNoteDisplay.textContent = 'Ouvindo...';
+            }
+        }
+    }
+
+    // O servidor envia a nota por Server-Sent Events só quando ela muda;
+    // sem suporte a EventSource (ou se o stream falhar), volta para o polling.
+    function startListeningForNotes() {
+        if (window.EventSource) {
+            startNoteStream();
+        } else {
+            startPollingForNotes();
+        }
+    }
+
+    function stopListeningForNotes() {
+        closeNoteStream();
+        stopPollingForNotes();
+    }
+
+    function startNoteStream() {
+        closeNoteStream();
+        noteSource = new EventSource(`/note_stream?session_id=${encodeURIComponent(sessionId)}`);
+        noteSource.addEventListener('note', (event) => {
+            handleNoteUpdate(JSON.parse(event.data));
+        });
+        noteSource.onerror = () => {
+            console.warn('Stream de notas indisponível, usando polling.');
+            closeNoteStream();
+            if (!stopBtn.disabled) startPollingForNotes();
+        };
+    }
+
+    function closeNoteStream() {
+        if (noteSource) {
+            noteSource.close();
+            noteSource = null;
+        }
+    }
+
     function startPollingForNotes() {
         if (pollingIntervalId) clearInterval(pollingIntervalId);
 
         pollingIntervalId = setInterval(async () => {
             try {
-                const response = await fetch('/get_note');
-                const data = await response.json();
-
-                if (data.status === 'stopped') {
-                    stopPollingForNotes();
-                    stopRecognitionCleanup();
-                    detectedNoteDisplay.textContent = 'Parado';
-                } else if (data.note) {
-                    resultContainer.classList.remove('is-listening'); 
-                    detectedNoteDisplay.textContent = data.note.replace(/_/g, ' ');
-                } else {
-                    if (!resultContainer.classList.contains('is-listening')) {
-                        resultContainer.classList.add('is-listening');
-                        detectedNoteDisplay.textContent = 'Ouvindo...';
-                    }
-                }
+                const response = await fetch(`/get_note?session_id=${encodeURIComponent(sessionId)}`);
+                handleNoteUpdate(await response.json());
             } catch (error) {
                 console.error('Erro no polling:', error);
                 detectedNoteDisplay.textContent = 'Erro!';
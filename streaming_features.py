@@ -0,0 +1,116 @@
+import numpy as np
+
+from feature_extractor import FeatureExtractor, SAMPLE_RATE, N_MFCC, N_FFT, HOP_LENGTH, N_MELS, TOP_DB
+
+
+class StreamingMFCC:
+    """
+    Extrator de MFCC incremental para o loop de reconhecimento ao vivo.
+
+    Reproduz `librosa.feature.mfcc` (STFT centrada com preenchimento de zeros, banco
+    mel, dB com top_db e DCT) sobre uma janela deslizante de `window_samples`
+    amostras, mas calcula o espectro mel apenas dos quadros novos a cada `push`.
+    Só os quadros das bordas da janela, que dependem do preenchimento com zeros,
+    são recalculados a cada chamada de `features`.
+
+    A janela termina sempre em uma posição alinhada à grade de hops, então até
+    `hop_length - 1` amostras mais recentes podem ficar para a próxima janela.
+    """
+
+    def __init__(self, window_samples, sample_rate=SAMPLE_RATE, n_mfcc=N_MFCC, n_fft=N_FFT,
+                 hop_length=HOP_LENGTH, n_mels=N_MELS, top_db=TOP_DB):
+        self.window_samples = int(window_samples)
+        self.sample_rate = sample_rate
+        self.n_mfcc = n_mfcc
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.top_db = top_db
+        self.n_frames = 1 + self.window_samples // hop_length
+
+        self._pad = n_fft // 2
+        # Janela, banco mel e DCT pré-calculados (float32), os mesmos do extract_features
+        self._extractor = FeatureExtractor(sample_rate, n_mfcc, n_fft, hop_length, n_mels, top_db)
+
+        # Quadros da janela cujo suporte inclui o preenchimento de zeros do início/fim
+        self._head_frames = -(-self._pad // hop_length)
+        self._first_tail_frame = (self.window_samples - self._pad) // hop_length + 1
+
+        self.reset()
+
+    def reset(self):
+        """Reinicia o estado; o histórico começa preenchido com silêncio, como o buffer de captura."""
+        self._buf = np.zeros(0, dtype=np.float32)
+        self._buf_start = 0
+        self._total = 0
+        self._frames = {}
+        self._next_frame = self._head_frames
+        self.frames_computed = 0
+        self.push(np.zeros(self.window_samples, dtype=np.float32))
+
+    def _window_bounds(self):
+        end = self.window_samples + self.hop_length * ((self._total - self.window_samples) // self.hop_length)
+        return end - self.window_samples, end
+
+    def push(self, samples):
+        """Consome apenas as amostras recém-chegadas e calcula os quadros que ficaram completos."""
+        samples = np.asarray(samples, dtype=np.float32).ravel()
+        if samples.size == 0:
+            return
+        self._buf = np.concatenate((self._buf, samples))
+        self._total += samples.size
+
+        start, _ = self._window_bounds()
+        first_needed = start // self.hop_length
+        last_complete = (self._total - self._pad) // self.hop_length
+        first_new = max(self._next_frame, first_needed)
+
+        if last_complete >= first_new:
+            offset = first_new * self.hop_length - self._pad - self._buf_start
+            length = (last_complete - first_new) * self.hop_length + self.n_fft
+            segment = self._buf[offset:offset + length]
+            frames = np.lib.stride_tricks.sliding_window_view(segment, self.n_fft)[::self.hop_length]
+            for k, column in zip(range(first_new, last_complete + 1), self._extractor.mel_db(frames)):
+                self._frames[k] = column
+            self.frames_computed += len(frames)
+        self._next_frame = max(self._next_frame, last_complete + 1)
+
+        for k in [k for k in self._frames if k < first_needed]:
+            del self._frames[k]
+        keep_from = min(start, self._next_frame * self.hop_length - self._pad)
+        if keep_from > self._buf_start:
+            self._buf = self._buf[keep_from - self._buf_start:]
+            self._buf_start = keep_from
+
+    def window_audio(self):
+        """Amostras da janela atual (a mesma janela usada por `features`)."""
+        start, end = self._window_bounds()
+        return self._buf[start - self._buf_start:end - self._buf_start]
+
+    def features(self, max_pad_len=None):
+        """
+        Retorna a matriz MFCC (n_mfcc, quadros) da janela atual, equivalente a
+        `extract_features(window_audio(), is_file=False, max_pad_len=...)`.
+        """
+        start, _ = self._window_bounds()
+        first_frame = start // self.hop_length
+        mel_db = np.empty((self.n_frames, self._extractor.n_mels), dtype=self._extractor.dtype)
+
+        for t in range(self._head_frames, self._first_tail_frame):
+            mel_db[t] = self._frames[first_frame + t]
+
+        edges = list(range(self._head_frames)) + list(range(self._first_tail_frame, self.n_frames))
+        padded = np.pad(self.window_audio(), (self._pad, self._pad))
+        edge_frames = np.stack([padded[t * self.hop_length:t * self.hop_length + self.n_fft] for t in edges])
+        mel_db[edges] = self._extractor.mel_db(edge_frames)
+        self.frames_computed += len(edges)
+
+        if self.top_db is not None:
+            mel_db = np.maximum(mel_db, mel_db.max() - self.top_db)
+        mfccs = np.ascontiguousarray(self._extractor.dct(mel_db).T)
+
+        if max_pad_len is not None:
+            if mfccs.shape[1] > max_pad_len:
+                mfccs = mfccs[:, :max_pad_len]
+            else:
+                mfccs = np.pad(mfccs, pad_width=((0, 0), (0, max_pad_len - mfccs.shape[1])), mode='constant')
+        return mfccs
@@ -0,0 +1,76 @@
+"""
+Benchmark: reconhecedor por cromagrama vs. CNN (Keras e motor NumPy) em um dataset
+sintético no layout do dataset real (dataset/<acorde>/*.wav): acordes sintéticos
+com ganho, afinação e ruído variados. O CNN é treinado nesse dataset (80/20); a
+comparação usa o mesmo relatório do `python chroma_recognizer.py --compare`
+(acurácia, latência do predict_note, tempo de carga e RSS, um processo por backend).
+
+Com o dataset real e um modelo treinado, use direto:
+    python chroma_recognizer.py --compare chroma numpy keras
+
+Uso:
+    python tests/benchmarks/bench_chroma_recognizer.py --files-per-chord 40 --epochs 30
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from audio_sources import CHORD_FREQUENCIES, synth_chord
+from chroma_recognizer import compare_backends
+from model_registry import artifact_paths
+from train_model import SAMPLE_RATE
+
+
+def write_dataset(path, files_per_chord, seconds=2.0, seed=0):
+    import soundfile as sf
+
+    rng = np.random.default_rng(seed)
+    for chord in sorted(CHORD_FREQUENCIES):
+        os.makedirs(os.path.join(path, chord))
+        for i in range(files_per_chord):
+            # Afinação até ±30 cents, ganho de -20 a 0 dB e ruído branco de fundo
+            detune = 2 ** (rng.uniform(-30, 30) / 1200)
+            signal = synth_chord(chord, seconds * detune, SAMPLE_RATE, seed=int(rng.integers(1 << 30)),
+                                 amplitude=0.3 * 10 ** (rng.uniform(-20, 0) / 20))
+            signal = signal[:int(seconds * SAMPLE_RATE)]
+            signal = signal + rng.normal(0, 0.004, len(signal)).astype(np.float32)
+            sf.write(os.path.join(path, chord, f'{i:03d}.wav'), signal, int(SAMPLE_RATE * detune))
+
+
+def train_cnn(dataset_path, model_dir, cache_dir, epochs):
+    import joblib
+    from numpy_inference import export_numpy_model
+    from train_model import train_model
+
+    model, encoder, scaler = train_model(dataset_path=dataset_path, epochs=epochs, save=False, cache_dir=cache_dir)
+    paths = artifact_paths(model_dir)
+    model.save(paths['model'])
+    joblib.dump(encoder, paths['encoder'])
+    joblib.dump(scaler, paths['scaler'])
+    # Já exportado: o backend numpy não precisa carregar o TensorFlow para gerar o .npz
+    export_numpy_model(model, scaler, paths['numpy'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files-per-chord', type=int, default=40)
+    parser.add_argument('--epochs', type=int, default=30)
+    parser.add_argument('--backends', nargs='+', default=['chroma', 'numpy', 'keras'])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dataset_path = os.path.join(tmp_dir, 'dataset')
+        model_dir = os.path.join(tmp_dir, 'modelo')
+        os.makedirs(model_dir)
+        write_dataset(dataset_path, args.files_per_chord)
+        train_cnn(dataset_path, model_dir, os.path.join(tmp_dir, 'cache'), args.epochs)
+        compare_backends(args.backends, dataset_path, model_dir, out_path=os.path.join(tmp_dir, 'relatorio.json'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: MFCC com librosa.feature.mfcc clipe a clipe vs. FeatureExtractor
+(filtros pré-calculados, float32) clipe a clipe e em lote, para janelas ao vivo
+(0,75 s) e clipes de treino (3 s, 704 quadros), e o erro máximo em relação ao librosa.
+
+Uso:
+    python tests/benchmarks/bench_feature_extractor.py --clips 256
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import librosa
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from feature_extractor import get_feature_extractor
+from synthetic import synth_chord, CHORD_FREQUENCIES
+from train_model import SAMPLE_RATE, N_MFCC, MAX_PAD_LEN, LIVE_WINDOW_SECONDS, frames_for_window
+
+
+def librosa_mfcc(clip, max_pad_len):
+    mfccs = librosa.feature.mfcc(y=clip, sr=SAMPLE_RATE, n_mfcc=N_MFCC)
+    if mfccs.shape[1] > max_pad_len:
+        return mfccs[:, :max_pad_len]
+    return np.pad(mfccs, ((0, 0), (0, max_pad_len - mfccs.shape[1])))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clips', type=int, default=256)
+    args = parser.parse_args()
+
+    extractor = get_feature_extractor(SAMPLE_RATE, N_MFCC)
+    chords = list(CHORD_FREQUENCIES)
+    cases = [
+        ('janela 0,75 s', LIVE_WINDOW_SECONDS, frames_for_window(LIVE_WINDOW_SECONDS)),
+        ('clipe 3 s', 3.0, MAX_PAD_LEN),
+    ]
+    print(f"\nClipes por caso: {args.clips}")
+    print(f"{'caso':<14} {'librosa':>12} {'extrator':>12} {'lote':>12} {'acelera':>8} {'erro máx.':>10}")
+    for name, seconds, max_pad_len in cases:
+        n_samples = int(SAMPLE_RATE * seconds)
+        clips = np.stack([synth_chord(chords[i % len(chords)], duration=seconds, seed=i)[:n_samples]
+                          for i in range(args.clips)]).astype(np.float32)
+        # Aquecimento (cache de filtros do librosa, FFT)
+        librosa_mfcc(clips[0], max_pad_len)
+        extractor.mfcc(clips[0], max_pad_len)
+
+        librosa_time, expected = timed(lambda: np.stack([librosa_mfcc(clip, max_pad_len) for clip in clips]))
+        single_time, _ = timed(lambda: np.stack([extractor.mfcc(clip, max_pad_len) for clip in clips]))
+        batch_time, batch = timed(lambda: extractor.mfcc_batch(clips, max_pad_len))
+        error = float(np.abs(batch - expected).max())
+        per_clip = lambda total: f"{total / args.clips * 1000:7.3f} ms"
+        print(f"{name:<14} {per_clip(librosa_time):>12} {per_clip(single_time):>12} {per_clip(batch_time):>12} "
+              f"{librosa_time / batch_time:7.1f}x {error:10.2e}")
+
+
+if __name__ == '__main__':
+    main()
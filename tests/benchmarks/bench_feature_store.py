@@ -0,0 +1,89 @@
+"""
+Benchmark: uma passada completa pelas features do dataset (o que o ajuste do
+scaler, cada época do treino e a avaliação fazem) lendo do cache de features
+(um .npy pequeno por arquivo) vs. dos shards do FeatureStore (np.memmap), e o
+custo de acrescentar gravações novas ao store.
+
+Uso:
+    python tests/benchmarks/bench_feature_store.py --files-per-chord 250
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic import write_synthetic_dataset
+from train_model import build_feature_store, cached_samples_reader, index_dataset, LIVE_WINDOW_SECONDS
+
+
+def full_pass(entries, read_samples):
+    # Soma das amostras: força a leitura de todos os bytes
+    total = 0.0
+    for _, key, _ in entries:
+        total += float(np.sum(read_samples(key)))
+    return total
+
+
+def best_of(fn, repeats=3):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files-per-chord', type=int, default=250)
+    parser.add_argument('--duration', type=float, default=2.0)
+    parser.add_argument('--live-window', action='store_true', help="Features com o tamanho da janela ao vivo.")
+    args = parser.parse_args()
+    window = LIVE_WINDOW_SECONDS if args.live_window else None
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dataset_path = os.path.join(tmp_dir, 'dataset')
+        chords = write_synthetic_dataset(dataset_path, files_per_chord=args.files_per_chord, duration=args.duration)
+        _, entries, cache = index_dataset(dataset_path, cache_dir=os.path.join(tmp_dir, 'cache'), window_seconds=window)
+
+        store_dir = os.path.join(tmp_dir, 'store')
+        start = time.perf_counter()
+        store = build_feature_store(dataset_path, store_dir, window_seconds=window)
+        build_time = time.perf_counter() - start
+
+        cache_time, cache_sum = best_of(lambda: full_pass(entries, cached_samples_reader(cache, window)))
+        store_time, store_sum = best_of(lambda: full_pass(store.entries(), store.file_samples))
+        n_samples, n_shards = len(store), len(store.shards)
+        assert np.isclose(cache_sum, store_sum, rtol=1e-4), "Features diferentes entre cache e store"
+
+        # Acrescenta ~1% de gravações novas: só elas são processadas, num shard novo
+        new_per_chord = max(1, args.files_per_chord // 100)
+        extra_path = os.path.join(tmp_dir, 'extra')
+        write_synthetic_dataset(extra_path, files_per_chord=new_per_chord, duration=args.duration,
+                                seed_offset=args.files_per_chord)
+        for chord in chords:
+            for filename in os.listdir(os.path.join(extra_path, chord)):
+                os.replace(os.path.join(extra_path, chord, filename), os.path.join(dataset_path, chord, 'novo_' + filename))
+        shard_mtimes = {shard['file']: os.stat(os.path.join(store_dir, shard['file'])).st_mtime_ns
+                        for shard in store.shards}
+        start = time.perf_counter()
+        store = build_feature_store(dataset_path, store_dir, window_seconds=window)
+        append_time = time.perf_counter() - start
+        size_mb = sum(count for _, _, count in entries) * store.file_samples(store.file_ids[0])[0].nbytes / 1e6
+        rewritten = sum(os.stat(os.path.join(store_dir, name)).st_mtime_ns != mtime for name, mtime in shard_mtimes.items())
+
+    print(f"\nArquivos: {len(entries)} ({len(chords)} acordes), amostras: {n_samples}, {size_mb:.0f} MB em {n_shards} shards")
+    print(f"Build do store (extração dos .wav):        {build_time:7.2f} s")
+    print(f"Passada completa, cache (.npy por arquivo): {cache_time:7.3f} s  ({size_mb / cache_time:7.0f} MB/s)")
+    print(f"Passada completa, store (memmap):           {store_time:7.3f} s  ({size_mb / store_time:7.0f} MB/s)")
+    print(f"Append de {new_per_chord * len(chords)} arquivos novos:  {append_time:7.2f} s, shards reescritos: {rewritten}")
+
+
+if __name__ == '__main__':
+    main()
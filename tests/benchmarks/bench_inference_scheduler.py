@@ -0,0 +1,98 @@
+"""
+Benchmark: vazão e latência de inferência com N sessões simuladas, cada uma
+chamando model.predict com lote de 1 vs. o InferenceScheduler (micro-lotes).
+
+Cada sessão envia uma janela a cada `--tick-ms` (como o loop ao vivo) durante
+`--seconds` segundos; o modelo tem o formato de produção e pesos aleatórios.
+
+Uso:
+    python tests/benchmarks/bench_inference_scheduler.py --sessions 1 8 64 --backend keras
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from inference_scheduler import InferenceScheduler
+from train_model import build_model, frames_for_window, LIVE_WINDOW_SECONDS, MAX_PAD_LEN, N_MFCC
+
+
+def make_model(backend, frames, classes=8):
+    model = build_model(frames, N_MFCC, classes)
+    if backend == 'keras':
+        return model
+    from sklearn.preprocessing import StandardScaler
+    from numpy_inference import export_numpy_model, load_numpy_model
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'weights.npz')
+        export_numpy_model(model, StandardScaler().fit(np.zeros((2, frames))), path)
+        return load_numpy_model(path)[0]
+
+
+def run(predictor, n_sessions, frames, seconds, tick):
+    latencies = [[] for _ in range(n_sessions)]
+    stop_at = time.perf_counter() + seconds
+    x = np.random.default_rng(0).normal(size=(1, frames, N_MFCC)).astype(np.float32)
+
+    def session(i):
+        next_tick = time.perf_counter() + tick * i / n_sessions
+        while True:
+            now = time.perf_counter()
+            if now >= stop_at:
+                return
+            if now < next_tick:
+                time.sleep(next_tick - now)
+            start = time.perf_counter()
+            predictor.predict(x, verbose=0)
+            latencies[i].append(time.perf_counter() - start)
+            next_tick = max(next_tick + tick, time.perf_counter())
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(n_sessions)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    all_latencies = np.concatenate([np.array(l) for l in latencies]) * 1000
+    return len(all_latencies) / elapsed, np.percentile(all_latencies, 50), np.percentile(all_latencies, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 8, 64])
+    parser.add_argument('--backend', choices=['keras', 'numpy'], default='keras')
+    parser.add_argument('--live-window', action='store_true', help="Entrada de 33 quadros em vez de MAX_PAD_LEN")
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--tick-ms', type=float, default=80.0)
+    parser.add_argument('--latency-budget-ms', type=float, default=10.0)
+    args = parser.parse_args()
+
+    frames = frames_for_window(LIVE_WINDOW_SECONDS) if args.live_window else MAX_PAD_LEN
+    model = make_model(args.backend, frames)
+    model.predict(np.zeros((1, frames, N_MFCC), dtype=np.float32), verbose=0)
+    demand = 1000 / args.tick_ms
+
+    print(f"Backend: {args.backend}, entrada: {frames} quadros, demanda: {demand:.1f} predições/s por sessão")
+    print(f"{'sessões':>8} {'modo':<12} {'pred/s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for n in args.sessions:
+        rate, p50, p95 = run(model, n, frames, args.seconds, args.tick_ms / 1000)
+        print(f"{n:>8} {'lote de 1':<12} {rate:9.1f} {p50:9.2f} {p95:9.2f}")
+
+        scheduler = InferenceScheduler(model, max_latency=args.latency_budget_ms / 1000).start()
+        scheduler.set_expected_clients(n)
+        rate, p50, p95 = run(scheduler, n, frames, args.seconds, args.tick_ms / 1000)
+        stats = scheduler.stats()
+        scheduler.stop()
+        print(f"{n:>8} {'agendador':<12} {rate:9.1f} {p50:9.2f} {p95:9.2f}   lote médio {stats['mean_batch_size']:.1f}")
+        print(f"{'':>8} {'demanda':<12} {n * demand:9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: tempo de resposta do /get_note e atraso do callback de captura com
+várias sessões de reconhecimento ativas, com MFCC + inferência no processo web
+(modo thread) vs. no worker de inferência (modo processo, buffer em memória
+compartilhada). O áudio vem do dispositivo virtual em tempo real e o modelo é o
+CNN de pesos aleatórios da suíte de benchmarks.
+
+Uso:
+    python tests/benchmarks/bench_inference_worker.py --sessions 4 --seconds 15
+    python tests/benchmarks/bench_inference_worker.py --backend numpy
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import app as app_module
+import audio_capture
+import metrics
+from audio_sources import VirtualAudioSource
+
+
+# Executado também no processo do worker (spawn): precisa ser uma função de módulo
+def fixtures_loader(version, backend):
+    from run_suite import Fixtures
+
+    fx = Fixtures(backend)
+    return fx.model, fx.encoder, fx.scaler
+
+
+def run(mode, n_sessions, seconds, backend):
+    app_module.INFERENCE_MODE = mode
+    app_module.INFERENCE_WORKER_LOADER = fixtures_loader
+    model, encoder, scaler = fixtures_loader('bench', backend)
+    app_module.swap_model(model, encoder, scaler, 'bench')
+    worker = app_module.inference_worker
+    while worker is not None and not worker.ready:
+        time.sleep(0.05)
+
+    from run_suite import Fixtures
+    source = VirtualAudioSource(Fixtures(backend).signal, name='bench', loop=True)
+    audio_capture.set_audio_source(source)
+    client = app_module.app.test_client()
+    session_ids = [f'bench-{i}' for i in range(n_sessions)]
+    for session_id in session_ids:
+        client.post('/start_recognition', json={'session_id': session_id})
+    time.sleep(1.0)
+
+    # Requisições em sequência durante `seconds`, como clientes fazendo polling
+    latencies = []
+    late_before = source.stream.late_blocks
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        client.get(f'/get_note?session_id={session_ids[len(latencies) % n_sessions]}')
+        latencies.append(time.perf_counter() - start)
+        time.sleep(0.005)
+    hops = sum(client.get(f'/session_stats?session_id={sid}').get_json()['hops_processed'] for sid in session_ids)
+    late_blocks = source.stream.late_blocks - late_before
+
+    for session_id in session_ids:
+        client.post('/stop_recognition', json={'session_id': session_id})
+    if worker is not None:
+        worker.stop()
+        app_module.inference_worker = None
+    ms = np.asarray(latencies) * 1000
+    return {
+        'mode': mode,
+        'get_note_p50_ms': float(np.percentile(ms, 50)),
+        'get_note_p99_ms': float(np.percentile(ms, 99)),
+        'get_note_max_ms': float(ms.max()),
+        'late_audio_blocks': late_blocks,
+        'hops_per_session': hops / n_sessions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=15.0)
+    parser.add_argument('--backend', choices=('keras', 'numpy'), default='keras')
+    args = parser.parse_args()
+
+    metrics.registry.enabled = True
+    rows = [run(mode, args.sessions, args.seconds, args.backend) for mode in ('thread', 'process')]
+    print(f"\n{args.sessions} sessões, {args.seconds:.0f} s, backend {args.backend}")
+    print(f"{'modo':<8} {'get_note p50':>13} {'p99':>9} {'máx':>9} {'blocos atrasados':>17} {'hops/sessão':>12}")
+    for row in rows:
+        print(f"{row['mode']:<8} {row['get_note_p50_ms']:10.2f} ms {row['get_note_p99_ms']:6.2f} ms "
+              f"{row['get_note_max_ms']:6.2f} ms {row['late_audio_blocks']:17d} {row['hops_per_session']:12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: modelo original (entrada preenchida até MAX_PAD_LEN quadros) vs. modelo
+treinado com entrada do tamanho da janela ao vivo (LIVE_WINDOW_SECONDS).
+
+Os dois modelos são avaliados como no loop ao vivo: janelas de 0,75 s, não
+silenciosas, de gravações que não foram usadas no treino.
+
+Uso:
+    python tests/benchmarks/bench_input_length.py --epochs 30
+    python tests/benchmarks/bench_input_length.py --dataset dataset --eval-dataset dataset_teste
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import librosa
+
+from synthetic import write_synthetic_dataset
+from train_model import (train_model, predict_note, model_input_frames, LIVE_WINDOW_SECONDS,
+                         SAMPLE_RATE, SILENCE_THRESHOLD)
+
+
+def live_windows(dataset_path):
+    window_samples = int(SAMPLE_RATE * LIVE_WINDOW_SECONDS)
+    for label in sorted(os.listdir(dataset_path)):
+        label_path = os.path.join(dataset_path, label)
+        if not os.path.isdir(label_path):
+            continue
+        for filename in sorted(os.listdir(label_path)):
+            if not filename.endswith('.wav'):
+                continue
+            audio, _ = librosa.load(os.path.join(label_path, filename), sr=SAMPLE_RATE)
+            for start in range(0, max(len(audio) - window_samples, 0) + 1, window_samples):
+                segment = audio[start:start + window_samples]
+                if np.sqrt(np.mean(segment**2)) >= SILENCE_THRESHOLD:
+                    yield label, segment
+
+
+def evaluate(name, model, encoder, scaler, windows):
+    predict_note(windows[0][1], model, encoder, scaler)  # aquecimento
+    correct = 0
+    latencies = []
+    for label, segment in windows:
+        start = time.perf_counter()
+        predicted = predict_note(segment, model, encoder, scaler)
+        latencies.append(time.perf_counter() - start)
+        correct += predicted == label
+    latencies = np.array(latencies) * 1000
+
+    # Custo só da rede (chamada direta, sem a sobrecarga de model.predict)
+    batch = np.zeros((1,) + tuple(model.input_shape[1:]), dtype=np.float32)
+    model(batch, training=False)
+    start = time.perf_counter()
+    for _ in range(50):
+        model(batch, training=False)
+    forward_ms = (time.perf_counter() - start) / 50 * 1000
+
+    print(f"{name:<22} quadros={model_input_frames(model):4d}  params={model.count_params():9d}  "
+          f"acurácia={correct / len(windows):.3f}  predict_note p50={np.percentile(latencies, 50):6.2f} ms  "
+          f"p95={np.percentile(latencies, 95):6.2f} ms  rede={forward_ms:6.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dataset', help="Dataset de treino (padrão: sintético)")
+    parser.add_argument('--eval-dataset', help="Dataset de avaliação (padrão: sintético, outras sementes)")
+    parser.add_argument('--files-per-chord', type=int, default=10)
+    parser.add_argument('--epochs', type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        train_path = args.dataset or os.path.join(tmp_dir, 'train')
+        eval_path = args.eval_dataset or os.path.join(tmp_dir, 'eval')
+        if not args.dataset:
+            write_synthetic_dataset(train_path, files_per_chord=args.files_per_chord, duration=3.0)
+        if not args.eval_dataset:
+            write_synthetic_dataset(eval_path, files_per_chord=max(args.files_per_chord // 3, 2), duration=3.0, seed_offset=500)
+
+        padded = train_model(dataset_path=train_path, epochs=args.epochs, save=False)
+        windowed = train_model(dataset_path=train_path, epochs=args.epochs, save=False, window_seconds=LIVE_WINDOW_SECONDS)
+        windows = list(live_windows(eval_path))
+
+        print(f"\nJanelas de avaliação: {len(windows)}")
+        evaluate("Preenchido (original)", *padded, windows)
+        evaluate("Janela ao vivo", *windowed, windows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark: extração de features do dataset em modo serial vs. pool de processos.
+
+Uso:
+    python tests/benchmarks/bench_load_dataset.py --files-per-chord 16 --workers 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic import write_synthetic_dataset
+from train_model import extract_features, load_dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files-per-chord', type=int, default=12)
+    parser.add_argument('--duration', type=float, default=3.0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dataset_path = os.path.join(tmp_dir, 'dataset')
+        chords = write_synthetic_dataset(dataset_path, files_per_chord=args.files_per_chord, duration=args.duration)
+        n_files = len(chords) * args.files_per_chord
+
+        # Aquecimento (JIT do numba/librosa) para não penalizar o primeiro modo medido
+        extract_features(os.path.join(dataset_path, chords[0], os.listdir(os.path.join(dataset_path, chords[0]))[0]))
+
+        start = time.perf_counter()
+        X_serial, y_serial, _ = load_dataset(dataset_path, use_cache=False, workers=1)
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        X_parallel, y_parallel, _ = load_dataset(dataset_path, use_cache=False, workers=args.workers)
+        parallel_time = time.perf_counter() - start
+
+    assert np.array_equal(y_serial, y_parallel), "Ordem dos rótulos diferente entre os modos"
+    assert np.allclose(X_serial, X_parallel), "Features diferentes entre os modos"
+
+    print(f"\nArquivos: {n_files} ({args.duration:.1f} s cada), CPUs disponíveis: {os.cpu_count()}")
+    print(f"Serial:              {serial_time:7.2f} s  ({n_files / serial_time:6.1f} arquivos/s)")
+    print(f"Paralelo ({args.workers:2d} proc.): {parallel_time:7.2f} s  ({n_files / parallel_time:6.1f} arquivos/s)")
+    print(f"Speedup:             {serial_time / parallel_time:7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark: várias sessões de reconhecimento, uma por canal de um mesmo
+dispositivo (interface com várias entradas), pelo gerenciador de captura. O
+dispositivo virtual entrega em tempo real um sinal diferente por canal (o sinal
+da suíte deslocado) e o modelo é o CNN de pesos aleatórios da suíte.
+
+Mede por canal a latência captura -> predição (p50/p95) e os hops descartados,
+e no total as chamadas do modelo por hop (1 = todos os canais no mesmo lote), o
+tamanho médio dos lotes e o uso de CPU do processo.
+
+Uso:
+    python tests/benchmarks/bench_multichannel.py --channels 1 4 8 --seconds 15
+    python tests/benchmarks/bench_multichannel.py --backend numpy
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import app as app_module
+import audio_capture
+import metrics
+from audio_sources import VirtualAudioSource
+from run_suite import Fixtures
+from soak import warm_up_pipeline
+
+
+def run(fx, n_channels, seconds):
+    app_module.swap_model(fx.model, fx.encoder, fx.scaler, 'bench')
+    warm_up_pipeline(fx.model, fx.encoder, fx.scaler)
+    # Um trecho diferente do sinal em cada canal
+    shift = len(fx.signal) // max(n_channels, 1)
+    signal = np.stack([np.roll(fx.signal, i * shift) for i in range(n_channels)], axis=1)
+    source = VirtualAudioSource(signal, name='bench', loop=True)
+    audio_capture.set_audio_source(source)
+    client = app_module.app.test_client()
+    session_ids = [f'canal-{i}' for i in range(n_channels)]
+    for channel, session_id in enumerate(session_ids):
+        client.post('/start_recognition', json={'session_id': session_id, 'channel': channel})
+    time.sleep(1.0)
+
+    scheduler = app_module.inference_scheduler
+    before = scheduler.stats()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    time.sleep(seconds)
+    cpu = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start) * 100
+    after = scheduler.stats()
+    channels = client.get('/channels').get_json()
+    stats = [client.get(f'/session_stats?session_id={sid}').get_json() for sid in session_ids]
+
+    for session_id in session_ids:
+        client.post('/stop_recognition', json={'session_id': session_id})
+    audio_capture.set_audio_source(None)
+    batches = after['batches'] - before['batches']
+    hops = float(np.mean([s['hops_processed'] for s in stats]))
+    p50 = [c['latency_p50_ms'] for c in channels]
+    p95 = [c['latency_p95_ms'] for c in channels]
+    return {
+        'channels': n_channels,
+        'latency_p50_ms': float(np.median(p50)),
+        'latency_p95_ms_worst': float(max(p95)),
+        'hops_per_channel': hops,
+        'hops_dropped': sum(s['hops_dropped'] for s in stats),
+        'mean_batch_size': (after['requests'] - before['requests']) / batches if batches else 0.0,
+        # Chamadas do modelo por hop de áudio (1 = todos os canais no mesmo lote; o filtro
+        # de similaridade pode dispensar canais cuja janela quase não mudou)
+        'model_calls_per_hop': batches / hops if hops else 0.0,
+        'cpu_percent': cpu,
+        'late_audio_blocks': source.stream.late_blocks if source.stream is not None else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--channels', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--seconds', type=float, default=15.0)
+    parser.add_argument('--backend', choices=('keras', 'numpy'), default='keras')
+    args = parser.parse_args()
+
+    metrics.registry.enabled = True
+    fx = Fixtures(args.backend)
+    rows = [run(fx, n, args.seconds) for n in args.channels]
+    print(f"\n{args.seconds:.0f} s por execução, backend {args.backend}")
+    print(f"{'canais':>6} {'latência p50':>13} {'p95 (pior)':>11} {'hops/canal':>11} {'descartados':>12} "
+          f"{'chamadas/hop':>13} {'lote médio':>11} {'CPU':>6} {'blocos atrasados':>17}")
+    for row in rows:
+        print(f"{row['channels']:6d} {row['latency_p50_ms']:10.1f} ms {row['latency_p95_ms_worst']:8.1f} ms "
+              f"{row['hops_per_channel']:11.0f} {row['hops_dropped']:12d} {row['model_calls_per_hop']:13.2f} "
+              f"{row['mean_batch_size']:11.2f} {row['cpu_percent']:5.0f}% {row['late_audio_blocks']:17d}")
+
+
+if __name__ == '__main__':
+    main()
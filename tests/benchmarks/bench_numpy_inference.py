@@ -0,0 +1,60 @@
+"""
+Benchmark: latência por chamada (lote de 1) do modelo Keras vs. motor NumPy,
+com pesos aleatórios no formato de produção.
+
+Uso:
+    python tests/benchmarks/bench_numpy_inference.py --calls 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from sklearn.preprocessing import StandardScaler
+
+from numpy_inference import export_numpy_model, load_numpy_model
+from train_model import build_model, MAX_PAD_LEN, N_MFCC, LIVE_WINDOW_SECONDS, frames_for_window
+
+
+def time_calls(fn, x, calls):
+    fn(x)
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn(x)
+    return (time.perf_counter() - start) / calls * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=100)
+    parser.add_argument('--classes', type=int, default=8)
+    args = parser.parse_args()
+
+    for frames in (MAX_PAD_LEN, frames_for_window(LIVE_WINDOW_SECONDS)):
+        model = build_model(frames, N_MFCC, args.classes)
+        scaler = StandardScaler().fit(np.random.default_rng(0).normal(size=(N_MFCC * 4, frames)))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'weights.npz')
+            export_numpy_model(model, scaler, path)
+            numpy_model, _ = load_numpy_model(path)
+            size_kb = os.path.getsize(path) / 1024
+
+        x = np.random.default_rng(1).normal(size=(1, frames, N_MFCC)).astype(np.float32)
+        keras_predict = time_calls(lambda v: model.predict(v, verbose=0), x, max(args.calls // 10, 5))
+        keras_call = time_calls(lambda v: model(v, training=False), x, args.calls)
+        numpy_predict = time_calls(numpy_model.predict, x, args.calls)
+        max_diff = np.abs(model.predict(x, verbose=0) - numpy_model.predict(x)).max()
+
+        print(f"\nEntrada ({frames} quadros, {N_MFCC} MFCC), arquivo NumPy: {size_kb:.0f} KB, diferença máx.: {max_diff:.2e}")
+        print(f"  Keras model.predict: {keras_predict:8.3f} ms/chamada")
+        print(f"  Keras model(x):      {keras_call:8.3f} ms/chamada")
+        print(f"  NumPy:               {numpy_predict:8.3f} ms/chamada  ({keras_predict / numpy_predict:.0f}x mais rápido que predict)")
+
+
+if __name__ == '__main__':
+    main()
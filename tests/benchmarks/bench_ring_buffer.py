@@ -0,0 +1,144 @@
+"""
+Benchmark: buffer de áudio antigo (lock compartilhado com o callback, cópia e
+np.concatenate a cada leitura) vs. RingBuffer (escritor sem lock, leitores com
+cursor próprio e views).
+
+Um thread escritor simula o callback do PortAudio (blocos de BLOCK_SIZE) enquanto
+N leitores pedem a janela de 0,75 s e as amostras novas o mais rápido possível.
+Mede o tempo de cada escrita (o que o thread de tempo real sente) e o custo de
+cada leitura.
+
+Uso:
+    python tests/benchmarks/bench_ring_buffer.py --readers 1 8 --seconds 3
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from audio_capture import SAMPLE_RATE, BLOCK_SIZE, BUFFER_SIZE_SECONDS, RECORD_DURATION
+from ring_buffer import RingBuffer
+
+WINDOW = int(SAMPLE_RATE * RECORD_DURATION)
+
+
+class LegacyBuffer:
+    """Reprodução do audio_capture original: um lock para o callback e todas as leituras."""
+
+    def __init__(self, size):
+        self.audio_buffer = np.zeros(size, dtype=np.float32)
+        self.buffer_write_idx = 0
+        self.samples_written = 0
+        self.buffer_lock = threading.Lock()
+
+    def write(self, indata):
+        with self.buffer_lock:
+            num_samples = indata.shape[0]
+            if self.buffer_write_idx + num_samples > self.audio_buffer.size:
+                samples_to_end = self.audio_buffer.size - self.buffer_write_idx
+                self.audio_buffer[self.buffer_write_idx:] = indata[:samples_to_end]
+                self.audio_buffer[:num_samples - samples_to_end] = indata[samples_to_end:]
+                self.buffer_write_idx = num_samples - samples_to_end
+            else:
+                self.audio_buffer[self.buffer_write_idx:self.buffer_write_idx + num_samples] = indata
+                self.buffer_write_idx += num_samples
+            self.samples_written += num_samples
+
+    def reader(self):
+        buf = self
+        state = {'cursor': self.samples_written}
+
+        def read():
+            with buf.buffer_lock:
+                if buf.buffer_write_idx >= WINDOW:
+                    window = buf.audio_buffer[buf.buffer_write_idx - WINDOW:buf.buffer_write_idx].copy()
+                else:
+                    window = np.concatenate((buf.audio_buffer[buf.audio_buffer.size - (WINDOW - buf.buffer_write_idx):].copy(),
+                                             buf.audio_buffer[:buf.buffer_write_idx].copy()))
+                available = min(buf.samples_written - state['cursor'], buf.audio_buffer.size)
+                start = (buf.buffer_write_idx - available) % buf.audio_buffer.size
+                if start + available <= buf.audio_buffer.size:
+                    new = buf.audio_buffer[start:start + available].copy()
+                else:
+                    new = np.concatenate((buf.audio_buffer[start:], buf.audio_buffer[:buf.buffer_write_idx]))
+                state['cursor'] = buf.samples_written
+            return window, new
+        return read
+
+
+class RingAdapter:
+    def __init__(self, size):
+        self.ring = RingBuffer(size)
+
+    def write(self, indata):
+        self.ring.write(indata)
+
+    def reader(self):
+        reader = self.ring.reader()
+
+        def read():
+            return self.ring.latest(WINDOW), reader.read_new()
+        return read
+
+
+def run(buffer, n_readers, seconds, speed):
+    block = np.random.default_rng(0).normal(size=BLOCK_SIZE).astype(np.float32)
+    interval = BLOCK_SIZE / SAMPLE_RATE / speed
+    write_times = []
+    read_counts = [0] * n_readers
+    read_times = [0.0] * n_readers
+    stop = threading.Event()
+
+    def writer():
+        next_at = time.perf_counter()
+        while not stop.is_set():
+            start = time.perf_counter()
+            buffer.write(block)
+            write_times.append(time.perf_counter() - start)
+            next_at += interval
+            time.sleep(max(next_at - time.perf_counter(), 0))
+
+    def consumer(i):
+        read = buffer.reader()
+        while not stop.is_set():
+            start = time.perf_counter()
+            read()
+            read_times[i] += time.perf_counter() - start
+            read_counts[i] += 1
+            time.sleep(0.0005)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=consumer, args=(i,)) for i in range(n_readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    writes = np.array(write_times) * 1e6
+    reads = sum(read_counts)
+    return np.percentile(writes, 50), np.percentile(writes, 99), writes.max(), sum(read_times) / reads * 1e6, reads / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--readers', type=int, nargs='+', default=[1, 8])
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--speed', type=float, default=4.0, help="Velocidade do escritor em relação ao tempo real")
+    args = parser.parse_args()
+
+    size = int(SAMPLE_RATE * BUFFER_SIZE_SECONDS)
+    print(f"{'leitores':>8} {'buffer':<8} {'escrita p50 µs':>15} {'p99 µs':>9} {'máx µs':>9} {'leitura µs':>11} {'leituras/s':>11}")
+    for n in args.readers:
+        for name, cls in (('antigo', LegacyBuffer), ('anel', RingAdapter)):
+            p50, p99, worst, read_us, rate = run(cls(size), n, args.seconds, args.speed)
+            print(f"{n:>8} {name:<8} {p50:15.1f} {p99:9.1f} {worst:9.1f} {read_us:11.1f} {rate:11.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: quantas chamadas ao modelo o SimilarityGate evita e quanto isso custa
+em acurácia, para vários limiares.
+
+Treina um modelo pequeno (janela ao vivo) com acordes sintéticos e percorre uma
+sequência de acordes sustentados, não vista no treino, em hops de 80 ms como o
+loop ao vivo. Para cada limiar mostra a fração de janelas que passaram pela rede,
+a concordância com as predições sem gate e a acurácia (bruta e após o filtro de
+estabilidade) contra o acorde tocado.
+
+Uso:
+    python tests/benchmarks/bench_similarity_gate.py --thresholds 0 0.003 0.006 0.01 0.02
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic import CHORD_FREQUENCIES, synth_chord, write_synthetic_dataset
+from numpy_inference import export_numpy_model, load_numpy_model
+from recognition import StabilityFilter, PREDICTION_HOP_SECONDS
+from similarity_gate import SimilarityGate, MAX_REUSE
+from train_model import (train_model, predict_note, extract_features, model_input_frames,
+                         LIVE_WINDOW_SECONDS, SAMPLE_RATE, N_MFCC)
+
+
+class CountingModel:
+    def __init__(self, model):
+        self.model = model
+        self.input_shape = model.input_shape
+        self.calls = 0
+
+    def predict(self, x, verbose=0):
+        self.calls += 1
+        return self.model.predict(x, verbose=0)
+
+
+def chord_sequence(chords, seconds_per_chord, seed_offset=900):
+    audio = np.concatenate([synth_chord(chord, seconds_per_chord, SAMPLE_RATE, seed=seed_offset + i)
+                            for i, chord in enumerate(chords)])
+    window = int(SAMPLE_RATE * LIVE_WINDOW_SECONDS)
+    hop = int(SAMPLE_RATE * PREDICTION_HOP_SECONDS)
+    chord_samples = int(SAMPLE_RATE * seconds_per_chord)
+    for end in range(window, len(audio) + 1, hop):
+        yield chords[(end - 1) // chord_samples], audio[end - window:end]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0, 0.003, 0.006, 0.01, 0.02])
+    parser.add_argument('--max-reuse', type=int, default=MAX_REUSE)
+    parser.add_argument('--files-per-chord', type=int, default=8)
+    parser.add_argument('--epochs', type=int, default=30)
+    parser.add_argument('--seconds-per-chord', type=float, default=3.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        train_path = os.path.join(tmp_dir, 'train')
+        write_synthetic_dataset(train_path, files_per_chord=args.files_per_chord, duration=3.0)
+        keras_model, encoder, scaler = train_model(dataset_path=train_path, epochs=args.epochs, save=False,
+                                                   window_seconds=LIVE_WINDOW_SECONDS)
+        weights_path = os.path.join(tmp_dir, 'weights.npz')
+        export_numpy_model(keras_model, scaler, weights_path)
+        model, _ = load_numpy_model(weights_path)
+
+    frames = model_input_frames(model)
+    chords = list(CHORD_FREQUENCIES) * 2
+    windows = [(label, segment, extract_features(segment, SAMPLE_RATE, N_MFCC, frames, is_file=False))
+               for label, segment in chord_sequence(chords, args.seconds_per_chord)]
+
+    baseline = None
+    print(f"\nJanelas: {len(windows)} ({len(chords)} acordes de {args.seconds_per_chord} s), max_reuse={args.max_reuse}")
+    print(f"{'limiar':>8} {'rede %':>8} {'reuso %':>8} {'concord.':>9} {'acurácia':>9} {'estável':>8}")
+    for threshold in args.thresholds:
+        counting = CountingModel(model)
+        gate = SimilarityGate(threshold, args.max_reuse) if threshold > 0 else None
+        stability = StabilityFilter()
+        predictions = []
+        stable_correct = 0
+        for label, segment, features in windows:
+            predicted = predict_note(segment, counting, encoder, scaler, max_pad_len=frames, features=features, gate=gate)
+            predictions.append(predicted)
+            stable_correct += stability.update(predicted) == label
+        if baseline is None:
+            baseline = predictions
+        agreement = np.mean([a == b for a, b in zip(predictions, baseline)])
+        accuracy = np.mean([p == label for p, (label, _, _) in zip(predictions, windows)])
+        reuse = gate.stats()['gate_reuse_rate'] if gate else 0.0
+        print(f"{threshold:>8.3f} {counting.calls / len(windows) * 100:8.1f} {reuse * 100:8.1f} "
+              f"{agreement:9.3f} {accuracy:9.3f} {stable_correct / len(windows):8.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark: custo de features por iteração do loop ao vivo (janela de 0,75 s,
+~80 ms de áudio novo por iteração) com extract_features vs. StreamingMFCC.
+
+Uso:
+    python tests/benchmarks/bench_streaming_features.py --seconds 20
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic import synth_chord
+from streaming_features import StreamingMFCC
+from train_model import extract_features, SAMPLE_RATE, N_MFCC, MAX_PAD_LEN
+
+WINDOW_SAMPLES = int(SAMPLE_RATE * 0.75)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=20.0)
+    parser.add_argument('--tick-samples', type=int, default=int(SAMPLE_RATE * 0.08))
+    args = parser.parse_args()
+
+    signal = np.concatenate([synth_chord(chord, duration=2.0, seed=i)
+                             for i, chord in enumerate(['C_Major', 'G_Major', 'A_Minor', 'F_Major'] * int(args.seconds // 8 + 1))])
+    signal = signal[:int(args.seconds * SAMPLE_RATE)]
+    ticks = range(WINDOW_SAMPLES, signal.size, args.tick_samples)
+
+    extract_features(signal[:WINDOW_SAMPLES], is_file=False)  # aquecimento
+    start = time.perf_counter()
+    for end in ticks:
+        extract_features(signal[end - WINDOW_SAMPLES:end], is_file=False, max_pad_len=MAX_PAD_LEN)
+    full_time = (time.perf_counter() - start) / len(ticks)
+
+    streaming = StreamingMFCC(WINDOW_SAMPLES, sample_rate=SAMPLE_RATE, n_mfcc=N_MFCC)
+    streaming.push(signal[:WINDOW_SAMPLES])
+    frames_before = streaming.frames_computed
+    start = time.perf_counter()
+    for end in ticks:
+        streaming.push(signal[end:end + args.tick_samples])
+        streaming.features(max_pad_len=MAX_PAD_LEN)
+    streaming_time = (time.perf_counter() - start) / len(ticks)
+    frames_per_tick = (streaming.frames_computed - frames_before) / len(ticks)
+
+    print(f"Iterações: {len(ticks)}, áudio novo por iteração: {args.tick_samples} amostras")
+    print(f"extract_features: {full_time * 1000:7.3f} ms/iteração ({streaming.n_frames} quadros)")
+    print(f"StreamingMFCC:    {streaming_time * 1000:7.3f} ms/iteração ({frames_per_tick:.1f} quadros)")
+    print(f"Speedup:          {full_time / streaming_time:7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: pico de memória (RSS) do treino com o dataset inteiro na memória vs.
+o modo streaming (tf.data lendo do cache de features).
+
+Cada modo roda num processo separado, com o cache de features já preenchido,
+e informa o próprio pico de RSS (ru_maxrss) e o RSS logo após importar o
+TensorFlow, para separar o custo fixo do framework do custo do dataset.
+
+Uso:
+    python tests/benchmarks/bench_training_memory.py --files-per-chord 100 --epochs 1
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+try:
+    import resource
+except ImportError:  # Windows: sem getrusage
+    resource = None
+
+
+def _peak_rss_mb():
+    # ru_maxrss é em KB no Linux (em bytes no macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_mode(args):
+    import tensorflow  # noqa: F401  (custo fixo, medido antes do dataset)
+    import train_model
+
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    train_model.train_model(workers=1, dataset_path=args.dataset, cache_dir=args.cache_dir, epochs=args.epochs,
+                            save=False, streaming=args.mode == 'streaming')
+    print(json.dumps({'mode': args.mode, 'baseline_mb': baseline, 'peak_mb': _peak_rss_mb(),
+                      'seconds': time.perf_counter() - start}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files-per-chord', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=2.0)
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--mode', choices=['in-memory', 'streaming'], help=argparse.SUPPRESS)
+    parser.add_argument('--dataset', help=argparse.SUPPRESS)
+    parser.add_argument('--cache-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if resource is None:
+        print("Benchmark indisponível nesta plataforma (módulo resource ausente).")
+        return
+    if args.mode:
+        run_mode(args)
+        return
+
+    from synthetic import write_synthetic_dataset
+    from train_model import index_dataset
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dataset_path = os.path.join(tmp_dir, 'dataset')
+        cache_dir = os.path.join(tmp_dir, 'cache')
+        chords = write_synthetic_dataset(dataset_path, files_per_chord=args.files_per_chord, duration=args.duration)
+        # Preenche o cache antes: os dois modos medem só o treino
+        _, entries, _ = index_dataset(dataset_path, cache_dir=cache_dir)
+
+        results = []
+        for mode in ('in-memory', 'streaming'):
+            output = subprocess.run(
+                [sys.executable, __file__, '--mode', mode, '--dataset', dataset_path, '--cache-dir', cache_dir,
+                 '--epochs', str(args.epochs)],
+                capture_output=True, text=True, check=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    dataset_mb = len(entries) * 40 * 704 * 4 / (1024 * 1024)
+    print(f"\nArquivos: {len(entries)} ({len(chords)} acordes), features em float32: {dataset_mb:.0f} MB, épocas: {args.epochs}")
+    print(f"{'modo':<10} {'RSS após TF':>12} {'pico RSS':>10} {'acréscimo':>10} {'tempo':>8}")
+    for result in results:
+        print(f"{result['mode']:<10} {result['baseline_mb']:10.0f} MB {result['peak_mb']:7.0f} MB "
+              f"{result['peak_mb'] - result['baseline_mb']:7.0f} MB {result['seconds']:7.1f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: transcrição offline de uma gravação longa (acordes sintéticos
+concatenados) com pesos aleatórios. Compara o caminho em lotes de transcribe.py
+com o laço janela a janela (extract_features + predict de lote 1) e mostra o
+fator de tempo real e o pico de memória.
+
+Uso:
+    python tests/benchmarks/bench_transcribe.py --minutes 10 --backend numpy
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic import CHORD_FREQUENCIES, synth_chord
+from bench_inference_scheduler import make_model
+from train_model import extract_features, frames_for_window, LIVE_WINDOW_SECONDS, N_MFCC, SAMPLE_RATE
+from transcribe import transcribe_file, window_starts, HOP_SECONDS, WINDOW_SECONDS
+
+
+class IdentityScaler:
+    def transform(self, x):
+        return x
+
+
+class Encoder:
+    classes_ = np.array(sorted(CHORD_FREQUENCIES))
+
+    def inverse_transform(self, indexes):
+        return self.classes_[indexes]
+
+
+def write_recording(path, minutes, chord_seconds=2.0):
+    # Escreve em blocos para que o próprio benchmark não ocupe a memória medida
+    chords = sorted(CHORD_FREQUENCIES)
+    with sf.SoundFile(path, 'w', samplerate=SAMPLE_RATE, channels=1) as f:
+        for i in range(int(minutes * 60 / chord_seconds)):
+            f.write(synth_chord(chords[i % len(chords)], chord_seconds, SAMPLE_RATE, seed=i))
+
+
+def per_window_loop(path, model, seconds):
+    # Referência: como o loop ao vivo, uma janela por vez (apenas os primeiros `seconds`)
+    audio, _ = sf.read(path, frames=int(seconds * SAMPLE_RATE), dtype='float32')
+    window_samples = int(SAMPLE_RATE * WINDOW_SECONDS)
+    starts = window_starts(0, 0, len(audio), window_samples, int(SAMPLE_RATE * HOP_SECONDS))
+    frames = frames_for_window(LIVE_WINDOW_SECONDS)
+    start = time.perf_counter()
+    for window_start in starts:
+        features = extract_features(audio[window_start:window_start + window_samples], SAMPLE_RATE, N_MFCC, frames,
+                                    is_file=False)
+        model.predict(features.T[None], verbose=0)
+    return (time.perf_counter() - start) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--minutes', type=float, default=5.0)
+    parser.add_argument('--backend', choices=['keras', 'numpy'], default='numpy')
+    parser.add_argument('--batch-size', type=int, default=128)
+    args = parser.parse_args()
+
+    model = make_model(args.backend, frames_for_window(LIVE_WINDOW_SECONDS))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'gravacao.wav')
+        write_recording(path, args.minutes)
+
+        rtf_loop = per_window_loop(path, model, seconds=20)
+        result = transcribe_file(path, model, Encoder(), IdentityScaler(), batch_size=args.batch_size)
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Gravação: {result['duration_seconds'] / 60:.1f} min, {result['windows']} janelas, backend {args.backend}")
+    print(f"Janela a janela:  fator de tempo real {rtf_loop:.4f} ({1 / rtf_loop:.0f}x tempo real)")
+    print(f"Em lotes:         fator de tempo real {result['real_time_factor']:.4f} "
+          f"({1 / result['real_time_factor']:.0f}x tempo real), {result['processing_seconds']:.1f} s")
+    print(f"Pico de memória do processo: {peak_mb:.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
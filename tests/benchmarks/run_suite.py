@@ -0,0 +1,313 @@
+"""
+Suíte de benchmarks reproduzível dos caminhos quentes de features e inferência.
+
+Usa sinais sintéticos de acordes (synthetic.py) e um modelo com as camadas de
+produção e pesos aleatórios (semente fixa), então não precisa do dataset nem do
+modelo treinado. Mede latência (p50/p95/média) e vazão de cada estágio e do
+caminho completo, grava os resultados em JSON e compara com uma baseline:
+
+    python tests/benchmarks/run_suite.py                       # roda e compara com baseline.json
+    python tests/benchmarks/run_suite.py --threshold 0.3       # acusa regressão acima de 30% de piora no p50
+    python tests/benchmarks/run_suite.py --update-baseline     # grava a baseline desta máquina
+    python tests/benchmarks/run_suite.py --only predict_note extract_features
+
+Cada benchmark roda `--rounds` vezes e fica a rodada de menor p50, o que reduz o
+ruído de máquinas compartilhadas. Sai com código 1 se algum benchmark piorar mais
+que o limiar em relação à baseline. Os tempos dependem da máquina: gere a baseline
+no mesmo ambiente em que a comparação vai rodar.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(BENCH_DIR, '..', '..')))
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic import CHORD_FREQUENCIES, synth_chord
+
+from ring_buffer import RingBuffer
+from recognition import StabilityFilter, PREDICTION_HOP_SECONDS
+from streaming_features import StreamingMFCC
+from feature_extractor import get_feature_extractor
+from transcribe import predict_windows, window_starts
+from train_model import (extract_features, predict_note, frames_for_window, build_model,
+                         LIVE_WINDOW_SECONDS, SAMPLE_RATE, N_MFCC, MAX_PAD_LEN)
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+DEFAULT_OUTPUT = 'benchmark_results.json'
+DEFAULT_THRESHOLD = 0.5
+DEFAULT_ROUNDS = 3
+SEED = 0
+
+WINDOW_SAMPLES = int(SAMPLE_RATE * LIVE_WINDOW_SECONDS)
+HOP_SAMPLES = int(SAMPLE_RATE * PREDICTION_HOP_SECONDS)
+LIVE_FRAMES = frames_for_window(LIVE_WINDOW_SECONDS)
+
+
+def split_hops(audio):
+    """Hops consecutivos (sem sobreposição) do áudio, como chegam do callback de captura."""
+    return audio[:len(audio) // HOP_SAMPLES * HOP_SAMPLES].reshape(-1, HOP_SAMPLES)
+
+
+def measure(fn, repeats, warmup=3, min_sample_seconds=1e-3):
+    """
+    Chama fn() `repeats` vezes e retorna as estatísticas de latência (ms) e a vazão
+    (chamadas/s). Funções muito rápidas são medidas em grupos de chamadas que somam
+    pelo menos `min_sample_seconds`, para que a resolução do relógio não domine.
+    """
+    for _ in range(warmup):
+        fn()
+    start = time.perf_counter()
+    fn()
+    inner = max(1, int(min_sample_seconds / max(time.perf_counter() - start, 1e-9)))
+    latencies = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        for _ in range(inner):
+            fn()
+        latencies[i] = (time.perf_counter() - start) / inner
+    latencies *= 1000
+    return {
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'mean_ms': float(latencies.mean()),
+        'throughput_per_s': float(1000 / latencies.mean()),
+        'repeats': repeats,
+    }
+
+
+class Fixtures:
+    """Sinais, modelo aleatório (Keras e motor NumPy), scaler e encoder compartilhados pelos benchmarks."""
+
+    def __init__(self, backend):
+        import keras
+        from sklearn.preprocessing import LabelEncoder, StandardScaler
+        from numpy_inference import export_numpy_model, load_numpy_model
+
+        keras.utils.set_random_seed(SEED)
+        self.chords = sorted(CHORD_FREQUENCIES)
+        self.signal = np.concatenate([synth_chord(chord, 2.0, SAMPLE_RATE, seed=SEED + i)
+                                      for i, chord in enumerate(self.chords)])
+        self.window = self.signal[:WINDOW_SAMPLES]
+        self.encoder = LabelEncoder().fit(self.chords)
+        training_starts = window_starts(0, 0, len(self.signal), WINDOW_SAMPLES, WINDOW_SAMPLES // 2)
+        features = get_feature_extractor(SAMPLE_RATE, N_MFCC).mfcc_windows(self.signal, training_starts, WINDOW_SAMPLES,
+                                                                           max_pad_len=LIVE_FRAMES)
+        self.scaler = StandardScaler().fit(features.reshape(-1, LIVE_FRAMES))
+
+        self.keras_model = build_model(LIVE_FRAMES, N_MFCC, len(self.chords))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'weights.npz')
+            export_numpy_model(self.keras_model, self.scaler, path)
+            self.numpy_model, _ = load_numpy_model(path)
+        self.model = self.keras_model if backend == 'keras' else self.numpy_model
+        self.features = extract_features(self.window, SAMPLE_RATE, N_MFCC, LIVE_FRAMES, is_file=False)
+
+
+def bench_extract_features(fx, repeats):
+    return measure(lambda: extract_features(fx.window, SAMPLE_RATE, N_MFCC, LIVE_FRAMES, is_file=False), repeats)
+
+
+def bench_extract_features_padded(fx, repeats):
+    # Caminho do treino original: arquivo de 2 s preenchido até MAX_PAD_LEN quadros
+    clip = fx.signal[:2 * SAMPLE_RATE]
+    return measure(lambda: extract_features(clip, SAMPLE_RATE, N_MFCC, MAX_PAD_LEN, is_file=False), repeats)
+
+
+def bench_streaming_features(fx, repeats):
+    streaming = StreamingMFCC(WINDOW_SAMPLES, sample_rate=SAMPLE_RATE, n_mfcc=N_MFCC)
+    hops = split_hops(fx.signal)
+    state = {'i': 0}
+
+    def step():
+        streaming.push(hops[state['i'] % len(hops)])
+        streaming.features(max_pad_len=LIVE_FRAMES)
+        state['i'] += 1
+    return measure(step, repeats)
+
+
+def bench_get_audio_segment(fx, repeats):
+    ring = RingBuffer(SAMPLE_RATE * 3)
+    ring.write(fx.signal[:SAMPLE_RATE * 3 + 1234])
+    return measure(lambda: ring.latest(WINDOW_SAMPLES), repeats)
+
+
+def bench_ring_read_hops(fx, repeats):
+    ring = RingBuffer(SAMPLE_RATE * 3)
+    reader = ring.reader()
+    block = fx.signal[:HOP_SAMPLES]
+
+    def step():
+        ring.write(block)
+        reader.read_hops(HOP_SAMPLES)
+    return measure(step, repeats)
+
+
+def bench_predict_note(fx, repeats):
+    # scaler + modelo + encoder com as features já calculadas (como no loop ao vivo)
+    return measure(lambda: predict_note(fx.window, fx.model, fx.encoder, fx.scaler,
+                                        max_pad_len=LIVE_FRAMES, features=fx.features), repeats)
+
+
+def bench_predict_note_keras(fx, repeats):
+    return measure(lambda: predict_note(fx.window, fx.keras_model, fx.encoder, fx.scaler,
+                                        max_pad_len=LIVE_FRAMES, features=fx.features), max(repeats // 10, 5))
+
+
+def bench_transcribe_batch(fx, repeats):
+    # 128 janelas em lote: features + modelo (caminho do transcribe.py)
+    starts = window_starts(0, 0, len(fx.signal), WINDOW_SAMPLES, HOP_SAMPLES)[:128]
+    audio = fx.signal[:starts[-1] + WINDOW_SAMPLES]
+
+    def step():
+        predict_windows(audio, starts, WINDOW_SAMPLES, fx.numpy_model, fx.encoder, fx.scaler, LIVE_FRAMES,
+                        batch_size=len(starts))
+    result = measure(step, max(repeats // 20, 3), warmup=1)
+    result['windows_per_s'] = result['throughput_per_s'] * len(starts)
+    return result
+
+
+def bench_end_to_end_hop(fx, repeats):
+    # Uma iteração do loop ao vivo: hop novo -> MFCC incremental -> predição -> filtro de estabilidade
+    streaming = StreamingMFCC(WINDOW_SAMPLES, sample_rate=SAMPLE_RATE, n_mfcc=N_MFCC)
+    stability = StabilityFilter()
+    hops = split_hops(fx.signal)
+    state = {'i': 0}
+
+    def step():
+        streaming.push(hops[state['i'] % len(hops)])
+        features = streaming.features(max_pad_len=LIVE_FRAMES)
+        chord = predict_note(streaming.window_audio(), fx.model, fx.encoder, fx.scaler,
+                             max_pad_len=LIVE_FRAMES, features=features)
+        stability.update(chord)
+        state['i'] += 1
+    return measure(step, repeats)
+
+
+def bench_start_to_stable_chord(fx, repeats):
+    # Do silêncio até a primeira nota estável: tempo de CPU do caminho e hops de áudio necessários
+    chord_samples = 2 * SAMPLE_RATE
+    hops_needed = []
+
+    def run_once():
+        chord_idx = len(hops_needed) % len(fx.chords)
+        audio = fx.signal[chord_idx * chord_samples:(chord_idx + 1) * chord_samples]
+        streaming = StreamingMFCC(WINDOW_SAMPLES, sample_rate=SAMPLE_RATE, n_mfcc=N_MFCC)
+        stability = StabilityFilter()
+        for hop_idx, hop in enumerate(split_hops(audio), start=1):
+            streaming.push(hop)
+            chord = predict_note(streaming.window_audio(), fx.model, fx.encoder, fx.scaler, max_pad_len=LIVE_FRAMES,
+                                 features=streaming.features(max_pad_len=LIVE_FRAMES))
+            if stability.update(chord) not in ("Ouvindo...", "Silêncio..."):
+                break
+        hops_needed.append(hop_idx)
+
+    result = measure(run_once, max(repeats // 20, len(fx.chords)), warmup=0)
+    result['hops_to_stable'] = float(np.mean(hops_needed))
+    result['audio_latency_ms'] = result['hops_to_stable'] * PREDICTION_HOP_SECONDS * 1000
+    return result
+
+
+BENCHMARKS = {
+    'extract_features': bench_extract_features,
+    'extract_features_padded': bench_extract_features_padded,
+    'streaming_features': bench_streaming_features,
+    'get_audio_segment': bench_get_audio_segment,
+    'ring_read_hops': bench_ring_read_hops,
+    'predict_note': bench_predict_note,
+    'predict_note_keras': bench_predict_note_keras,
+    'transcribe_batch': bench_transcribe_batch,
+    'end_to_end_hop': bench_end_to_end_hop,
+    'start_to_stable_chord': bench_start_to_stable_chord,
+}
+
+
+def compare(results, baseline, threshold):
+    """Retorna as linhas da comparação e os nomes dos benchmarks com regressão (p50 acima do limiar)."""
+    lines = []
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get('benchmarks', {}).get(name)
+        if base is None:
+            lines.append(f"{name:<24} {result['p50_ms']:10.3f} {'-':>10} {'':>8}  (sem baseline)")
+            continue
+        ratio = result['p50_ms'] / base['p50_ms'] if base['p50_ms'] > 0 else 1.0
+        regressed = ratio > 1 + threshold
+        if regressed:
+            regressions.append(name)
+        lines.append(f"{name:<24} {result['p50_ms']:10.3f} {base['p50_ms']:10.3f} {ratio:8.2f}x"
+                     f"{'  REGRESSÃO' if regressed else ''}")
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="Roda só estes benchmarks")
+    parser.add_argument('--repeats', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS, help="Rodadas por benchmark (fica a de menor p50)")
+    parser.add_argument('--backend', choices=['numpy', 'keras'], default='numpy',
+                        help="Modelo usado em predict_note/end_to_end (predict_note_keras sempre usa Keras)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Arquivo JSON com os resultados")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Piora relativa máxima do p50 antes de acusar regressão (0.5 = 50%%)")
+    parser.add_argument('--update-baseline', action='store_true', help="Grava os resultados como nova baseline")
+    args = parser.parse_args()
+
+    fixtures = Fixtures(args.backend)
+    names = args.only or list(BENCHMARKS)
+    results = {}
+    for name in names:
+        rounds = [BENCHMARKS[name](fixtures, args.repeats) for _ in range(max(args.rounds, 1))]
+        results[name] = min(rounds, key=lambda result: result['p50_ms'])
+        print(f"{name:<24} p50={results[name]['p50_ms']:9.3f} ms  p95={results[name]['p95_ms']:9.3f} ms  "
+              f"{results[name]['throughput_per_s']:10.1f}/s")
+
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'backend': args.backend,
+            'seed': SEED,
+            'repeats': args.repeats,
+            'rounds': args.rounds,
+        },
+        'benchmarks': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResultados salvos em: {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline atualizada: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"Baseline não encontrada ({args.baseline}); rode com --update-baseline para criá-la.")
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    lines, regressions = compare(results, baseline, args.threshold)
+    print(f"\n{'benchmark':<24} {'p50 ms':>10} {'baseline':>10} {'razão':>9}  (limiar {args.threshold:.0%})")
+    print("\n".join(lines))
+    if regressions:
+        print(f"\nRegressões: {', '.join(regressions)}")
+        return 1
+    print("\nNenhuma regressão.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
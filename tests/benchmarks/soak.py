@@ -0,0 +1,267 @@
+"""
+Soak test do reconhecimento ao vivo com o dispositivo de áudio virtual.
+
+Toca um roteiro de acordes sintéticos (com os instantes exatos das mudanças)
+pelo caminho real de captura (audio_capture.callback -> buffer circular -> loop
+de predição do app.py -> filtro de estabilidade), em tempo real ou N vezes mais
+rápido, e compara as mudanças de nota exibidas com o roteiro:
+
+- latência de detecção de cada mudança: tempo de áudio entre o início do acorde
+  e a nota estável mudar para ele (p50/p95/máx);
+- mudanças perdidas (o acorde não apareceu até MAX_LATENCY depois do próximo) e
+  falsas (mudanças exibidas que não correspondem ao roteiro);
+- uso de CPU do processo (médio e pico por intervalo) e hops processados/descartados.
+
+Com --speed N o áudio chega N vezes mais rápido: a latência em tempo de áudio
+inclui o atraso de processamento multiplicado por N (é um teste de estresse).
+Sem modelo treinado (ex.: CI), --synthetic-model treina antes um modelo pequeno
+(motor NumPy) com acordes sintéticos.
+
+Uso:
+    python tests/benchmarks/soak.py --minutes 10 --speed 4 --synthetic-model
+    python tests/benchmarks/soak.py --script "C_Major:3,G_Major:3,silence:2" --repeat 20
+    python tests/benchmarks/soak.py --minutes 60 --json soak.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import app as app_module
+import audio_capture
+from audio_sources import ChordScript, VirtualAudioSource, parse_chord_script, CHORD_FREQUENCIES, SILENCE, SAMPLE_RATE
+
+# Uma mudança do roteiro conta como detectada até MAX_LATENCY_SECONDS depois do início do trecho seguinte
+MAX_LATENCY_SECONDS = 2.0
+CPU_SAMPLE_SECONDS = 1.0
+SOAK_SESSION_ID = 'soak'
+
+
+def random_script(seconds, chords=None, min_seconds=1.5, max_seconds=3.0, silence_probability=0.1, seed=0):
+    """Roteiro aleatório (reproduzível) de ~`seconds` segundos, sem o mesmo rótulo duas vezes seguidas."""
+    rng = np.random.default_rng(seed)
+    chords = list(chords or CHORD_FREQUENCIES)
+    steps, total, previous = [], 0.0, None
+    while total < seconds:
+        label = SILENCE if rng.random() < silence_probability else chords[rng.integers(len(chords))]
+        if label == previous:
+            continue
+        duration = float(rng.uniform(min_seconds, max_seconds))
+        steps.append((label, duration))
+        total += duration
+        previous = label
+    return steps
+
+
+def normalize_note(note):
+    # Notas exibidas pelo loop -> rótulos do roteiro (mensagens de estado são ignoradas)
+    if note.startswith(SILENCE):
+        return SILENCE
+    if note in CHORD_FREQUENCIES:
+        return note
+    return None
+
+
+def score_changes(changes, detections, sample_rate=SAMPLE_RATE, max_latency=MAX_LATENCY_SECONDS):
+    """
+    Casa as mudanças do roteiro [(amostra, rótulo)] com as mudanças exibidas
+    [(amostra em que apareceram, rótulo)], em ordem. Retorna latências (s),
+    mudanças perdidas e falsas.
+    """
+    max_latency_samples = int(max_latency * sample_rate)
+    used = [False] * len(detections)
+    latencies, missed = [], []
+    first_free = 0
+    for i, (start, label) in enumerate(changes):
+        limit = (changes[i + 1][0] if i + 1 < len(changes) else float('inf')) + max_latency_samples
+        hit = None
+        for j in range(first_free, len(detections)):
+            position, detected = detections[j]
+            if position >= limit:
+                break
+            if position >= start and detected == label:
+                hit = j
+                break
+        if hit is None:
+            missed.append((start / sample_rate, label))
+        else:
+            used[hit] = True
+            latencies.append((detections[hit][0] - start) / sample_rate)
+            first_free = hit + 1
+    false_changes = [(position / sample_rate, label) for (position, label), hit in zip(detections, used) if not hit]
+    return latencies, missed, false_changes
+
+
+def _percentile(values, q):
+    return float(np.percentile(values, q)) if values else None
+
+
+def warm_up_pipeline(model, encoder, scaler):
+    """
+    Roda uma vez o caminho de features + predição com silêncio antes de tocar o
+    roteiro: o primeiro uso (imports, filtros mel, compilação) leva segundos e,
+    com o áudio acelerado, descartaria os hops do início da medição.
+    """
+    from train_model import predict_note, model_input_frames, N_MFCC
+    from streaming_features import StreamingMFCC
+
+    window = np.zeros(int(SAMPLE_RATE * audio_capture.RECORD_DURATION), dtype=np.float32)
+    streaming_mfcc = StreamingMFCC(len(window), sample_rate=SAMPLE_RATE, n_mfcc=N_MFCC)
+    streaming_mfcc.push(window)
+    frames = model_input_frames(model)
+    features = streaming_mfcc.features(max_pad_len=frames)
+    predict_note(window, model, encoder, scaler, sample_rate=SAMPLE_RATE, n_mfcc=N_MFCC, max_pad_len=frames,
+                 features=features)
+
+
+def run_soak(script, model, encoder, scaler, speed=1.0, cpu_interval=CPU_SAMPLE_SECONDS, verbose=True):
+    """
+    Toca `script` (ChordScript) pelo dispositivo virtual com o loop de predição do
+    app e retorna o relatório (dict). Usa o modelo/encoder/scaler dados.
+    """
+    warm_up_pipeline(model, encoder, scaler)
+    source = VirtualAudioSource(script.signal, name='soak', speed=speed, loop=False)
+    previous_source = audio_capture.audio_source
+    audio_capture.stop_recording()
+    audio_capture.set_audio_source(source)
+    app_module.swap_model(model, encoder, scaler, 'soak')
+    session = app_module.sessions.get(SOAK_SESSION_ID, create=True)
+
+    detections = []
+    done = threading.Event()
+
+    def observe():
+        version, last_label = None, None
+        while not done.is_set():
+            version = session.wait_for_change(version, 0.1)
+            label = normalize_note(session.current_note)
+            if label is not None and label != last_label:
+                detections.append((audio_capture.audio_ring.written, label))
+                last_label = label
+
+    cpu_samples = []
+    observer = threading.Thread(target=observe, daemon=True)
+    observer.start()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        if not audio_capture.start_recording():
+            raise RuntimeError("Não foi possível iniciar o dispositivo virtual")
+        session.start(app_module.audio_prediction_loop)
+        last_wall, last_cpu, next_report = wall_start, cpu_start, wall_start + 60
+        while not source.stream.finished.wait(cpu_interval):
+            now, cpu = time.perf_counter(), time.process_time()
+            cpu_samples.append((cpu - last_cpu) / (now - last_wall) * 100)
+            last_wall, last_cpu = now, cpu
+            if verbose and now >= next_report:
+                position = source.stream.samples_delivered / SAMPLE_RATE
+                print(f"  {position:8.1f} s de áudio, {len(detections)} mudanças exibidas, CPU {cpu_samples[-1]:.0f}%")
+                next_report = now + 60
+            if not session.active:
+                raise RuntimeError(f"O loop de predição parou: {session.current_note}")
+        # O loop processa os últimos hops já entregues
+        time.sleep(0.5)
+    finally:
+        wall_seconds = time.perf_counter() - wall_start
+        cpu_seconds = time.process_time() - cpu_start
+        done.set()
+        stats = session.stats()
+        session.stop()
+        audio_capture.stop_recording()
+        audio_capture.set_audio_source(previous_source)
+        observer.join(timeout=1)
+
+    latencies, missed, false_changes = score_changes(script.changes, detections)
+    return {
+        'audio_seconds': script.duration,
+        'wall_seconds': wall_seconds,
+        'speed': speed,
+        'changes': len(script.changes),
+        'detected': len(latencies),
+        'missed': len(missed),
+        'false_changes': len(false_changes),
+        'latency_p50_s': _percentile(latencies, 50),
+        'latency_p95_s': _percentile(latencies, 95),
+        'latency_max_s': max(latencies) if latencies else None,
+        'cpu_mean_percent': cpu_seconds / wall_seconds * 100,
+        'cpu_peak_percent': max(cpu_samples) if cpu_samples else None,
+        'hops_processed': stats['hops_processed'],
+        'hops_dropped': stats['hops_dropped'],
+        'audio_overruns': stats['audio_overruns'],
+        'late_audio_blocks': source.stream.late_blocks,
+        'missed_changes': missed[:50],
+        'false_change_list': false_changes[:50],
+    }
+
+
+def synthetic_model(epochs=30, files_per_chord=8):
+    """Modelo pequeno (janela ao vivo, motor NumPy) treinado com acordes sintéticos."""
+    from synthetic import write_synthetic_dataset
+    from numpy_inference import export_numpy_model, load_numpy_model
+    from train_model import train_model, LIVE_WINDOW_SECONDS
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dataset_path = os.path.join(tmp_dir, 'dataset')
+        write_synthetic_dataset(dataset_path, files_per_chord=files_per_chord, duration=3.0)
+        keras_model, encoder, scaler = train_model(dataset_path=dataset_path, epochs=epochs, save=False,
+                                                   window_seconds=LIVE_WINDOW_SECONDS,
+                                                   cache_dir=os.path.join(tmp_dir, 'cache'))
+        weights_path = os.path.join(tmp_dir, 'weights.npz')
+        export_numpy_model(keras_model, scaler, weights_path)
+        model, _ = load_numpy_model(weights_path)
+    return model, encoder, scaler
+
+
+def print_report(report):
+    print(f"\nÁudio: {report['audio_seconds']:.0f} s em {report['wall_seconds']:.0f} s ({report['speed']}x)")
+    print(f"Mudanças: {report['changes']}, detectadas: {report['detected']}, perdidas: {report['missed']}, "
+          f"falsas: {report['false_changes']}")
+    if report['latency_p50_s'] is not None:
+        print(f"Latência de detecção (áudio): p50 {report['latency_p50_s']:.2f} s, "
+              f"p95 {report['latency_p95_s']:.2f} s, máx {report['latency_max_s']:.2f} s")
+    peak = report['cpu_peak_percent']
+    print(f"CPU: média {report['cpu_mean_percent']:.0f}%" + (f", pico {peak:.0f}%" if peak is not None else ""))
+    print(f"Hops processados: {report['hops_processed']}, descartados: {report['hops_dropped']}, "
+          f"overruns: {report['audio_overruns']}, blocos de áudio atrasados: {report['late_audio_blocks']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--minutes', type=float, default=5.0, help="Duração do roteiro aleatório (tempo de áudio).")
+    parser.add_argument('--script', default=None, help="Roteiro fixo, ex.: 'C_Major:3,G_Major:3,silence:2'.")
+    parser.add_argument('--repeat', type=int, default=1, help="Repete o roteiro fixo.")
+    parser.add_argument('--speed', type=float, default=1.0, help="Velocidade do áudio em relação ao tempo real.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--synthetic-model', action='store_true', help="Treina um modelo sintético em vez de usar o salvo.")
+    parser.add_argument('--epochs', type=int, default=30, help="Épocas do modelo sintético.")
+    parser.add_argument('--json', default=None, help="Grava o relatório neste arquivo.")
+    args = parser.parse_args()
+
+    if args.synthetic_model:
+        model, encoder, scaler = synthetic_model(epochs=args.epochs)
+    else:
+        from train_model import load_trained_model
+        model, encoder, scaler = load_trained_model(train_if_missing=False)
+        if model is None:
+            sys.exit("Nenhum modelo treinado: rode python train_model.py ou use --synthetic-model.")
+
+    steps = parse_chord_script(args.script) * args.repeat if args.script else random_script(args.minutes * 60, seed=args.seed)
+    script = ChordScript(steps, seed=args.seed)
+    print(f"Roteiro: {len(script.changes)} mudanças, {script.duration:.0f} s de áudio, velocidade {args.speed}x")
+    report = run_soak(script, model, encoder, scaler, speed=args.speed)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Relatório salvo em: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+import os
+
+# Os acordes sintéticos vêm do dispositivo de áudio virtual (audio_sources.py)
+from audio_sources import CHORD_FREQUENCIES, synth_chord
+
+
+def write_synthetic_dataset(dataset_path, files_per_chord=8, duration=2.0, sample_rate=22050, chords=None, seed_offset=0):
+    """Cria dataset/<acorde>/*.wav com sinais sintéticos, no mesmo layout do dataset real."""
+    import soundfile as sf
+
+    chords = chords or list(CHORD_FREQUENCIES)
+    for chord_idx, chord in enumerate(chords):
+        chord_path = os.path.join(dataset_path, chord)
+        os.makedirs(chord_path, exist_ok=True)
+        for i in range(files_per_chord):
+            signal = synth_chord(chord, duration=duration, sample_rate=sample_rate, seed=seed_offset + chord_idx * 1000 + i)
+            sf.write(os.path.join(chord_path, f"{chord}_{i:03d}.wav"), signal, sample_rate)
+    return chords
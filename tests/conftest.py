@@ -23,4 +23,13 @@ def client(app):
 @pytest.fixture
 def runner(app):
     """Um executor de teste para a CLI do aplicativo."""
-    return app.test_cli_runner()
\ No newline at end of file
+    return app.test_cli_runner()
+
+@pytest.fixture
+def write_wav_stub():
+    """Grava um .wav falso (só os bytes de `content`) e retorna o caminho; o cache e o store olham só tamanho e mtime."""
+    def write(path, content=b'RIFF'):
+        with open(path, 'wb') as f:
+            f.write(content)
+        return str(path)
+    return write
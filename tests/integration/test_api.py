@@ -72,14 +72,107 @@ def test_get_note_returns_predicted_note(client, mocker):
     """
     Testa se o endpoint /get_note retorna a nota que foi 'detectada'.
     """
+    import app as app_module
+    session = app_module.sessions.get(app_module.DEFAULT_SESSION_ID, create=True)
     # Mock para simular que o reconhecimento está ativo
-    mocker.patch('app.prediction_active', True)
+    mocker.patch.object(session, 'active', True)
     # Define a nota 'detectada'
-    mocker.patch('app.current_note', 'C_Major')
+    mocker.patch.object(session, 'current_note', 'C_Major')
 
     response = client.get('/get_note')
     data = response.get_json()
 
     assert response.status_code == 200
     assert data['status'] == 'active'
-    assert data['note'] == 'C_Major'
\ No newline at end of file
+    assert data['note'] == 'C_Major'
+
+def test_recognition_sessions_are_independent(client, mocker):
+    """
+    Testa se duas sessões (session_id) têm estado próprio e se a gravação só é
+    encerrada quando a última sessão para.
+    """
+    mock_start_recording = mocker.patch('audio_capture.start_recording', return_value=True)
+    mock_stop_recording = mocker.patch('audio_capture.stop_recording')
+    mocker.patch('app.model_loaded', True)
+    mocker.patch('app.encoder_loaded', True)
+    mocker.patch('app.scaler_loaded', True)
+
+    for session_id in ('aba-1', 'aba-2'):
+        response = client.post('/start_recognition', json={'device_id': '', 'session_id': session_id})
+        assert response.get_json()['status'] == 'success'
+        assert response.get_json()['session_id'] == session_id
+    assert mock_start_recording.call_count == 2
+
+    client.post('/stop_recognition', json={'session_id': 'aba-1'})
+    assert client.get('/get_note?session_id=aba-1').get_json()['status'] == 'stopped'
+    assert client.get('/get_note?session_id=aba-2').get_json()['status'] == 'active'
+    mock_stop_recording.assert_not_called()
+
+    client.post('/stop_recognition', json={'session_id': 'aba-2'})
+    mock_stop_recording.assert_called_once()
+
+    response = client.get('/get_note?session_id=../../etc')
+    assert response.status_code == 400
+
+def test_transcribe_endpoint_returns_timeline(client, mocker):
+    """
+    Testa se o /transcribe aceita um .wav enviado no formulário e devolve a
+    linha do tempo calculada com o modelo carregado.
+    """
+    import io
+    timeline = {'duration_seconds': 1.0, 'processing_seconds': 0.01, 'real_time_factor': 0.01,
+                'windows': 4, 'segments': [{'start': 0.75, 'end': 1.0, 'chord': 'C_Major'}]}
+    mock_transcribe = mocker.patch('app.transcribe_file', return_value=timeline)
+    mocker.patch('app.model_loaded', True)
+    mocker.patch('app.encoder_loaded', True)
+    mocker.patch('app.scaler_loaded', True)
+
+    response = client.post('/transcribe?hop=0.1', data={'file': (io.BytesIO(b'RIFF'), 'gravacao.wav')},
+                           content_type='multipart/form-data')
+    json_data = response.get_json()
+
+    assert response.status_code == 200
+    assert json_data['status'] == 'success'
+    assert json_data['segments'][0]['chord'] == 'C_Major'
+    assert mock_transcribe.call_args.kwargs['hop_seconds'] == 0.1
+
+def test_transcribe_is_refused_outside_the_state_owner(client, mocker):
+    """
+    Testa se um worker que não é o dono do estado recusa o /transcribe com o estado
+    do modelo do dono, sem carregar uma cópia própria do modelo.
+    """
+    import io
+    mocker.patch('app.is_state_owner', return_value=False)
+    mocker.patch('app.state_store.owner_status', create=True, return_value={'model_status': 'ready', 'message': 'Modelo carregado.'})
+    mock_loading = mocker.patch('app.start_model_loading')
+    mock_transcribe = mocker.patch('app.transcribe_file')
+
+    response = client.post('/transcribe', data={'file': (io.BytesIO(b'RIFF'), 'gravacao.wav')},
+                           content_type='multipart/form-data')
+
+    assert response.status_code == 503
+    assert response.get_json()['model_status'] == 'ready'
+    mock_loading.assert_not_called()
+    mock_transcribe.assert_not_called()
+
+def test_metrics_endpoint_exports_stages_and_callback_status(client):
+    """
+    Testa se o /metrics exporta os estágios do loop no formato do Prometheus e
+    conta as flags de status do callback de captura.
+    """
+    import numpy as np
+    import audio_capture
+
+    status = type('Status', (), {'input_overflow': True, '__bool__': lambda self: True,
+                                 '__str__': lambda self: 'input overflow'})()
+    audio_capture.callback(np.zeros((audio_capture.BLOCK_SIZE, 1), dtype=np.float32), audio_capture.BLOCK_SIZE, None, status)
+
+    response = client.get('/metrics')
+    text = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    for name in ('violao_features_seconds', 'violao_model_predict_seconds', 'violao_stability_filter_seconds',
+                 'violao_loop_iteration_seconds', 'violao_audio_callback_seconds_count', 'violao_active_sessions'):
+        assert name in text
+    assert 'violao_audio_callback_status_total{flag="input_overflow"}' in text
@@ -0,0 +1,96 @@
+import time
+
+import numpy as np
+import pytest
+
+import app as app_module
+import audio_capture
+from audio_sources import VirtualAudioSource
+from ring_buffer import SharedRingBuffer
+
+
+class OneChordModel:
+    input_shape = (None, 33, 40)
+
+    def predict(self, x, verbose=0):
+        return np.ones((len(x), 1), dtype=np.float32)
+
+
+class VersionEncoder:
+    def __init__(self, version):
+        self.classes_ = np.array([version])
+
+    def inverse_transform(self, indices):
+        return self.classes_[np.asarray(indices)]
+
+
+class IdentityScaler:
+    def transform(self, x):
+        return x
+
+
+# Executado no processo do worker (spawn): precisa ser uma função de módulo
+def version_loader(version, backend):
+    return OneChordModel(), VersionEncoder(version), IdentityScaler()
+
+
+@pytest.fixture
+def process_mode(mocker):
+    mocker.patch('app.INFERENCE_MODE', 'process')
+    mocker.patch('app.INFERENCE_WORKER_LOADER', version_loader)
+    mocker.patch('app.SIMILARITY_THRESHOLD', 0)
+    for name in ('model_loaded', 'encoder_loaded', 'scaler_loaded', 'model_version', 'model_warmup',
+                 'inference_scheduler', 'inference_worker'):
+        mocker.patch(f'app.{name}', None)
+    mocker.patch('app.model_status', 'not_loaded')
+    # O buffer compartilhado criado pelo modo processo não fica para os outros testes
+    mocker.patch.object(audio_capture, 'audio_ring', audio_capture.audio_ring)
+    mocker.patch.object(audio_capture, 'audio_source', None)
+    yield
+    app_module.sessions.clear()
+    audio_capture.stop_recording()
+    if app_module.inference_worker is not None:
+        app_module.inference_worker.stop()
+    if app_module.inference_scheduler is not None:
+        app_module.inference_scheduler.stop()
+
+
+def test_recognition_through_inference_worker(process_mode, client):
+    """
+    Testa o modo processo de ponta a ponta: a captura (dispositivo virtual) escreve
+    no buffer compartilhado, o worker prediz em outro processo e as duas sessões
+    recebem as mesmas predições, com a nota estável e as estatísticas do worker.
+    """
+    app_module.swap_model(OneChordModel(), VersionEncoder('C_Major'), IdentityScaler(), 'C_Major')
+    worker = app_module.inference_worker
+    assert isinstance(audio_capture.audio_ring, SharedRingBuffer)
+    deadline = time.monotonic() + 30
+    while not worker.ready and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert worker.ready
+
+    audio_capture.set_audio_source(VirtualAudioSource.from_spec('script:C_Major:1', speed=2))
+    for session_id in ('aba-1', 'aba-2'):
+        response = client.post('/start_recognition', json={'session_id': session_id})
+        assert response.get_json()['status'] == 'success'
+
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        notes = [client.get(f'/get_note?session_id={sid}').get_json()['note'] for sid in ('aba-1', 'aba-2')]
+        if notes == ['C_Major', 'C_Major']:
+            break
+        time.sleep(0.05)
+    assert notes == ['C_Major', 'C_Major']
+
+    stats = client.get('/session_stats?session_id=aba-1').get_json()
+    assert stats['hops_processed'] > 0
+    assert stats['inference_worker']['ready'] and stats['inference_worker']['version'] == 'C_Major'
+    assert stats['inference_worker']['pid'] != app_module.os.getpid()
+
+    # Hot reload: o mesmo worker passa a usar a nova versão
+    app_module.swap_model(OneChordModel(), VersionEncoder('G_Major'), IdentityScaler(), 'G_Major')
+    deadline = time.monotonic() + 20
+    while client.get('/get_note?session_id=aba-2').get_json()['note'] != 'G_Major' and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert client.get('/get_note?session_id=aba-2').get_json()['note'] == 'G_Major'
+    assert app_module.inference_worker is worker and worker.restarts == 0
@@ -0,0 +1,178 @@
+import time
+
+import numpy as np
+import pytest
+
+import app as app_module
+import audio_capture
+import model_registry
+from streaming_features import StreamingMFCC
+
+
+class ChordModel:
+    """Modelo falso que sempre prediz a mesma classe, um pouco lento como um predict real."""
+
+    input_shape = (None, 33, 40)
+
+    def __init__(self, class_index, n_classes=2, delay=0.002):
+        self.class_index = class_index
+        self.n_classes = n_classes
+        self.delay = delay
+        self.calls = 0
+
+    def predict(self, x, verbose=0):
+        time.sleep(self.delay)
+        self.calls += 1
+        out = np.zeros((len(x), self.n_classes), dtype=np.float32)
+        out[:, self.class_index] = 1.0
+        return out
+
+
+class FakeEncoder:
+    classes_ = np.array(['A_Major', 'C_Major'])
+
+    def inverse_transform(self, indices):
+        return self.classes_[np.asarray(indices)]
+
+
+class IdentityScaler:
+    def transform(self, x):
+        return x
+
+
+@pytest.fixture
+def model_state(mocker):
+    # swap_model altera os globais do app: o mocker restaura os valores originais no fim
+    for name in ('model_loaded', 'encoder_loaded', 'scaler_loaded', 'model_version', 'model_warmup',
+                 'inference_scheduler'):
+        mocker.patch(f'app.{name}', None)
+    mocker.patch('app.model_status', 'not_loaded')
+    mocker.patch('app.model_status_message', '')
+    yield
+    if app_module.inference_scheduler is not None:
+        app_module.inference_scheduler.stop()
+
+
+def test_swap_under_live_recognition_does_not_drop_ticks(model_state, mocker):
+    """
+    Testa se trocar o modelo várias vezes com o loop de predição rodando (e o
+    agendador real) não perde nenhum hop: cada hop processado vira exatamente uma
+    predição de um dos modelos, o loop nunca recebe um erro e passa a usar o
+    modelo novo depois da troca.
+    """
+    # Sem reaproveitamento de predições: todo hop chega ao modelo
+    mocker.patch('app.SIMILARITY_THRESHOLD', 0)
+    old_model, new_model = ChordModel(0), ChordModel(1)
+    app_module.swap_model(old_model, FakeEncoder(), IdentityScaler(), 'v1')
+
+    def toggle_model():
+        model = new_model if app_module.model_loaded is old_model else old_model
+        app_module.swap_model(model, FakeEncoder(), IdentityScaler(), 'v2' if model is new_model else 'v1')
+
+    # Pior caso: a troca chega depois de o loop pegar o agendador e antes de ele enviar a janela
+    real_predict_note = app_module.predict_note
+    hops = iter(range(10 ** 6))
+
+    def predict_note_with_swap(*args, **kwargs):
+        if next(hops) % 3 == 0:
+            toggle_model()
+        return real_predict_note(*args, **kwargs)
+
+    mocker.patch('app.predict_note', side_effect=predict_note_with_swap)
+    StreamingMFCC(int(audio_capture.SAMPLE_RATE * audio_capture.RECORD_DURATION)).features()
+    audio_capture.audio_ring.reset()
+    session = app_module.sessions.get('sessao-reload', create=True)
+    session.start(app_module.audio_prediction_loop)
+    time.sleep(0.1)
+
+    block = np.random.default_rng(0).normal(0, 0.1, audio_capture.BLOCK_SIZE).astype(np.float32)
+    interval = audio_capture.BLOCK_SIZE / audio_capture.SAMPLE_RATE / 2
+    try:
+        for i in range(int(1.5 * audio_capture.SAMPLE_RATE / audio_capture.BLOCK_SIZE)):
+            audio_capture.audio_ring.write(block)
+            if i % 5 == 0:
+                toggle_model()
+            time.sleep(interval)
+        mocker.patch('app.predict_note', side_effect=real_predict_note)
+        app_module.swap_model(new_model, FakeEncoder(), IdentityScaler(), 'v2')
+        calls_before = new_model.calls
+        for _ in range(8):
+            audio_capture.audio_ring.write(block)
+            time.sleep(interval)
+        time.sleep(0.3)
+
+        assert session.active
+        assert session.hops_processed > 0
+        assert old_model.calls + new_model.calls == session.hops_processed
+        assert new_model.calls > calls_before
+        assert session.stability.stable_note in ('C_Major', 'A_Major')
+        assert 'Erro' not in str(session.payload())
+    finally:
+        session.stop()
+
+
+def test_admin_reload_and_rollback_switch_versions(client, model_state, mocker, tmp_path, monkeypatch):
+    """
+    Testa se /admin/model/reload carrega e aquece a versão pedida em segundo plano,
+    se /admin/model mostra os tempos de aquecimento e se o rollback volta para a
+    versão anterior, atualizando o ponteiro CURRENT.
+    """
+    monkeypatch.chdir(tmp_path)
+    mocker.patch('app.ADMIN_TOKEN', 'segredo')
+    client.environ_base['HTTP_X_ADMIN_TOKEN'] = 'segredo'
+    versions = []
+    for _ in range(2):
+        version = model_registry.create_version()
+        for key in model_registry.REQUIRED_ARTIFACTS:
+            open(model_registry.artifact_paths(model_registry.version_dir(version))[key], 'w').close()
+        versions.append(version)
+    model_registry.activate(versions[0])
+
+    models = {model_registry.version_dir(v): ChordModel(i, delay=0) for i, v in enumerate(versions)}
+    load = mocker.patch('app.load_trained_model',
+                        side_effect=lambda **kwargs: (models[kwargs['model_dir']], FakeEncoder(), IdentityScaler()))
+
+    response = client.post('/admin/model/reload', json={'version': versions[1]})
+    assert response.status_code == 202
+    # Uma segunda recarga enquanto a primeira ainda roda é recusada
+    response_busy = client.post('/admin/model/reload', json={})
+    assert response_busy.status_code in (202, 409)
+    while app_module.model_reload_lock.locked():
+        time.sleep(0.01)
+
+    assert load.call_args.kwargs['train_if_missing'] is False
+    data = client.get('/admin/model').get_json()
+    assert data['loaded'] == data['current'] == versions[1]
+    assert data['versions'] == versions
+    assert data['reload']['status'] == 'done'
+    assert data['warmup']['first_predict_ms'] >= 0 and data['warmup']['warmup_seconds'] > 0
+    assert app_module.model_loaded is models[model_registry.version_dir(versions[1])]
+
+    assert client.post('/admin/model/reload', json={'version': '../etc'}).status_code == 400
+    assert client.post('/admin/model/reload', json={'version': 'nao-existe'}).status_code == 404
+
+    assert client.post('/admin/model/rollback', json={}).status_code == 202
+    while app_module.model_reload_lock.locked():
+        time.sleep(0.01)
+    assert model_registry.current_version() == versions[0]
+    assert app_module.model_version == versions[0]
+    assert app_module.model_loaded is models[model_registry.version_dir(versions[0])]
+
+
+def test_admin_endpoints_require_token(client, mocker):
+    """
+    Testa se os endpoints /admin e /train ficam desativados sem VIOLAO_ADMIN_TOKEN e,
+    com ele definido, exigem o cabeçalho X-Admin-Token.
+    """
+    reload_model = mocker.patch('app.reload_model')
+    mocker.patch('app.ADMIN_TOKEN', None)
+    for method, path in [('get', '/admin/model'), ('post', '/admin/model/reload'), ('post', '/admin/model/rollback'),
+                         ('post', '/train'), ('get', '/train/1')]:
+        assert getattr(client, method)(path, headers={'X-Admin-Token': ''}).status_code == 403
+
+    mocker.patch('app.ADMIN_TOKEN', 'segredo')
+
+    assert client.get('/admin/model').status_code == 403
+    assert client.post('/admin/model/reload', headers={'X-Admin-Token': 'errado'}).status_code == 403
+    assert client.get('/admin/model', headers={'X-Admin-Token': 'segredo'}).status_code == 200
+    reload_model.assert_not_called()
@@ -0,0 +1,159 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+WORKERS = 3
+
+# Configuração do gunicorn do teste: modelo falso (sempre C_Major) em todos os workers
+GUNICORN_CONFIG = '''
+import numpy as np
+
+bind = '127.0.0.1:{port}'
+workers = {workers}
+threads = 4
+
+
+class OneChordModel:
+    input_shape = (None, 33, 40)
+
+    def predict(self, x, verbose=0):
+        return np.ones((len(x), 1), dtype=np.float32)
+
+
+class OneChordEncoder:
+    classes_ = np.array(['C_Major'])
+
+    def inverse_transform(self, indices):
+        return self.classes_[np.asarray(indices)]
+
+
+class IdentityScaler:
+    def transform(self, x):
+        return x
+
+
+def post_worker_init(worker):
+    import os
+    import app
+    # Versão com o pid: mostra qual worker respondeu o /admin/model
+    app.swap_model(OneChordModel(), OneChordEncoder(), IdentityScaler(), f'teste-{{os.getpid()}}')
+    app.is_state_owner()
+'''
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def gunicorn_server(tmp_path):
+    port = free_port()
+    config_path = tmp_path / 'gunicorn_test.conf.py'
+    config_path.write_text(GUNICORN_CONFIG.format(port=port, workers=WORKERS))
+    env = dict(os.environ, PYTHONPATH=ROOT, VIOLAO_STATE_BACKEND='shared', VIOLAO_STATE_DIR=str(tmp_path / 'state'),
+               VIOLAO_AUDIO_SOURCE='script:C_Major:1', VIOLAO_METRICS='0', VIOLAO_ADMIN_TOKEN='segredo')
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', str(config_path), 'app:app'], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if request(base_url, '/ready')['ready']:
+                break
+        except OSError:
+            time.sleep(0.2)
+    yield base_url
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def request(base_url, path, body=None):
+    # Uma conexão nova por requisição: o gunicorn distribui entre os workers
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data,
+                                 headers={'Content-Type': 'application/json', 'X-Admin-Token': 'segredo'})
+    try:
+        with urllib.request.urlopen(req, timeout=10) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read())
+
+
+def poll_all_workers(base_url, session_id, n_requests=60):
+    # Muitas requisições concorrentes para passar por vários workers
+    def one(_):
+        stats = request(base_url, f'/session_stats?session_id={session_id}')
+        note = request(base_url, f'/get_note?session_id={session_id}')
+        return stats['state'], note
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        return list(pool.map(one, range(n_requests)))
+
+
+def wait_for_note(base_url, session_id, note, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if request(base_url, f'/get_note?session_id={session_id}').get('note') == note:
+            return
+        time.sleep(0.1)
+    raise AssertionError(f"nota {note} não apareceu")
+
+
+def test_any_worker_serves_shared_recognition_state(gunicorn_server):
+    """
+    Testa o deploy com vários workers do gunicorn: um único dono roda captura e
+    inferência; qualquer worker inicia/para o reconhecimento e responde /get_note e
+    /session_stats com o mesmo estado; se o dono morre, outro worker assume.
+    """
+    base_url = gunicorn_server
+    assert request(base_url, '/start_recognition', {'session_id': 'palco'})['status'] == 'success'
+    wait_for_note(base_url, 'palco', 'C_Major')
+
+    responses = poll_all_workers(base_url, 'palco')
+    owners = {state['owner_pid'] for state, _ in responses}
+    served_by = {state['served_by'] for state, _ in responses}
+    assert len(owners) == 1
+    assert len(served_by) >= 2
+    assert all(note == {'note': 'C_Major', 'status': 'active'} for _, note in responses)
+    stats = request(base_url, '/session_stats?session_id=palco')
+    assert stats['hops_processed'] > 0 and stats['active']
+
+    # /admin e /train são encaminhados ao dono: o mesmo modelo e a mesma lista de jobs em todos os workers
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        admin = list(pool.map(lambda _: request(base_url, '/admin/model'), range(30)))
+        train = list(pool.map(lambda _: request(base_url, '/train/1'), range(30)))
+    owner = next(iter(owners))
+    assert {response['loaded'] for response in admin} == {f'teste-{owner}'}
+    assert all(response['message'] == 'Job de treino não encontrado.' for response in train)
+
+    assert request(base_url, '/stop_recognition', {'session_id': 'palco'})['status'] == 'success'
+    assert all(note == {'status': 'stopped'} for _, note in poll_all_workers(base_url, 'palco', 30))
+
+    # O dono morre: o lock é liberado e o próximo worker a receber uma requisição assume
+    assert request(base_url, '/start_recognition', {'session_id': 'palco'})['status'] == 'success'
+    old_owner = owners.pop()
+    os.kill(old_owner, signal.SIGKILL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        state = request(base_url, '/session_stats?session_id=palco')['state']
+        if state['owner_pid'] != old_owner:
+            break
+        time.sleep(0.1)
+    assert state['owner_pid'] != old_owner
+    assert request(base_url, '/get_note?session_id=palco') == {'status': 'stopped'}
+    assert request(base_url, '/start_recognition', {'session_id': 'palco'})['status'] == 'success'
+    wait_for_note(base_url, 'palco', 'C_Major')
@@ -0,0 +1,91 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import app as app_module
+import audio_capture
+from audio_sources import VirtualAudioSource, synth_chord
+
+
+class LoudnessModel:
+    """Modelo falso: 'Forte' ou 'Fraco' pela energia (MFCC 0) da janela; guarda o tamanho de cada lote."""
+
+    input_shape = (None, 33, 40)
+
+    def __init__(self):
+        self.batch_sizes = []
+        self._lock = threading.Lock()
+
+    def predict(self, x, verbose=0):
+        with self._lock:
+            self.batch_sizes.append(len(x))
+        loud = x[:, :, 0].mean(axis=1) > -500
+        return np.stack([~loud, loud], axis=1).astype(np.float32)
+
+
+class LoudnessEncoder:
+    classes_ = np.array(['Fraco', 'Forte'])
+
+    def inverse_transform(self, indices):
+        return self.classes_[np.asarray(indices)]
+
+
+class IdentityScaler:
+    def transform(self, x):
+        return x
+
+
+@pytest.fixture
+def app_state(mocker):
+    for name in ('model_loaded', 'encoder_loaded', 'scaler_loaded', 'model_version', 'model_warmup',
+                 'inference_scheduler', 'inference_worker'):
+        mocker.patch(f'app.{name}', None)
+    mocker.patch('app.model_status', 'not_loaded')
+    mocker.patch('app.SIMILARITY_THRESHOLD', 0)
+    mocker.patch.object(audio_capture, 'audio_source', None)
+    yield
+    app_module.sessions.clear()
+    app_module.capture_manager.close()
+    if app_module.inference_scheduler is not None:
+        app_module.inference_scheduler.stop()
+
+
+def test_sessions_on_separate_channels(app_state, client):
+    """
+    Testa duas sessões em canais diferentes do mesmo dispositivo (violão forte no
+    canal 0, fraco no canal 1): cada uma reconhece o seu canal, as predições dos
+    dois canais saem no mesmo lote do modelo e o /channels mostra a latência de cada canal.
+    """
+    model = LoudnessModel()
+    app_module.swap_model(model, LoudnessEncoder(), IdentityScaler(), 'teste')
+    chord = np.tile(synth_chord('C_Major', 1.0, audio_capture.SAMPLE_RATE), 4)
+    audio_capture.set_audio_source(VirtualAudioSource(np.stack([chord, chord * 0.2], axis=1), speed=2, loop=True))
+
+    for session_id, channel in (('violao-1', 0), ('violao-2', 1)):
+        response = client.post('/start_recognition', json={'session_id': session_id, 'channel': channel})
+        assert response.get_json()['status'] == 'success'
+    assert client.post('/start_recognition', json={'session_id': 'x', 'channel': -1}).get_json()['status'] == 'error'
+
+    expected = ['Forte', 'Fraco']
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        notes = [client.get(f'/get_note?session_id={sid}').get_json()['note'] for sid in ('violao-1', 'violao-2')]
+        if notes == expected:
+            break
+        time.sleep(0.05)
+    assert notes == expected
+    assert not audio_capture.is_recording
+
+    # Um lote por hop com as duas sessões (o primeiro hop de cada uma pode sair sozinho)
+    assert model.batch_sizes.count(2) > model.batch_sizes.count(1)
+    channels = client.get('/channels').get_json()
+    assert [(c['channel'], c['sessions']) for c in sorted(channels, key=lambda c: c['channel'])] == \
+        [(0, ['violao-1']), (1, ['violao-2'])]
+    assert all(c['latency_p95_ms'] is not None for c in channels)
+    assert client.get('/session_stats?session_id=violao-2').get_json()['capture']['channel'] == 1
+
+    for session_id in ('violao-1', 'violao-2'):
+        client.post('/stop_recognition', json={'session_id': session_id})
+    assert client.get('/channels').get_json() == []
@@ -0,0 +1,153 @@
+import json
+import threading
+import time
+
+import pytest
+
+import app as app_module
+
+POLL_INTERVAL_SECONDS = 0.2  # mesmo intervalo do polling em static/js/main.js
+CHORD_CHANGES = ['G_Major', 'A_Minor', 'D_Major']
+POLLED_CHORD_CHANGES = ['E_Major', 'F_Major', 'C_Major']
+
+
+@pytest.fixture
+def active_recognition():
+    """Simula uma sessão de reconhecimento ativa, descartada ao final do teste."""
+    session = app_module.sessions.get('sessao-stream', create=True)
+    session.active = True
+    session.publish_note('C_Major')
+    yield session
+    session.active = False
+    session.publish_note('Reconhecimento parado.')
+
+
+def _next_event(chunks):
+    while True:
+        chunk = next(chunks)
+        chunk = chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+        if chunk.startswith(':'):
+            continue
+        data_line = [line for line in chunk.splitlines() if line.startswith('data: ')][0]
+        return json.loads(data_line[len('data: '):])
+
+
+def _publish_later(session, chord, delay, published_at):
+    def publish():
+        published_at[chord] = time.perf_counter()
+        session.publish_note(chord)
+    timer = threading.Timer(delay, publish)
+    timer.start()
+    return timer
+
+
+def test_note_stream_vs_polling_latency_and_requests(client, active_recognition):
+    """
+    Mede a latência entre a mudança da nota e sua chegada ao cliente, e o número de
+    requisições, no /note_stream (SSE) e no polling do /get_note.
+    """
+    published_at = {}
+
+    # SSE: uma única requisição recebe todas as mudanças
+    response = client.get('/note_stream?session_id=sessao-stream', buffered=False)
+    chunks = iter(response.response)
+    assert _next_event(chunks) == {'note': 'C_Major', 'status': 'active'}
+    sse_latencies = []
+    for chord in CHORD_CHANGES:
+        _publish_later(active_recognition, chord, 0.05, published_at)
+        event = _next_event(chunks)
+        sse_latencies.append(time.perf_counter() - published_at[chord])
+        assert event['note'] == chord
+    response.close()
+    sse_requests = 1
+
+    # Polling: uma requisição a cada POLL_INTERVAL_SECONDS até enxergar a mudança
+    poll_requests = 0
+    poll_latencies = []
+    published_at.clear()
+    for chord in POLLED_CHORD_CHANGES:
+        timer = _publish_later(active_recognition, chord, 0.05, published_at)
+        while True:
+            poll_requests += 1
+            note = client.get('/get_note?session_id=sessao-stream').get_json()['note']
+            if note == chord and chord in published_at:
+                poll_latencies.append(time.perf_counter() - published_at[chord])
+                break
+            time.sleep(POLL_INTERVAL_SECONDS)
+        timer.join()
+
+    print(f"\nSSE: {sse_requests} requisição, latência máx. {max(sse_latencies) * 1000:.1f} ms")
+    print(f"Polling: {poll_requests} requisições, latência máx. {max(poll_latencies) * 1000:.1f} ms")
+
+    assert max(sse_latencies) < POLL_INTERVAL_SECONDS / 2
+    # Cada mudança exige ao menos duas consultas (antes e depois da mudança)
+    assert poll_requests >= 2 * len(POLLED_CHORD_CHANGES) > sse_requests
+
+
+def test_note_stream_sends_heartbeat_when_idle(client, active_recognition, mocker):
+    """
+    Testa se o stream envia um heartbeat quando a nota não muda.
+    """
+    mocker.patch('app.SSE_HEARTBEAT_SECONDS', 0.05)
+
+    response = client.get('/note_stream?session_id=sessao-stream', buffered=False)
+    chunks = iter(response.response)
+    _next_event(chunks)
+    heartbeat = next(chunks)
+    response.close()
+
+    assert (heartbeat.decode('utf-8') if isinstance(heartbeat, bytes) else heartbeat) == ': heartbeat\n\n'
+
+
+def test_publish_note_only_notifies_real_changes(active_recognition):
+    """
+    Testa se republicar a mesma nota não gera uma nova versão (nem push aos clientes).
+    """
+    version = active_recognition.note_version
+    active_recognition.publish_note('C_Major')
+    assert active_recognition.note_version == version
+
+    active_recognition.publish_note('G_Major')
+    assert active_recognition.note_version == version + 1
+
+
+def test_note_stream_returns_503_past_the_stream_cap(client, active_recognition, mocker):
+    """
+    Testa se, com todas as vagas de stream ocupadas, o /note_stream responde 503
+    (o navegador volta ao polling) enquanto o /get_note segue respondendo, e se a
+    vaga volta quando o stream é fechado.
+    """
+    mocker.patch('app.note_stream_slots', threading.BoundedSemaphore(1))
+
+    first = client.get('/note_stream?session_id=sessao-stream', buffered=False)
+    assert first.status_code == 200
+    rejected = client.get('/note_stream?session_id=sessao-stream', buffered=False)
+    assert rejected.status_code == 503
+    assert client.get('/get_note?session_id=sessao-stream').status_code == 200
+
+    first.close()
+    reopened = client.get('/note_stream?session_id=sessao-stream', buffered=False)
+    assert reopened.status_code == 200
+    reopened.close()
+
+
+def test_note_stream_does_not_create_sessions(client, mocker):
+    """
+    Testa se abrir o /note_stream de uma sessão que não existe envia o estado ocioso
+    sem registrá-la, e se sessões criadas e nunca iniciadas expiram pelo TTL.
+    """
+    mocker.patch.object(app_module.sessions, 'ttl_seconds', 0)
+    before = len(app_module.sessions._sessions)
+
+    for i in range(20):
+        response = client.get(f'/note_stream?session_id=sem-sessao-{i}', buffered=False)
+        assert _next_event(iter(response.response)) == {'note': 'Aguardando áudio...', 'status': 'inactive'}
+        response.close()
+    assert len(app_module.sessions._sessions) == before
+    assert client.post('/stop_recognition', json={'session_id': 'sem-sessao-0'}).status_code == 200
+    assert app_module.sessions.get('sem-sessao-0') is None
+
+    never_started = app_module.sessions.get('nunca-iniciada', create=True)
+    never_started.created_at -= 1
+    app_module.sessions.get('outra-sessao', create=True)
+    assert app_module.sessions.get('nunca-iniciada') is None
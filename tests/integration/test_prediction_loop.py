@@ -0,0 +1,116 @@
+import time
+
+import numpy as np
+import pytest
+
+import app as app_module
+import audio_capture
+from streaming_features import StreamingMFCC
+
+
+class FakeModel:
+    input_shape = (None, 33, 40)
+
+
+@pytest.fixture
+def loop_session(mocker):
+    """Sessão com o loop de predição real, modelo falso e áudio escrito direto no buffer da captura."""
+    mocker.patch('app.model_loaded', FakeModel())
+    mocker.patch('app.encoder_loaded', True)
+    mocker.patch('app.scaler_loaded', True)
+    mocker.patch('app.get_inference_scheduler', return_value=None)
+    # Aquece o MFCC incremental (compilação JIT do librosa) para não atrasar o primeiro hop
+    StreamingMFCC(int(audio_capture.SAMPLE_RATE * audio_capture.RECORD_DURATION)).features()
+    audio_capture.audio_ring.reset()
+    session = app_module.sessions.get('sessao-loop', create=True)
+    yield session
+    session.stop()
+
+
+def feed_audio(seconds, speed=1.0):
+    # Escreve blocos como o callback do PortAudio, no ritmo do tempo real (vezes `speed`)
+    block = np.full(audio_capture.BLOCK_SIZE, 0.1, dtype=np.float32)
+    interval = audio_capture.BLOCK_SIZE / audio_capture.SAMPLE_RATE / speed
+    blocks = int(seconds * audio_capture.SAMPLE_RATE / audio_capture.BLOCK_SIZE)
+    for _ in range(blocks):
+        audio_capture.audio_ring.write(block)
+        time.sleep(interval)
+    return blocks * audio_capture.BLOCK_SIZE
+
+
+def test_loop_predicts_once_per_hop_of_new_audio(loop_session, mocker):
+    """
+    Testa se o loop faz exatamente uma predição por hop de áudio novo e nenhuma
+    quando não chega áudio (sem predições duplicadas da mesma janela).
+    """
+    predict = mocker.patch('app.predict_note', return_value='C_Major')
+    loop_session.start(app_module.audio_prediction_loop)
+    time.sleep(0.1)
+
+    samples = feed_audio(1.0, speed=2.0)
+    time.sleep(0.2)
+    calls_after_audio = predict.call_count
+    time.sleep(0.4)
+
+    hop_samples = int(audio_capture.SAMPLE_RATE * app_module.PREDICTION_HOP_SECONDS)
+    assert predict.call_count == calls_after_audio
+    assert loop_session.hops_processed == calls_after_audio
+    assert loop_session.hops_processed + loop_session.hops_dropped == samples // hop_samples
+    assert loop_session.hops_dropped == 0
+
+
+def test_loop_drops_stale_hops_when_inference_is_slow(loop_session, mocker):
+    """
+    Testa se, com a inferência mais lenta que o tempo real, os hops acumulados são
+    descartados (e contados) em vez de enfileirados.
+    """
+    def slow_predict(*args, **kwargs):
+        time.sleep(0.25)
+        return 'C_Major'
+
+    mocker.patch('app.predict_note', side_effect=slow_predict)
+    loop_session.start(app_module.audio_prediction_loop)
+    time.sleep(0.1)
+
+    samples = feed_audio(1.0)
+    time.sleep(0.6)
+
+    hop_samples = int(audio_capture.SAMPLE_RATE * app_module.PREDICTION_HOP_SECONDS)
+    stats = loop_session.stats()
+    assert stats['hops_dropped'] > 0
+    assert stats['hops_processed'] < samples // hop_samples
+    assert stats['hops_processed'] + stats['hops_dropped'] == samples // hop_samples
+
+
+class WindowFeaturesModel(FakeModel):
+    """Modelo com features próprias (como o ChromaChordModel): não usa o MFCC."""
+
+    def window_features(self, audio, sample_rate):
+        return np.zeros((12, 1), dtype=np.float32)
+
+
+def test_loop_skips_streaming_mfcc_for_models_with_own_features(loop_session, mocker):
+    """
+    Testa se, com um modelo que não usa MFCC, o loop não calcula o MFCC incremental
+    e passa a janela direto do buffer, e se depois de trocar para um modelo MFCC o
+    MFCC incremental recomeça da janela atual.
+    """
+    mocker.patch('app.model_loaded', WindowFeaturesModel())
+    features = mocker.spy(StreamingMFCC, 'features')
+    predict = mocker.patch('app.predict_note', return_value='C_Major')
+    loop_session.start(app_module.audio_prediction_loop)
+    time.sleep(0.1)
+
+    feed_audio(0.5, speed=2.0)
+    time.sleep(0.2)
+    window_samples = int(audio_capture.SAMPLE_RATE * audio_capture.RECORD_DURATION)
+    assert predict.call_count > 0 and features.call_count == 0
+    assert all(call.kwargs['features'] is None and len(call.args[0]) == window_samples
+               for call in predict.call_args_list)
+
+    app_module.model_loaded = FakeModel()
+    predict.reset_mock()
+    feed_audio(0.5, speed=2.0)
+    time.sleep(0.2)
+    assert predict.call_count > 0 and features.call_count == predict.call_count
+    assert all(call.kwargs['features'] is not None for call in predict.call_args_list)
@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+# Orçamento de tempo para `import app` em um processo novo (inclui Flask e NumPy)
+IMPORT_TIME_BUDGET_SECONDS = float(os.environ.get('VIOLAO_IMPORT_TIME_BUDGET', '5.0'))
+HEAVY_MODULES = ('tensorflow', 'keras', 'sklearn', 'matplotlib', 'sounddevice', 'pydub')
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    'import_seconds': elapsed,
+    'heavy_modules': [m for m in %r if m in sys.modules],
+    'model_loaded': app.model_loaded is not None,
+    'model_status': app.model_status,
+}))
+""" % (HEAVY_MODULES,)
+
+
+def test_app_import_is_fast_and_side_effect_free(record_property):
+    """
+    Mede o tempo de `import app` em um processo novo e garante que a importação
+    não carrega TensorFlow/scikit-learn nem o modelo (e, portanto, não treina).
+    """
+    result = subprocess.run([sys.executable, '-c', IMPORT_PROBE], cwd=ROOT,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+
+    record_property('import_seconds', round(data['import_seconds'], 3))
+    print(f"\nimport app: {data['import_seconds']:.3f} s (orçamento {IMPORT_TIME_BUDGET_SECONDS:.1f} s)")
+
+    assert data['heavy_modules'] == []
+    assert data['model_loaded'] is False
+    assert data['model_status'] == 'not_loaded'
+    assert data['import_seconds'] < IMPORT_TIME_BUDGET_SECONDS
+
+
+def test_ready_endpoint_loads_model_in_background_without_training(client, mocker):
+    """
+    Testa se /ready responde 503 enquanto o modelo não está pronto, dispara o
+    carregamento em segundo plano e nunca pede um treino ao load_trained_model.
+    """
+    import app as app_module
+
+    mocker.patch('app.model_loaded', None)
+    mocker.patch('app.encoder_loaded', None)
+    mocker.patch('app.scaler_loaded', None)
+    mocker.patch('app.model_status', 'not_loaded')
+    mock_load = mocker.patch('app.load_trained_model', return_value=(None, None, None))
+
+    response = client.get('/ready')
+    assert response.status_code == 503
+    assert response.get_json()['ready'] is False
+
+    app_module.model_loading_thread.join(timeout=5)
+    mock_load.assert_called_once()
+    assert mock_load.call_args.kwargs['train_if_missing'] is False
+
+    response = client.get('/ready')
+    assert response.status_code == 503
+    assert response.get_json()['status'] in ('unavailable', 'loading')
+
+
+def test_ready_endpoint_reports_loaded_model(client, mocker):
+    """
+    Testa se /ready responde 200 quando modelo, encoder e scaler estão carregados.
+    """
+    mocker.patch('app.model_loaded', True)
+    mocker.patch('app.encoder_loaded', True)
+    mocker.patch('app.scaler_loaded', True)
+
+    response = client.get('/ready')
+
+    assert response.status_code == 200
+    assert response.get_json() == {'status': 'ready', 'ready': True, 'message': 'Modelo carregado.'}
@@ -0,0 +1,76 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+sf = pytest.importorskip('soundfile')
+pytest.importorskip('tensorflow')
+
+import app as app_module
+import model_registry
+from training_jobs import TrainingJobRunner
+
+SAMPLE_RATE = 22050
+
+
+@pytest.fixture
+def training_workspace(client, tmp_path, monkeypatch, mocker):
+    """Diretório com um dataset mínimo; o app usa um runner de jobs novo e restaura o modelo no fim."""
+    mocker.patch('app.ADMIN_TOKEN', 'segredo')
+    client.environ_base['HTTP_X_ADMIN_TOKEN'] = 'segredo'
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    for label, freq in [('G_Major', 196.0), ('C_Major', 261.63)]:
+        os.makedirs(tmp_path / 'dataset' / label)
+        for i in range(4):
+            signal = 0.3 * np.sin(2 * np.pi * freq * (1 + 0.01 * i) * t)
+            sf.write(str(tmp_path / 'dataset' / label / f"{i}.wav"), signal.astype(np.float32), SAMPLE_RATE)
+    monkeypatch.chdir(tmp_path)
+    for name in ('model_loaded', 'encoder_loaded', 'scaler_loaded', 'model_version', 'model_warmup',
+                 'inference_scheduler'):
+        mocker.patch(f'app.{name}', None)
+    mocker.patch('app.model_status', 'unavailable')
+    mocker.patch('app.training_jobs', TrainingJobRunner(on_success=app_module.on_training_success))
+    return tmp_path
+
+
+def test_train_endpoint_runs_job_in_background(client, training_workspace):
+    """
+    Testa se o POST /train treina em outro processo enquanto a API continua
+    respondendo, se /train/<id> mostra o progresso por época e se, no fim, a
+    nova versão do modelo é gravada, ativada e carregada pela API.
+    """
+    response = client.post('/train', json={'epochs': 2, 'live_window': True, 'workers': 1})
+    assert response.status_code == 202
+    job_id = response.get_json()['job']['id']
+
+    slowest_response = 0.0
+    deadline = time.monotonic() + 240
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        assert client.get('/ready').status_code in (200, 503)
+        job = client.get(f'/train/{job_id}').get_json()
+        slowest_response = max(slowest_response, time.perf_counter() - start)
+        if job['status'] not in ('queued', 'running'):
+            break
+        time.sleep(0.1)
+
+    assert job['status'] == 'succeeded', job
+    assert slowest_response < 1.0
+    assert [entry['epoch'] for entry in job['history']] == [1, 2]
+    last = job['progress']
+    assert last['epochs'] == 2
+    assert last['loss'] > 0 and 0 <= last['val_accuracy'] <= 1 and last['samples_per_sec'] > 0
+
+    assert model_registry.current_version() == job['version']
+    assert model_registry.is_complete(model_registry.version_dir(job['version']))
+    deadline = time.monotonic() + 60
+    while app_module.model_version != job['version'] and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert app_module.model_version == job['version']
+    assert client.get('/ready').status_code == 200
+
+    assert client.get('/train').get_json()['jobs'][0]['id'] == job_id
+    assert client.get('/train/999').status_code == 404
+    assert client.post(f'/train/{job_id}/cancel').status_code == 409
+    assert client.post('/train', json={'epochs': 0}).status_code == 400
@@ -0,0 +1,61 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+
+import app as app_module
+import audio_capture
+from audio_sources import ChordScript, SILENCE
+from soak import run_soak
+
+
+class OneChordModel:
+    input_shape = (None, 33, 40)
+
+    def predict(self, x, verbose=0):
+        return np.ones((len(x), 1), dtype=np.float32)
+
+
+class OneChordEncoder:
+    classes_ = np.array(['C_Major'])
+
+    def inverse_transform(self, indices):
+        return self.classes_[np.asarray(indices)]
+
+
+class IdentityScaler:
+    def transform(self, x):
+        return x
+
+
+@pytest.fixture
+def app_state(mocker):
+    for name in ('model_loaded', 'encoder_loaded', 'scaler_loaded', 'model_version', 'model_warmup',
+                 'inference_scheduler'):
+        mocker.patch(f'app.{name}', None)
+    mocker.patch('app.model_status', 'not_loaded')
+    mocker.patch('app.model_status_message', '')
+    yield
+    if app_module.inference_scheduler is not None:
+        app_module.inference_scheduler.stop()
+
+
+def test_soak_run_through_live_loop(app_state):
+    """
+    Testa o caminho completo com o dispositivo virtual a 4x o tempo real:
+    callback da captura, loop de predição e filtro de estabilidade detectam as
+    mudanças silêncio -> acorde -> silêncio do roteiro, com latência limitada.
+    """
+    script = ChordScript([(SILENCE, 2.0), ('C_Major', 2.0), (SILENCE, 2.5)])
+
+    report = run_soak(script, OneChordModel(), OneChordEncoder(), IdentityScaler(), speed=4, verbose=False)
+
+    assert report['changes'] == 3
+    assert report['missed'] == 0 and report['false_changes'] == 0
+    assert 0 < report['latency_max_s'] < 2.0
+    assert report['hops_processed'] > 0 and report['cpu_mean_percent'] > 0
+    assert audio_capture.audio_source is None
+    assert not audio_capture.is_recording
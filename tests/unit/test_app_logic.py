@@ -1,6 +1,6 @@
 import pytest
 from collections import deque, Counter
-from app import PREDICTION_BUFFER_SIZE, STABILITY_THRESHOLD
+from recognition import PREDICTION_BUFFER_SIZE, STABILITY_THRESHOLD
 
 def test_note_stability_logic():
     """
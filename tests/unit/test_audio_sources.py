@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+
+from audio_sources import ChordScript, VirtualAudioSource, VirtualInputStream, parse_chord_script, SILENCE
+from soak import score_changes
+
+SR = 22050
+
+
+def test_chord_script_ground_truth():
+    """
+    Testa se o roteiro gera o sinal com a duração pedida e os instantes exatos das
+    mudanças, unindo trechos seguidos com o mesmo rótulo.
+    """
+    script = ChordScript('C_Major:1,C_Major:0.5,silence:1,G_Major:2', sample_rate=SR)
+
+    assert len(script.signal) == int(1 * SR) + int(0.5 * SR) + SR + 2 * SR
+    assert script.changes == [(0, 'C_Major'), (int(1.5 * SR), SILENCE), (int(2.5 * SR), 'G_Major')]
+    assert script.label_at(int(2 * SR)) == SILENCE
+    assert np.sqrt(np.mean(script.signal[int(1.5 * SR):int(2.5 * SR)] ** 2)) < 0.003
+    with pytest.raises(ValueError):
+        parse_chord_script('H_Major:1')
+
+
+def test_virtual_stream_feeds_callback_at_speed():
+    """
+    Testa se o stream virtual entrega o sinal inteiro, em ordem e em blocos do
+    tamanho pedido, pelo callback no formato do sounddevice, N vezes mais rápido
+    que o tempo real; com loop=True o sinal recomeça do início.
+    """
+    signal = np.arange(SR, dtype=np.float32) / SR
+    received = []
+
+    def callback(indata, frames, time_info, status):
+        assert indata.shape == (frames, 1) and status is None
+        received.append(indata[:, 0].copy())
+
+    stream = VirtualInputStream(signal, SR, 1024, 1, callback, speed=10)
+    start = time.perf_counter()
+    stream.start()
+    assert stream.finished.wait(5)
+    elapsed = time.perf_counter() - start
+
+    np.testing.assert_array_equal(np.concatenate(received), signal)
+    assert all(len(block) == 1024 for block in received[:-1])
+    assert 0.08 <= elapsed < 0.5
+    assert not stream.active
+
+    received.clear()
+    source = VirtualAudioSource(signal[:3000], speed=100, loop=True)
+    looping = source.open_stream(SR, 1024, 1, callback)
+    looping.start()
+    while sum(map(len, received)) < 6144:
+        time.sleep(0.005)
+    looping.stop()
+    np.testing.assert_array_equal(np.concatenate(received)[:6000], np.tile(signal[:3000], 2))
+
+
+def test_soak_scoring_counts_latency_missed_and_false_changes():
+    """
+    Testa se o soak casa as mudanças exibidas com o roteiro: latência da detecção,
+    mudanças nunca exibidas (perdidas) e exibidas sem corresponder ao roteiro (falsas).
+    """
+    changes = [(0, 'C_Major'), (2 * SR, 'G_Major'), (4 * SR, 'A_Minor'), (6 * SR, SILENCE)]
+    detections = [(SR, 'C_Major'), (int(2.5 * SR), 'E_Minor'), (3 * SR, 'G_Major'), (int(7.5 * SR), SILENCE)]
+
+    latencies, missed, false_changes = score_changes(changes, detections, sample_rate=SR, max_latency=1.0)
+
+    assert latencies == [1.0, 1.0, 1.5]
+    assert missed == [(4.0, 'A_Minor')]
+    assert false_changes == [(2.5, 'E_Minor')]
@@ -0,0 +1,30 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+
+from run_suite import compare, measure
+
+
+def test_compare_flags_only_regressions_above_threshold():
+    """
+    Testa se a comparação com a baseline só acusa os benchmarks cujo p50 piorou
+    mais que o limiar, e ignora benchmarks novos, sem baseline.
+    """
+    baseline = {'benchmarks': {'rapido': {'p50_ms': 1.0}, 'lento': {'p50_ms': 1.0}}}
+    results = {'rapido': {'p50_ms': 1.2}, 'lento': {'p50_ms': 1.6}, 'novo': {'p50_ms': 5.0}}
+
+    lines, regressions = compare(results, baseline, threshold=0.5)
+
+    assert regressions == ['lento']
+    assert any('sem baseline' in line for line in lines)
+
+
+def test_measure_reports_latency_and_throughput():
+    """
+    Testa se measure devolve percentis coerentes e a vazão correspondente à média.
+    """
+    result = measure(lambda: sum(range(100)), repeats=20)
+
+    assert 0 < result['p50_ms'] <= result['p95_ms']
+    assert abs(result['throughput_per_s'] - 1000 / result['mean_ms']) < 1e-6 * result['throughput_per_s']
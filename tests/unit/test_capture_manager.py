@@ -0,0 +1,120 @@
+import time
+
+import numpy as np
+
+import audio_capture
+from audio_sources import VirtualAudioSource, synth_chord
+from capture_manager import CaptureManager, DeviceCapture
+from metrics import AUDIO_CALLBACKS, AUDIO_CALLBACK_STATUS
+
+SR = 22050
+
+
+def wait_for_samples(capture, count, timeout=5):
+    deadline = time.monotonic() + timeout
+    while capture.ring.written < count and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return capture.ring.written >= count
+
+
+def test_each_channel_gets_its_own_buffer():
+    """
+    Testa se um dispositivo com vários canais (fonte virtual com um acorde por
+    coluna) abre um único stream e cada canal pedido recebe só a sua coluna, no
+    próprio buffer circular, com o horário de chegada de cada bloco.
+    """
+    columns = [synth_chord(name, 0.5, SR) for name in ('C_Major', 'G_Major', 'A_Minor')]
+    source = VirtualAudioSource(np.stack(columns, axis=1), speed=10)
+    opened = []
+
+    def open_stream(device_id, channels, callback):
+        opened.append(channels)
+        return source.open_stream(SR, 1024, channels, callback)
+
+    manager = CaptureManager(open_stream=open_stream)
+    second = manager.acquire(None, 2)
+    first = manager.acquire(None, 0)
+    assert opened == [3]
+    assert wait_for_samples(first, len(columns[0])) and wait_for_samples(second, len(columns[2]))
+
+    np.testing.assert_array_equal(first.ring.read(0, len(columns[0]))[0], columns[0])
+    np.testing.assert_array_equal(second.ring.read(0, len(columns[2]))[0], columns[2])
+    assert first.arrival_time(1) is not None
+    first.record_hop(first.ring.written, time.perf_counter())
+    stats = first.stats()
+    assert stats['channel'] == 0 and stats['samples_captured'] >= len(columns[0])
+    assert stats['latency_p50_ms'] >= 0
+    manager.close()
+
+
+class FakeStream:
+    def __init__(self, channels):
+        self.channels = channels
+        self.active = False
+        self.closed = False
+
+    def start(self):
+        self.active = True
+
+    def stop(self):
+        self.active = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_streams_are_shared_reopened_and_closed_by_use():
+    """
+    Testa a contagem de uso: duas sessões no mesmo canal dividem o CaptureChannel,
+    um canal acima do stream aberto reabre o dispositivo com mais canais (sem
+    trocar os buffers existentes), e o stream fecha quando o último canal é solto.
+    """
+    streams = []
+
+    def open_stream(device_id, channels, callback):
+        streams.append(FakeStream(channels))
+        return streams[-1]
+
+    manager = CaptureManager(open_stream=open_stream)
+    a = manager.acquire(3, 0)
+    b = manager.acquire(3, 0)
+    assert a is b and len(streams) == 1 and streams[0].channels == 1
+
+    c = manager.acquire(3, 1)
+    assert len(streams) == 2 and streams[0].closed and streams[1].channels == 2
+    assert manager.acquire(7, 0) is not a and len(manager.channels()) == 3
+
+    manager.release(a)
+    assert not streams[1].closed
+    manager.release(b)
+    manager.release(c)
+    assert streams[1].closed
+    assert [(ch.device_id, ch.channel) for ch in manager.channels()] == [(7, 0)]
+
+
+def test_callback_records_into_slots_drained_off_the_audio_thread(mocker):
+    """
+    Testa se o callback só grava duração e flags nos slots do CallbackStats (sem
+    print) e se o drain, fora da thread de áudio, conta as chamadas e as flags,
+    inclusive quando o callback deu a volta nos slots antes do drain.
+    """
+    print_ = mocker.patch('builtins.print')
+    overflow = type('Status', (), {'input_overflow': True, '__bool__': lambda self: True})()
+    device = DeviceCapture(None)
+    device.callback_stats = audio_capture.CallbackStats(slots=4)
+    block = np.zeros((1024, 1), dtype=np.float32)
+    for i in range(6):
+        device.callback(block, 1024, None, overflow if i in (1, 5) else None)
+    print_.assert_not_called()
+
+    calls, durations, flags = device.callback_stats.drain()
+    assert calls == 6 and len(durations) == 4 and (durations > 0).all()
+    assert list(flags) == [0, 0, 0, 1]
+    assert device.callback_stats.drain()[0] == 0
+
+    callbacks, overflows = AUDIO_CALLBACKS.value(), AUDIO_CALLBACK_STATUS.value('input_overflow')
+    device.callback(block, 1024, None, overflow)
+    audio_capture.register_callback_stats(device.callback_stats)
+    audio_capture.unregister_callback_stats(device.callback_stats)
+    assert AUDIO_CALLBACKS.value() == callbacks + 1
+    assert AUDIO_CALLBACK_STATUS.value('input_overflow') == overflows + 1
@@ -0,0 +1,93 @@
+import joblib
+import numpy as np
+import pytest
+import soundfile as sf
+from sklearn.preprocessing import LabelEncoder
+
+from audio_sources import synth_chord, CHORD_FREQUENCIES
+from chroma_recognizer import ChromaChordModel, IdentityScaler, chord_template, compare_backends, parse_chord_label
+from inference_scheduler import InferenceScheduler
+from model_registry import artifact_paths
+from train_model import load_trained_model, predict_note, warm_up_model, SAMPLE_RATE
+
+CHORDS = sorted(CHORD_FREQUENCIES)
+WINDOW = int(SAMPLE_RATE * 0.75)
+
+
+def encoder_for(labels):
+    return LabelEncoder().fit(labels)
+
+
+def test_templates_from_chord_labels():
+    """
+    Testa a leitura dos rótulos em vários formatos (fundamental, acidente e
+    qualidade) e se o molde destaca as notas do acorde.
+    """
+    assert parse_chord_label('C_Major') == (0, (0, 4, 7))
+    assert parse_chord_label('A_Minor') == parse_chord_label('Am') == (9, (0, 3, 7))
+    assert parse_chord_label('F#m7') == (6, (0, 3, 7, 10))
+    assert parse_chord_label('Bb') == (10, (0, 4, 7))
+    assert parse_chord_label('G7') == (7, (0, 4, 7, 10))
+    with pytest.raises(ValueError):
+        parse_chord_label('Ruído')
+
+    template = chord_template('E_Minor')
+    assert np.isclose(np.linalg.norm(template), 1.0)
+    assert set(np.argsort(template)[-3:]) == {4, 7, 11}
+
+
+def test_chroma_model_recognizes_chords_through_predict_note():
+    """
+    Testa o reconhecedor por cromagrama pelo mesmo predict_note do CNN, direto e
+    pelo agendador de inferência (lote com várias janelas), com os acordes sintéticos.
+    """
+    encoder = encoder_for(CHORDS)
+    model = ChromaChordModel(encoder.classes_)
+    warm_up_model(model, encoder, IdentityScaler())
+    scheduler = InferenceScheduler(model).start()
+    try:
+        for i, chord in enumerate(CHORDS):
+            window = synth_chord(chord, 2.0, SAMPLE_RATE, seed=i)[5000:5000 + WINDOW]
+            assert predict_note(window, model, encoder, IdentityScaler()) == chord
+            assert predict_note(window, scheduler, encoder, IdentityScaler()) == chord
+    finally:
+        scheduler.stop()
+
+    batch = np.stack([model.window_features(synth_chord(c, 1.0, SAMPLE_RATE)[:WINDOW]).T for c in CHORDS])
+    probabilities = model.predict(batch)
+    assert probabilities.shape == (len(CHORDS), len(CHORDS))
+    np.testing.assert_allclose(probabilities.sum(axis=1), 1.0, rtol=1e-5)
+    assert list(np.argmax(probabilities, axis=1)) == list(range(len(CHORDS)))
+
+
+def test_chroma_backend_loads_from_encoder_and_compares(tmp_path):
+    """
+    Testa o backend 'chroma' do load_trained_model: só o encoder da versão (sem
+    .h5 nem scaler) e, quando existem, os moldes aprendidos do dataset. Testa
+    também o relatório de comparação no layout do dataset (dataset/<acorde>/*.wav).
+    """
+    model_dir = tmp_path / 'versao'
+    model_dir.mkdir()
+    paths = artifact_paths(str(model_dir))
+    joblib.dump(encoder_for(CHORDS), paths['encoder'])
+
+    model, encoder, scaler = load_trained_model(backend='chroma', train_if_missing=False, model_dir=str(model_dir))
+    assert isinstance(model, ChromaChordModel) and list(encoder.classes_) == CHORDS
+    np.testing.assert_allclose(model.templates[0], chord_template(CHORDS[0]), rtol=1e-6)
+
+    learned = np.eye(len(CHORDS), 12, dtype=np.float32)
+    np.savez(paths['chroma_templates'], labels=np.array(CHORDS), templates=learned)
+    model, _, _ = load_trained_model(backend='chroma', train_if_missing=False, model_dir=str(model_dir))
+    np.testing.assert_array_equal(model.templates, learned)
+    (model_dir / 'chroma_templates.npz').unlink()
+
+    dataset = tmp_path / 'dataset'
+    for chord in CHORDS:
+        (dataset / chord).mkdir(parents=True)
+        for seed in range(5):
+            sf.write(str(dataset / chord / f'{seed}.wav'), synth_chord(chord, 1.0, SAMPLE_RATE, seed=seed), SAMPLE_RATE)
+    rows = compare_backends(['chroma'], str(dataset), str(model_dir))
+
+    assert rows[0]['backend'] == 'chroma' and rows[0]['accuracy'] == 1.0
+    assert rows[0]['latency_p50_ms'] > 0 and rows[0]['rss_model_mb'] is not None
+    assert (model_dir / 'chroma_report.json').exists()
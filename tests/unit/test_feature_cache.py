@@ -0,0 +1,124 @@
+import os
+import numpy as np
+from unittest.mock import Mock
+
+from feature_cache import FeatureCache
+
+PARAMS = {'sample_rate': 22050, 'n_mfcc': 40, 'max_pad_len': 704}
+
+
+def _load(cache, file_path, compute):
+    # Mesmo fluxo do load_dataset: lê do cache e, na falta, calcula e grava
+    found, features = cache.get(file_path)
+    if not found:
+        features = compute(file_path)
+        cache.put(file_path, features)
+    return features
+
+
+def test_cache_serves_unchanged_files_from_disk(tmp_path, write_wav_stub):
+    """
+    Testa se um arquivo já processado é servido do cache, sem recalcular as features.
+    """
+    wav_path = write_wav_stub(tmp_path / 'a.wav')
+    compute = Mock(return_value=np.ones((40, 704), dtype=np.float32))
+
+    cache = FeatureCache(PARAMS, cache_dir=str(tmp_path / 'cache'))
+    first = _load(cache, wav_path, compute)
+    second = _load(cache, wav_path, compute)
+
+    assert compute.call_count == 1
+    np.testing.assert_array_equal(first, second)
+    assert cache.stats() == {'hits': 1, 'misses': 1}
+
+    # Uma nova instância (nova execução do treino) também encontra a entrada
+    reopened = FeatureCache(PARAMS, cache_dir=str(tmp_path / 'cache'))
+    _load(reopened, wav_path, compute)
+    assert compute.call_count == 1
+    assert reopened.stats() == {'hits': 1, 'misses': 0}
+
+
+def test_cache_recomputes_modified_files(tmp_path, write_wav_stub):
+    """
+    Testa se um arquivo modificado (tamanho/mtime diferentes) é processado novamente.
+    """
+    wav_path = write_wav_stub(tmp_path / 'a.wav')
+    compute = Mock(return_value=np.zeros((40, 704), dtype=np.float32))
+    cache = FeatureCache(PARAMS, cache_dir=str(tmp_path / 'cache'))
+    _load(cache, wav_path, compute)
+
+    write_wav_stub(tmp_path / 'a.wav', content=b'RIFF-modificado')
+    _load(cache, wav_path, compute)
+
+    assert compute.call_count == 2
+    assert cache.stats() == {'hits': 0, 'misses': 2}
+
+
+def test_cache_keeps_recently_used_params(tmp_path, write_wav_stub):
+    """
+    Testa se alternar entre parâmetros de extração (ex.: treino padrão e com
+    --live-window) reaproveita o cache de cada um, e se só o conjunto usado há
+    mais tempo é removido quando passa de max_params_dirs.
+    """
+    wav_path = write_wav_stub(tmp_path / 'a.wav')
+    cache_dir = str(tmp_path / 'cache')
+    compute = Mock(return_value=np.zeros((40, 704), dtype=np.float32))
+
+    padded = FeatureCache(PARAMS, cache_dir=cache_dir, max_params_dirs=2)
+    _load(padded, wav_path, compute)
+    live = FeatureCache(dict(PARAMS, max_pad_len=33), cache_dir=cache_dir, max_params_dirs=2)
+    _load(live, wav_path, compute)
+    assert compute.call_count == 2
+
+    padded = FeatureCache(PARAMS, cache_dir=cache_dir, max_params_dirs=2)
+    _load(padded, wav_path, compute)
+    assert compute.call_count == 2
+    assert padded.stats() == {'hits': 1, 'misses': 0}
+
+    # O mtime de params.json marca o último uso (aqui forçado, sem depender da resolução do relógio)
+    os.utime(os.path.join(live.root, 'params.json'), (1, 1))
+    other = FeatureCache(dict(PARAMS, n_mfcc=20), cache_dir=cache_dir, max_params_dirs=2)
+    assert os.path.exists(padded.root) and os.path.exists(other.root)
+    assert not os.path.exists(live.root)
+
+
+def test_prune_only_touches_the_scanned_dataset(tmp_path, write_wav_stub):
+    """
+    Testa se prune remove as entradas não usadas do dataset lido (arquivo apagado)
+    sem apagar as entradas de outro dataset que compartilha o mesmo cache.
+    """
+    for folder in ('dataset/C_Major', 'dataset/G_Major', 'outro/C_Major'):
+        (tmp_path / folder).mkdir(parents=True)
+    kept = write_wav_stub(tmp_path / 'dataset' / 'C_Major' / 'a.wav')
+    deleted = write_wav_stub(tmp_path / 'dataset' / 'G_Major' / 'b.wav')
+    other = write_wav_stub(tmp_path / 'outro' / 'C_Major' / 'c.wav')
+    compute = Mock(return_value=np.zeros((40, 704), dtype=np.float32))
+    cache_dir = str(tmp_path / 'cache')
+
+    first = FeatureCache(PARAMS, cache_dir=cache_dir)
+    for path in (kept, deleted, other):
+        _load(first, path, compute)
+
+    os.remove(deleted)
+    second = FeatureCache(PARAMS, cache_dir=cache_dir)
+    _load(second, kept, compute)
+    assert second.prune(str(tmp_path / 'dataset')) == 1
+
+    third = FeatureCache(PARAMS, cache_dir=cache_dir)
+    _load(third, kept, compute)
+    _load(third, other, compute)
+    assert compute.call_count == 3
+    assert third.stats() == {'hits': 2, 'misses': 0}
+
+
+def test_cache_remembers_files_without_features(tmp_path, write_wav_stub):
+    """
+    Testa se arquivos que não geram features (áudio curto) também ficam no cache.
+    """
+    wav_path = write_wav_stub(tmp_path / 'curto.wav')
+    compute = Mock(return_value=None)
+    cache = FeatureCache(PARAMS, cache_dir=str(tmp_path / 'cache'))
+
+    assert _load(cache, wav_path, compute) is None
+    assert _load(cache, wav_path, compute) is None
+    assert compute.call_count == 1
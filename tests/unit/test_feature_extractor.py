@@ -0,0 +1,66 @@
+import numpy as np
+import librosa
+import pytest
+
+from feature_extractor import FeatureExtractor, get_feature_extractor
+
+SAMPLE_RATE = 22050
+
+
+def _signal(n_samples, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_samples) / SAMPLE_RATE
+    tone = 0.3 * np.sin(2 * np.pi * 196.0 * t) + 0.05 * rng.standard_normal(n_samples)
+    return tone.astype(np.float32)
+
+
+@pytest.mark.parametrize('n_samples', [1102, 16537, 66150])
+def test_mfcc_matches_librosa(n_samples):
+    """
+    Testa se o MFCC com filtros pré-calculados (float32 e float64) coincide com
+    librosa.feature.mfcc, inclusive com áudio mais curto que n_fft.
+    """
+    audio = _signal(n_samples)
+    expected = librosa.feature.mfcc(y=audio, sr=SAMPLE_RATE, n_mfcc=40)
+
+    features = get_feature_extractor(SAMPLE_RATE, 40).mfcc(audio)
+    assert features.dtype == np.float32
+    np.testing.assert_allclose(features, expected, atol=1e-3)
+    np.testing.assert_allclose(FeatureExtractor(dtype=np.float64).mfcc(audio), expected, atol=1e-3)
+
+
+def test_batch_matches_single_clips_with_padding_and_trimming():
+    """
+    Testa se o lote dá o mesmo resultado clipe a clipe (top_db por clipe) e se
+    max_pad_len completa com zeros ou corta como o extract_features original.
+    """
+    extractor = get_feature_extractor(SAMPLE_RATE, 40)
+    clips = np.stack([_signal(16537, seed) * gain for seed, gain in [(0, 1.0), (1, 0.01), (2, 0.5)]])
+    full = librosa.feature.mfcc(y=clips[1], sr=SAMPLE_RATE, n_mfcc=40)
+
+    batch = extractor.mfcc_batch(clips)
+    for clip, features in zip(clips, batch):
+        np.testing.assert_allclose(features, extractor.mfcc(clip), atol=1e-4)
+
+    padded = extractor.mfcc_batch(clips, max_pad_len=40)
+    assert padded.shape == (3, 40, 40)
+    np.testing.assert_array_equal(padded[:, :, 33:], 0)
+    trimmed = extractor.mfcc_batch(clips, max_pad_len=10)
+    np.testing.assert_allclose(trimmed[1], full[:, :10], atol=1e-3)
+
+
+def test_windows_of_long_audio_match_cut_clips():
+    """
+    Testa se o MFCC das janelas de um áudio longo (quadros internos calculados uma
+    vez e fatiados) coincide com o lote das janelas recortadas, com volumes
+    diferentes por trecho (top_db por janela) e janelas fora de ordem.
+    """
+    extractor = get_feature_extractor(SAMPLE_RATE, 40)
+    audio = _signal(SAMPLE_RATE * 4) * np.repeat(np.geomspace(0.001, 1.0, 40), SAMPLE_RATE // 10).astype(np.float32)
+    starts = np.array([7, 3, 0, 12, 44]) * 1536 + 512
+    clips = np.lib.stride_tricks.sliding_window_view(audio, 16537)[starts]
+
+    np.testing.assert_allclose(extractor.mfcc_windows(audio, starts, 16537, max_pad_len=33),
+                               extractor.mfcc_batch(clips, max_pad_len=33), atol=1e-4)
+    with pytest.raises(ValueError):
+        extractor.mfcc_windows(audio, starts + np.arange(len(starts)), 16537)
@@ -0,0 +1,87 @@
+import os
+import numpy as np
+
+from feature_store import FeatureStore
+
+PARAMS = {'sample_rate': 22050, 'n_mfcc': 40, 'max_pad_len': 704, 'window_seconds': 0.75}
+
+
+def _fake_featurize(calls):
+    # Cada arquivo gera (tamanho do arquivo) janelas preenchidas com o próprio tamanho
+    def featurize(file_paths):
+        calls.append(list(file_paths))
+        for position, file_path in enumerate(file_paths):
+            size = os.path.getsize(file_path)
+            yield position, np.full((size, 2, 3), size, dtype=np.float32)
+    return featurize
+
+
+def test_store_serves_zero_copy_views_and_sample_index(tmp_path, write_wav_stub):
+    """
+    Testa se as amostras de cada arquivo são views do memmap do shard e se os
+    índices por amostra (rótulo e arquivo de origem) seguem o manifest.
+    """
+    items = [('A', write_wav_stub(tmp_path / 'a.wav', b'RI')), ('B', write_wav_stub(tmp_path / 'b.wav', b'RIF'))]
+    calls = []
+    store = FeatureStore(str(tmp_path / 'store'), PARAMS)
+    assert store.update(items, _fake_featurize(calls)) == (2, 0)
+
+    assert len(store) == 5
+    assert list(store.labels) == ['A', 'A', 'B', 'B', 'B']
+    assert [(label, count) for label, _, count in store.entries()] == [('A', 2), ('B', 3)]
+
+    samples = store.file_samples(store.entries()[1][1])
+    shard = store._shard(store.shards[0]['file'])
+    assert isinstance(shard, np.memmap)
+    assert np.shares_memory(samples, shard)
+    np.testing.assert_array_equal(samples, np.full((3, 2, 3), 3))
+
+    # Reaberto do manifest, sem processar nada de novo
+    reopened = FeatureStore(str(tmp_path / 'store'), PARAMS)
+    assert reopened.update(items, _fake_featurize(calls)) == (0, 0)
+    assert calls[-1] == []
+    np.testing.assert_array_equal(reopened.take(reopened.file_ids), store.take(store.file_ids))
+
+
+def test_update_appends_new_shards_without_rewriting(tmp_path, write_wav_stub):
+    """
+    Testa se gravações novas vão para um shard novo sem reescrever o existente e se
+    arquivos modificados ou apagados deixam de aparecer no índice.
+    """
+    a = write_wav_stub(tmp_path / 'a.wav', b'RI')
+    b = write_wav_stub(tmp_path / 'b.wav', b'RIF')
+    calls = []
+    store = FeatureStore(str(tmp_path / 'store'), PARAMS)
+    store.update([('A', a), ('B', b)], _fake_featurize(calls))
+    first_shard = os.path.join(store.root, store.shards[0]['file'])
+    first_mtime = os.stat(first_shard).st_mtime_ns
+
+    c = write_wav_stub(tmp_path / 'c.wav', b'R')
+    write_wav_stub(tmp_path / 'b.wav', b'RIFF')
+    assert store.update([('A', a), ('B', b), ('C', c)], _fake_featurize(calls)) == (2, 1)
+
+    assert calls[-1] == [os.path.abspath(b), os.path.abspath(c)]
+    assert len(store.shards) == 2
+    assert os.stat(first_shard).st_mtime_ns == first_mtime
+    assert [(label, count) for label, _, count in store.entries()] == [('A', 2), ('B', 4), ('C', 1)]
+    assert store.stats()['inactive_samples'] == 3
+
+    # Sem nenhum arquivo ativo, o primeiro shard é apagado
+    store.update([('B', b), ('C', c)], _fake_featurize(calls))
+    assert not os.path.exists(first_shard)
+    assert [(label, count) for label, _, count in store.entries()] == [('B', 4), ('C', 1)]
+    np.testing.assert_array_equal(store.take(store.file_ids)[:, 0, 0], [4, 4, 4, 4, 1])
+
+
+def test_store_invalidated_when_feature_params_change(tmp_path, write_wav_stub):
+    """
+    Testa se alterar os parâmetros de extração descarta os shards anteriores.
+    """
+    items = [('A', write_wav_stub(tmp_path / 'a.wav', b'RI'))]
+    calls = []
+    FeatureStore(str(tmp_path / 'store'), PARAMS).update(items, _fake_featurize(calls))
+
+    store = FeatureStore(str(tmp_path / 'store'), dict(PARAMS, window_seconds=None))
+    assert len(store) == 0
+    assert store.update(items, _fake_featurize(calls)) == (1, 0)
+    assert sorted(os.listdir(store.root)) == ['manifest.json', 'shard_00000.npy']
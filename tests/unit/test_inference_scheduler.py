@@ -0,0 +1,97 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from inference_scheduler import InferenceScheduler
+
+
+class RecordingModel:
+    """Modelo falso: a 'probabilidade' de cada linha é a soma da entrada; registra os lotes."""
+
+    input_shape = (None, 4, 2)
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, x, verbose=0):
+        self.batch_sizes.append(len(x))
+        return x.sum(axis=(1, 2))[:, None]
+
+
+@pytest.fixture
+def model():
+    return RecordingModel()
+
+
+def test_scheduler_batches_windows_from_all_sessions(model):
+    """
+    Testa se janelas enviadas ao mesmo tempo por várias sessões viram um único lote
+    e se cada sessão recebe a sua própria saída.
+    """
+    scheduler = InferenceScheduler(model, max_batch_size=64, max_latency=1.0).start()
+    scheduler.set_expected_clients(8)
+    results = {}
+
+    def session(i):
+        results[i] = scheduler.predict(np.full((1, 4, 2), i, dtype=np.float32), timeout=5)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    scheduler.stop()
+
+    assert model.batch_sizes == [8]
+    assert {i: float(r[0, 0]) for i, r in results.items()} == {i: 8.0 * i for i in range(8)}
+    assert scheduler.stats()['mean_batch_size'] == 8.0
+
+
+def test_scheduler_respects_latency_budget(model):
+    """
+    Testa se uma janela sozinha espera no máximo o orçamento de latência quando
+    outras sessões ativas ainda não enviaram as suas.
+    """
+    scheduler = InferenceScheduler(model, max_latency=0.05).start()
+    scheduler.set_expected_clients(4)
+
+    start = time.perf_counter()
+    scheduler.predict(np.ones((1, 4, 2), dtype=np.float32), timeout=5)
+    elapsed = time.perf_counter() - start
+    scheduler.stop()
+
+    assert 0.04 <= elapsed < 0.5
+    assert model.batch_sizes == [1]
+
+
+def test_scheduler_with_single_session_does_not_wait(model):
+    """
+    Testa se, com uma única sessão ativa, a janela é executada sem esperar o prazo.
+    """
+    scheduler = InferenceScheduler(model, max_latency=1.0).start()
+
+    start = time.perf_counter()
+    scheduler.predict(np.ones((1, 4, 2), dtype=np.float32), timeout=5)
+    elapsed = time.perf_counter() - start
+    scheduler.stop()
+
+    assert elapsed < 0.5
+    assert scheduler.input_shape == model.input_shape
+
+
+def test_scheduler_stopped_with_drain_still_answers(model):
+    """
+    Testa se um agendador parado com drain=True (troca de modelo) ainda responde
+    às janelas enviadas depois do stop, direto no modelo, em vez de falhar.
+    """
+    scheduler = InferenceScheduler(model, max_latency=1.0).start()
+    scheduler.stop(drain=True)
+
+    result = scheduler.predict(np.full((1, 4, 2), 2, dtype=np.float32), timeout=5)
+
+    assert float(result[0, 0]) == 16.0
+    assert model.batch_sizes == [1]
+    with pytest.raises(RuntimeError):
+        InferenceScheduler(model).submit(np.ones((1, 4, 2), dtype=np.float32))
@@ -0,0 +1,165 @@
+import os
+import signal
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from audio_sources import synth_chord
+from inference_worker import InferenceWorker
+from ring_buffer import SharedRingBuffer
+
+SR = 22050
+HOP = 1764
+
+
+class VersionModel:
+    # Sempre prevê a única classe do encoder (o nome da versão); 'hang' trava no predict
+    input_shape = (None, 33, 40)
+
+    def __init__(self, version):
+        self.version = version
+
+    def predict(self, x, verbose=0):
+        if self.version == 'hang':
+            time.sleep(60)
+        return np.ones((len(x), 1), dtype=np.float32)
+
+
+class VersionEncoder:
+    def __init__(self, version):
+        self.classes_ = np.array([version])
+
+    def inverse_transform(self, indices):
+        return self.classes_[np.asarray(indices)]
+
+
+class IdentityScaler:
+    def transform(self, x):
+        return x
+
+
+# Carregadores executados no processo do worker (spawn): precisam ser funções de módulo
+def version_loader(version, backend):
+    if version == 'broken':
+        raise RuntimeError("arquivo do modelo corrompido")
+    return VersionModel(version), VersionEncoder(version), IdentityScaler()
+
+
+@pytest.fixture
+def ring():
+    ring = SharedRingBuffer(SR * 3)
+    yield ring
+    ring.unlink()
+
+
+def feed(ring, seconds, stop_event, speed=4.0):
+    # Escreve acordes (repetidos a cada 1 s) em blocos de 1024 amostras, como o callback de captura
+    signal = np.tile(synth_chord('C_Major', 1.0, SR), int(np.ceil(seconds)))
+    for start in range(0, len(signal), 1024):
+        if stop_event.is_set():
+            return
+        ring.write(signal[start:start + 1024])
+        time.sleep(1024 / SR / speed)
+
+
+def wait_until(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert condition()
+
+
+def test_shared_ring_buffer_is_visible_from_another_attach():
+    """
+    Testa se amostras e cursores escritos em um SharedRingBuffer aparecem em outra
+    instância aberta pelo nome (como no processo do worker), inclusive o reset.
+    """
+    ring = SharedRingBuffer(10)
+    try:
+        other = SharedRingBuffer.attach(ring.name, 10)
+        reader = other.reader()
+        ring.write(np.arange(7, dtype=np.float32))
+        ring.write(np.arange(7, 14, dtype=np.float32))
+
+        assert other.written == 14
+        assert other.wait_for(14, timeout=0.1)
+        assert not other.wait_for(15, timeout=0.05)
+        np.testing.assert_array_equal(other.latest(4), [10, 11, 12, 13])
+        np.testing.assert_array_equal(reader.read_new(), np.arange(4, 14))
+        assert reader.overruns == 1
+
+        ring.reset()
+        assert other.written == 0 and other.resets == 1
+        other.close()
+    finally:
+        ring.unlink()
+
+
+def test_worker_predicts_each_hop_and_swaps_versions(ring):
+    """
+    Testa se o worker (outro processo) lê o áudio da memória compartilhada, envia uma
+    predição por hop a todas as sessões inscritas e troca de versão sem reiniciar.
+    """
+    worker = InferenceWorker(ring, version='C_Major', loader=version_loader, hop_samples=HOP).start()
+    first, second = worker.subscribe(), worker.subscribe()
+    stop = threading.Event()
+    try:
+        wait_until(lambda: worker.ready)
+        pid = worker.pid
+        feeder = threading.Thread(target=feed, args=(ring, 30.0, stop), daemon=True)
+        feeder.start()
+
+        # As primeiras janelas ainda são quase só o silêncio de antes da gravação
+        result = first.get(timeout=10)
+        assert second.get(timeout=10) == result
+        assert result['cursor'] % HOP == 0
+        while result['chord'] == 'Silêncio':
+            result = first.get(timeout=10)
+        assert result['chord'] == 'C_Major'
+
+        worker.load('G_Major')
+        wait_until(lambda: worker.loaded_version == 'G_Major')
+        chords = [first.get(timeout=10)['chord'] for _ in range(3)]
+        assert chords[-1] == 'G_Major'
+        assert worker.pid == pid and worker.restarts == 0
+    finally:
+        stop.set()
+        worker.stop()
+    assert worker.results >= 4
+
+
+def test_worker_is_restarted_after_crash_and_hang(ring):
+    """
+    Testa a supervisão: um worker morto é reiniciado e volta a enviar predições; um
+    worker travado (sem predições com áudio chegando) é encerrado e reiniciado; uma
+    versão que não carrega é informada em last_error.
+    """
+    worker = InferenceWorker(ring, version='C_Major', loader=version_loader, hop_samples=HOP,
+                             hang_timeout=1.0, restart_backoff=0.05).start()
+    results = worker.subscribe()
+    stop = threading.Event()
+    feeder = threading.Thread(target=feed, args=(ring, 60.0, stop, 1.0), daemon=True)
+    try:
+        wait_until(lambda: worker.ready)
+        feeder.start()
+        results.get(timeout=10)
+
+        os.kill(worker.pid, signal.SIGKILL)
+        wait_until(lambda: worker.restarts == 1 and worker.ready)
+        assert 'terminou' in worker.last_error
+        while not results.empty():
+            results.get_nowait()
+        assert results.get(timeout=10)['chord'] == 'C_Major'
+
+        worker.load('broken')
+        wait_until(lambda: 'corrompido' in (worker.last_error or ''))
+        assert worker.loaded_version == 'C_Major'
+
+        worker.load('hang')
+        wait_until(lambda: worker.restarts >= 2)
+        assert 'sem resposta' in worker.last_error
+    finally:
+        stop.set()
+        worker.stop()
@@ -0,0 +1,45 @@
+import os
+import numpy as np
+import pytest
+
+sf = pytest.importorskip('soundfile')
+
+import train_model
+
+
+@pytest.fixture
+def tiny_dataset(tmp_path):
+    """Cria um dataset mínimo com dois acordes e três arquivos cada."""
+    sr = train_model.SAMPLE_RATE
+    t = np.arange(sr // 2) / sr
+    for label, freq in [('G_Major', 196.0), ('C_Major', 261.63)]:
+        os.makedirs(tmp_path / label)
+        for i in range(3):
+            signal = 0.3 * np.sin(2 * np.pi * freq * (1 + 0.01 * i) * t)
+            sf.write(str(tmp_path / label / f"{i}.wav"), signal.astype(np.float32), sr)
+    return str(tmp_path)
+
+
+def test_parallel_load_matches_serial_order(tiny_dataset):
+    """
+    Testa se o modo paralelo mantém a mesma ordem de amostras e rótulos do modo serial.
+    """
+    X_serial, y_serial, labels_serial = train_model.load_dataset(tiny_dataset, use_cache=False, workers=1)
+    X_parallel, y_parallel, labels_parallel = train_model.load_dataset(tiny_dataset, use_cache=False, workers=2)
+
+    assert list(y_serial) == ['C_Major'] * 3 + ['G_Major'] * 3
+    assert list(y_parallel) == list(y_serial)
+    assert labels_parallel == labels_serial
+    np.testing.assert_allclose(X_parallel, X_serial)
+
+
+def test_parallel_load_falls_back_to_serial(tiny_dataset, mocker):
+    """
+    Testa se uma falha ao criar o pool de processos cai para o modo serial.
+    """
+    mocker.patch('train_model.ProcessPoolExecutor', side_effect=OSError('sem semáforos'))
+
+    X, y, _ = train_model.load_dataset(tiny_dataset, use_cache=False, workers=4)
+
+    assert X.shape == (6, train_model.N_MFCC, train_model.MAX_PAD_LEN)
+    assert len(y) == 6
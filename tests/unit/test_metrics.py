@@ -0,0 +1,55 @@
+import numpy as np
+
+from metrics import Histogram, MetricsRegistry, NULL_METRIC
+
+
+def test_histogram_quantiles_are_close_to_exact():
+    """
+    Testa se os percentis estimados pelos buckets ficam a menos de ~12% dos exatos.
+    """
+    values = np.random.default_rng(0).lognormal(mean=np.log(0.005), sigma=0.6, size=5000)
+    histogram = Histogram('teste_seconds', "teste")
+    for value in values:
+        histogram.observe(value)
+
+    assert histogram.count == 5000
+    for q in (0.5, 0.95, 0.99):
+        assert abs(histogram.quantile(q) / np.quantile(values, q) - 1) < 0.12
+
+
+def test_registry_renders_prometheus_text():
+    """
+    Testa o formato de texto do Prometheus: HELP/TYPE, percentis, _sum/_count,
+    contadores com rótulo e gauges.
+    """
+    registry = MetricsRegistry(enabled=True)
+    histogram = registry.histogram('etapa_seconds', "Uma etapa")
+    with histogram.time():
+        pass
+    counter = registry.counter('status_total', "Status", label='flag')
+    counter.inc(label_value='input_overflow')
+    counter.inc(label_value='input_overflow')
+    registry.gauge('sessoes', "Sessões", lambda: 3)
+
+    text = registry.render()
+    assert '# TYPE violao_etapa_seconds summary' in text
+    assert 'violao_etapa_seconds{quantile="0.99"}' in text
+    assert 'violao_etapa_seconds_count 1' in text
+    assert 'violao_status_total{flag="input_overflow"} 2' in text
+    assert 'violao_sessoes 3' in text
+    assert registry.histogram('etapa_seconds', "Uma etapa") is histogram
+
+
+def test_disabled_registry_returns_no_op_metrics():
+    """
+    Testa se, com as métricas desligadas, as métricas são no-ops compartilhados
+    e nada é exportado.
+    """
+    registry = MetricsRegistry(enabled=False)
+    histogram = registry.histogram('etapa_seconds', "Uma etapa")
+    with histogram.time():
+        histogram.observe(1.0)
+    registry.counter('total', "Total").inc()
+
+    assert histogram is NULL_METRIC
+    assert registry.render() == "\n"
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+import model_registry
+from model_registry import (artifact_paths, available_versions, create_version, activate, current_version,
+                            current_model_dir, previous_version, rollback, version_dir, LEGACY_VERSION)
+
+
+def _write_version(model_dir):
+    # Só a existência dos arquivos obrigatórios importa para o registro
+    os.makedirs(model_dir, exist_ok=True)
+    paths = artifact_paths(model_dir)
+    for key in model_registry.REQUIRED_ARTIFACTS:
+        with open(paths[key], 'w') as f:
+            f.write(key)
+
+
+def test_versions_are_activated_and_rolled_back(tmp_path):
+    """
+    Testa se uma versão nova só vira a atual depois de ativada e se o rollback
+    volta para a versão anterior (e, no fim, para o layout antigo).
+    """
+    root = str(tmp_path)
+    _write_version(root)
+    assert current_version(root) == LEGACY_VERSION
+    assert current_model_dir(root) == root
+
+    first = create_version(root)
+    second = create_version(root)
+    assert first != second
+    # Versões ainda sem arquivos não aparecem nem podem ser ativadas
+    assert available_versions(root) == [LEGACY_VERSION]
+    with pytest.raises(ValueError):
+        activate(first, root)
+
+    _write_version(version_dir(first, root))
+    _write_version(version_dir(second, root))
+    assert current_version(root) == LEGACY_VERSION
+    activate(second, root)
+    assert current_model_dir(root) == version_dir(second, root)
+    assert available_versions(root) == [LEGACY_VERSION, first, second]
+
+    assert previous_version(root) == first
+    assert rollback(root=root) == first
+    assert current_version(root) == first
+    assert rollback(root=root) == LEGACY_VERSION
+    assert current_version(root) == LEGACY_VERSION
+    # O layout antigo é o mais antigo: não há para onde voltar
+    assert previous_version(root) is None
+    with pytest.raises(ValueError):
+        rollback(root=root)
+    assert rollback(to=second, root=root) == second
+
+
+def test_version_names_cannot_escape_the_versions_directory(tmp_path):
+    """
+    Testa se nomes de versão com caminhos (vindos do endpoint /admin) são recusados.
+    """
+    for name in ('../trained_model', '/tmp', '.', '', 'a/b'):
+        with pytest.raises(ValueError):
+            version_dir(name, str(tmp_path))
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from numpy_inference import export_numpy_model, load_numpy_model
+from train_model import build_model, predict_note, N_MFCC, SAMPLE_RATE
+
+
+@pytest.fixture(params=[33, 704], ids=['janela_ao_vivo', 'preenchido'])
+def exported(request, tmp_path):
+    """Modelo Keras com pesos aleatórios (formato de produção) e sua exportação NumPy."""
+    frames = request.param
+    model = build_model(frames, N_MFCC, 5)
+    scaler = StandardScaler().fit(np.random.default_rng(0).normal(2.0, 3.0, size=(N_MFCC * 10, frames)))
+    path = str(tmp_path / 'weights.npz')
+    export_numpy_model(model, scaler, path)
+    numpy_model, numpy_scaler = load_numpy_model(path)
+    return model, scaler, numpy_model, numpy_scaler
+
+
+def test_numpy_forward_matches_keras(exported):
+    """
+    Testa se o forward pass em NumPy reproduz as saídas do Keras.
+    """
+    model, scaler, numpy_model, numpy_scaler = exported
+    x = np.random.default_rng(1).normal(size=(8,) + model.input_shape[1:]).astype(np.float32)
+
+    np.testing.assert_allclose(numpy_model.predict(x), model.predict(x, verbose=0), atol=1e-5)
+    assert numpy_model.input_shape == model.input_shape
+    assert numpy_model.count_params() == model.count_params()
+
+    features = np.random.default_rng(2).normal(size=(N_MFCC, model.input_shape[1]))
+    np.testing.assert_allclose(numpy_scaler.transform(features), scaler.transform(features), rtol=1e-5, atol=1e-5)
+
+
+def test_predict_note_same_chord_with_both_backends(exported):
+    """
+    Testa se predict_note retorna o mesmo acorde com o modelo Keras e com o motor NumPy.
+    """
+    model, scaler, numpy_model, numpy_scaler = exported
+    encoder = LabelEncoder().fit(['A', 'C', 'D', 'E', 'G'])
+    t = np.arange(int(SAMPLE_RATE * 0.75)) / SAMPLE_RATE
+
+    for freq in (110.0, 196.0, 261.63):
+        segment = (0.2 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+        assert predict_note(segment, numpy_model, encoder, numpy_scaler) == predict_note(segment, model, encoder, scaler)
@@ -0,0 +1,48 @@
+import numpy as np
+from unittest.mock import Mock
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+import train_model
+from train_model import predict_note, frames_for_window, LIVE_WINDOW_SECONDS, SAMPLE_RATE, N_MFCC
+
+
+def _chord_segment(seconds=LIVE_WINDOW_SECONDS):
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (0.2 * np.sin(2 * np.pi * 196.0 * t)).astype(np.float32)
+
+
+def _fitted_helpers(frames):
+    encoder = LabelEncoder().fit(['A_Major', 'C_Major', 'G_Major'])
+    scaler = StandardScaler().fit(np.random.default_rng(0).normal(size=(N_MFCC * 4, frames)))
+    return encoder, scaler
+
+
+def test_predict_note_uses_model_input_length():
+    """
+    Testa se predict_note ajusta as features ao comprimento de entrada salvo no modelo.
+    """
+    frames = frames_for_window(LIVE_WINDOW_SECONDS)
+    model = Mock(input_shape=(None, frames, N_MFCC))
+    model.predict.return_value = np.array([[0.1, 0.2, 0.7]])
+    encoder, scaler = _fitted_helpers(frames)
+
+    chord = predict_note(_chord_segment(), model, encoder, scaler)
+
+    assert chord == 'G_Major'
+    assert frames == 33
+    assert model.predict.call_args[0][0].shape == (1, frames, N_MFCC)
+
+
+def test_model_metadata_roundtrip(tmp_path):
+    """
+    Testa se os metadados do modelo guardam o comprimento de entrada e se modelos
+    antigos, sem metadados, usam o formato original.
+    """
+    path = str(tmp_path / 'model_metadata.json')
+    legacy = train_model.load_model_metadata(path)
+    assert legacy['max_pad_len'] == train_model.MAX_PAD_LEN
+
+    train_model.save_model_metadata(33, window_seconds=LIVE_WINDOW_SECONDS, path=path)
+    metadata = train_model.load_model_metadata(path)
+    assert metadata['max_pad_len'] == 33
+    assert metadata['window_seconds'] == LIVE_WINDOW_SECONDS
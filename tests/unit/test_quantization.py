@@ -0,0 +1,73 @@
+import os
+import numpy as np
+import pytest
+import joblib
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+pytest.importorskip('tensorflow')
+
+import train_model
+from model_registry import artifact_paths
+from quantization import TFLiteChordModel, export_quantized_model, quantization_report
+from train_model import build_model, N_MFCC
+
+FRAMES = 33
+
+
+@pytest.fixture(scope='module')
+def float_model():
+    """Modelo Keras com pesos aleatórios (formato de produção, janela ao vivo)."""
+    return build_model(FRAMES, N_MFCC, 5)
+
+
+def _features(n, seed):
+    return np.random.default_rng(seed).normal(size=(n, FRAMES, N_MFCC)).astype(np.float32)
+
+
+@pytest.mark.parametrize('mode', ['int8', 'float16'])
+def test_quantized_model_agrees_with_float_model(float_model, mode, tmp_path):
+    """
+    Testa se o modelo quantizado aceita lotes de tamanhos diferentes e prediz o
+    mesmo acorde que o float32 na grande maioria das amostras.
+    """
+    path = export_quantized_model(float_model, _features(50, 0), mode, str(tmp_path / f'{mode}.tflite'))
+    quantized = TFLiteChordModel(path)
+    x = _features(64, 1)
+
+    assert quantized.input_shape == float_model.input_shape
+    assert quantized.predict(x[:1]).shape == (1, 5)
+    predictions = quantized.predict(x)
+    assert predictions.shape == (64, 5)
+    agreement = np.mean(np.argmax(predictions, axis=1) == np.argmax(float_model.predict(x, verbose=0), axis=1))
+    assert agreement >= 0.9
+    assert os.path.getsize(path) < float_model.count_params() * 4
+
+
+def test_report_and_backend_selection(float_model, tmp_path):
+    """
+    Testa se o relatório compara tamanho, latência e acurácia e se
+    load_trained_model seleciona o modelo int8 (ou cai para o float32 quando ele falta).
+    """
+    paths = artifact_paths(str(tmp_path))
+    model_path = paths['model']
+    float_model.save(model_path)
+    scaler = StandardScaler().fit(np.zeros((4, FRAMES)))
+    joblib.dump(scaler, paths['scaler'])
+    joblib.dump(LabelEncoder().fit(list('ABCDE')), paths['encoder'])
+
+    model, _, _ = train_model.load_trained_model(backend='int8', train_if_missing=False, model_dir=str(tmp_path))
+    assert not isinstance(model, TFLiteChordModel)
+
+    export_quantized_model(float_model, _features(50, 0), 'int8', paths['int8'])
+    model, encoder, _ = train_model.load_trained_model(backend='int8', train_if_missing=False, model_dir=str(tmp_path))
+    assert isinstance(model, TFLiteChordModel)
+    assert list(encoder.classes_) == list('ABCDE')
+
+    x = _features(20, 2)
+    labels = np.argmax(float_model.predict(x, verbose=0), axis=1)
+    rows = quantization_report({'keras float32': (float_model, model_path), 'tflite int8': (model, model.path)},
+                               x, labels, repeats=5, out_path=str(tmp_path / 'report.json'))
+    assert [row['model'] for row in rows] == ['keras float32', 'tflite int8']
+    assert rows[0]['accuracy'] == rows[0]['agreement'] == 1.0
+    assert rows[1]['size_bytes'] < rows[0]['size_bytes']
+    assert os.path.exists(tmp_path / 'report.json')
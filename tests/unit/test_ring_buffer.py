@@ -0,0 +1,146 @@
+import threading
+import time
+
+import numpy as np
+
+from ring_buffer import RingBuffer
+
+
+def test_read_returns_view_when_contiguous_and_copy_across_wrap():
+    """
+    Testa se a leitura de uma região contígua é uma view do buffer e se a região
+    que dá a volta no fim do buffer é copiada na ordem certa.
+    """
+    ring = RingBuffer(10)
+    ring.write(np.arange(8))
+
+    samples, start = ring.read(2, 4)
+    assert start == 2
+    assert np.shares_memory(samples, ring._data)
+    np.testing.assert_array_equal(samples, [2, 3, 4, 5])
+
+    ring.write(np.arange(8, 14))
+    samples, start = ring.read(6)
+    assert not np.shares_memory(samples, ring._data)
+    np.testing.assert_array_equal(samples, np.arange(6, 14))
+    np.testing.assert_array_equal(ring.latest(3), [11, 12, 13])
+
+
+def test_latest_is_zero_padded_before_enough_samples():
+    """
+    Testa se, logo após iniciar a gravação, a janela mais recente tem zeros antes
+    das primeiras amostras (como o buffer original).
+    """
+    ring = RingBuffer(10)
+    ring.write([1, 2])
+
+    np.testing.assert_array_equal(ring.latest(4), [0, 0, 1, 2])
+
+
+def test_readers_have_independent_cursors():
+    """
+    Testa se cada leitor recebe apenas as amostras novas desde a sua última leitura,
+    sem interferir nos outros leitores.
+    """
+    ring = RingBuffer(16)
+    ring.write(np.arange(4))
+    fast = ring.reader()
+    slow = ring.reader(backlog=2)
+
+    ring.write(np.arange(4, 7))
+    np.testing.assert_array_equal(fast.read_new(), [4, 5, 6])
+    ring.write(np.arange(7, 9))
+    np.testing.assert_array_equal(fast.read_new(), [7, 8])
+    assert fast.read_new().size == 0
+
+    np.testing.assert_array_equal(slow.read_new(), np.arange(2, 9))
+    assert fast.overruns == slow.overruns == 0
+
+
+def test_reader_detects_overrun():
+    """
+    Testa se um leitor que ficou mais atrasado que a capacidade recebe as amostras
+    mais antigas ainda disponíveis e registra quantas foram perdidas.
+    """
+    ring = RingBuffer(8)
+    reader = ring.reader()
+    ring.write(np.arange(5))
+    ring.write(np.arange(5, 12))
+
+    samples = reader.read_new()
+    np.testing.assert_array_equal(samples, np.arange(4, 12))
+    assert reader.overruns == 1
+    assert reader.dropped_samples == 4
+    assert not ring.is_valid(0)
+
+
+def test_reader_detects_reset_after_writer_passes_old_cursor():
+    """
+    Testa se o leitor percebe o reinício do buffer mesmo quando a nova gravação já
+    escreveu além do cursor antigo, sem misturar amostras das duas gravações.
+    """
+    ring = RingBuffer(16)
+    ring.write(np.arange(3))
+    reader = ring.reader()
+
+    ring.reset()
+    ring.write(np.arange(100, 105))
+    assert reader.available() == 0
+    assert reader.read_new().size == 0
+
+    ring.write(np.arange(105, 107))
+    np.testing.assert_array_equal(reader.read_new(), [105, 106])
+    assert reader.overruns == 0
+
+
+def test_write_larger_than_capacity_keeps_latest_samples():
+    """
+    Testa se um bloco maior que o buffer mantém apenas as últimas amostras e o
+    cursor conta todas as escritas.
+    """
+    ring = RingBuffer(5)
+    ring.write([0, 1, 2])
+    ring.write(np.arange(3, 15))
+
+    assert ring.written == 15
+    np.testing.assert_array_equal(ring.read(0)[0], np.arange(10, 15))
+    np.testing.assert_array_equal(ring.latest(5), np.arange(10, 15))
+
+
+def test_reader_wait_is_woken_by_writer():
+    """
+    Testa se o leitor é acordado pela escrita assim que um hop de amostras novas
+    chega, e se a espera sem áudio novo termina no timeout.
+    """
+    ring = RingBuffer(64)
+    reader = ring.reader()
+    assert reader.wait(8, timeout=0.01) is False
+
+    timer = threading.Timer(0.05, ring.write, args=(np.ones(8),))
+    timer.start()
+    start = time.perf_counter()
+    assert reader.wait(8, timeout=2) is True
+    assert time.perf_counter() - start < 1
+    timer.join()
+
+
+def test_read_hops_drops_stale_hops_and_keeps_grid():
+    """
+    Testa se, com vários hops acumulados, todos são lidos de uma vez (os antigos
+    contados como descartados) e a sobra menor que um hop fica para a próxima leitura.
+    """
+    ring = RingBuffer(64)
+    reader = ring.reader()
+    ring.write(np.arange(3))
+    assert reader.read_hops(4)[0].size == 0
+
+    ring.write(np.arange(3, 13))
+    samples, dropped = reader.read_hops(4)
+    np.testing.assert_array_equal(samples, np.arange(12))
+    assert dropped == 2
+    assert reader.cursor == 12
+
+    ring.write(np.arange(13, 16))
+    samples, dropped = reader.read_hops(4)
+    np.testing.assert_array_equal(samples, [12, 13, 14, 15])
+    assert dropped == 0
@@ -0,0 +1,82 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from shared_state import SharedStateStore, LocalStateStore, create_state_store
+
+
+def test_only_one_store_becomes_owner_until_it_releases(tmp_path):
+    """
+    Testa a eleição do dono: só um processo (aqui, uma instância com seu próprio
+    descritor) pega o lock; quando o dono solta (ou morre), outro assume.
+    """
+    first, second = SharedStateStore(str(tmp_path)), SharedStateStore(str(tmp_path))
+
+    assert first.try_become_owner()
+    assert not second.try_become_owner()
+    assert first.is_owner() and not second.is_owner()
+    assert second.owner_pid() == os.getpid()
+
+    first.release_owner()
+    assert second.try_become_owner()
+    assert isinstance(create_state_store('local'), LocalStateStore)
+    with pytest.raises(ValueError):
+        create_state_store('redis')
+
+
+def test_commands_results_and_published_state_round_trip(tmp_path):
+    """
+    Testa o caminho de um start encaminhado: o comando chega ao dono em ordem, a
+    resposta volta para quem enviou, comandos vencidos são descartados e o estado
+    publicado acorda quem espera uma nova versão.
+    """
+    owner, worker = SharedStateStore(str(tmp_path)), SharedStateStore(str(tmp_path))
+    owner.try_become_owner()
+
+    stale_id = worker.submit({'action': 'start', 'session_id': 'velha'})
+    path = tmp_path / 'commands' / f'{stale_id}.json'
+    path.write_text(json.dumps(dict(json.loads(path.read_text()), submitted_at=time.time() - 60)))
+    first_id = worker.submit({'action': 'start', 'session_id': 'aba-1', 'device_id': '2'})
+    second_id = worker.submit({'action': 'stop', 'session_id': 'aba-1'})
+
+    commands = owner.take_commands()
+    assert [command_id for command_id, _ in commands] == [first_id, second_id]
+    assert commands[0][1]['device_id'] == '2'
+    assert owner.take_commands() == []
+
+    threading.Timer(0.1, owner.put_result, args=(first_id, {'status': 'success'})).start()
+    assert worker.wait_result(first_id, timeout=2) == {'status': 'success'}
+    assert worker.wait_result(second_id, timeout=0.1) is None
+
+    owner.publish('aba-1', {'version': 1, 'payload': {'note': 'Ouvindo...', 'status': 'active'}})
+    threading.Timer(0.1, owner.publish, args=('aba-1', {'version': 2, 'payload': {'note': 'C_Major', 'status': 'active'}})).start()
+    start = time.monotonic()
+    state = worker.wait_for_change('aba-1', 1, timeout=2)
+    assert state['payload']['note'] == 'C_Major'
+    assert time.monotonic() - start < 1
+    assert worker.wait_for_change('aba-1', 2, timeout=0.1)['version'] == 2
+    assert set(worker.sessions()) == {'aba-1'}
+
+
+def test_state_directory_is_private(tmp_path):
+    """
+    Testa se o diretório do estado é criado só para o usuário (0o700) e se um
+    diretório que outros podem escrever, ou um link simbólico, é recusado.
+    """
+    store = SharedStateStore(str(tmp_path / 'estado'))
+    assert store.try_become_owner()
+    for name in ('', 'sessions', 'commands', 'results'):
+        assert os.stat(tmp_path / 'estado' / name).st_mode & 0o777 == 0o700
+
+    shared = tmp_path / 'aberto'
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(PermissionError):
+        SharedStateStore(str(shared)).try_become_owner()
+
+    (tmp_path / 'link').symlink_to(tmp_path / 'estado')
+    with pytest.raises(PermissionError):
+        SharedStateStore(str(tmp_path / 'link')).submit({'action': 'stop', 'session_id': 'aba-1'})
@@ -0,0 +1,115 @@
+import numpy as np
+from unittest.mock import Mock
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from similarity_gate import SimilarityGate, spectral_fingerprint
+from train_model import predict_note, frames_for_window, LIVE_WINDOW_SECONDS, SAMPLE_RATE, N_MFCC
+
+FRAMES = frames_for_window(LIVE_WINDOW_SECONDS)
+
+
+def _features(seed, scale=1.0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(size=(N_MFCC, FRAMES)).astype(np.float32) + np.linspace(-5, 5, N_MFCC)[:, None] * scale
+
+
+def _tone(freq, amplitude=0.2):
+    t = np.arange(int(SAMPLE_RATE * LIVE_WINDOW_SECONDS)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def test_fingerprint_ignores_loudness_coefficient():
+    """
+    Testa se a impressão não muda quando só o coeficiente 0 (energia) muda,
+    como no decaimento de um acorde sustentado.
+    """
+    features = _features(0)
+    quieter = features.copy()
+    quieter[0] -= 30
+
+    np.testing.assert_allclose(spectral_fingerprint(features), spectral_fingerprint(quieter))
+
+
+def test_gate_reuses_until_max_reuse_and_on_change():
+    """
+    Testa se janelas parecidas reaproveitam a predição até max_reuse vezes seguidas
+    e se uma janela diferente volta a passar pelo modelo.
+    """
+    gate = SimilarityGate(threshold=0.01, max_reuse=2)
+    features = _features(0)
+
+    assert gate.lookup(features) is None
+    gate.store('C_Major')
+    assert gate.lookup(features + 0.01) == 'C_Major'
+    assert gate.lookup(features - 0.01) == 'C_Major'
+    assert gate.lookup(features) is None  # idade máxima atingida
+    gate.store('C_Major')
+
+    assert gate.lookup(_features(1, scale=-1.0)) is None
+    assert gate.stats() == {'gate_checks': 5, 'gate_reused': 2, 'gate_reuse_rate': 0.4}
+
+
+def test_predict_note_skips_model_for_sustained_chord():
+    """
+    Testa se predict_note com o gate só chama o modelo na primeira janela de um
+    som sustentado, volta a chamá-lo quando o som muda e reinicia no silêncio.
+    """
+    model = Mock(input_shape=(None, FRAMES, N_MFCC))
+    model.predict.return_value = np.array([[0.1, 0.2, 0.7]])
+    encoder = LabelEncoder().fit(['A_Major', 'C_Major', 'G_Major'])
+    scaler = StandardScaler().fit(np.random.default_rng(0).normal(size=(N_MFCC * 4, FRAMES)))
+    gate = SimilarityGate()
+
+    for amplitude in (0.2, 0.18, 0.16, 0.14):
+        assert predict_note(_tone(196.0, amplitude), model, encoder, scaler, gate=gate) == 'G_Major'
+    assert model.predict.call_count == 1
+
+    predict_note(_tone(440.0), model, encoder, scaler, gate=gate)
+    assert model.predict.call_count == 2
+
+    assert predict_note(np.zeros(1000, dtype=np.float32), model, encoder, scaler, gate=gate) == 'Silêncio'
+    predict_note(_tone(440.0), model, encoder, scaler, gate=gate)
+    assert model.predict.call_count == 3
+
+
+class FixedChromaModel:
+    """Modelo falso com features próprias (como o cromagrama): devolve `chroma` como features da janela."""
+
+    input_shape = (None, None, 12)
+
+    def __init__(self, chroma):
+        self.chroma = chroma
+        self.calls = 0
+
+    def window_features(self, audio_segment, sample_rate=SAMPLE_RATE):
+        return self.chroma
+
+    def predict(self, x, verbose=0, batch_size=None):
+        self.calls += 1
+        return np.array([[0.1, 0.2, 0.7]])
+
+
+def test_chroma_fingerprint_keeps_pitch_class_c():
+    """
+    Testa se, com cromagrama, a linha 0 (classe de altura Dó) entra na impressão:
+    uma mudança só no Dó não pode reaproveitar a predição anterior.
+    """
+    chroma = np.full((12, 20), 0.1, dtype=np.float32)
+    chroma[[4, 7]] = 1.0  # Mi e Sol
+    with_c = chroma.copy()
+    with_c[0] = 1.0
+
+    assert not np.allclose(spectral_fingerprint(chroma, skip_energy=False),
+                           spectral_fingerprint(with_c, skip_energy=False))
+
+    model = FixedChromaModel(chroma)
+    encoder = LabelEncoder().fit(['A_Major', 'C_Major', 'E_Minor'])
+    scaler = Mock(transform=lambda x: x)
+    gate = SimilarityGate()
+    assert predict_note(_tone(330.0), model, encoder, scaler, gate=gate) == 'E_Minor'
+    assert predict_note(_tone(330.0), model, encoder, scaler, gate=gate) == 'E_Minor'
+    assert model.calls == 1
+
+    model.chroma = with_c
+    predict_note(_tone(330.0), model, encoder, scaler, gate=gate)
+    assert model.calls == 2
@@ -0,0 +1,80 @@
+import numpy as np
+
+from streaming_features import StreamingMFCC
+from train_model import extract_features, predict_note, SAMPLE_RATE, N_MFCC, MAX_PAD_LEN
+
+WINDOW_SAMPLES = int(SAMPLE_RATE * 0.75)
+
+
+def _chord_like_signal(seconds=3.0, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    signal = sum(np.sin(2 * np.pi * f * t) for f in (130.81, 164.81, 196.0)) * np.exp(-1.5 * t)
+    return (0.2 * signal + rng.normal(0, 0.002, t.size)).astype(np.float32)
+
+
+class LinearModel:
+    # Modelo linear com pesos aleatórios: pequenas diferenças nas features mudariam o argmax
+    input_shape = (None, MAX_PAD_LEN, N_MFCC)
+
+    def __init__(self, n_classes=8, seed=0):
+        self.weights = np.random.default_rng(seed).normal(size=(MAX_PAD_LEN * N_MFCC, n_classes))
+
+    def predict(self, x, verbose=0):
+        return x.reshape(len(x), -1) @ self.weights
+
+
+class IndexEncoder:
+    classes_ = np.arange(8)
+
+    def inverse_transform(self, indices):
+        return self.classes_[np.asarray(indices)]
+
+
+class IdentityScaler:
+    def transform(self, x):
+        return x
+
+
+def test_streaming_mfcc_matches_extract_features():
+    """
+    Testa se o extrator incremental produz as mesmas features que extract_features
+    para a janela atual, independentemente do tamanho dos blocos recebidos, e a
+    mesma predição no predict_note.
+    """
+    signal = _chord_like_signal()
+    model = LinearModel()
+    streaming = StreamingMFCC(WINDOW_SAMPLES, sample_rate=SAMPLE_RATE, n_mfcc=N_MFCC)
+    rng = np.random.default_rng(1)
+
+    position = 0
+    while position < signal.size:
+        block = int(rng.integers(200, 3000))
+        streaming.push(signal[position:position + block])
+        position += block
+
+        expected = extract_features(streaming.window_audio(), is_file=False)
+        actual = streaming.features(max_pad_len=MAX_PAD_LEN)
+        assert actual.shape == (N_MFCC, MAX_PAD_LEN)
+        np.testing.assert_allclose(actual, expected, atol=1e-4)
+        window = streaming.window_audio()
+        assert predict_note(window, model, IndexEncoder(), IdentityScaler(), features=actual) == \
+            predict_note(window, model, IndexEncoder(), IdentityScaler())
+
+
+def test_streaming_mfcc_only_computes_new_frames():
+    """
+    Testa se cada iteração calcula apenas os quadros novos mais os das bordas da janela.
+    """
+    signal = _chord_like_signal()
+    streaming = StreamingMFCC(WINDOW_SAMPLES, sample_rate=SAMPLE_RATE, n_mfcc=N_MFCC)
+    streaming.push(signal[:WINDOW_SAMPLES])
+    streaming.features()
+
+    before = streaming.frames_computed
+    streaming.push(signal[WINDOW_SAMPLES:WINDOW_SAMPLES + 2048])  # ~93 ms, 4 hops
+    streaming.features()
+
+    # 4 quadros novos + 4 quadros de borda, contra 33 quadros da janela completa
+    assert streaming.frames_computed - before <= 8
+    assert streaming.n_frames == 33
@@ -0,0 +1,89 @@
+import os
+import numpy as np
+import pytest
+
+sf = pytest.importorskip('soundfile')
+pytest.importorskip('tensorflow')
+
+import train_model
+
+
+@pytest.fixture
+def tiny_dataset(tmp_path):
+    """Cria um dataset mínimo com dois acordes e quatro arquivos cada."""
+    sr = train_model.SAMPLE_RATE
+    t = np.arange(sr) / sr
+    for label, freq in [('G_Major', 196.0), ('C_Major', 261.63)]:
+        os.makedirs(tmp_path / 'dataset' / label)
+        for i in range(4):
+            signal = 0.3 * np.sin(2 * np.pi * freq * (1 + 0.01 * i) * t)
+            sf.write(str(tmp_path / 'dataset' / label / f"{i}.wav"), signal.astype(np.float32), sr)
+    return str(tmp_path / 'dataset'), str(tmp_path / 'cache')
+
+
+def test_incremental_scaler_matches_in_memory_fit(tiny_dataset):
+    """
+    Testa se o scaler ajustado arquivo a arquivo (partial_fit) é igual ao ajustado
+    com o dataset inteiro na memória.
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    dataset_path, cache_dir = tiny_dataset
+    window = train_model.LIVE_WINDOW_SECONDS
+    labels, entries, cache = train_model.index_dataset(dataset_path, cache_dir=cache_dir, workers=1, window_seconds=window)
+    X, _, _ = train_model.load_dataset(dataset_path, use_cache=False, workers=1, window_seconds=window)
+
+    assert labels == ['C_Major', 'G_Major']
+    assert sum(count for _, _, count in entries) == len(X)
+
+    incremental = train_model.fit_scaler_incremental(entries, train_model.cached_samples_reader(cache, window))
+    full = StandardScaler().fit(X.reshape(-1, X.shape[-1]))
+    np.testing.assert_allclose(incremental.mean_, full.mean_, rtol=1e-5, atol=1e-5)
+    np.testing.assert_allclose(incremental.scale_, full.scale_, rtol=1e-4, atol=1e-5)
+
+
+def test_streaming_dataset_yields_scaled_batches(tiny_dataset):
+    """
+    Testa se o tf.data entrega lotes no formato do modelo (batch, quadros, n_mfcc),
+    com rótulos one-hot e todas as amostras do dataset.
+    """
+    from sklearn.preprocessing import LabelEncoder
+
+    dataset_path, cache_dir = tiny_dataset
+    window = train_model.LIVE_WINDOW_SECONDS
+    _, entries, cache = train_model.index_dataset(dataset_path, cache_dir=cache_dir, workers=1, window_seconds=window)
+    encoder = LabelEncoder().fit([label for label, _, _ in entries])
+    read_samples = train_model.cached_samples_reader(cache, window)
+    scaler = train_model.fit_scaler_incremental(entries, read_samples)
+
+    dataset = train_model.make_streaming_dataset(entries, read_samples, encoder, scaler, batch_size=4, shuffle=True)
+    batches = list(dataset.as_numpy_iterator())
+
+    frames = train_model.frames_for_window(window)
+    assert all(x.shape[1:] == (frames, train_model.N_MFCC) and len(x) <= 4 for x, _ in batches)
+    targets = np.concatenate([y for _, y in batches])
+    assert len(targets) == sum(count for _, _, count in entries)
+    np.testing.assert_array_equal(targets.sum(axis=1), 1)
+    # Features normalizadas: média ~0 no conjunto inteiro
+    samples = np.concatenate([x for x, _ in batches])
+    assert abs(samples.mean()) < 0.1
+
+
+def test_feature_store_matches_feature_cache(tiny_dataset, tmp_path):
+    """
+    Testa se o FeatureStore entrega as mesmas amostras e o mesmo scaler que o
+    cache de features, arquivo a arquivo.
+    """
+    dataset_path, cache_dir = tiny_dataset
+    window = train_model.LIVE_WINDOW_SECONDS
+    _, entries, cache = train_model.index_dataset(dataset_path, cache_dir=cache_dir, workers=1, window_seconds=window)
+    store = train_model.build_feature_store(dataset_path, str(tmp_path / 'store'), workers=1, window_seconds=window)
+
+    read_cached = train_model.cached_samples_reader(cache, window)
+    assert [(label, count) for label, _, count in store.entries()] == [(label, count) for label, _, count in entries]
+    for (_, file_path, _), (_, file_id, _) in zip(entries, store.entries()):
+        np.testing.assert_array_equal(store.file_samples(file_id), read_cached(file_path))
+
+    from_store = train_model.fit_scaler_incremental(store.entries(), store.file_samples)
+    from_cache = train_model.fit_scaler_incremental(entries, read_cached)
+    np.testing.assert_allclose(from_store.mean_, from_cache.mean_)
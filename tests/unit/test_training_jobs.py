@@ -0,0 +1,114 @@
+import time
+
+import pytest
+
+from training_jobs import TrainingJobRunner, validate_training_params
+
+
+# Alvos executados no processo de treino (spawn): precisam ser funções de módulo
+def fake_training(params, events, cancel_event):
+    events.put({'type': 'stage', 'stage': 'training', 'epochs': 3})
+    for epoch in range(1, 4):
+        time.sleep(params.get('epoch_seconds', 0.05))
+        if cancel_event.is_set():
+            events.put({'type': 'cancelled'})
+            return
+        events.put({'type': 'epoch', 'epoch': epoch, 'epochs': 3, 'loss': 1.0 / epoch, 'val_accuracy': 0.3 * epoch,
+                    'samples_per_sec': 100.0})
+    events.put({'type': 'succeeded', 'version': f"versao-{params['name']}"})
+
+
+def stuck_training(params, events, cancel_event):
+    # Simula o carregamento do dataset, que não verifica o cancelamento
+    events.put({'type': 'stage', 'stage': 'loading_dataset'})
+    time.sleep(60)
+
+
+def crashing_training(params, events, cancel_event):
+    raise SystemExit(3)
+
+
+def wait_for(job, timeout=30):
+    deadline = time.monotonic() + timeout
+    while job.finished_at is None and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert job.finished_at is not None, job.to_dict()
+
+
+def test_jobs_run_one_at_a_time_and_report_progress():
+    """
+    Testa se os jobs rodam um de cada vez, em ordem, com o progresso de cada época
+    e a nova versão no fim, chamando on_success para cada treino concluído.
+    """
+    succeeded = []
+    runner = TrainingJobRunner(target=fake_training, on_success=succeeded.append)
+    first = runner.submit({'name': 'a', 'epoch_seconds': 0.2})
+    second = runner.submit({'name': 'b'})
+
+    deadline = time.monotonic() + 30
+    while first.status == 'queued' and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert first.status == 'running'
+    assert second.status == 'queued'
+
+    wait_for(first)
+    wait_for(second)
+    assert [job.status for job in (first, second)] == ['succeeded', 'succeeded']
+    assert first.started_at < first.finished_at <= second.started_at
+    assert first.version == 'versao-a'
+    assert [entry['epoch'] for entry in first.history] == [1, 2, 3]
+    assert first.to_dict()['progress']['val_accuracy'] == pytest.approx(0.9)
+    # on_success roda depois de o job terminar
+    deadline = time.monotonic() + 5
+    while len(succeeded) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert succeeded == [first, second]
+
+
+def test_cancel_running_queued_and_stuck_jobs():
+    """
+    Testa o cancelamento: um job em execução para no próximo ponto de verificação,
+    um job na fila nunca começa e um processo que não responde é encerrado depois
+    do prazo de cancelamento.
+    """
+    runner = TrainingJobRunner(target=fake_training, cancel_grace=0.5)
+    running = runner.submit({'name': 'a', 'epoch_seconds': 0.3})
+    queued = runner.submit({'name': 'b'})
+    while running.status != 'running':
+        time.sleep(0.01)
+
+    assert runner.cancel(queued.id)
+    assert runner.cancel(running.id)
+    wait_for(running)
+    assert running.status == 'cancelled' and running.version is None
+    assert queued.status == 'cancelled' and queued.started_at is None
+    assert not runner.cancel(running.id)
+
+    runner.target = stuck_training
+    stuck = runner.submit({})
+    while stuck.stage != 'loading_dataset':
+        time.sleep(0.01)
+    start = time.monotonic()
+    runner.cancel(stuck.id)
+    wait_for(stuck)
+    assert stuck.status == 'cancelled'
+    assert time.monotonic() - start < 10
+
+    runner.target = crashing_training
+    crashed = runner.submit({})
+    wait_for(crashed)
+    assert crashed.status == 'failed'
+    assert '3' in crashed.message
+
+
+def test_training_params_are_validated():
+    """
+    Testa se o corpo do POST /train é validado (tipos, limites e parâmetros desconhecidos).
+    """
+    params = validate_training_params({'epochs': 5, 'live_window': True, 'quantize': ['int8']}, max_epochs=200)
+    assert params['epochs'] == 5 and params['live_window'] is True and params['reload'] is True
+
+    for body in ({'epochs': 0}, {'epochs': 500}, {'epochs': True}, {'epochs': '5'},
+                 {'quantize': ['int4']}, {'dataset_path': '/etc'}, {'workers': 0}):
+        with pytest.raises(ValueError):
+            validate_training_params(body, max_epochs=200)
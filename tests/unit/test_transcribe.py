@@ -0,0 +1,156 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+from train_model import extract_features, SAMPLE_RATE, N_MFCC
+import transcribe
+from feature_extractor import HOP_LENGTH
+from transcribe import window_starts, predict_windows, transcribe_file
+
+
+class IdentityScaler:
+    def transform(self, x):
+        return x
+
+
+class LabelEncoder:
+    classes_ = np.array(['C_Major', 'G_Major'])
+
+    def inverse_transform(self, indexes):
+        return self.classes_[indexes]
+
+
+class LoudnessModel:
+    """Modelo falso: 'G_Major' quando a média do 1º coeficiente MFCC é alta (som forte), senão 'C_Major'."""
+
+    input_shape = (None, 33, N_MFCC)
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, x, verbose=0):
+        self.batch_sizes.append(len(x))
+        loud = x[:, :, 0].mean(axis=1) > -650
+        return np.stack([~loud, loud], axis=1).astype(np.float32)
+
+
+@pytest.fixture
+def recording(tmp_path):
+    # 2 s de som fraco, 3 s de som forte e 2 s de silêncio
+    t = np.arange(int(SAMPLE_RATE * 7)) / SAMPLE_RATE
+    audio = np.sin(2 * np.pi * 220 * t).astype(np.float32)
+    audio[:2 * SAMPLE_RATE] *= 0.01
+    audio[2 * SAMPLE_RATE:5 * SAMPLE_RATE] *= 0.5
+    audio[5 * SAMPLE_RATE:] = 0
+    path = tmp_path / 'gravacao.wav'
+    sf.write(path, audio, SAMPLE_RATE)
+    return path
+
+
+def test_window_starts_follow_hop_grid():
+    """
+    Testa se as janelas começam a cada hop arredondado para a grade de HOP_LENGTH
+    e se só entram as janelas que terminam dentro do áudio.
+    """
+    starts = window_starts(0, 0, 100000, 30000, 1764)
+
+    assert np.all(starts % HOP_LENGTH == 0)
+    np.testing.assert_array_equal(starts, np.arange(len(starts)) * 1764 // HOP_LENGTH * HOP_LENGTH)
+    assert starts[-1] + 30000 <= 100000 < starts[-1] + 1764 + 30000
+    assert window_starts(0, 0, 20000, 30000, 1764).size == 0
+
+
+class RecordingModel(LoudnessModel):
+    def predict(self, x, verbose=0):
+        self.inputs = x
+        return super().predict(x, verbose)
+
+
+def test_predict_windows_matches_extract_features():
+    """
+    Testa se as features que chegam ao modelo são as mesmas de extract_features
+    janela a janela, inclusive com janelas de volumes diferentes (top_db por janela).
+    """
+    rng = np.random.default_rng(0)
+    audio = rng.normal(size=SAMPLE_RATE * 2).astype(np.float32)
+    audio[SAMPLE_RATE:] *= 0.01
+    starts = np.array([0, 20, 40]) * HOP_LENGTH
+    model = RecordingModel()
+
+    labels = predict_windows(audio, starts, 16537, model, LabelEncoder(), IdentityScaler(), 33)
+    assert len(labels) == 3
+    for start, features in zip(starts, model.inputs):
+        expected = extract_features(audio[start:start + 16537], SAMPLE_RATE, N_MFCC, 33, is_file=False)
+        np.testing.assert_allclose(features.T, expected, atol=1e-3)
+
+
+def test_transcribe_file_returns_stable_timeline(recording):
+    """
+    Testa se a transcrição aplica o filtro de estabilidade e devolve os segmentos
+    na ordem, cobrindo a gravação até o fim, com o fator de tempo real.
+    """
+    model = LoudnessModel()
+    result = transcribe_file(recording, model, LabelEncoder(), IdentityScaler(), batch_size=16)
+
+    chords = [segment['chord'] for segment in result['segments']]
+    assert chords == ['C_Major', 'G_Major', 'Silêncio...']
+    assert result['segments'][1]['start'] == pytest.approx(2.0 + 0.75, abs=0.2)
+    assert result['segments'][-1]['end'] == result['duration_seconds'] == pytest.approx(7.0)
+    assert result['real_time_factor'] > 0
+    assert max(model.batch_sizes) == 16
+
+
+def test_transcribe_file_is_independent_of_chunk_size(recording):
+    """
+    Testa se ler o arquivo em blocos pequenos gera exatamente a mesma linha do tempo
+    que ler tudo de uma vez (as janelas continuam entre os blocos).
+    """
+    whole = transcribe_file(recording, LoudnessModel(), LabelEncoder(), IdentityScaler(), chunk_seconds=60)
+    chunked = transcribe_file(recording, LoudnessModel(), LabelEncoder(), IdentityScaler(), chunk_seconds=0.5)
+
+    assert chunked['windows'] == whole['windows']
+    assert chunked['segments'] == whole['segments']
+
+
+def test_resampled_transcription_is_independent_of_chunk_size(recording, tmp_path):
+    """
+    Testa se um arquivo em outra taxa de amostragem é reamostrado como um todo (o
+    mesmo áudio com blocos de qualquer tamanho, igual ao librosa.resample do arquivo
+    inteiro) e se hops maiores que a janela pulam o áudio entre as janelas.
+    """
+    import librosa
+    from transcribe import iter_audio_chunks
+
+    audio, _ = sf.read(recording, dtype='float32')
+    path = tmp_path / 'gravacao_44k.wav'
+    sf.write(path, librosa.resample(audio, orig_sr=SAMPLE_RATE, target_sr=44100), 44100)
+
+    whole = np.concatenate(list(iter_audio_chunks(path, chunk_seconds=60)))
+    chunked = np.concatenate(list(iter_audio_chunks(path, chunk_seconds=0.3)))
+    np.testing.assert_array_equal(chunked, whole)
+    expected = librosa.resample(sf.read(path, dtype='float32')[0], orig_sr=44100, target_sr=SAMPLE_RATE)
+    np.testing.assert_allclose(whole, expected, atol=1e-6)
+
+    results = [transcribe_file(path, LoudnessModel(), LabelEncoder(), IdentityScaler(), chunk_seconds=chunk)
+               for chunk in (60, 0.5)]
+    assert results[0]['windows'] == results[1]['windows']
+    assert results[0]['segments'] == results[1]['segments']
+    assert [s['chord'] for s in results[0]['segments']] == ['C_Major', 'G_Major', 'Silêncio...']
+
+    long_hops = [transcribe_file(recording, LoudnessModel(), LabelEncoder(), IdentityScaler(), hop_seconds=1.5,
+                                 chunk_seconds=chunk) for chunk in (60, 0.5)]
+    assert long_hops[0]['windows'] == long_hops[1]['windows'] == 5
+    assert long_hops[0]['segments'] == long_hops[1]['segments']
+
+
+def test_main_prints_summary_for_empty_recording(tmp_path, mocker, monkeypatch, capsys):
+    """
+    Testa se a linha de resumo não quebra com uma gravação vazia (sem fator de tempo real).
+    """
+    path = tmp_path / 'vazia.wav'
+    sf.write(path, np.zeros(0, dtype=np.float32), SAMPLE_RATE)
+    mocker.patch('transcribe.load_trained_model', return_value=(LoudnessModel(), LabelEncoder(), IdentityScaler()))
+    monkeypatch.setattr('sys.argv', ['transcribe.py', str(path)])
+
+    transcribe.main()
+    assert 'Duração: 0.0 s' in capsys.readouterr().out
@@ -1,28 +1,59 @@
 import os
+import time
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import librosa
-import librosa.display
-import tensorflow as tf
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from keras.models import Sequential
-from keras.layers import Dense, Dropout, Flatten, Conv1D, MaxPooling1D
-from keras.utils import to_categorical
-from keras.callbacks import EarlyStopping, ReduceLROnPlateau
 import warnings
-import joblib
-from pydub import AudioSegment
+import json
+from collections import Counter
+from functools import partial
+
+# TensorFlow/Keras, scikit-learn e joblib são importados dentro das funções de
+# treino e carregamento: importar este módulo (ex.: pelo app.py) não os carrega.
+
+from feature_cache import FeatureCache, FEATURE_CACHE_DIR
+from feature_store import FeatureStore, FEATURE_STORE_DIR
+from feature_extractor import get_feature_extractor, FEATURE_EXTRACTOR_VERSION
+from model_registry import artifact_paths, create_version, activate, current_model_dir, version_dir, MODEL_DIR
+from numpy_inference import export_numpy_model, export_from_files, load_numpy_model
+from quantization import (export_quantized_model, quantization_report, calibration_sample, load_quantized_model,
+                          QUANTIZATION_MODES, CALIBRATION_SAMPLES)
+from chroma_recognizer import load_chroma_model
+from metrics import STAGE_FEATURES, STAGE_SCALER, STAGE_MODEL
 
 warnings.filterwarnings("ignore", category=FutureWarning)
 
 DATASET_PATH = 'dataset'
+# Layout antigo (arquivos direto em trained_model/): usado enquanto não existe o ponteiro CURRENT.
+# Cada treino novo grava em trained_model/versions/<versão>/ (ver model_registry.py).
 MODEL_SAVE_PATH = 'trained_model/chord_recognizer_cnn_model.h5'
 ENCODER_SAVE_PATH = 'trained_model/label_encoder_chords.joblib'
 SCALER_SAVE_PATH = 'trained_model/scaler_chords.joblib'
+METADATA_SAVE_PATH = 'trained_model/model_metadata.json'
+
+# 'keras' (TensorFlow), 'numpy' (forward pass em NumPy, ver numpy_inference.py), 'int8'/'float16'
+# (TFLite, ver quantization.py) ou 'chroma' (moldes de acordes por cromagrama, ver chroma_recognizer.py)
+INFERENCE_BACKEND = os.environ.get('VIOLAO_INFERENCE_BACKEND', 'keras')
 
 SAMPLE_RATE = 22050
 N_MFCC = 40
 MAX_PAD_LEN = 704 
+HOP_LENGTH = 512
+SILENCE_THRESHOLD = 0.003
+EPOCHS = 200
+BATCH_SIZE = 32
+# Modo streaming: lotes pré-carregados pelo tf.data e buffer de embaralhamento (em amostras).
+# Só isso (mais o arquivo sendo lido) fica na memória, independente do tamanho do dataset.
+PREFETCH_BATCHES = 4
+SHUFFLE_BUFFER_SAMPLES = 256
+# Amostras de teste usadas no relatório de quantização do modo streaming
+STREAMING_REPORT_SAMPLES = 2000
+# Duração da janela ao vivo (audio_capture.RECORD_DURATION), usada no modo de treino por janelas
+LIVE_WINDOW_SECONDS = 0.75
+# Tamanhos de lote pré-aquecidos depois do carregamento (o agendador junta até VIOLAO_MAX_BATCH_SIZE janelas)
+WARMUP_BATCH_SIZES = (1, 2, 4, 8)
+WARMUP_STEADY_REPEATS = 5
 
 
 def extract_features(audio_data, sample_rate=SAMPLE_RATE, n_mfcc=N_MFCC, max_pad_len=MAX_PAD_LEN, is_file=True):
@@ -36,130 +67,588 @@ def extract_features(audio_data, sample_rate=SAMPLE_RATE, n_mfcc=N_MFCC, max_pad
         if len(audio) < sample_rate * 0.05: 
             return None
 
-        mfccs = librosa.feature.mfcc(y=audio, sr=sr, n_mfcc=n_mfcc)
-        
-        if mfccs.shape[1] > max_pad_len:
-            mfccs = mfccs[:, :max_pad_len]
-        else:
-            pad_width = max_pad_len - mfccs.shape[1]
-            mfccs = np.pad(mfccs, pad_width=((0, 0), (0, pad_width)), mode='constant')
-        
-        return mfccs
+        # Mesmo resultado de librosa.feature.mfcc, com filtros pré-calculados e em float32
+        return get_feature_extractor(sr, n_mfcc).mfcc(audio, max_pad_len=max_pad_len)
     except Exception as e:
         print(f"Erro ao processar áudio para features: {e}")
         return None
 
-def load_dataset(dataset_path=DATASET_PATH):
-    X = []
-    y = []
+def frames_for_window(window_seconds, sample_rate=SAMPLE_RATE, hop_length=HOP_LENGTH):
+    # Número de quadros MFCC (STFT centrada) de uma janela de window_seconds
+    return 1 + int(sample_rate * window_seconds) // hop_length
+
+def extract_window_features(file_path, window_seconds, sample_rate=SAMPLE_RATE, n_mfcc=N_MFCC):
+    """
+    Divide o áudio em janelas com a duração da janela ao vivo (50% de sobreposição),
+    descarta janelas silenciosas e retorna um array (janelas, n_mfcc, quadros) ou None.
+    """
+    try:
+        audio, sr = librosa.load(file_path, sr=sample_rate)
+    except Exception as e:
+        print(f"Erro ao processar áudio para features: {e}")
+        return None
+
+    window_samples = int(sample_rate * window_seconds)
+    max_pad_len = frames_for_window(window_seconds, sample_rate)
+    if len(audio) < window_samples:
+        segments = audio[np.newaxis]
+    else:
+        segments = np.lib.stride_tricks.sliding_window_view(audio, window_samples)[::max(window_samples // 2, 1)]
+    segments = segments[np.sqrt(np.mean(np.square(segments), axis=1)) >= SILENCE_THRESHOLD]
+    if len(segments) == 0 or segments.shape[1] < sample_rate * 0.05:
+        return None
+    # Todas as janelas do arquivo em uma única passada
+    return get_feature_extractor(sr, n_mfcc).mfcc_batch(segments, max_pad_len=max_pad_len)
+
+def feature_params(sample_rate=SAMPLE_RATE, n_mfcc=N_MFCC, max_pad_len=MAX_PAD_LEN, window_seconds=None):
+    params = {
+        'sample_rate': sample_rate,
+        'n_mfcc': n_mfcc,
+        'max_pad_len': max_pad_len,
+        'librosa_version': librosa.__version__,
+        'feature_extractor': FEATURE_EXTRACTOR_VERSION,
+    }
+    if window_seconds is not None:
+        params['window_seconds'] = window_seconds
+        params['max_pad_len'] = frames_for_window(window_seconds, sample_rate)
+    return params
+
+def _list_dataset_files(dataset_path):
     labels = sorted(os.listdir(dataset_path))
     valid_labels = []
+    items = []
     for label in labels:
         label_path = os.path.join(dataset_path, label)
         if os.path.isdir(label_path):
             valid_labels.append(label)
-            print(f"Carregando áudios para o acorde: {label}")
-            for filename in os.listdir(label_path):
+            for filename in sorted(os.listdir(label_path)):
                 if filename.endswith(".wav"):
-                    file_path = os.path.join(label_path, filename)
-                    features = extract_features(file_path, is_file=True)
-                    if features is not None:
-                        X.append(features)
-                        y.append(label)
+                    items.append((label, os.path.join(label_path, filename)))
+    return valid_labels, items
+
+def _featurize_file(file_path, window_seconds=None):
+    if window_seconds is not None:
+        return extract_window_features(file_path, window_seconds)
+    return extract_features(file_path, is_file=True)
+
+def _featurize_files(file_paths, workers, window_seconds=None):
+    # Gera (posição, features) na mesma ordem de file_paths. Se o pool de processos
+    # falhar, os arquivos restantes são processados em modo serial.
+    done = 0
+    if workers > 1 and len(file_paths) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                chunksize = max(1, len(file_paths) // (workers * 4))
+                featurize = partial(_featurize_file, window_seconds=window_seconds)
+                for features in executor.map(featurize, file_paths, chunksize=chunksize):
+                    yield done, features
+                    done += 1
+            return
+        except (OSError, BrokenProcessPool) as e:
+            print(f"Falha no pool de processos ({e}). Continuando em modo serial...")
+    for position in range(done, len(file_paths)):
+        yield position, _featurize_file(file_paths[position], window_seconds)
+
+def load_dataset(dataset_path=DATASET_PATH, use_cache=True, cache_dir=FEATURE_CACHE_DIR, workers=None,
+                 window_seconds=None, return_groups=False):
+    # Com window_seconds, cada arquivo gera várias amostras (uma por janela) e
+    # return_groups devolve também o índice do arquivo de origem de cada amostra.
+    if workers is None:
+        workers = os.cpu_count() or 1
+    valid_labels, items = _list_dataset_files(dataset_path)
+    cache = FeatureCache(feature_params(window_seconds=window_seconds), cache_dir=cache_dir) if use_cache else None
+
+    all_features = [None] * len(items)
+    pending = []
+    for i, (_, file_path) in enumerate(items):
+        if cache is not None:
+            found, features = cache.get(file_path)
+            if found:
+                all_features[i] = features
+                continue
+        pending.append(i)
+
+    remaining_per_label = Counter(label for label, _ in items)
+    def report_done(i):
+        label = items[i][0]
+        remaining_per_label[label] -= 1
+        if remaining_per_label[label] == 0:
+            print(f"Áudios carregados para o acorde: {label}")
+
+    pending_set = set(pending)
+    for i in range(len(items)):
+        if i not in pending_set:
+            report_done(i)
+
+    if pending:
+        mode = f"{workers} processos" if workers > 1 else "modo serial"
+        print(f"Extraindo features de {len(pending)} arquivos ({mode})...")
+    for position, features in _featurize_files([items[i][1] for i in pending], workers, window_seconds):
+        i = pending[position]
+        all_features[i] = features
+        if cache is not None:
+            cache.put(items[i][1], features)
+        report_done(i)
+
+    X = []
+    y = []
+    groups = []
+    for file_idx, ((label, _), features) in enumerate(zip(items, all_features)):
+        if features is None:
+            continue
+        windows = features if window_seconds is not None else [features]
+        X.extend(windows)
+        y.extend([label] * len(windows))
+        groups.extend([file_idx] * len(windows))
+    if cache is not None:
+        removed = cache.prune(dataset_path)
+        print(f"Cache de features: {cache.hits} acertos, {cache.misses} faltas, {removed} entradas obsoletas removidas.")
+    if return_groups:
+        return np.array(X), np.array(y), sorted(valid_labels), np.array(groups)
     return np.array(X), np.array(y), sorted(valid_labels)
 
-def train_model():
+def _sample_count(features, window_seconds):
+    if features is None:
+        return 0
+    return len(features) if window_seconds is not None else 1
+
+def index_dataset(dataset_path=DATASET_PATH, cache_dir=FEATURE_CACHE_DIR, workers=None, window_seconds=None):
+    """
+    Garante que as features de todos os arquivos estão no cache em disco, sem
+    mantê-las na memória. Retorna (rótulos, entradas, cache), com uma entrada
+    (rótulo, caminho, amostras) por arquivo que gerou features.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    valid_labels, items = _list_dataset_files(dataset_path)
+    cache = FeatureCache(feature_params(window_seconds=window_seconds), cache_dir=cache_dir)
+
+    counts = [0] * len(items)
+    pending = []
+    for i, (_, file_path) in enumerate(items):
+        found, features = cache.get(file_path)
+        if found:
+            counts[i] = _sample_count(features, window_seconds)
+        else:
+            pending.append(i)
+
+    if pending:
+        mode = f"{workers} processos" if workers > 1 else "modo serial"
+        print(f"Extraindo features de {len(pending)} arquivos ({mode})...")
+    for position, features in _featurize_files([items[i][1] for i in pending], workers, window_seconds):
+        i = pending[position]
+        cache.put(items[i][1], features)
+        counts[i] = _sample_count(features, window_seconds)
+
+    removed = cache.prune(dataset_path)
+    print(f"Cache de features: {cache.hits} acertos, {cache.misses} faltas, {removed} entradas obsoletas removidas.")
+    entries = [(label, file_path, count) for (label, file_path), count in zip(items, counts) if count > 0]
+    return sorted(valid_labels), entries, cache
+
+def cached_samples_reader(cache, window_seconds=None):
+    """Função que lê do cache as amostras (n, n_mfcc, quadros) de um arquivo."""
+    def read_samples(file_path):
+        _, features = cache.get(file_path)
+        return features if window_seconds is not None else features[np.newaxis]
+    return read_samples
+
+def build_feature_store(dataset_path=DATASET_PATH, store_dir=FEATURE_STORE_DIR, workers=None, window_seconds=None):
+    """Cria ou atualiza o FeatureStore do dataset, processando só os arquivos novos ou modificados."""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    _, items = _list_dataset_files(dataset_path)
+    store = FeatureStore(store_dir, feature_params(window_seconds=window_seconds))
+
+    def featurize(file_paths):
+        if file_paths:
+            mode = f"{workers} processos" if workers > 1 else "modo serial"
+            print(f"Extraindo features de {len(file_paths)} arquivos ({mode})...")
+        for position, features in _featurize_files(file_paths, workers, window_seconds):
+            # Sem janelas, cada arquivo é uma amostra
+            yield position, (features[np.newaxis] if features is not None and window_seconds is None else features)
+
+    added, removed = store.update(items, featurize)
+    print(f"Feature store: {added} arquivos adicionados, {removed} removidos, {len(store)} amostras em {len(store.shards)} shards.")
+    return store
+
+def fit_scaler_incremental(entries, read_samples):
+    """StandardScaler ajustado arquivo a arquivo com partial_fit (mesmo resultado do fit em memória)."""
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    for _, key, _ in entries:
+        samples = read_samples(key)
+        scaler.partial_fit(samples.reshape(-1, samples.shape[-1]))
+    return scaler
+
+def make_streaming_dataset(entries, read_samples, encoder, scaler, batch_size=BATCH_SIZE, shuffle=False, seed=42):
+    """
+    tf.data.Dataset que lê as amostras de cada entrada (rótulo, chave, n) com
+    `read_samples(chave)` sob demanda, normaliza e entrega lotes
+    (batch, quadros, n_mfcc). A ordem dos arquivos é embaralhada a cada época.
+    """
+    import tensorflow as tf
+
+    frames = scaler.n_features_in_
+    class_index = {label: idx for idx, label in enumerate(encoder.classes_)}
+    n_classes = len(encoder.classes_)
+    rng = np.random.default_rng(seed)
+
+    def generate():
+        order = rng.permutation(len(entries)) if shuffle else range(len(entries))
+        for idx in order:
+            label, key, _ = entries[idx]
+            samples = read_samples(key)
+            scaled = scaler.transform(samples.reshape(-1, frames)).reshape(samples.shape)
+            target = np.zeros(n_classes, dtype=np.float32)
+            target[class_index[label]] = 1.0
+            for sample in scaled:
+                yield np.ascontiguousarray(sample.T, dtype=np.float32), target
+
+    dataset = tf.data.Dataset.from_generator(generate, output_signature=(
+        tf.TensorSpec(shape=(frames, N_MFCC), dtype=tf.float32),
+        tf.TensorSpec(shape=(n_classes,), dtype=tf.float32),
+    ))
+    # Número de amostras conhecido: o Keras sabe quantos passos tem cada época
+    dataset = dataset.apply(tf.data.experimental.assert_cardinality(sum(count for _, _, count in entries)))
+    if shuffle:
+        dataset = dataset.shuffle(SHUFFLE_BUFFER_SAMPLES, seed=seed)
+    return dataset.batch(batch_size).prefetch(PREFETCH_BATCHES)
+
+def build_model(input_frames, n_mfcc, n_classes):
+    from keras.models import Sequential
+    from keras.layers import Dense, Dropout, Flatten, Conv1D, MaxPooling1D
+
+    model = Sequential([
+        Conv1D(filters=64, kernel_size=5, activation='relu', input_shape=(input_frames, n_mfcc)),
+        MaxPooling1D(pool_size=2),
+        Dropout(0.3),
+        Conv1D(filters=128, kernel_size=3, activation='relu'),
+        MaxPooling1D(pool_size=2),
+        Dropout(0.3),
+        Flatten(),
+        Dense(128, activation='relu'),
+        Dropout(0.4),
+        Dense(n_classes, activation='softmax')
+    ])
+    model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+    return model
+
+def save_model_metadata(max_pad_len, window_seconds=None, path=METADATA_SAVE_PATH):
+    metadata = {
+        'sample_rate': SAMPLE_RATE,
+        'n_mfcc': N_MFCC,
+        'hop_length': HOP_LENGTH,
+        'max_pad_len': max_pad_len,
+        'window_seconds': window_seconds,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2)
+    return metadata
+
+def load_model_metadata(path=None):
+    # Sem path: metadados da versão atual do modelo.
+    # Modelos antigos não têm metadados: assume o formato original (preenchido até MAX_PAD_LEN)
+    if path is None:
+        path = artifact_paths(current_model_dir())['metadata']
+    if not os.path.exists(path):
+        return {'sample_rate': SAMPLE_RATE, 'n_mfcc': N_MFCC, 'hop_length': HOP_LENGTH,
+                'max_pad_len': MAX_PAD_LEN, 'window_seconds': None}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def model_window_features(model):
+    # Extrator de features próprio do modelo (ex.: cromagrama, ver chroma_recognizer.py);
+    # None para os modelos de MFCC. Procurado na classe, como um método declarado.
+    if getattr(type(model), 'window_features', None) is None:
+        return None
+    return model.window_features
+
+def model_input_frames(model, default=MAX_PAD_LEN):
+    # Comprimento (em quadros MFCC) esperado na entrada do modelo
+    input_shape = getattr(model, 'input_shape', None)
+    if input_shape is not None and len(input_shape) == 3 and input_shape[1] is not None:
+        return int(input_shape[1])
+    return default
+
+def _training_callbacks():
+    from keras.callbacks import EarlyStopping, ReduceLROnPlateau
+
+    early_stopping = EarlyStopping(monitor='val_loss', patience=20, restore_best_weights=True) 
+    reduce_lr = ReduceLROnPlateau(monitor='val_loss', factor=0.2, patience=10, min_lr=0.00001) 
+    return [early_stopping, reduce_lr]
+
+def _save_trained_model(model, encoder, scaler, input_frames, window_seconds):
+    # Cada treino gera uma nova versão em trained_model/versions/; ela só vira a
+    # atual (CURRENT) em _activate_version, depois de todos os arquivos gravados.
+    import joblib
+
+    version = create_version()
+    paths = artifact_paths(version_dir(version))
+    model.save(paths['model'])
+    joblib.dump(encoder, paths['encoder'])
+    joblib.dump(scaler, paths['scaler'])
+    save_model_metadata(input_frames, window_seconds, path=paths['metadata'])
+    export_numpy_model(model, scaler, paths['numpy'])
+    print(f"Modelo de acordes (CNN), encoder e scaler salvos em: {version_dir(version)}")
+    return version
+
+def _activate_version(version):
+    activate(version)
+    print(f"Versão atual do modelo: {version} (a API em execução carrega com POST /admin/model/reload)")
+
+def split_dataset(X, y_categorical, y_encoded, groups, window_seconds=None):
+    from sklearn.model_selection import train_test_split
+
+    if window_seconds is None:
+        return train_test_split(X, y_categorical, test_size=0.2, random_state=42, stratify=y_encoded)
+    # Janelas do mesmo arquivo ficam sempre do mesmo lado da divisão treino/teste
+    file_ids, first_idx = np.unique(groups, return_index=True)
+    train_files, _ = train_test_split(file_ids, test_size=0.2, random_state=42, stratify=y_encoded[first_idx])
+    train_mask = np.isin(groups, train_files)
+    return X[train_mask], X[~train_mask], y_categorical[train_mask], y_categorical[~train_mask]
+
+def _dataset_arrays(dataset, max_samples):
+    # Primeiras max_samples amostras (x, y) de um tf.data.Dataset em lotes
+    xs, ys, total = [], [], 0
+    for x, y in dataset.as_numpy_iterator():
+        xs.append(x)
+        ys.append(y)
+        total += len(x)
+        if total >= max_samples:
+            break
+    return np.concatenate(xs)[:max_samples], np.concatenate(ys)[:max_samples]
+
+def export_quantized_models(model, modes, X_calibration, X_test, y_test, model_dir=MODEL_DIR):
+    """
+    Exporta os modelos quantizados (TFLite) ao lado do float32 em `model_dir` e
+    gera o relatório comparando tamanho, latência e acurácia. As entradas já
+    estão normalizadas.
+    """
+    paths = artifact_paths(model_dir)
+    candidates = {'keras float32': (model, paths['model'])}
+    if os.path.exists(paths['numpy']):
+        candidates['numpy float32'] = (load_numpy_model(paths['numpy'])[0], paths['numpy'])
+    for mode in modes:
+        export_quantized_model(model, X_calibration, mode, paths[mode])
+        candidates[f'tflite {mode}'] = (load_quantized_model(mode, paths[mode]), paths[mode])
+    return quantization_report(candidates, X_test, y_test, out_path=paths['quantization_report'])
+
+def train_model(workers=None, window_seconds=None, dataset_path=DATASET_PATH, epochs=EPOCHS, save=True,
+                streaming=False, cache_dir=FEATURE_CACHE_DIR, feature_store_dir=None, quantize=(), callbacks=()):
+    # window_seconds=None treina com o áudio inteiro preenchido até MAX_PAD_LEN quadros (modo original).
+    # Com window_seconds (ex.: LIVE_WINDOW_SECONDS), a entrada do modelo tem o tamanho da janela ao vivo.
+    # streaming=True lê as features do cache em lotes (tf.data) em vez de carregar o dataset inteiro;
+    # feature_store_dir faz o mesmo a partir dos shards do FeatureStore.
+    # quantize=('int8', 'float16') exporta também os modelos quantizados (exige save=True).
+    # callbacks: callbacks Keras extras (ex.: progresso e cancelamento dos jobs de treino em training_jobs.py).
+    if streaming or feature_store_dir is not None:
+        return train_model_streaming(workers=workers, window_seconds=window_seconds, dataset_path=dataset_path,
+                                     epochs=epochs, save=save, cache_dir=cache_dir, feature_store_dir=feature_store_dir,
+                                     quantize=quantize, callbacks=callbacks)
+
+    from sklearn.preprocessing import LabelEncoder, StandardScaler
+    from keras.utils import to_categorical
+
     print("Iniciando carregamento do dataset...")
-    X, y, labels = load_dataset()
+    X, y, labels, groups = load_dataset(dataset_path, cache_dir=cache_dir, workers=workers, window_seconds=window_seconds,
+                                        return_groups=True)
 
     if len(X) == 0:
         print("Nenhum dado encontrado no dataset. Verifique se a pasta 'dataset' contém subpastas com arquivos .wav de acordes.")
         return None, None, None
 
+    # load_dataset já descarta os arquivos sem features
     encoder = LabelEncoder()
     y_encoded = encoder.fit_transform(y)
     y_categorical = to_categorical(y_encoded)
 
-    valid_indices = [i for i, features in enumerate(X) if features is not None]
-    X_filtered = np.array([X[i] for i in valid_indices])
-    y_filtered = np.array([y_categorical[i] for i in valid_indices])
-
-    if len(X_filtered) == 0:
-        print("Nenhum dado válido após extração de features. Verifique seus arquivos de áudio.")
-        return None, None, None
-        
-    X_train, X_test, y_train, y_test = train_test_split(X_filtered, y_filtered, test_size=0.2, random_state=42, stratify=np.argmax(y_filtered, axis=1))
+    X_train, X_test, y_train, y_test = split_dataset(X, y_categorical, y_encoded, groups, window_seconds)
+    # Só as partições de treino e teste continuam na memória
+    del X
 
-    original_shape = X_train.shape
-    X_train_reshaped_for_scaler = X_train.reshape(-1, X_train.shape[-1])
-    X_test_reshaped_for_scaler = X_test.reshape(-1, X_test.shape[-1])
-
-    scaler = StandardScaler()
-    X_train_scaled_reshaped = scaler.fit_transform(X_train_reshaped_for_scaler)
-    X_test_scaled_reshaped = scaler.transform(X_test_reshaped_for_scaler)
-
-    X_train_scaled = X_train_scaled_reshaped.reshape(original_shape)
-    X_test_scaled = X_test_scaled_reshaped.reshape(X_test.shape)
+    # copy=False: a normalização é feita no próprio array de treino/teste, sem cópias
+    scaler = StandardScaler(copy=False)
+    X_train_scaled = scaler.fit_transform(X_train.reshape(-1, X_train.shape[-1])).reshape(X_train.shape)
+    X_test_scaled = scaler.transform(X_test.reshape(-1, X_test.shape[-1])).reshape(X_test.shape)
+    scaler.copy = True
 
     X_train_final = np.swapaxes(X_train_scaled, 1, 2)
     X_test_final = np.swapaxes(X_test_scaled, 1, 2)
 
-    
-    model = Sequential([
-        Conv1D(filters=64, kernel_size=5, activation='relu', input_shape=(X_train_final.shape[1], X_train_final.shape[2])),
-        MaxPooling1D(pool_size=2),
-        Dropout(0.3),
-        Conv1D(filters=128, kernel_size=3, activation='relu'),
-        MaxPooling1D(pool_size=2),
-        Dropout(0.3),
-        Flatten(),
-        Dense(128, activation='relu'),
-        Dropout(0.4),
-        Dense(len(labels), activation='softmax')
-    ])
-
-    model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+    model = build_model(X_train_final.shape[1], X_train_final.shape[2], len(labels))
 
     print(f"Shape final de X_train para o modelo: {X_train_final.shape}")
     print(f"Shape de y_train: {y_train.shape}")
     print(model.summary())
 
     print("Iniciando treinamento do modelo de acordes (CNN)...")
-    
-    early_stopping = EarlyStopping(monitor='val_loss', patience=20, restore_best_weights=True) 
-    reduce_lr = ReduceLROnPlateau(monitor='val_loss', factor=0.2, patience=10, min_lr=0.00001) 
 
     history = model.fit(X_train_final, y_train, 
-                        epochs=200, 
-                        batch_size=32, 
+                        epochs=epochs, 
+                        batch_size=BATCH_SIZE, 
                         validation_data=(X_test_final, y_test),
-                        callbacks=[early_stopping, reduce_lr],
+                        callbacks=_training_callbacks() + list(callbacks),
                         verbose=1)
 
     loss, accuracy = model.evaluate(X_test_final, y_test, verbose=0)
     print(f"Acurácia final do modelo de acordes no conjunto de teste: {accuracy:.4f}")
 
-    os.makedirs(os.path.dirname(MODEL_SAVE_PATH), exist_ok=True)
-    model.save(MODEL_SAVE_PATH)
-    joblib.dump(encoder, ENCODER_SAVE_PATH)
-    joblib.dump(scaler, SCALER_SAVE_PATH)
-    print(f"Modelo de acordes (CNN), encoder e scaler salvos em: {os.path.dirname(MODEL_SAVE_PATH)}")
+    if save:
+        version = _save_trained_model(model, encoder, scaler, X_train_final.shape[1], window_seconds)
+        if quantize:
+            export_quantized_models(model, quantize, calibration_sample(X_train_final), X_test_final, y_test,
+                                    model_dir=version_dir(version))
+        _activate_version(version)
+
+    return model, encoder, scaler
+
+def train_model_streaming(workers=None, window_seconds=None, dataset_path=DATASET_PATH, epochs=EPOCHS, save=True,
+                          cache_dir=FEATURE_CACHE_DIR, batch_size=BATCH_SIZE, feature_store_dir=None, quantize=(),
+                          callbacks=()):
+    """
+    Treino sem materializar o dataset: as features ficam no cache em disco, o
+    scaler é ajustado com partial_fit e o tf.data lê, normaliza e pré-carrega
+    no máximo PREFETCH_BATCHES lotes (mais o buffer de embaralhamento).
+    Com feature_store_dir, as features vêm dos shards do FeatureStore (memmap).
+    """
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import LabelEncoder
+
+    if feature_store_dir is not None:
+        store = build_feature_store(dataset_path, feature_store_dir, workers=workers, window_seconds=window_seconds)
+        entries, read_samples = store.entries(), store.file_samples
+    else:
+        print("Indexando o dataset (modo streaming)...")
+        _, entries, cache = index_dataset(dataset_path, cache_dir=cache_dir, workers=workers, window_seconds=window_seconds)
+        read_samples = cached_samples_reader(cache, window_seconds)
+    if not entries:
+        print("Nenhum dado encontrado no dataset. Verifique se a pasta 'dataset' contém subpastas com arquivos .wav de acordes.")
+        return None, None, None
+
+    # Divisão treino/teste por arquivo, só com índices
+    encoder = LabelEncoder()
+    file_labels = encoder.fit_transform([label for label, _, _ in entries])
+    train_idx, test_idx = train_test_split(np.arange(len(entries)), test_size=0.2, random_state=42, stratify=file_labels)
+    train_entries = [entries[i] for i in train_idx]
+    test_entries = [entries[i] for i in test_idx]
+
+    scaler = fit_scaler_incremental(train_entries, read_samples)
+    train_dataset = make_streaming_dataset(train_entries, read_samples, encoder, scaler, batch_size, shuffle=True)
+    test_dataset = make_streaming_dataset(test_entries, read_samples, encoder, scaler, batch_size)
+
+    input_frames = scaler.n_features_in_
+    model = build_model(input_frames, N_MFCC, len(encoder.classes_))
+    print(f"Amostras de treino: {sum(count for _, _, count in train_entries)}, "
+          f"teste: {sum(count for _, _, count in test_entries)}, entrada: ({input_frames}, {N_MFCC})")
+    print(model.summary())
+
+    print("Iniciando treinamento do modelo de acordes (CNN)...")
+    model.fit(train_dataset, epochs=epochs, validation_data=test_dataset,
+              callbacks=_training_callbacks() + list(callbacks), verbose=1)
+
+    loss, accuracy = model.evaluate(test_dataset, verbose=0)
+    print(f"Acurácia final do modelo de acordes no conjunto de teste: {accuracy:.4f}")
+
+    if save:
+        version = _save_trained_model(model, encoder, scaler, input_frames, window_seconds)
+        if quantize:
+            # Calibração e relatório com uma parte limitada dos dados (sem materializar o dataset)
+            X_calibration, _ = _dataset_arrays(train_dataset, CALIBRATION_SAMPLES)
+            X_test, y_test = _dataset_arrays(test_dataset, STREAMING_REPORT_SAMPLES)
+            export_quantized_models(model, quantize, X_calibration, X_test, y_test, model_dir=version_dir(version))
+        _activate_version(version)
 
     return model, encoder, scaler
 
-def load_trained_model():
-    if not os.path.exists(MODEL_SAVE_PATH) or \
-       not os.path.exists(ENCODER_SAVE_PATH) or \
-       not os.path.exists(SCALER_SAVE_PATH):
-        print(f"Arquivos do modelo/encoder/scaler para acordes não encontrados em 'trained_model/'.")
+def quantize_trained_model(modes=QUANTIZATION_MODES, workers=None, dataset_path=DATASET_PATH, cache_dir=FEATURE_CACHE_DIR,
+                           model_dir=None):
+    """
+    Gera os modelos quantizados a partir do modelo já salvo (por padrão, a versão
+    atual): recalcula a mesma divisão treino/teste do treino, calibra com amostras
+    de treino e compara no teste.
+    """
+    import joblib
+    import tensorflow as tf
+    from keras.utils import to_categorical
+
+    model_dir = model_dir or current_model_dir()
+    paths = artifact_paths(model_dir)
+    model = tf.keras.models.load_model(paths['model'])
+    encoder = joblib.load(paths['encoder'])
+    scaler = joblib.load(paths['scaler'])
+    window_seconds = load_model_metadata(paths['metadata']).get('window_seconds')
+
+    X, y, _, groups = load_dataset(dataset_path, cache_dir=cache_dir, workers=workers, window_seconds=window_seconds,
+                                   return_groups=True)
+    if len(X) == 0:
+        print("Nenhum dado encontrado no dataset para calibrar a quantização.")
+        return None
+    y_encoded = encoder.transform(y)
+    X_train, X_test, _, y_test = split_dataset(X, to_categorical(y_encoded, len(encoder.classes_)), y_encoded,
+                                               groups, window_seconds)
+
+    def prepare(samples):
+        scaled = scaler.transform(samples.reshape(-1, samples.shape[-1])).reshape(samples.shape)
+        return np.swapaxes(scaled, 1, 2).astype(np.float32)
+
+    return export_quantized_models(model, modes, prepare(calibration_sample(X_train)), prepare(X_test), y_test,
+                                   model_dir=model_dir)
+
+def _load_numpy_backend(paths):
+    # Reexporta os pesos se o .npz não existir ou for mais antigo que o .h5
+    if not os.path.exists(paths['numpy']) or \
+       os.path.getmtime(paths['numpy']) < os.path.getmtime(paths['model']):
+        export_from_files(paths['model'], paths['scaler'], paths['numpy'])
+    model, scaler = load_numpy_model(paths['numpy'])
+    return model, scaler
+
+def _quantized_model_current(mode, paths):
+    # O modelo quantizado precisa de calibração com o dataset: não é regerado automaticamente
+    path = paths[mode]
+    return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(paths['model'])
+
+def load_trained_model(backend=INFERENCE_BACKEND, train_if_missing=True, model_dir=None):
+    # O processo web chama com train_if_missing=False: o treino nunca começa implicitamente.
+    # Sem model_dir, carrega a versão atual (CURRENT) ou o layout antigo direto em trained_model/.
+    import joblib
+
+    model_dir = model_dir or current_model_dir()
+    if backend == 'chroma':
+        # Só precisa do encoder (os rótulos): sem .h5, scaler nem TensorFlow
+        return load_chroma_model(model_dir)
+    paths = artifact_paths(model_dir)
+    if not os.path.exists(paths['model']) or \
+       not os.path.exists(paths['encoder']) or \
+       not os.path.exists(paths['scaler']):
+        print(f"Arquivos do modelo/encoder/scaler para acordes não encontrados em '{model_dir}/'.")
+        if not train_if_missing:
+            print("Para treinar o modelo, execute: python train_model.py")
+            return None, None, None
         print("Treinando um novo modelo de acordes...")
-        return train_model()
+        model, encoder, scaler = train_model(quantize=(backend,) if backend in QUANTIZATION_MODES else ())
+        new_paths = artifact_paths(current_model_dir())
+        if model is not None and backend == 'numpy':
+            model, scaler = load_numpy_model(new_paths['numpy'])
+        elif model is not None and backend in QUANTIZATION_MODES:
+            model = load_quantized_model(backend, new_paths[backend])
+        return model, encoder, scaler
     else:
-        print(f"Carregando modelo de acordes de: {MODEL_SAVE_PATH}")
+        print(f"Carregando modelo de acordes de: {paths['model']} (backend: {backend})")
         try:
-            model = tf.keras.models.load_model(MODEL_SAVE_PATH)
-            encoder = joblib.load(ENCODER_SAVE_PATH)
-            scaler = joblib.load(SCALER_SAVE_PATH)
+            if backend == 'numpy':
+                model, scaler = _load_numpy_backend(paths)
+            elif backend in QUANTIZATION_MODES and _quantized_model_current(backend, paths):
+                model = load_quantized_model(backend, paths[backend])
+                scaler = joblib.load(paths['scaler'])
+            else:
+                if backend in QUANTIZATION_MODES:
+                    print(f"Modelo quantizado ({backend}) ausente ou mais antigo que o .h5; usando o modelo float32. "
+                          f"Para gerá-lo: python quantization.py --modes {backend}")
+                import tensorflow as tf
+                model = tf.keras.models.load_model(paths['model'])
+                scaler = joblib.load(paths['scaler'])
+            encoder = joblib.load(paths['encoder'])
             print("Modelo de acordes (CNN), encoder e scaler carregados com sucesso!")
             return model, encoder, scaler
         except Exception as e:
@@ -168,27 +657,48 @@ def load_trained_model():
             return None, None, None
 
 
-def predict_note(audio_segment_np, model, encoder, scaler, sample_rate=SAMPLE_RATE, n_mfcc=N_MFCC, max_pad_len=MAX_PAD_LEN):
-  
-    SILENCE_THRESHOLD = 0.003 
+def predict_note(audio_segment_np, model, encoder, scaler, sample_rate=SAMPLE_RATE, n_mfcc=N_MFCC, max_pad_len=None, features=None,
+                 gate=None):
+    # max_pad_len=None usa o comprimento de entrada do próprio modelo.
+    # gate (SimilarityGate) reaproveita a predição anterior quando a janela quase não mudou.
+    if max_pad_len is None:
+        max_pad_len = model_input_frames(model)
+
     if audio_segment_np.size > 0:
         segment_rms = np.sqrt(np.mean(audio_segment_np**2))
         if segment_rms < SILENCE_THRESHOLD:
+            if gate is not None:
+                gate.reset()
             return "Silêncio"
 
-    features = extract_features(audio_segment_np, sample_rate=sample_rate, n_mfcc=n_mfcc, max_pad_len=max_pad_len, is_file=False)
+    # Features já calculadas (por exemplo, pelo StreamingMFCC) dispensam a extração;
+    # modelos com features próprias (window_features, ex.: cromagrama) não usam o MFCC
+    window_features = model_window_features(model)
+    if features is None and window_features is not None:
+        with STAGE_FEATURES.time():
+            features = window_features(audio_segment_np, sample_rate)
+    elif features is None:
+        with STAGE_FEATURES.time():
+            features = extract_features(audio_segment_np, sample_rate=sample_rate, n_mfcc=n_mfcc, max_pad_len=max_pad_len, is_file=False)
     
     if features is None:
         return "N/A - Áudio curto"
 
-    features_reshaped_for_scaler = features.reshape(-1, features.shape[-1])
-    features_scaled_reshaped = scaler.transform(features_reshaped_for_scaler)
-    features_scaled = features_scaled_reshaped.reshape(features.shape)
+    if gate is not None:
+        reused_chord = gate.lookup(features, skip_energy=window_features is None)
+        if reused_chord is not None:
+            return reused_chord
+
+    with STAGE_SCALER.time():
+        features_reshaped_for_scaler = features.reshape(-1, features.shape[-1])
+        features_scaled_reshaped = scaler.transform(features_reshaped_for_scaler)
+        features_scaled = features_scaled_reshaped.reshape(features.shape)
 
     features_final = np.swapaxes(features_scaled, 0, 1)
     features_final = np.expand_dims(features_final, axis=0)
 
-    prediction = model.predict(features_final, verbose=0)
+    with STAGE_MODEL.time():
+        prediction = model.predict(features_final, verbose=0)
     predicted_class_idx = np.argmax(prediction[0])
     
     if predicted_class_idx < len(encoder.classes_):
@@ -196,7 +706,63 @@ def predict_note(audio_segment_np, model, encoder, scaler, sample_rate=SAMPLE_RA
     else:
         predicted_chord = "Acorde Desconhecido"
 
+    if gate is not None:
+        gate.store(predicted_chord)
     return predicted_chord
 
+def warm_up_model(model, encoder, scaler, batch_sizes=WARMUP_BATCH_SIZES, sample_rate=SAMPLE_RATE, n_mfcc=N_MFCC):
+    """
+    Aquece um modelo recém-carregado antes de ele atender o reconhecimento: a
+    primeira chamada de `predict` (tracing do grafo no Keras, alocação no TFLite)
+    é muito mais lenta que as seguintes. Roda entradas falsas nos tamanhos de
+    lote usados pelo agendador e o caminho completo (features, scaler, modelo) com um
+    tom sintético. Retorna os tempos medidos.
+    """
+    start = time.perf_counter()
+    input_frames = model_input_frames(model)
+    input_shape = getattr(model, 'input_shape', None)
+    n_features = input_shape[-1] if input_shape and input_shape[-1] is not None else n_mfcc
+    dummy = np.zeros((1, input_frames, n_features), dtype=np.float32)
+
+    first_start = time.perf_counter()
+    model.predict(dummy, verbose=0)
+    first_predict = time.perf_counter() - first_start
+    for batch_size in batch_sizes:
+        model.predict(np.zeros((batch_size, input_frames, n_features), dtype=np.float32), verbose=0)
+
+    t = np.arange((input_frames - 1) * HOP_LENGTH) / sample_rate
+    tone = (0.1 * np.sin(2 * np.pi * 440.0 * t)).astype(np.float32)
+    if model_window_features(model) is not None:
+        features = model.window_features(tone, sample_rate)
+    else:
+        features = extract_features(tone, sample_rate=sample_rate, n_mfcc=n_mfcc, max_pad_len=input_frames, is_file=False)
+    features = scaler.transform(features.reshape(-1, features.shape[-1])).reshape(features.shape)
+    prediction = model.predict(np.swapaxes(features, 0, 1)[np.newaxis], verbose=0)
+    encoder.inverse_transform([int(np.argmax(prediction[0]))])
+
+    steady = []
+    for _ in range(WARMUP_STEADY_REPEATS):
+        steady_start = time.perf_counter()
+        model.predict(dummy, verbose=0)
+        steady.append(time.perf_counter() - steady_start)
+    return {
+        'first_predict_ms': first_predict * 1000,
+        'steady_predict_ms': float(np.median(steady)) * 1000,
+        'warmup_seconds': time.perf_counter() - start,
+    }
+
 if __name__ == '__main__':
-    train_model()
+    import argparse
+    parser = argparse.ArgumentParser(description="Treina o modelo CNN 1D de reconhecimento de acordes.")
+    parser.add_argument('--live-window', action='store_true',
+                        help=f"Treina com janelas de {LIVE_WINDOW_SECONDS} s (entrada do tamanho da janela ao vivo, sem preenchimento).")
+    parser.add_argument('--workers', type=int, default=None, help="Processos para extração de features (padrão: número de CPUs).")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Lê as features do cache em lotes (tf.data) em vez de carregar o dataset inteiro na memória.")
+    parser.add_argument('--feature-store', nargs='?', const=FEATURE_STORE_DIR, default=None, metavar='DIR',
+                        help=f"Treina a partir do feature store (shards .npy com memmap; padrão: {FEATURE_STORE_DIR}).")
+    parser.add_argument('--quantize', nargs='+', choices=QUANTIZATION_MODES, default=[],
+                        help="Exporta também modelos TFLite quantizados (int8 calibrado e/ou float16) e o relatório comparativo.")
+    args = parser.parse_args()
+    train_model(workers=args.workers, window_seconds=LIVE_WINDOW_SECONDS if args.live_window else None,
+                streaming=args.streaming, feature_store_dir=args.feature_store, quantize=tuple(args.quantize))
@@ -0,0 +1,282 @@
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+from collections import deque
+
+# Jobs terminados mantidos na memória para o GET /train
+MAX_FINISHED_JOBS = 20
+# Depois de pedir o cancelamento, espera o treino parar sozinho antes de encerrar o processo
+CANCEL_GRACE_SECONDS = 10.0
+PROGRESS_POLL_SECONDS = 0.2
+
+# Parâmetros aceitos pelo POST /train (nome: (tipo, padrão))
+TRAINING_PARAMS = {
+    'epochs': (int, None),
+    'live_window': (bool, False),
+    'streaming': (bool, False),
+    'feature_store': (bool, False),
+    'quantize': (list, []),
+    'workers': (int, None),
+    # Recarrega a nova versão na API quando o treino termina
+    'reload': (bool, True),
+}
+
+
+class TrainingCancelled(Exception):
+    pass
+
+
+def validate_training_params(data, max_epochs):
+    """Converte o corpo do POST /train nos parâmetros do job (ValueError se algum for inválido)."""
+    from quantization import QUANTIZATION_MODES
+
+    unknown = set(data) - set(TRAINING_PARAMS)
+    if unknown:
+        raise ValueError(f"Parâmetros desconhecidos: {', '.join(sorted(unknown))}")
+    params = {}
+    for name, (kind, default) in TRAINING_PARAMS.items():
+        value = data.get(name, default)
+        # bool também é int em Python: {"epochs": true} não é aceito
+        valid = value is None or isinstance(value, kind) and not (kind is int and isinstance(value, bool))
+        if not valid:
+            raise ValueError(f"Parâmetro inválido: {name}")
+        params[name] = value
+    if params['epochs'] is not None and not 1 <= params['epochs'] <= max_epochs:
+        raise ValueError(f"epochs deve estar entre 1 e {max_epochs}")
+    if params['workers'] is not None and params['workers'] < 1:
+        raise ValueError("workers deve ser positivo")
+    if any(mode not in QUANTIZATION_MODES for mode in params['quantize']):
+        raise ValueError(f"quantize aceita: {', '.join(QUANTIZATION_MODES)}")
+    return params
+
+
+def _progress_callback(events, cancel_event, batch_size):
+    # Importa o Keras só no processo de treino
+    import keras
+
+    class ProgressCallback(keras.callbacks.Callback):
+        """Envia época, perdas e amostras/s ao processo web e interrompe o fit quando o job é cancelado."""
+
+        def on_train_begin(self, logs=None):
+            events.put({'type': 'stage', 'stage': 'training', 'epochs': self.params.get('epochs')})
+
+        def on_epoch_begin(self, epoch, logs=None):
+            self._epoch_start = time.perf_counter()
+
+        def on_train_batch_end(self, batch, logs=None):
+            if cancel_event.is_set():
+                raise TrainingCancelled()
+
+        def on_epoch_end(self, epoch, logs=None):
+            logs = logs or {}
+            elapsed = time.perf_counter() - self._epoch_start
+            # Aproximado: a Keras não informa o tamanho do último lote
+            samples = (self.params.get('steps') or 0) * batch_size
+            events.put({
+                'type': 'epoch',
+                'epoch': epoch + 1,
+                'epochs': self.params.get('epochs'),
+                'loss': logs.get('loss'),
+                'accuracy': logs.get('accuracy'),
+                'val_loss': logs.get('val_loss'),
+                'val_accuracy': logs.get('val_accuracy'),
+                'samples_per_sec': samples / elapsed if elapsed > 0 else None,
+                'epoch_seconds': elapsed,
+            })
+
+        def on_train_end(self, logs=None):
+            events.put({'type': 'stage', 'stage': 'saving'})
+
+    return ProgressCallback()
+
+
+def run_training(params, events, cancel_event):
+    """
+    Executado no processo de treino: chama train_model com os parâmetros do job e
+    informa o resultado (a nova versão do modelo) pela fila `events`.
+    """
+    import train_model as tm
+    from model_registry import current_version
+
+    events.put({'type': 'stage', 'stage': 'loading_dataset'})
+    try:
+        model, _, _ = tm.train_model(
+            workers=params.get('workers'),
+            window_seconds=tm.LIVE_WINDOW_SECONDS if params.get('live_window') else None,
+            epochs=params.get('epochs') or tm.EPOCHS,
+            streaming=params.get('streaming', False),
+            feature_store_dir=tm.FEATURE_STORE_DIR if params.get('feature_store') else None,
+            quantize=tuple(params.get('quantize') or ()),
+            callbacks=[_progress_callback(events, cancel_event, tm.BATCH_SIZE)],
+        )
+    except TrainingCancelled:
+        events.put({'type': 'cancelled'})
+        return
+    except Exception as e:
+        events.put({'type': 'failed', 'message': str(e)})
+        return
+    if model is None:
+        events.put({'type': 'failed', 'message': "Nenhum dado encontrado no dataset."})
+        return
+    # train_model grava a nova versão e aponta CURRENT para ela no fim
+    events.put({'type': 'succeeded', 'version': current_version()})
+
+
+class TrainingJob:
+    def __init__(self, job_id, params):
+        self.id = job_id
+        self.params = params
+        self.status = 'queued'
+        self.stage = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.progress = {}
+        self.history = []
+        self.version = None
+        self.message = None
+        self.cancel_requested = False
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'stage': self.stage,
+            'params': self.params,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'progress': dict(self.progress),
+            'history': list(self.history),
+            'version': self.version,
+            'message': self.message,
+        }
+
+
+class TrainingJobRunner:
+    """
+    Fila de jobs de treino executados um de cada vez, cada um em um processo
+    separado (spawn): o processo web não carrega o TensorFlow de treino, continua
+    respondendo e servindo o modelo atual durante o treino.
+
+    O progresso chega pelo callback Keras do processo de treino (época, perdas,
+    acurácia de validação, amostras/s). `on_success(job)` é chamado quando a nova
+    versão do modelo foi gravada (ex.: para recarregá-la na API).
+    """
+
+    def __init__(self, target=run_training, on_success=None, cancel_grace=CANCEL_GRACE_SECONDS):
+        self.target = target
+        self.on_success = on_success
+        self.cancel_grace = cancel_grace
+        self._context = multiprocessing.get_context('spawn')
+        self._jobs = {}
+        self._queue = deque()
+        self._ids = itertools.count(1)
+        self._condition = threading.Condition()
+        self._current = None
+        self._cancel_event = None
+        self._thread = None
+
+    def submit(self, params):
+        with self._condition:
+            job = TrainingJob(str(next(self._ids)), params)
+            self._jobs[job.id] = job
+            self._queue.append(job)
+            self._prune()
+            self._condition.notify_all()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='training-jobs', daemon=True)
+                self._thread.start()
+            return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def jobs(self):
+        return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        """Cancela um job na fila ou em execução; retorna False se ele já terminou."""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job.status not in ('queued', 'running'):
+                return False
+            if job.status == 'queued':
+                self._queue.remove(job)
+                self._finish(job, 'cancelled', "Cancelado antes de iniciar.")
+            else:
+                job.cancel_requested = True
+                job.message = "Cancelamento solicitado..."
+                self._cancel_event.set()
+            return True
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if job.finished_at is not None]
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job.id]
+
+    def _finish(self, job, status, message=None):
+        job.status = status
+        job.message = message
+        job.stage = None
+        job.finished_at = time.time()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                job = self._queue.popleft()
+                job.status = 'running'
+                job.started_at = time.time()
+                self._current = job
+                self._cancel_event = self._context.Event()
+            try:
+                self._run_job(job)
+            except Exception as e:
+                self._finish(job, 'failed', f"Erro no job de treino: {e}")
+            with self._condition:
+                self._current = None
+            if job.status == 'succeeded' and self.on_success is not None:
+                self.on_success(job)
+
+    def _run_job(self, job):
+        events = self._context.Queue()
+        process = self._context.Process(target=self.target, args=(job.params, events, self._cancel_event),
+                                        name=f'training-job-{job.id}', daemon=True)
+        process.start()
+        cancel_deadline = None
+        result = None
+        while result is None:
+            try:
+                event = events.get(timeout=PROGRESS_POLL_SECONDS)
+            except queue.Empty:
+                if job.cancel_requested and cancel_deadline is None:
+                    cancel_deadline = time.monotonic() + self.cancel_grace
+                if cancel_deadline is not None and time.monotonic() > cancel_deadline:
+                    # Ainda carregando o dataset (sem callback para interromper): encerra o processo
+                    process.terminate()
+                    result = {'type': 'cancelled'}
+                elif not process.is_alive():
+                    result = {'type': 'failed', 'message': f"Processo de treino terminou (código {process.exitcode})."}
+                continue
+            if event['type'] == 'stage':
+                job.stage = event['stage']
+                if event.get('epochs'):
+                    job.progress['epochs'] = event['epochs']
+            elif event['type'] == 'epoch':
+                job.progress = {key: value for key, value in event.items() if key != 'type'}
+                job.history.append(job.progress)
+            else:
+                result = event
+        process.join(timeout=5)
+
+        if result['type'] == 'succeeded':
+            job.version = result['version']
+            self._finish(job, 'succeeded', f"Nova versão do modelo: {job.version}")
+        elif result['type'] == 'cancelled':
+            self._finish(job, 'cancelled', "Treino cancelado.")
+        else:
+            self._finish(job, 'failed', result.get('message'))
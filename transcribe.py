@@ -0,0 +1,179 @@
+import os
+import time
+
+import numpy as np
+
+from feature_extractor import get_feature_extractor, HOP_LENGTH
+from recognition import StabilityFilter, PREDICTION_HOP_SECONDS
+from train_model import (load_trained_model, model_input_frames, model_window_features, SAMPLE_RATE, N_MFCC,
+                         SILENCE_THRESHOLD, LIVE_WINDOW_SECONDS)
+
+# Mesmo passo do loop ao vivo, para reproduzir o filtro de estabilidade
+HOP_SECONDS = PREDICTION_HOP_SECONDS
+WINDOW_SECONDS = LIVE_WINDOW_SECONDS
+BATCH_SIZE = 128
+# O arquivo é lido em blocos deste tamanho: a memória não cresce com a duração
+CHUNK_SECONDS = 30.0
+
+
+def iter_audio_chunks(path, sample_rate=SAMPLE_RATE, chunk_seconds=CHUNK_SECONDS):
+    """Lê o arquivo em blocos (mono, float32, reamostrado para sample_rate)."""
+    import soundfile as sf
+
+    with sf.SoundFile(path) as f:
+        block_frames = max(int(chunk_seconds * f.samplerate), 1)
+        # Um único resampler (o soxr do librosa.resample) para o arquivo todo: o resultado é o
+        # mesmo de reamostrar o arquivo inteiro, sem emendas nas bordas dos blocos
+        resampler = None
+        if f.samplerate != sample_rate:
+            import soxr
+            resampler = soxr.ResampleStream(f.samplerate, sample_rate, 1, dtype='float32', quality='HQ')
+        while True:
+            block = f.read(block_frames, dtype='float32', always_2d=True)
+            last = len(block) < block_frames
+            audio = block.mean(axis=1)
+            if resampler is not None:
+                audio = resampler.resample_chunk(audio, last=last)
+            if len(audio):
+                yield audio.astype(np.float32, copy=False)
+            if last:
+                break
+
+
+def window_starts(first_window, audio_start, audio_end, window_samples, hop_samples, grid=HOP_LENGTH):
+    """
+    Início (amostra do arquivo) das janelas first_window, first_window + 1, ... que
+    terminam até audio_end. A janela k começa em k * hop_samples arredondado para
+    baixo na grade de `grid` amostras, como as janelas do loop ao vivo
+    (streaming_features.StreamingMFCC); assim os quadros STFT são os mesmos entre janelas.
+    """
+    count = max((audio_end - audio_start + grid) // hop_samples + 2, 0)
+    starts = (np.arange(first_window, first_window + count) * hop_samples) // grid * grid
+    return starts[starts + window_samples <= audio_end]
+
+
+def window_rms(audio, starts, window_samples):
+    """RMS de cada janela audio[start:start + window_samples] pela soma acumulada dos quadrados (sem montar as janelas)."""
+    energy = np.concatenate(([0.0], np.cumsum(np.square(audio, dtype=np.float64))))
+    return np.sqrt(np.maximum(energy[starts + window_samples] - energy[starts], 0.0) / window_samples)
+
+
+def predict_windows(audio, starts, window_samples, model, encoder, scaler, input_frames, batch_size=BATCH_SIZE,
+                    sample_rate=SAMPLE_RATE):
+    """
+    Prediz o acorde de cada janela audio[start:start + window_samples] (inícios na
+    grade de HOP_LENGTH), em lotes de até batch_size; janelas silenciosas viram 'Silêncio'.
+    """
+    labels = np.full(len(starts), "Silêncio", dtype=object)
+    voiced = np.flatnonzero(window_rms(audio, starts, window_samples) >= SILENCE_THRESHOLD)
+    if len(voiced) == 0:
+        return labels
+
+    if model_window_features(model) is not None:
+        features = np.stack([model.window_features(audio[start:start + window_samples], sample_rate)
+                             for start in starts[voiced]])
+    else:
+        # STFT e espectro mel uma vez por bloco do arquivo, fatiados por janela
+        features = get_feature_extractor(sample_rate, N_MFCC).mfcc_windows(audio, starts[voiced], window_samples,
+                                                                           max_pad_len=input_frames)
+    for batch_start in range(0, len(voiced), batch_size):
+        batch = features[batch_start:batch_start + batch_size]
+        scaled = scaler.transform(batch.reshape(-1, batch.shape[-1])).reshape(batch.shape)
+        predictions = model.predict(np.swapaxes(scaled, 1, 2), verbose=0)
+        labels[voiced[batch_start:batch_start + batch_size]] = encoder.inverse_transform(np.argmax(predictions, axis=1))
+    return labels
+
+
+def transcribe_file(path, model, encoder, scaler, hop_seconds=HOP_SECONDS, window_seconds=WINDOW_SECONDS,
+                    batch_size=BATCH_SIZE, chunk_seconds=CHUNK_SECONDS, sample_rate=SAMPLE_RATE):
+    """
+    Transcreve uma gravação em uma linha do tempo de acordes. Cada segmento começa
+    no instante em que o filtro de estabilidade (o mesmo do loop ao vivo) passaria
+    a exibir o acorde.
+    """
+    window_samples = int(sample_rate * window_seconds)
+    hop_samples = max(int(sample_rate * hop_seconds), 1)
+    input_frames = model_input_frames(model)
+    stability = StabilityFilter(initial_note=None)
+
+    segments = []
+    n_windows = 0
+    total_samples = 0
+    # Áudio ainda não coberto por janelas completas e a posição (amostra do arquivo) do seu início
+    carry = np.zeros(0, dtype=np.float32)
+    carry_start = 0
+    start_time = time.perf_counter()
+
+    for chunk in iter_audio_chunks(path, sample_rate, chunk_seconds):
+        total_samples += len(chunk)
+        audio = np.concatenate((carry, chunk)) if len(carry) else chunk
+        starts = window_starts(n_windows, carry_start, total_samples, window_samples, hop_samples)
+
+        labels = predict_windows(audio, starts - carry_start, window_samples, model, encoder, scaler, input_frames,
+                                 batch_size, sample_rate)
+        for start, label in zip(starts, labels):
+            # Instante (s) do fim da janela, como no loop ao vivo
+            window_end = (start + window_samples) / sample_rate
+            note = stability.update(label)
+            if note is not None and (not segments or segments[-1]['chord'] != note):
+                if segments:
+                    segments[-1]['end'] = round(window_end, 3)
+                segments.append({'start': round(window_end, 3), 'end': None, 'chord': note})
+        n_windows += len(starts)
+
+        # Guarda o áudio a partir do início da próxima janela (nada, se ela começa depois deste bloco)
+        next_start = min(n_windows * hop_samples // HOP_LENGTH * HOP_LENGTH, total_samples)
+        carry = audio[next_start - carry_start:]
+        carry_start = next_start
+
+    duration = total_samples / sample_rate
+    if segments:
+        segments[-1]['end'] = round(duration, 3)
+    processing = time.perf_counter() - start_time
+    return {
+        'duration_seconds': round(duration, 3),
+        'processing_seconds': round(processing, 3),
+        'real_time_factor': round(processing / duration, 5) if duration else None,
+        'windows': n_windows,
+        'segments': segments,
+    }
+
+
+def main():
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Transcreve uma gravação .wav em uma linha do tempo de acordes.")
+    parser.add_argument('wav', help="Arquivo de áudio (.wav)")
+    parser.add_argument('--hop', type=float, default=HOP_SECONDS, help="Passo entre janelas em segundos")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--chunk-seconds', type=float, default=CHUNK_SECONDS)
+    parser.add_argument('--json', dest='json_path', help="Salva o resultado em JSON neste caminho")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.wav):
+        parser.error(f"Arquivo não encontrado: {args.wav}")
+    model, encoder, scaler = load_trained_model(train_if_missing=False)
+    if model is None:
+        raise SystemExit("Modelo não carregado. Treine o modelo primeiro (python train_model.py).")
+
+    result = transcribe_file(args.wav, model, encoder, scaler, hop_seconds=args.hop,
+                             batch_size=args.batch_size, chunk_seconds=args.chunk_seconds)
+    for segment in result['segments']:
+        print(f"{segment['start']:9.2f}s - {segment['end']:9.2f}s  {segment['chord']}")
+    summary = f"\nDuração: {result['duration_seconds']:.1f} s, processamento: {result['processing_seconds']:.2f} s"
+    # Sem fator para arquivos vazios (None); arredondado para 0 quando o processamento é instantâneo
+    rtf = result['real_time_factor']
+    if rtf is not None:
+        summary += f", fator de tempo real: {rtf:.4f}"
+        if rtf > 0:
+            summary += f" ({1 / rtf:.0f}x mais rápido que tempo real)"
+    print(summary)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()